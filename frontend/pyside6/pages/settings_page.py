@@ -16,6 +16,7 @@ from src.util.downloader import ffmpeg_available
 
 from frontend.pyside6 import fonts
 from frontend.pyside6.logs import LOG_DIR
+from frontend.pyside6.settings import CODEC_CHOICES
 from frontend.pyside6.signals import app_signals
 from frontend.pyside6.theme import build_qss, get_palette
 from frontend.pyside6.workers.login_worker import recheck_login
@@ -94,6 +95,15 @@ class SettingsPage(QWidget):
         self.quality_combo.currentIndexChanged.connect(self._on_quality_changed)
         form.addRow("默认清晰度", self.quality_combo)
 
+        # 默认编码（同一清晰度常有 H.264 / HEVC / AV1 三种，HEVC / AV1 体积小得多）
+        self.codec_combo = QComboBox()
+        for value, name in CODEC_CHOICES:
+            self.codec_combo.addItem(name, value)
+        self.codec_combo.setCurrentIndex(max(self.codec_combo.findData(self.settings.get("codec", "")), 0))
+        self.codec_combo.currentIndexChanged.connect(
+            lambda _idx: self.settings.set("codec", self.codec_combo.currentData() or ""))
+        form.addRow("默认编码", self.codec_combo)
+
         # 默认类型（有且仅有一个）
         self.rb_video = QRadioButton("视频")  # 视频即含声音
         self.rb_audio = QRadioButton("仅音频")
@@ -9,6 +9,7 @@ UI_SETTINGS_PATH = ASSETS_DIR / "ui_settings.json"
 DEFAULTS = {
     "save_dir": str(VIDEO_OUTPUT_DIR),
     "quality": "HD4K",
+    "codec": "",                       # 编码选择策略（见 CODEC_CHOICES / CodecPolicy.parse），空 = 默认
     "media_type": "video_with_audio",  # 视频（含音频）/ 仅音频
     "theme": "light",                  # light / dark
     "zoom": 1.0,                       # 界面缩放系数（0.8~1.5，100 = 100%）
@@ -16,9 +17,18 @@ DEFAULTS = {
     "log_timestamp": True,
     "cookie_dir": str(COOKIE_ROOT),    # 全局 cookie 目录（默认 %APPDATA%/xiaoman/BiliTools/cookie）
     "download_threads": 2,             # 并发下载线程数（1~5）
-    "distribute_accounts": True,      # 多账号分流：把并发线程均匀分摊到各账号（降风控）
+    "distribute_accounts": True,      # 多账号分流：并发任务按代价分给各账号，风控只冷却触发的账号
 }
 
+# 编码选择下拉框：(CodecPolicy.parse 可解析的策略文本, 展示名)
+CODEC_CHOICES = [
+    ("", "默认编码"),
+    ("smallest", "体积最小"),
+    ("compat", "仅 H.264（兼容）"),
+    ("hevc", "优先 HEVC"),
+    ("av1", "优先 AV1"),
+]
+
 
 class Settings:
     def __init__(self, path=None):
@@ -106,5 +106,6 @@ class DownloadManager(QObject):
             spec.get("page", 1),
             spec["media_type"],
             int(spec["quality"]),
+            spec.get("codec", ""),
             str(spec["save_dir"]),
         )
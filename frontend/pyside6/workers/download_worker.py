@@ -4,6 +4,7 @@ from pathlib import Path
 
 from PySide6.QtCore import QThread, Signal
 
+from src.models.download_model import CodecPolicy
 from src.services.dressup import DressupService
 from src.services.emote import EmoteService
 from src.services.fav import FavService
@@ -89,6 +90,7 @@ class DownloadWorker(QThread):
         spec = self.spec
         save_dir = Path(spec["save_dir"])
         quality = spec["quality"]
+        codec = CodecPolicy.parse(spec.get("codec"))
         mt = spec["media_type"]
         src = spec["source"]
         media_type = "audio" if mt == "audio" else "video_with_audio"
@@ -104,7 +106,7 @@ class DownloadWorker(QThread):
                     result = service.download_audio(bvid, save_dir, page=page, progress=adapter)
                 else:
                     result = service.download_video_with_audio(
-                        bvid, save_dir, page=page, quality=quality, progress=adapter
+                        bvid, save_dir, page=page, quality=quality, codec=codec, progress=adapter
                     )
                 adapter.finish()
                 return result
@@ -112,16 +114,17 @@ class DownloadWorker(QThread):
             n = len(info.pages) if info.pages else 1
             adapter = ProgressAdapter(n, f"视频 {bvid}", self)
             return service.download_all_pages(
-                bvid, save_dir, quality=quality, media_type=media_type, progress=adapter
+                bvid, save_dir, quality=quality, codec=codec, media_type=media_type, progress=adapter
             )
 
         if src == "fav":
             fid = spec["input"]
-            # 先取一次收藏夹视频列表：既用于进度总数，也传回 service 复用，避免内部再拉取一次
+            # 先取一次 BV 号列表（单次请求）：既用于进度总数，也传回 service 复用；
+            # 明细只为需要下载的视频补取（见 VideoService.download_fav）
             bvids = FavService(service.session).get_fav_bv(fid)
             adapter = self._make_adapter(threads, len(bvids), f"收藏夹 {fid}")
             mode = "audio" if mt == "audio" else "video"
-            return service.download_fav(fid, save_dir, mode=mode, quality=quality,
+            return service.download_fav(fid, save_dir, mode=mode, quality=quality, codec=codec,
                                         progress=adapter, bvids=bvids, threads=threads,
                                         account_sessions=self._account_sessions(threads, spec))
 
@@ -139,7 +142,7 @@ class DownloadWorker(QThread):
             adapter = self._make_adapter(threads, file_count, f"合集「{season.title}」")
             return service.download_season(
                 bvid=bvid, dir=save_dir, season_id=season_id, mid=mid or 0,
-                quality=quality, media_type=media_type, progress=adapter, season=season,
+                quality=quality, codec=codec, media_type=media_type, progress=adapter, season=season,
                 threads=threads, account_sessions=self._account_sessions(threads, spec),
             )
 
@@ -182,7 +185,7 @@ class DownloadWorker(QThread):
             bvids = service.list_up_videos(mid)
             adapter = self._make_adapter(threads, len(bvids), f"UP主 {mid}")
             mode = "audio" if mt == "audio" else "video"
-            return service.download_up(mid, save_dir, mode=mode, quality=quality,
+            return service.download_up(mid, save_dir, mode=mode, quality=quality, codec=codec,
                                        progress=adapter, bvids=bvids, threads=threads,
                                        account_sessions=self._account_sessions(threads, spec))
 
@@ -1,11 +1,11 @@
 """BatchProgress 兼容对象 → Qt 信号。
 
 SDK 的下载方法接受一个鸭子类型的 progress 对象（n/label/display +
-start/set_quality/add/update/status/finish/make_stream_callback/iter_count）。
+start/set_quality/add/update/status/finish/merge_status/make_stream_callback/iter_count）。
 本对象不 print，而是把事件转发为 Qt 信号：
 
 - 字节进度 → worker.progress（实时百分比，任务进度区覆盖式刷新）；
-- 阶段文本（如 ffmpeg 合成中）→ worker.phase；
+- 阶段文本（如 ffmpeg 合成中、合成队列状态）→ worker.phase；
 - 里程碑（第 i/n 个、单文件完成）→ worker.milestone（追加进日志）。
 """
 import threading
@@ -72,6 +72,9 @@ class ProgressAdapter:
         else:
             self.worker.milestone(LogCategory.SUCCESS, f"下载完成 {q}{self.current_name}")
 
+    def merge_status(self, queued, running, seconds):
+        self.worker.phase.emit(_merge_text(queued, running, seconds))
+
     def make_stream_callback(self):
         return self.update
 
@@ -97,6 +100,14 @@ class ProgressAdapter:
         self.worker.progress.emit(self.current_done, self._grand_total() or 0)
 
 
+def _merge_text(queued, running, seconds):
+    """合成队列状态文案（进度条阶段提示）。"""
+    text = f"合成队列：排队 {queued}，进行中 {running}"
+    if seconds is not None:
+        text += f"，上次耗时 {seconds:.1f}s"
+    return text
+
+
 class _FileState:
     """单个线程的「当前文件」进度状态（ParallelProgressAdapter 内部使用）。"""
 
@@ -196,6 +207,10 @@ class ParallelProgressAdapter:
         else:
             self.worker.milestone(LogCategory.SUCCESS, f"下载完成 {q}{name}")
 
+    def merge_status(self, queued, running, seconds):
+        # 由合成线程调用；Qt 信号跨线程发射是安全的
+        self.worker.phase.emit(_merge_text(queued, running, seconds))
+
     def make_stream_callback(self):
         return self.update
 
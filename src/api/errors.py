@@ -47,6 +47,10 @@ class FFmpegNotFoundError(DownloadError):
     """系统未安装 ffmpeg，无法进行音视频合成。"""
 
 
+class StreamResumeError(DownloadError):
+    """边下载边合成时续传未获 206：已写入 ffmpeg 的字节无法回退，需改用普通模式重新下载视频流。"""
+
+
 def raise_for_code(code: int, message: str) -> None:
     """根据错误码抛出对应异常；code == 0 时直接返回。
 
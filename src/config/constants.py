@@ -29,3 +29,5 @@ RETRY_DELAY = 0.712  # 重试延迟（秒）
 DASH_FNVAL = 4048
 # 默认请求超时（秒）
 REQUEST_TIMEOUT = 15
+# 分段下载时每段的最小字节数（小于 2 段的流直接单连接下载，省去探测与多连接开销）
+SEGMENT_MIN_SIZE = 4 * 1024 * 1024
@@ -4,11 +4,18 @@
 模块命名：`*_model.py`，与 services / urls 下的同名文件区分。
 - `video_model.py`   VideoInfo / VideoStat / VideoOwner / VideoUserAction 等
 - `user_model.py`    UserInfo
-- `download_model.py` VideoQuality / DownloadResult / DASH 流数据
+- `download_model.py` VideoQuality / DownloadResult / DASH 流数据 / CodecPolicy
 """
 
-from src.models.download_model import AudioStream, DashStreams, DownloadResult, VideoQuality, VideoStream
-from src.models.fav_model import FavInfo
+from src.models.download_model import (
+    AudioStream,
+    CodecPolicy,
+    DashStreams,
+    DownloadResult,
+    VideoQuality,
+    VideoStream,
+)
+from src.models.fav_model import FavInfo, FavMedia
 from src.models.login_model import LoginUser
 from src.models.video_model import (
     VideoInfo,
@@ -23,11 +30,13 @@ from src.models.user_model import UserInfo
 
 __all__ = [
     "AudioStream",
+    "CodecPolicy",
     "DashStreams",
     "DownloadResult",
     "VideoQuality",
     "VideoStream",
     "FavInfo",
+    "FavMedia",
     "LoginUser",
     "VideoInfo",
     "VideoOwner",
@@ -87,6 +87,7 @@ class VideoStream:
     quality: int = 0  # qn 值，数值越大清晰度越高
     frame_rate: str = ""
     size: int = 0  # 文件大小（字节）
+    backup_urls: list = field(default_factory=list)  # backupUrl 备用镜像直链（其他 CDN 主机）
 
     @property
     def ext(self) -> str:
@@ -112,6 +113,7 @@ class AudioStream:
     codecs: str = ""
     bandwidth: int = 0
     size: int = 0
+    backup_urls: list = field(default_factory=list)  # backupUrl 备用镜像直链（其他 CDN 主机）
 
     @property
     def ext(self) -> str:
@@ -131,6 +133,82 @@ class AudioStream:
         return path_suffix if path_suffix in ("m4a", "mp3", "flac", "aac", "mp4") else "m4a"
 
 
+_CODEC_FAMILIES = {
+    "avc": "avc", "avc1": "avc", "avc3": "avc", "h264": "avc",
+    "hevc": "hevc", "hev1": "hevc", "hvc1": "hevc", "h265": "hevc",
+    "av1": "av1", "av01": "av1",
+}
+
+
+def codec_family(codecs: str) -> str:
+    """把 codecs 字段（如 `avc1.640032`、`hev1.1.6.L150.90`、`av01.0.08M.08`）或编码名归一为编码族：
+    `avc` / `hevc` / `av1`；无法识别时返回小写原值。"""
+    name = codecs.strip().lower()
+    return _CODEC_FAMILIES.get(name.split(".", 1)[0], name)
+
+
+@dataclass(frozen=True)
+class CodecPolicy:
+    """视频流的编码选择策略（同一清晰度下 B 站通常同时提供 avc1 / hev1 / av01 三种编码）。
+
+    HEVC / AV1 通常比同清晰度的 H.264 小 30%~50%，批量存档时按体积挑选能明显减少流量与磁盘占用；
+    需要在老设备上播放时则可以只要 H.264。
+
+    - `prefer`：编码族偏好顺序（如 `("av1", "hevc")`），靠前的优先，不在列表中的排在最后；
+    - `smallest`：同一偏好档位内选 size 最小的流（size 未知的排在最后）；
+    - `require`：只接受这些编码族（如 `("avc",)`）；为空时不限制。
+
+    编码名可以写 codecs 前缀或常用别名（avc1 / h264 / hev1 / h265 / av01 …），构造时归一为编码族。
+    """
+
+    prefer: tuple = ()
+    smallest: bool = False
+    require: tuple = ()
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "prefer", tuple(codec_family(c) for c in self.prefer))
+        object.__setattr__(self, "require", tuple(codec_family(c) for c in self.require))
+
+    @classmethod
+    def parse(cls, text: Optional[str]) -> Optional["CodecPolicy"]:
+        """从逗号分隔的文本构造策略（界面设置 / 命令行使用）。
+
+        `smallest` 表示选体积最小；`avc-only` / `compat` 表示只要 H.264；其余各项按顺序作为偏好编码。
+        示例：`"smallest"`、`"compat"`、`"av1,hevc"`、`"hevc,smallest"`。
+
+        :return: CodecPolicy；text 为空或 `any` 时返回 None（不挑编码，沿用默认行为）
+        """
+        tokens = [t.strip().lower() for t in (text or "").split(",") if t.strip()]
+        if not tokens or tokens == ["any"]:
+            return None
+        smallest = "smallest" in tokens
+        require = ("avc",) if any(t in ("avc-only", "compat") for t in tokens) else ()
+        prefer = tuple(t for t in tokens if t not in ("smallest", "avc-only", "compat", "any"))
+        return cls(prefer=prefer, smallest=smallest, require=require)
+
+    @property
+    def key(self) -> str:
+        """策略的稳定短标识（如 `av1.hevc-smallest-only.avc`），用于区分按不同策略下载的文件。"""
+        parts = [".".join(self.prefer)] if self.prefer else []
+        if self.smallest:
+            parts.append("smallest")
+        if self.require:
+            parts.append("only." + ".".join(self.require))
+        return "-".join(parts) or "any"
+
+    def accepts(self, codecs: str) -> bool:
+        """该编码是否满足 require 限制。"""
+        return not self.require or codec_family(codecs) in self.require
+
+    def rank(self, stream: VideoStream) -> tuple:
+        """同一清晰度内的排序键（越小越优先）。"""
+        family = codec_family(stream.codecs)
+        order = self.prefer.index(family) if family in self.prefer else len(self.prefer)
+        if not self.smallest:
+            return (order,)
+        return (order, stream.size if stream.size > 0 else float("inf"))
+
+
 @dataclass
 class DashStreams:
     """一次 playurl 请求返回的完整 DASH 流信息。
@@ -150,7 +228,7 @@ class DashStreams:
         """返回清晰度最高的视频流。"""
         return self.video[0] if self.video else None
 
-    def pick_video(self, quality: VideoQuality) -> Optional[VideoStream]:
+    def pick_video(self, quality: VideoQuality, codec: Optional[CodecPolicy] = None) -> Optional[VideoStream]:
         """按**目标清晰度**挑选视频流。
 
         语义（精确目标）：优先返回清晰度 "恰好等于" quality 的流；
@@ -158,13 +236,33 @@ class DashStreams:
 
         示例：`P1080` 时视频有 4K+1080P → 选 1080P（不会被拉到 4K）；
               视频只有 720P → 回退到 720P。
+
+        同一清晰度通常有多种编码：codec 为 None 时取接口返回顺序中的第一个，
+        否则按 CodecPolicy 挑选（require 限制先于清晰度匹配生效，满足限制的流都没有时返回 None）。
         """
-        if not self.video:
+        streams = self.video
+        if codec is not None and codec.require:
+            streams = [s for s in streams if codec.accepts(s.codecs)]
+        if not streams:
             return None
-        for stream in self.video:  # 已按 quality 降序
-            if stream.quality == quality:
-                return stream
-        return self.video[0]  # 无精确匹配 → 回退到最高可用
+        # 已按 quality 降序；无精确匹配 → 回退到最高可用
+        matched = [s for s in streams if s.quality == quality]
+        if not matched:
+            matched = [s for s in streams if s.quality == streams[0].quality]
+        if codec is None:
+            return matched[0]
+        return min(matched, key=codec.rank)  # min 取第一个最小值，同档位保持接口顺序
+
+    def video_options(self, quality: VideoQuality, codec: Optional[CodecPolicy] = None) -> list:
+        """按体积预算挑选时的候选视频流：首个即 pick_video(quality, codec) 的结果，其后依次为
+        同一清晰度的其他编码（按 codec 排序）与更低的清晰度（满足 codec 的 require 限制）。"""
+        top = self.pick_video(quality, codec)
+        if top is None:
+            return []
+        streams = [s for s in self.video if s.quality <= top.quality and (codec is None or codec.accepts(s.codecs))]
+        if codec is not None:
+            streams.sort(key=lambda s: (-s.quality, codec.rank(s)))
+        return streams
 
     def best_audio(self) -> Optional[AudioStream]:
         """返回码率最高的音频流。"""
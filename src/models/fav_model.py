@@ -5,6 +5,8 @@
 from dataclasses import dataclass, field
 from typing import Optional
 
+from src.models.video_model import VideoInfo, VideoPage
+
 
 @dataclass
 class FavInfo:
@@ -29,3 +31,66 @@ class FavInfo:
             media_count=data.get("media_count", 0),
             raw=data,
         )
+
+
+@dataclass
+class FavMedia:
+    """收藏夹内的单个条目（x/v3/fav/resource/list 返回的 medias 数组的一项）。
+
+    比 resource/ids 多出标题、封面、分P数与时长，收藏夹批量下载据此规划文件名与缓存命中，
+    不必逐个请求 view 接口。
+    """
+
+    aid: int = 0  # 条目 id（视频为 avid）
+    bvid: str = ""  # BV号
+    type: int = 2  # 条目类型（2 视频，12 音频，21 合集）
+    title: str = ""  # 标题（已失效的视频为「已失效视频」）
+    cover: str = ""  # 封面地址
+    page_count: int = 1  # 分P数
+    duration: int = 0  # 总时长（秒）
+    first_cid: int = 0  # 首个分P的 cid（ugc.first_cid）
+    upper_name: str = ""  # UP 主昵称
+    pub_time: int = 0  # 发布时间（Unix 秒）
+    fav_time: int = 0  # 收藏时间（Unix 秒）
+    attr: int = 0  # 失效标记（0 正常；1 / 9 已删除）
+
+    @property
+    def is_valid(self) -> bool:
+        """是否为仍可访问的视频（非视频条目与已失效视频为 False）。"""
+        return self.type == 2 and self.attr == 0 and bool(self.bvid)
+
+    def to_video_info(self) -> VideoInfo:
+        """用收藏夹条目构造下载所需的 VideoInfo（标题 / 封面 / 单P视频的 cid）。
+
+        单P且带 first_cid 时 pages 直接可用，文件名、缓存检查与 playurl 都不需要 view；
+        多P视频的 pages 为空，由调用方补取轻量的分P列表（见 VideoService.fetch_pages）。
+        """
+        pages = []
+        if self.page_count == 1 and self.first_cid:
+            pages = [VideoPage(page=1, cid=self.first_cid, part=self.title, duration=self.duration)]
+        return VideoInfo(
+            bvid=self.bvid,
+            aid=self.aid,
+            cid=self.first_cid or None,
+            title=self.title,
+            pic=self.cover,
+            pub_time=self.pub_time,
+            pages=pages,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FavMedia":
+        return cls(
+            aid=data.get("id", 0),
+            bvid=data.get("bvid") or data.get("bv_id") or "",
+            type=data.get("type", 2),
+            title=data.get("title", ""),
+            cover=data.get("cover", ""),
+            page_count=data.get("page", 1) or 1,
+            duration=data.get("duration", 0),
+            first_cid=(data.get("ugc") or {}).get("first_cid", 0),
+            upper_name=(data.get("upper") or {}).get("name", ""),
+            pub_time=data.get("pubtime", 0),
+            fav_time=data.get("fav_time", 0),
+            attr=data.get("attr", 0),
+        )
@@ -111,6 +111,7 @@ class VideoSeason:
                 ep_aid = ep.get("aid") or 0
                 pages = [VideoPage.from_dict(p) for p in (ep.get("pages") or [])]
                 first_cid = pages[0].cid if pages else 0
+                arc = ep.get("arc") or {}
                 episodes.append(VideoSeasonEpisode(
                     bvid=ep_bvid,
                     aid=ep_aid,
@@ -118,6 +119,9 @@ class VideoSeason:
                     title=ep.get("title", ""),
                     section=section.get("title", ""),
                     pages=pages,
+                    video_title=arc.get("title", ""),
+                    pic=arc.get("pic", ""),
+                    pub_time=arc.get("pubdate", 0),
                 ))
         return cls(
             id=data.get("id", 0),
@@ -138,11 +142,32 @@ class VideoSeasonEpisode:
     title: str = ""  # 稿件标题
     section: str = ""  # 所在分区（如「正片」）
     pages: list = field(default_factory=list)  # 该稿件分P（VideoPage 列表）
+    video_title: str = ""  # 稿件本身的标题（arc.title；合集内的条目标题可能被 UP 主改过）
+    pic: str = ""  # 封面地址（arc.pic）
+    pub_time: int = 0  # 发布时间（arc.pubdate）
 
     @property
     def is_multi_page(self) -> bool:
         return len(self.pages) > 1
 
+    def to_video_info(self) -> Optional["VideoInfo"]:
+        """用合集内嵌的稿件数据构造下载所需的 VideoInfo（标题 / 封面 / 分P与 cid）。
+
+        合集下载据此直接请求 playurl，不必再逐个请求 view 接口；没有分P数据时返回 None
+        （调用方退回 fetch_info）。统计、作者、标签等字段不在内嵌数据中，保持默认值。
+        """
+        if not self.bvid or not self.pages:
+            return None
+        return VideoInfo(
+            bvid=self.bvid,
+            aid=self.aid,
+            cid=self.pages[0].cid,
+            title=self.video_title or self.title,
+            pic=self.pic,
+            pub_time=self.pub_time,
+            pages=list(self.pages),
+        )
+
 
 @dataclass
 class VideoInfo:
@@ -205,3 +230,25 @@ class VideoInfo:
             pages=[VideoPage.from_dict(p) for p in pages],
             season=VideoSeason.from_dict(season_data) if season_data else None,
         )
+
+    @classmethod
+    def from_detail_json(cls, data: dict) -> "VideoInfo":
+        """从视频详细信息接口（x/web-interface/view/detail）的 data 字段构造。
+
+        一次响应里同时包含 view 数据（View）、标签（Tags）与 UP 主卡片（Card），
+        在 from_view_json 的基础上补全 tags 与 owner 的粉丝数 / 是否已关注。
+
+        :param data: view/detail 接口返回的 data 字典
+        :return: VideoInfo（含 tags；owner.num_followers 来自 Card）
+        """
+        info = cls.from_view_json(data.get("View") or {})
+        info.tags = [t["tag_name"] for t in (data.get("Tags") or []) if t.get("tag_name")]
+        card = data.get("Card") or {}
+        if card and info.owner is not None:
+            followers = card.get("follower")
+            if followers is None:
+                followers = (card.get("card") or {}).get("fans")
+            info.owner.num_followers = followers
+            if "following" in card:
+                info.owner.is_followed = bool(card.get("following"))
+        return info
@@ -3,7 +3,8 @@
 取代旧 `src/archive.py` 中的 `BiliArchive`（原文件把收藏夹与合集混在一起，已拆分）。
 
 说明：`seasons_archives_list` 接口需要完整的 `page_num`/`page_size` 参数，
-缺任一参数会返回 -400（旧代码因此误判为接口失效）。
+缺任一参数会返回 -400（旧代码因此误判为接口失效）。多页合集在第 1 页返回总数后
+并发获取其余页（见 src.util.paginate）。
 """
 
 import logging
@@ -12,6 +13,7 @@ from typing import Optional
 from src.api.auth import get_wbi
 from src.api.session import BiliSession
 from src.urls.archive_urls import ArchiveUrls
+from src.util.paginate import fetch_all_pages
 
 logger = logging.getLogger(__name__)
 
@@ -264,12 +266,11 @@ class ArchiveService:
             from src.services.login import LoginService
             mid = LoginService(self.session).get_mid() or 0
 
-        page_num = 1
         page_size = 50
-        all_archives = []
         meta = None
 
-        while True:
+        def fetch_page(page_num: int) -> tuple:
+            nonlocal meta
             params = {
                 "mid": mid,
                 "season_id": season_id,
@@ -277,23 +278,14 @@ class ArchiveService:
                 "page_size": page_size,
             }
             data = self.session.get(ArchiveUrls.SEASONS_ARCHIVES_LIST, params=params)
-
             if not data:
-                break
-
-            if meta is None:
+                return [], 0
+            if page_num == 1:
                 meta = data.get("meta")
-            archives = data.get("archives", [])
-            all_archives.extend(archives)
-            page = data.get("page", {})
-            total = page.get("total", 0)
-
-            if len(all_archives) >= total:
-                break  # 已经获取全部视频
-            if not archives:
-                break  # 本页没有数据，避免死循环
+            return data.get("archives", []), data.get("page", {}).get("total", 0)
 
-            page_num += 1
+        # 第 1 页拿到总数后，其余页并发获取；按 aid 去重（翻页期间合集变动时条目可能跨页重复）
+        all_archives = fetch_all_pages(fetch_page, page_size=page_size, key=lambda a: a.get("aid"))
 
         if not all_archives:
             raise ValueError(f"合集 {season_id} 不存在或没有视频。")
@@ -6,7 +6,8 @@
 - ``suit``：装扮商城里的主题装扮。
 
 批量下载时支持 ``threads > 1`` 并发，并在传入多账号 ``BiliSession`` 列表时
-按任务下标轮询分摊账号，降低单个账号的风控风险。
+由 ``AccountDispatcher`` 按各账号的健康状况分摊任务（登录失效的账号自动移出），
+降低单个账号的风控风险。
 """
 
 from __future__ import annotations
@@ -21,7 +22,9 @@ from src.config.path import COLLECTION_OUTPUT_DIR
 from src.models.download_model import DownloadResult
 from src.services.emote import EmoteService
 from src.services.garb import GarbService
+from src.util.dispatcher import AccountDispatcher
 from src.util.downloader import ProgressCallback
+from src.util.transport import ensure_pool_size
 
 
 _PREFIXES = {
@@ -127,7 +130,7 @@ class DressupService:
         progress_cb: Optional[ProgressCallback] = None,
         use_full_name: bool = False,
     ) -> list[DownloadResult]:
-        """按勾选顺序批量下载；``threads > 1`` 时并发执行并轮询分摊账号。"""
+        """按勾选顺序批量下载；``threads > 1`` 时并发执行并按账号健康状况分摊任务。"""
         normalized = [self._normalize_item(item) for item in items]
         if not normalized:
             raise ValueError("请选择要下载的装扮/表情包")
@@ -135,12 +138,12 @@ class DressupService:
         root = Path(directory) if directory is not None else self.default_dir
         if threads < 1:
             threads = 1
-        sessions = list(account_sessions) if account_sessions else []
+        dispatcher = AccountDispatcher(account_sessions) if account_sessions else None
 
         if len(normalized) <= 1 or threads <= 1:
             results = [
                 self._download_one(
-                    item, root, sessions, index,
+                    item, root, dispatcher, index,
                     progress=progress, progress_cb=progress_cb,
                     use_full_name=use_full_name,
                 )
@@ -148,10 +151,11 @@ class DressupService:
             ]
         else:
             results: list = [None] * len(normalized)
+            ensure_pool_size(threads)  # 素材图片同主机，连接池至少容纳全部并发线程
             with ThreadPoolExecutor(max_workers=threads) as pool:
                 future_to_index = {
                     pool.submit(
-                        self._download_one, item, root, sessions, index,
+                        self._download_one, item, root, dispatcher, index,
                         progress=progress, progress_cb=progress_cb,
                         use_full_name=use_full_name,
                     ): index
@@ -188,14 +192,33 @@ class DressupService:
         self,
         item: DressupItem,
         root: Path,
-        sessions: list[BiliSession],
+        dispatcher: Optional[AccountDispatcher],
         index: int,
         *,
         progress=None,
         progress_cb: Optional[ProgressCallback] = None,
         use_full_name: bool = False,
     ) -> list[DownloadResult]:
-        session = sessions[index % len(sessions)] if sessions else self.session
+        def run(session) -> list[DownloadResult]:
+            return self._download_with(
+                item, root, session,
+                progress=progress, progress_cb=progress_cb, use_full_name=use_full_name,
+            )
+
+        if dispatcher is None:
+            return run(self.session)
+        return dispatcher.call(run, hint=index)
+
+    def _download_with(
+        self,
+        item: DressupItem,
+        root: Path,
+        session,
+        *,
+        progress=None,
+        progress_cb: Optional[ProgressCallback] = None,
+        use_full_name: bool = False,
+    ) -> list[DownloadResult]:
         if item.kind == "emoji":
             service = EmoteService(session, default_dir=root)
             return service.download_packages(
@@ -7,8 +7,10 @@ import logging
 from typing import Optional
 
 from src.api.session import BiliSession
-from src.models.fav_model import FavInfo
+from src.models.fav_model import FavInfo, FavMedia
 from src.urls.fav_urls import FavUrls
+from src.util.pacing import Pacer, shared_pacer
+from src.util.paginate import fetch_all_pages, fetch_pages
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +21,15 @@ class FavService:
     后端只接收规范 media_id（int），不解析 URL；链接解析统一由前端完成后再传入。
     """
 
-    def __init__(self, session: Optional[BiliSession] = None):
+    RESOURCE_PAGE_SIZE = 20  # resource/list 每页条数（服务端上限 20）
+
+    def __init__(self, session: Optional[BiliSession] = None, pacer: Optional[Pacer] = None):
+        """
+        :param session: 请求会话，None 时新建
+        :param pacer: 翻页用的请求节奏控制器，None 时使用进程共用的 shared_pacer()
+        """
         self.session = session if session is not None else BiliSession()
+        self.pacer = pacer if pacer is not None else shared_pacer()
 
     def _resolve_media_id(self, media_id: Optional[int]) -> int:
         """后端只接收规范 media_id（int 或数字字符串），不接受 URL。
@@ -133,3 +142,78 @@ class FavService:
         mid = self._resolve_media_id(media_id)
         data = self.session.get(FavUrls.RESOURCE_IDS, params={"media_id": mid})
         return [fav["bvid"] for fav in data]
+
+    def _fetch_media_page(self, mid: int, pn: int, ps: int) -> tuple:
+        """获取 resource/list 的第 pn 页：(FavMedia 列表, 条目总数)。"""
+        data = self.session.get(FavUrls.RESOURCE_LIST,
+                                params={"media_id": mid, "pn": pn, "ps": ps, "platform": "web"})
+        medias = [FavMedia.from_dict(m) for m in data.get("medias") or []]
+        return medias, (data.get("info") or {}).get("media_count", len(medias))
+
+    def list_fav_medias(self, media_id: Optional[int] = None, ps: int = RESOURCE_PAGE_SIZE) -> list:
+        """获取收藏夹内全部条目的明细（标题 / 封面 / 分P数 / 时长 / 首P cid）。
+
+        与 get_fav_bv 相比，每页多带下载规划所需的元数据：收藏夹批量下载据此生成文件名、
+        统计进度总数、检查本地缓存，不必逐个请求 view 接口。第 1 页返回总数后其余页并发获取
+        （见 src.util.paginate）。
+        请求示例：
+        https://api.bilibili.com/x/v3/fav/resource/list?media_id=3953119978&pn=1&ps=20&platform=web
+        返回值示例（节选）：
+            {
+              "info": {"id": 3953119978, "title": "走不出来的那些日子", "media_count": 4, ...},
+              "medias": [
+                {
+                  "id": 115972119724128,
+                  "type": 2,
+                  "title": "...",
+                  "cover": "http://i0.hdslb.com/bfs/archive/....jpg",
+                  "page": 1,  # 分P数
+                  "duration": 245,
+                  "upper": {"mid": 506925078, "name": "..."},
+                  "attr": 0,  # 0 正常；1 / 9 已失效
+                  "pubtime": 1768000000,
+                  "fav_time": 1768138225,
+                  "bvid": "BV1hr6EBBEAV",
+                  "ugc": {"first_cid": 35000000000}
+                }
+              ],
+              "has_more": false
+            }
+        [使用方法]:
+            service = FavService()
+            medias = service.list_fav_medias(3953119978)
+            bvs = [m.bvid for m in medias if m.is_valid]
+
+        :param media_id: 收藏夹 media_id（int）
+        :param ps: 每页条数
+        :return: FavMedia 列表（收藏顺序，含已失效条目，由调用方按 is_valid 过滤）
+        """
+        mid = self._resolve_media_id(media_id)
+        return fetch_all_pages(lambda pn: self._fetch_media_page(mid, pn, ps), page_size=ps,
+                               key=lambda m: (m.type, m.aid), pacer=self.pacer)
+
+    def list_fav_medias_of(self, media_id: Optional[int], bvids, order: list,
+                           ps: int = RESOURCE_PAGE_SIZE) -> dict:
+        """只获取收藏夹内指定视频的明细：只请求包含这些视频的明细页。
+
+        resource/ids 一次返回整个收藏夹的 BV 号，顺序与 resource/list 一致（收藏顺序），
+        由 BV 号在 order 中的位置推算它在第几页。几千个条目的收藏夹只有少数视频需要下载时，
+        不必翻完上百页明细。翻页期间收藏夹变动导致某个视频不在推算的页里时，结果中没有它，
+        由调用方按原方式请求视频信息。
+        [使用方法]:
+            service = FavService()
+            order = service.get_fav_bv(3953119978)
+            medias = service.list_fav_medias_of(3953119978, order[:3], order)
+
+        :param media_id: 收藏夹 media_id（int）
+        :param bvids: 需要明细的 BV 号（可迭代）
+        :param order: 收藏夹内全部 BV 号（get_fav_bv 的返回值）
+        :param ps: 每页条数
+        :return: BV 号 -> FavMedia（含已失效条目，由调用方按 is_valid 过滤）
+        """
+        mid = self._resolve_media_id(media_id)
+        wanted = set(bvids)
+        pns = sorted({i // ps + 1 for i, bvid in enumerate(order) if bvid in wanted})
+        medias = fetch_pages(lambda pn: self._fetch_media_page(mid, pn, ps), pns,
+                             key=lambda m: (m.type, m.aid), pacer=self.pacer)
+        return {m.bvid: m for m in medias if m.bvid in wanted}
@@ -8,7 +8,6 @@
 """
 
 import logging
-import time
 from pathlib import Path
 from typing import Optional
 
@@ -17,6 +16,7 @@ from src.config.path import HISTORY_OUTPUT_DIR
 from src.models.history_model import HistoryPage
 from src.urls.history_urls import HistoryUrls
 from src.util.filename import resolve_save_path
+from src.util.pacing import Pacer, shared_pacer
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +24,13 @@ logger = logging.getLogger(__name__)
 class HistoryService:
     """B 站历史记录服务。"""
 
-    def __init__(self, session: Optional[BiliSession] = None):
+    def __init__(self, session: Optional[BiliSession] = None, pacer: Optional[Pacer] = None):
+        """
+        :param session: BiliSession 实例，None 时创建（使用默认 cookie）
+        :param pacer: 翻页用的请求节奏控制器，None 时使用进程共用的 shared_pacer()
+        """
         self.session = session if session is not None else BiliSession()
+        self.pacer = pacer if pacer is not None else shared_pacer()
 
     # ---- 分页获取 ----
 
@@ -74,13 +79,12 @@ class HistoryService:
         items = []
         for i in range(max_iter):
             logger.info("[HistoryService] 正在获取第 %d/%d 页历史记录", i + 1, max_iter)
-            page = self.get_history_page(max_id=max_id, business=business, view_at=view_at,
-                                         filter_type=filter_type, ps=ps)
+            page = self.pacer.call(lambda: self.get_history_page(
+                max_id=max_id, business=business, view_at=view_at, filter_type=filter_type, ps=ps))
             items.extend(page.items)
             if not page.has_more:
                 break
             max_id, business, view_at = page.max, page.business, page.view_at
-            time.sleep(0.3)
         return items
 
     # ---- 失效视频 ----
@@ -108,7 +112,7 @@ class HistoryService:
         remaining = set(bv)
         found = []
 
-        page = self.get_history_page(filter_type="archive", ps=ps)
+        page = self.pacer.call(lambda: self.get_history_page(filter_type="archive", ps=ps))
         for _ in range(max_iter):
             if not remaining:
                 break
@@ -120,17 +124,62 @@ class HistoryService:
                     found.append(item.raw or {})
             if not page.has_more or not remaining:
                 break
-            page = self.get_history_page(max_id=page.max, business=page.business,
-                                         view_at=page.view_at, filter_type="archive", ps=ps)
-            time.sleep(0.3)
+            cursor = page
+            page = self.pacer.call(lambda: self.get_history_page(
+                max_id=cursor.max, business=cursor.business, view_at=cursor.view_at,
+                filter_type="archive", ps=ps))
 
         logger.info("[HistoryService] 找到 %d/%d 个失效视频", len(found), len(bv))
         return found
 
     # ---- 导出 ----
 
+    _DETAIL_KEYS = ("title", "num_view", "num_dm", "num_reply", "pub_time",
+                    "num_like", "num_coin", "num_fav", "num_share", "tags",
+                    "tid", "up_name", "up_followers")
+
+    def fill_video_details(self, items: list, video_service=None) -> list:
+        """为视频类历史条目补全详情（标题 / stat / 标签 / UP 主及粉丝数），原地写入条目属性。
+
+        每个视频只发一次 view/detail 请求（见 VideoService.fetch_info_detail），取代
+        view + tag + card 三次请求；请求间隔由本服务的节奏控制器决定。视频已失效等错误时
+        该条目详情留空并继续。
+
+        :param items: HistoryItem 列表（只处理 business == "archive" 的条目）
+        :param video_service: 复用的 VideoService；None 时用本服务的 session 新建
+        :return: items（便于链式调用）
+        """
+        from src.api.errors import BiliError
+        from src.services.video import VideoService
+
+        if video_service is None:
+            video_service = VideoService(session=self.session)
+            video_service.pacer = self.pacer  # 详情请求由 VideoService 按本服务的节奏控制器取时间片
+        for it in items:
+            if it.business != "archive" or not it.bvid:
+                continue
+            try:
+                info = video_service.fetch_info_detail(it.bvid)
+            except BiliError as e:
+                logger.warning("[HistoryService] 获取视频 %s 详情失败：%s", it.bvid, e)
+                continue
+            owner = info.owner
+            stat = info.stat
+            details = {
+                "title": info.title, "num_view": stat.num_view, "num_dm": stat.num_dm,
+                "num_reply": stat.num_reply, "pub_time": info.pub_time, "num_like": stat.num_like,
+                "num_coin": stat.num_coin, "num_fav": stat.num_fav, "num_share": stat.num_share,
+                "tags": ",".join(info.tags), "tid": info.tid,
+                "up_name": owner.name if owner else "",
+                "up_followers": owner.num_followers if owner and owner.num_followers is not None else "",
+            }
+            for key, value in details.items():
+                setattr(it, key, value)
+        return items
+
     def save_video_history_df(self, items: Optional[list] = None, *, view_info: bool = False,
                               detailed_info: bool = False,
+                              fetch_details: bool = False,
                               save_path: Optional[Path] = None,
                               save_name: str = "history",
                               add_df: bool = True):
@@ -142,7 +191,10 @@ class HistoryService:
 
         :param items: HistoryItem 列表。None 时调用 get_history_all() 获取默认 5 页
         :param view_info: 是否需要保存观看信息（点赞/投币/收藏）——需要传入已带 user_action 的详情
-        :param detailed_info: 是否需要保存视频详细信息（标题/stat等）——需要传入已带详情的 items
+        :param detailed_info: 是否需要保存视频详细信息（标题/stat等）——需要传入已带详情的条目
+            （见 fill_video_details），未带详情的条目留空
+        :param fetch_details: 与 detailed_info 同时开启时，先为未带详情的条目调用 fill_video_details 补全
+            （每个视频一次 view/detail 请求，默认关闭，导出本身不发请求）
         :param save_path: xlsx 保存目录。None 时用 HISTORY_OUTPUT_DIR
         :param save_name: xlsx 文件名（不含后缀）
         :param add_df: 文件存在时是否追加（默认 True）
@@ -166,9 +218,10 @@ class HistoryService:
             data["u_coin"] = [getattr(it, "u_coin", "") for it in archive_items]
             data["u_fav"] = [getattr(it, "u_fav", "") for it in archive_items]
         if detailed_info:
-            for key in ("title", "num_view", "num_dm", "num_reply", "pub_time",
-                        "num_like", "num_coin", "num_fav", "num_share", "tags",
-                        "tid", "up_name", "up_followers"):
+            missing = [it for it in archive_items if not hasattr(it, "num_view")]
+            if missing and fetch_details:
+                self.fill_video_details(missing)
+            for key in self._DETAIL_KEYS:
                 data[key] = [getattr(it, key, "") for it in archive_items]
 
         df = pd.DataFrame(data)
@@ -12,26 +12,31 @@
     result = service.download_video_with_audio("BV1ov42117yC")
     print(result.path)
 """
-import time
-import random
+import copy
+import re
+import shutil
 import logging
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Optional, Union
 
 from src.api.auth import get_wbi
 from src.api.errors import (
     BiliAPIError,
-    BiliForbiddenError,
+    BiliAuthError,
     BiliRiskError,
+    DownloadError,
     FFmpegNotFoundError,
+    StreamResumeError,
 )
 from src.api.session import BiliSession
 from src.config.constants import DASH_FNVAL
 from src.config.path import VIDEO_OUTPUT_DIR
 from src.models.download_model import (
     AudioStream,
+    CodecPolicy,
     DashStreams,
     DownloadResult,
     VideoQuality,
@@ -40,13 +45,50 @@ from src.models.download_model import (
 from src.models.video_model import VideoInfo, VideoPage, VideoSeason, VideoSeasonEpisode
 from src.services.archive import ArchiveService
 from src.urls.video_urls import VideoUrls
-from src.util.downloader import ProgressCallback, download_stream, ffmpeg_available, merge_video_audio
+from src.util.dispatcher import AccountDispatcher
+from src.util.downloader import (
+    ProgressCallback,
+    download_stream,
+    download_streams,
+    extract_audio,
+    ffmpeg_available,
+    merge_video_audio,
+    stream_merge_video_audio,
+)
 from src.util.filename import build_download_filename, build_multi_page_filename
+from src.util.inflight import InflightRegistry, shared_inflight
+from src.util.library_index import find_downloaded, record_download
+from src.util.media_store import MediaStore, link_or_copy
+from src.util.memo import RequestMemo
+from src.util.pacing import Pacer, is_risk_error, shared_pacer
+from src.util.paginate import fetch_all_pages
+from src.util.merge_pool import MergePool
+from src.util.pipeline import Stage, run_pipeline
 from src.util.progress import BatchProgress, ParallelBatchProgress
+from src.util.remux import remux_supported
+from src.util.resume import StreamJournal, parts_dir, url_deadline
 from src.util.risk_gate import RiskGate
+from src.util.size_budget import DownloadPlan, PlannedItem, SizeBudget, StreamOption
+from src.util.sync_state import SyncState, SyncStore
+from src.util.transport import ensure_pool_size
 
 logger = logging.getLogger(__name__)
 
+PLAYURL_EXPIRY_MARGIN = 600  # 缓存的 playurl 在直链 deadline 前该秒数即视为过期（留足下载时间）
+
+# 各下载类型的缓存检查扩展名：音频不含 mp4（已存在的「视频」mp4 不能当作音频已下载）
+_CACHE_EXTS = {
+    "video": {"mp4", "flv", "m4s"},
+    "video_with_audio": {"mp4", "flv", "m4s"},
+    "audio": {"m4a", "mp3", "flac", "aac"},
+    "cover": {"jpg", "jpeg", "png", "webp"},
+}
+
+
+# 可从中提取音轨的已下载成品（合成后的视频）；文件名的分P标记须与请求的分P一致
+_AUDIO_SOURCE_EXTS = {"mp4"}
+_PAGE_TAG_RE = re.compile(r"-P(\d{2,})", re.IGNORECASE)
+
 
 class _FileCounter:
     """线程安全的文件序号分配：并发下载时每个视频（稿件）预先占号，保证进度序号不重叠。"""
@@ -63,38 +105,108 @@ class _FileCounter:
             return start
 
 
-def _parallel_run(items, fn, threads: int) -> list:
-    """并发执行 fn(item, idx)，返回按输入顺序排列的结果列表。
+def _playurl_expiry(dash: DashStreams) -> Optional[float]:
+    """playurl 结果的缓存过期时刻：最早过期的直链 deadline 减去余量；直链均无 deadline 时返回 None。"""
+    deadlines = [d for d in (url_deadline(s.url) for s in (*dash.video, *dash.audio)) if d is not None]
+    return min(deadlines) - PLAYURL_EXPIRY_MARGIN if deadlines else None
+
+
+class _FlightPool:
+    """合成线程池的包装：提交的合成任务结束时才算单飞下载完成（见 src.util.inflight）。"""
 
-    :param items: 输入列表
-    :param fn: fn(item, index) -> result；异常会上抛（线程池退出时会等其余任务跑完）
-    :param threads: 并发线程数
-    """
-    results: list = [None] * len(items)
-    if len(items) <= 1 or threads <= 1:
-        return [fn(item, i) for i, item in enumerate(items)]
-    with ThreadPoolExecutor(max_workers=threads) as ex:
-        future_to_idx = {ex.submit(fn, item, i): i for i, item in enumerate(items)}
-        for future in as_completed(future_to_idx):
-            idx = future_to_idx[future]
-            results[idx] = future.result()
-    return results
+    def __init__(self, pool: MergePool, flight):
+        self.pool = pool
+        self.flight = flight
+
+    def submit(self, job: Callable[[], None], name: str = "") -> None:
+        self.flight.defer()
+
+        def _job() -> None:
+            try:
+                job()
+            except BaseException as e:
+                self.flight.complete(error=e)
+                raise
+            self.flight.complete()
+
+        self.pool.submit(_job, name=name)
 
 
 class VideoService:
     """B 站视频的获取与下载服务。"""
 
+    segments: int = 1  # 单个媒体流的并发连接数（类级默认，__init__ 可覆盖）
+    stream_merge: bool = False  # 是否边下载边合成（类级默认，__init__ 可覆盖）
+    merge_workers: int = 2  # 并发批量下载时合成线程池的大小（类级默认，__init__ 可覆盖）
+    cache_ttl: float = 300.0  # view / playurl 结果的缓存时长（秒，类级默认，__init__ 可覆盖）
+    api_workers: int = 2  # 并发批量下载时预取信息/直链的线程数（类级默认，__init__ 可覆盖）
+    _memo: Optional[RequestMemo] = None  # 请求缓存（首次使用时创建，多账号服务间共享）
+    _memo_lock = threading.Lock()
+    pacer: Optional[Pacer] = None  # 请求节奏控制器；None 时使用进程共用的 shared_pacer()
+    inflight: Optional[InflightRegistry] = None  # 进行中下载登记；None 时使用进程共用的 shared_inflight()
+    store: Optional[MediaStore] = None  # 共享媒体库；None 时不启用（类级默认，__init__ 可覆盖）
+    codec_policy: Optional[CodecPolicy] = None  # 默认编码选择策略；None 时取接口返回顺序的第一个
+
     def __init__(
             self,
             session: Optional[BiliSession] = None,
             default_dir: Path = VIDEO_OUTPUT_DIR,
+            segments: int = 1,
+            stream_merge: bool = False,
+            merge_workers: int = 2,
+            cache_ttl: float = 300.0,
+            api_workers: int = 2,
+            store_dir: Optional[Path] = None,
+            codec_policy: Optional[CodecPolicy] = None,
     ):
         """
         :param session: BiliSession 实例，None 时创建（使用默认 cookie）
         :param default_dir: 默认下载目录，调用下载方法未指定 dir 时使用
+        :param segments: 单个媒体流的并发连接数（>1 启用分段下载，见 download_stream）
+        :param stream_merge: 边下载边合成（视频流直接喂给 ffmpeg，见 stream_merge_video_audio），
+            峰值磁盘占用约 1 倍成品大小；默认 False（先下载两个流再合成）
+        :param merge_workers: 并发批量下载（threads>1）时同时进行的合成数上限；下载线程把
+            合成交给该线程池后立即下载下一个视频（见 MergePool）
+        :param cache_ttl: view / playurl 结果的缓存时长（秒）。同一批次内重复获取同一视频的信息
+            与直链时直接复用，减少请求数（也就减少触发风控的机会）；playurl 另按直链有效期提前过期；
+            <=0 时不缓存
+        :param api_workers: 并发批量下载（threads>1）时预取视频信息与 playurl 的线程数。预取线程
+            领先下载线程至多 2×threads 个视频，下载线程取到任务时直链已就绪（见 _run_batch_pipeline）
+        :param store_dir: 共享媒体库目录（见 src.util.media_store）。启用后下载完成的文件同时
+            登记到媒体库，其他保存目录以相同的清晰度与编码策略需要同一文件时直接硬链接，不再下载；
+            None 时不启用
+        :param codec_policy: 默认编码选择策略（见 CodecPolicy）。同一清晰度 B 站通常同时提供
+            avc1 / hev1 / av01，HEVC / AV1 往往小 30%~50%；各下载方法的 codec 参数可逐次覆盖。
+            None 时取接口返回顺序中的第一个
         """
         self.session = session if session is not None else BiliSession()
         self.default_dir = Path(default_dir)
+        self.segments = segments
+        self.stream_merge = stream_merge
+        self.merge_workers = merge_workers
+        self.cache_ttl = cache_ttl
+        self.api_workers = api_workers
+        self.store = MediaStore(store_dir) if store_dir is not None else None
+        self.codec_policy = codec_policy
+
+    def get_pacer(self) -> Pacer:
+        """本服务批量下载 / 翻页使用的请求节奏控制器（可读取 rate 查看当前速率）。"""
+        return self.pacer if self.pacer is not None else shared_pacer()
+
+    def _api_get(self, url: str, params: dict) -> Any:
+        """经本服务的节奏控制器发出一次接口请求：等待时间片，按结果调整速率。
+
+        只有真正发出的请求才占用时间片：请求缓存命中、本地已有文件的视频都不会走到这里。
+        """
+        return self.get_pacer().call(lambda: self.session.get(url, params=params))
+
+    def _request_memo(self) -> RequestMemo:
+        """本服务的请求缓存（线程安全的懒创建；_account_services 派生的服务共用同一个）。"""
+        if self._memo is None:
+            with self._memo_lock:
+                if self._memo is None:
+                    self._memo = RequestMemo(ttl=self.cache_ttl)
+        return self._memo
 
     # ---- 视频信息 ----
 
@@ -104,8 +216,43 @@ class VideoService:
         :param bvid: BV号
         :return: VideoInfo
         """
-        data = self.session.get(VideoUrls.VIEW, params={"bvid": bvid})
-        return VideoInfo.from_view_json(data)
+        info = self._request_memo().get_or_fetch(
+            ("view", bvid),
+            lambda: VideoInfo.from_view_json(self._api_get(VideoUrls.VIEW, {"bvid": bvid})),
+        )
+        return copy.copy(info)  # 浅拷贝：调用方改写字段（如 tags）不影响缓存
+
+    def fetch_pages(self, bvid: str) -> list:
+        """获取视频的分P列表（cid / 分P标题 / 时长），走轻量的 pagelist 接口。
+
+        只需要 cid 与分P标题的路径（逐P下载已有文件的视频、合集稿件补全）用它代替 view：
+        响应小得多，也不解析统计 / 作者 / 合集等字段。已缓存完整视频信息时直接取其中的分P。
+
+        :param bvid: BV号
+        :return: VideoPage 列表
+        """
+        memo = self._request_memo()
+        info = memo.peek(("view", bvid))
+        if info is not None:
+            return list(info.pages)
+        pages = memo.get_or_fetch(
+            ("pagelist", bvid),
+            lambda: [VideoPage.from_dict(p)
+                     for p in self._api_get(VideoUrls.PAGELIST, {"bvid": bvid}) or []],
+        )
+        return list(pages)
+
+    def _has_local_file(self, bvid: str, media_type: str, root: Optional[Path],
+                        variant: Optional[str] = None) -> bool:
+        """保存目录下是否已有该视频的任意分P（决定先取轻量分P列表还是直接取完整信息）。
+
+        仅音频下载时，已下载的合成视频也算（音频可从中提取，见 _find_audio_source）。
+        传入 variant 时媒体库中同一版本的文件也算（见 _find_downloaded_file）。
+        """
+        exts = _CACHE_EXTS.get(media_type, _CACHE_EXTS["video_with_audio"])
+        if media_type == "audio":
+            exts = exts | _AUDIO_SOURCE_EXTS
+        return self._find_downloaded_file(bvid, exts, root=root, variant=variant) is not None
 
     def fetch_tags(self, bvid: str) -> list:
         """获取视频标签（tag_name 列表）。
@@ -113,29 +260,55 @@ class VideoService:
         :param bvid: BV号
         :return: 标签名列表
         """
-        data = self.session.get(VideoUrls.TAG, params={"bvid": bvid})
+        data = self._api_get(VideoUrls.TAG, {"bvid": bvid})
         return [tag["tag_name"] for tag in data]
 
+    def fetch_info_detail(self, bvid: str) -> VideoInfo:
+        """一次请求获取视频信息 + 标签 + UP 主粉丝数（view/detail 接口）。
+
+        取代 view → tag → card 三次串行请求；结果与 fetch_info 一样进入请求缓存，
+        同时写入 view 的缓存，之后的 fetch_info / fetch_pages 不再重复请求。
+
+        :param bvid: BV号
+        :return: VideoInfo（含 tags；owner.num_followers / is_followed 来自 UP 主卡片）
+        """
+        memo = self._request_memo()
+        info = memo.get_or_fetch(
+            ("view_detail", bvid),
+            lambda: VideoInfo.from_detail_json(self._api_get(VideoUrls.VIEW_DETAIL, {"bvid": bvid})),
+        )
+        memo.get_or_fetch(("view", bvid), lambda: info)
+        info = copy.copy(info)  # 浅拷贝：调用方改写字段不影响缓存
+        info.tags = list(info.tags)
+        return info
+
     def fetch_info_with_tags(self, bvid: str) -> VideoInfo:
-        """获取视频基本信息 + 标签（一次调用组装完整信息）。
+        """获取视频基本信息 + 标签（一次 view/detail 请求，见 fetch_info_detail）。
 
         :param bvid: BV号
         :return: VideoInfo（含 tags）
         """
-        info = self.fetch_info(bvid)
-        info.tags = self.fetch_tags(bvid)
-        return info
+        return self.fetch_info_detail(bvid)
 
     # ---- 播放流 ----
 
     def get_playurl(self, bvid: str, cid: int, fnval: int = DASH_FNVAL) -> DashStreams:
         """获取视频 DASH 播放流（视频/音频直链）。
 
+        结果按账号缓存（可用清晰度与账号有关），直链 deadline 前 PLAYURL_EXPIRY_MARGIN 秒过期。
+
         :param bvid: BV号
         :param cid: 视频 cid（鉴权参数）
         :param fnval: 置为 4048 会取到所有可用 DASH 视频流
         :return: DashStreams（video 按清晰度降序，audio 按码率降序）
         """
+        return self._request_memo().get_or_fetch(
+            ("playurl", id(self.session), bvid, cid, fnval),
+            lambda: self._request_playurl(bvid, cid, fnval),
+            expires_at=_playurl_expiry,
+        )
+
+    def _request_playurl(self, bvid: str, cid: int, fnval: int) -> DashStreams:
         params = {
             "bvid": bvid,
             "cid": cid,
@@ -147,7 +320,7 @@ class VideoService:
             "high_quality": 1,  # 当platform=html5时，此值为1可使画质为1080p
         }
         get_wbi(params)  # 原地追加 wts 与 w_rid
-        data = self.session.get(VideoUrls.PLAY, params=params)
+        data = self._api_get(VideoUrls.PLAY, params)
 
         videos = [
             VideoStream(
@@ -158,6 +331,7 @@ class VideoService:
                 quality=v.get("id", 0),
                 frame_rate=v.get("frameRate", ""),
                 size=v.get("size", 0),
+                backup_urls=list(v.get("backupUrl") or []),
             )
             for v in data["dash"]["video"]
         ]
@@ -167,6 +341,7 @@ class VideoService:
                 codecs=a.get("codecs", ""),
                 bandwidth=a.get("bandwidth", 0),
                 size=a.get("size", 0),
+                backup_urls=list(a.get("backupUrl") or []),
             )
             for a in data["dash"]["audio"]
         ]
@@ -192,10 +367,20 @@ class VideoService:
             raise ValueError(f"视频 {info.bvid} 没有分P信息，无法指定第 {page} 分P。")
         return VideoPage(page=1, cid=info.cid or 0, part=info.title)
 
-    def _fetch_streams(self, bvid: str, page: int = 1) -> tuple[VideoInfo, DashStreams]:
-        """获取视频信息 + 指定分P的 DASH 流（download_* 系列共用，避免重复请求）。"""
-        info = self.fetch_info(bvid)
-        target = self._resolve_page(info, page)
+    def _fetch_streams(self, bvid: str, page: int = 1, info: Optional[VideoInfo] = None, *,
+                       need_info: bool = True) -> tuple[Optional[VideoInfo], DashStreams]:
+        """获取视频信息 + 指定分P的 DASH 流（download_* 系列共用，避免重复请求）。
+
+        传入 info（如合集内嵌的稿件数据）时直接用它的分P cid 请求 playurl，不再请求 view 接口；
+        need_info=False（调用方已指定文件名，不需要标题）且没有 info 时只取轻量的分P列表
+        （见 fetch_pages），返回的 info 为 None。
+        """
+        if info is None and not need_info:
+            target = self._resolve_page(VideoInfo(bvid=bvid, pages=self.fetch_pages(bvid)), page)
+        else:
+            if info is None:
+                info = self.fetch_info(bvid)
+            target = self._resolve_page(info, page)
         if target.cid is None or target.cid == 0:
             raise ValueError(f"视频 {bvid} 第 {page} 分P 的 cid 获取失败，无法下载。")
         return info, self.get_playurl(bvid, target.cid)
@@ -224,58 +409,89 @@ class VideoService:
         return isinstance(exc, BiliAPIError) and exc.code in (-404, 62002)
 
     def _is_risk_control_error(self, exc: Exception) -> bool:
-        """是否触发风控（-412 触发风控 / -403 被拒绝访问），这类错误稍作等待后重试通常可恢复。"""
-        return isinstance(exc, (BiliRiskError, BiliForbiddenError))
+        """是否触发风控（-412 触发风控 / -403 被拒绝访问），这类错误稍作等待后重试通常可恢复。
+
+        与请求节奏控制器共用同一判定（见 src.util.pacing.is_risk_error），两处不会各自演变。
+        """
+        return is_risk_error(exc)
+
+    def _account_key(self) -> int:
+        """本服务账号在 RiskGate 中的标识（按会话对象区分账号）。"""
+        return id(self.session)
 
     def _execute_batch_download(
             self,
             bvid: str,
-            action: Callable[[], Any],
+            action: Callable[..., Any],
             *,
             label: str = "",
             retries: int = 3,
             risk_gate: Optional[RiskGate] = None,
+            dispatcher: Optional[AccountDispatcher] = None,
+            prefer: Optional["VideoService"] = None,
     ) -> Any:
         """执行批量下载中单个视频（稿件）的下载动作，统一处理异常。
 
         - 视频不可见（-404 不存在 / 62002 稿件不可见）：记录日志并返回 None（跳过）；
-        - 触发风控（-412 / -403）：有 risk_gate 时标记风控事件（由 gate 让**所有线程**
-          在下一次获取信息前各自随机暂停），无 gate 时保持原有本地退避重试；
+        - 节奏控制在单个接口请求上（见 _api_get）：动作内真正发出的 view / pagelist / playurl 请求
+          才向所用账号的节奏控制器（get_pacer()）预约时间片，成功加快、风控减速并冷却；本地已有、
+          缓存命中的视频不发请求，也就不等待、不计入速率调整；
+        - 触发风控（-412 / -403）：有 risk_gate 时另外标记该账号的风控事件（由 gate 让**使用该账号
+          的线程**在下一次获取信息前各自随机暂停，该账号进入冷却期），随后重试；
+        - 传入 dispatcher 时，每次尝试由调度器选出当前最合适的账号（见 AccountDispatcher），
+          并把耗时与结果反馈给调度器；账号登录失效（BiliAuthError）时该账号被移出调度，
+          换其他账号重试（不计入风控重试次数）；
         - 其余异常：原样抛出。
 
         :param bvid: 视频BV号（仅用于日志）
-        :param action: 无参可调用对象，完成该视频（稿件）的下载
+        :param action: 完成该视频（稿件）下载的可调用对象：无 dispatcher 时无参调用；
+            有 dispatcher 时以本次尝试选中的服务调用 action(svc)
         :param label: 批量任务描述（收藏夹/合集/UP主名称），仅用于日志
         :param retries: 触发风控后的最大重试次数
         :param risk_gate: 并发下载时的风控协调器；None 表示顺序下载（本地退避）
+        :param dispatcher: 多账号并发时的账号调度器（元素为各账号的 VideoService）
+        :param prefer: 首次尝试优先使用的服务（如预取阶段用过的账号，可命中其直链缓存）
         :return: action 的返回值；视频不可见被跳过时返回 None
         """
         last_error: Optional[Exception] = None
-        for attempt in range(retries + 1):
+        attempt = 0
+        while attempt <= retries:
+            svc = dispatcher.acquire(prefer=prefer) if dispatcher is not None else self
+            pacer = svc.get_pacer()
             if risk_gate is not None:
-                # 风控后所有线程在下一次获取信息前暂停（每个线程暂停时长单独计算）
-                risk_gate.pause_before_fetch()
+                # 该账号风控后，使用它的线程在下一次获取信息前暂停（每个线程暂停时长单独计算）
+                risk_gate.pause_before_fetch(account=svc._account_key())
+            started = time.monotonic()
             try:
-                return action()
+                result = action(svc) if dispatcher is not None else action()
             except Exception as e:
+                if dispatcher is not None:
+                    dispatcher.release(svc, time.monotonic() - started, e)
                 if self._is_video_unavailable_error(e):
                     logger.warning("视频 %s 不可见，跳过（%s）。", bvid, label)
                     return None
+                if isinstance(e, BiliAuthError) and dispatcher is not None and dispatcher.live:
+                    logger.warning("视频 %s：账号登录已失效，改用其他账号重试（%s）。", bvid, label)
+                    prefer = None
+                    continue
                 if self._is_risk_control_error(e):
                     last_error = e
+                    attempt += 1
+                    prefer = None
                     if risk_gate is not None:
                         logger.warning(
-                            "视频 %s 触发风控（第 %d/%d 次尝试），通知所有线程暂停（%s）。",
-                            bvid, attempt + 1, retries + 1, label)
-                        risk_gate.mark_risk()
+                            "视频 %s 触发风控（第 %d/%d 次尝试），该账号暂停并冷却（%s）。",
+                            bvid, attempt, retries + 1, label)
+                        risk_gate.mark_risk(svc._account_key())
                     else:
-                        wait = random.uniform(3, 8) * (attempt + 1)
                         logger.warning(
-                            "视频 %s 触发风控（第 %d/%d 次尝试），等待 %.1fs 后重试（%s）。",
-                            bvid, attempt + 1, retries + 1, wait, label)
-                        time.sleep(wait)
+                            "视频 %s 触发风控（第 %d/%d 次尝试），冷却 %.1fs 后重试（%s）。",
+                            bvid, attempt, retries + 1, pacer.cooldown_remaining, label)
                     continue
                 raise
+            if dispatcher is not None:
+                dispatcher.release(svc, time.monotonic() - started)
+            return result
         logger.error("视频 %s 连续 %d 次触发风控，已放弃（%s）。", bvid, retries + 1, label)
         if last_error is not None:
             raise last_error
@@ -289,10 +505,9 @@ class VideoService:
             index: int,
             total: int,
     ) -> int:
-        """报告单个视频的缓存命中/下载情况，并做防风控节流，返回累计的未命中缓存下载次数。
+        """报告单个视频的缓存命中/下载情况，返回累计的未命中缓存下载次数。
 
-        - 全部命中本地缓存：提示跳过网络请求，不节流；
-        - 有新下载：提示文件数，短停 0.3s；每累计 10 个未命中缓存的视频再随机休息 1~3s，降低风控风险。
+        防风控节流由各接口请求的节奏控制器（见 _api_get）负责，这里不再固定休眠。
         """
         all_cached = bool(new_results) and all(result.cached for result in new_results)
         if all_cached:
@@ -300,42 +515,280 @@ class VideoService:
         else:
             print(f"{bvid}：下载 {len(new_results)} 个文件")
             download_count += 1
-            time.sleep(0.3)  # 避免风控
-            if download_count % 10 == 0:
-                time.sleep(random.uniform(1, 3))  # 每10个未命中缓存的视频随机休息1~3秒，降低风控风险
         print(f"已下载 {index}/{total} 个视频")
         return download_count
 
+    @staticmethod
+    def _store_variant(media_type: str, quality: int = 0, codec: Optional[CodecPolicy] = None) -> str:
+        """媒体库中区分同一分P不同版本的名称：视频为下载类型 + 目标清晰度（+ 编码策略），
+        音频 / 封面为下载类型本身（见 src.util.media_store）。"""
+        if media_type not in ("video", "video_with_audio"):
+            return media_type
+        variant = f"{media_type}-q{int(quality)}"
+        return f"{variant}-{codec.key}" if codec is not None else variant
+
+    def _planned_variant(self, bvid: str, page: int, media_type: str, quality: VideoQuality,
+                         codec: Optional[CodecPolicy], plan: Optional[DownloadPlan]) -> str:
+        """某个分P在媒体库中的版本：有体积预算规划时按规划为它选定的清晰度与编码（与下载时一致）。"""
+        if plan is not None:
+            quality, codec = plan.override(bvid, page, quality, codec)
+        return self._store_variant(media_type, quality, codec if codec is not None else self.codec_policy)
+
     def _find_downloaded_file(self, bvid: str, extensions: set[str],
                               page: Optional[int] = None,
-                              root: Optional[Path] = None) -> Optional[Path]:
+                              root: Optional[Path] = None,
+                              variant: Optional[str] = None,
+                              link: bool = False) -> Optional[Path]:
+        """在保存目录（递归）中查找已下载的文件，查询 root 下的下载库索引（见 src.util.library_index）。
+
+        :param bvid: BV号
+        :param extensions: 可接受的扩展名集合（区分视频/音频/封面）
+        :param page: 分P序号；>1 时要求文件名含 `-Pxx`，与 _default_filename 的命名规则保持一致
+        :param root: 查找的根目录。None 时使用默认下载目录
+        :param variant: 媒体库中的版本（见 _store_variant）；None 时只查 root，不查媒体库
+        :param link: 命中媒体库时是否把文件硬链接到 root 下（直接复用该文件的下载方法传 True）；
+            False 时只做检查，返回媒体库中的路径，不改动 root
+
+        启用媒体库（store_dir）且传入 variant 时，root 下没有而媒体库里有同一版本的文件也算已下载。
+        """
         root = root or self.default_dir
+        found = find_downloaded(root, bvid, extensions, page)
+        if found is None and self.store is not None and variant is not None:
+            stored = self.store.find(bvid, extensions, page, variant=variant)
+            if stored is not None and link:
+                found = self.store.link_into(stored, root)
+                logger.debug("%s 已在媒体库中，链接到 %s", bvid, found)
+            else:
+                found = stored
+        return found
+
+    def _record_download(self, save_dir: Path, save_path: Path, *, bvid: str, page: int = 1,
+                         media_type: str, quality: int = 0, variant: Optional[str] = None) -> None:
+        """新下载的文件写入保存目录的下载库索引，启用媒体库时同时登记到媒体库。
+
+        :param variant: 媒体库中的版本（见 _store_variant）；None 时为 media_type
+        """
+        record_download(save_dir, save_path, bvid=bvid, page=page, media_type=media_type, quality=quality)
+        if self.store is not None:
+            self.store.put(save_path, bvid=bvid, page=page, media_type=media_type, quality=quality,
+                           variant=variant or media_type)
+
+    def _find_audio_source(self, bvid: str, page: int, root: Optional[Path]) -> Optional[Path]:
+        """查找可提取音频的已下载合成视频（如收藏夹从视频模式切换到仅音频时）。
 
-        if not root.exists():
+        文件名带分P标记（-Pxx）时须与 page 一致，避免把其他分P的视频当作来源。
+        """
+        source = self._find_downloaded_file(bvid, _AUDIO_SOURCE_EXTS, page=page, root=root)
+        if source is None:
+            return None
+        tag = _PAGE_TAG_RE.search(source.stem)
+        if tag is not None and int(tag.group(1)) != page:
             return None
+        return source
 
-        extensions = {ext.lower().lstrip(".") for ext in extensions}
-        # 只有需要区分分P时才生成 page_tag，page_tag与 _default_filename 的命名规则保持一致
-        if page is not None and page > 1:
-            page_tag = f"-P{page:02d}".lower()  # 单P也不需要判断
-        else:
-            page_tag = None
+    def _extract_local_audio(self, bvid: str, save_dir: Path, *, page: int, filename: Optional[str],
+                             progress: Optional[BatchProgress] = None,
+                             progress_cb: Optional[ProgressCallback] = None) -> Optional[DownloadResult]:
+        """从已下载的合成视频中提取音频（stream copy），不走网络。
+
+        没有可用的合成视频、或提取失败（视频没有音轨、需要 ffmpeg 但不可用等）时返回 None，
+        由调用方照常下载音频流。
+        """
+        source = self._find_audio_source(bvid, page, save_dir)
+        if source is None:
+            return None
+        save_path = save_dir / (filename or f"{source.stem}.m4a")
+        if save_path.exists():
+            return DownloadResult(path=save_path, media_type="audio", size=save_path.stat().st_size, cached=True)
+        tmp = save_path.with_name(save_path.name + ".part")
+        try:
+            size = extract_audio(source, tmp)
+            tmp.replace(save_path)
+        except (DownloadError, FFmpegNotFoundError, OSError) as e:
+            tmp.unlink(missing_ok=True)
+            logger.info("无法从 %s 提取音频（%s），改为下载音频流。", source.name, e)
+            return None
+        self._record_download(save_dir, save_path, bvid=bvid, page=page, media_type="audio")
+        logger.debug("已从 %s 提取音频：%s", source.name, save_path.name)
+        if progress:
+            progress.update(size, size)
+        elif progress_cb:
+            progress_cb(size, size)
+        return DownloadResult(path=save_path, media_type="audio", size=size)
+
+    # ---- 进程内单飞 ----
+
+    def _inflight_registry(self) -> InflightRegistry:
+        return self.inflight if self.inflight is not None else shared_inflight()
 
-        for path in root.rglob("*"):
-            if not path.is_file():
+    def _single_flight(self, key: tuple, save_dir: Path, filename: Optional[str], *, bvid: str, page: int,
+                       media_type: str, work: Callable[[Optional[MergePool]], DownloadResult],
+                       merge_pool: Optional[MergePool] = None) -> DownloadResult:
+        """同一文件同一时刻只下载一次：进程内已有线程在下载 key 时等待它完成并复用结果。
+
+        首个请求者执行 work(merge_pool)；合成交给合成线程池时，合成结束才唤醒等待者。
+        等待者复用结果：同一路径直接返回；保存目录 / 文件名不同时硬链接（或复制）到自己的目录，
+        并记入该目录的下载库索引。首个请求者失败（或结果文件已不在）时等待者自行重试。
+
+        :param key: (BV号, 分P, 下载类型, 清晰度[, 编码策略])
+        :param save_dir: 本次调用的保存目录
+        :param filename: 本次调用指定的文件名；None 时沿用首个请求者的文件名
+        :param work: 实际下载：merge_pool -> DownloadResult
+        :return: DownloadResult（复用他人结果时 cached=True）
+        """
+        registry = self._inflight_registry()
+        while True:
+            flight, leader = registry.acquire(key)
+            if leader:
+                break
+            logger.debug("%s 正在由其他任务下载，等待复用：%s", bvid, key)
+            try:
+                shared = flight.wait()
+            except Exception as e:
+                logger.debug("%s 的另一下载失败（%s），自行重试。", bvid, e)
                 continue
-            stem = path.stem.lower()
-            # 基础条件：BV号 + 文件扩展名
-            if bvid.lower() not in stem:
+            if shared is None or not shared.path.exists():
                 continue
-            if path.suffix.lower().lstrip(".") not in extensions:
+            target = save_dir / (filename or shared.path.name)
+            if target != shared.path and not target.exists():
+                link_or_copy(shared.path, target)
+                record_download(save_dir, target, bvid=bvid, page=page, media_type=media_type)
+            return DownloadResult(path=target, media_type=shared.media_type,
+                                  size=target.stat().st_size, cached=True)
+
+        pool = _FlightPool(merge_pool, flight) if merge_pool is not None else None
+        try:
+            result = work(pool)
+        except BaseException as e:
+            flight.complete(error=e)
+            raise
+        flight.complete(result)
+        return result
+
+    # ---- 跨进程续传 ----
+
+    @staticmethod
+    def _load_journals(pdir: Path, kinds: tuple, quality: VideoQuality,
+                       codec: Optional[CodecPolicy] = None) -> dict:
+        """读取某分P未完成下载的续传日志 {kind: StreamJournal}；目标清晰度变了或编码不满足 codec 限制的
+        视频流日志作废。"""
+        journals = {}
+        for kind in kinds:
+            journal = StreamJournal.load(pdir / f"{kind}.part.json")
+            if journal is None:
                 continue
-            # 视频/音频需要进一步匹配 P 序号
-            if page_tag is not None and page_tag not in stem:
+            if journal.quality != (int(quality) if kind == "video" else 0) or (
+                    kind == "video" and codec is not None and not codec.accepts(journal.codecs)):
+                journal.discard()
                 continue
-            return path
+            journals[kind] = journal
+        return journals
+
+    @staticmethod
+    def _streams_from_journals(journals: dict, kinds: tuple) -> Optional[dict]:
+        """日志齐全且未完成的流直链均未过期时，用日志重建流对象（省去视频信息与 playurl 请求）。"""
+        if any(k not in journals or (journals[k].expired() and not journals[k].complete) for k in kinds):
+            return None
+        streams = {}
+        for kind in kinds:
+            j = journals[kind]
+            if kind == "video":
+                streams[kind] = VideoStream(url=j.url, codecs=j.codecs, quality=j.stream_quality,
+                                            size=j.expected_size, backup_urls=list(j.backup_urls))
+            else:
+                streams[kind] = AudioStream(url=j.url, codecs=j.codecs, size=j.expected_size,
+                                            backup_urls=list(j.backup_urls))
+        return streams
+
+    @staticmethod
+    def _journal_for(pdir: Path, kind: str, stream, journals: dict, *, bvid: str, page: int,
+                     quality: VideoQuality, filename: str) -> StreamJournal:
+        """取待下载流的续传日志：与旧日志是同一个流时沿用（直链过期则换新直链），否则新建。"""
+        old = journals.get(kind)
+        if old is not None:
+            if old.matches(stream):
+                if old.url != stream.url:
+                    old.rebind(stream)
+                logger.info("从上次中断处继续下载 %s 第 %d 分P %s 流（已下载 %d 字节）",
+                            bvid, page, kind, old.bytes_written)
+                return old
+            old.discard()
+        journal = StreamJournal(
+            path=pdir / f"{kind}.part.json", bvid=bvid, page=page,
+            quality=int(quality) if kind == "video" else 0, stream_id=kind,
+            stream_quality=getattr(stream, "quality", 0), codecs=stream.codecs,
+            expected_size=stream.size, url=stream.url, backup_urls=list(stream.backup_urls),
+            filename=filename,
+        )
+        journal.part_path.unlink(missing_ok=True)  # 没有日志的残留 .part 不可信
+        journal.save()
+        return journal
+
+    def _download_single_stream(
+            self,
+            bvid: str,
+            dir: Optional[Path],
+            kind: str,
+            *,
+            page: int,
+            quality: VideoQuality,
+            progress_cb: Optional[ProgressCallback],
+            progress: Optional[BatchProgress],
+            filename: Optional[str],
+            info: Optional[VideoInfo] = None,
+            codec: Optional[CodecPolicy] = None,
+    ) -> DownloadResult:
+        """download_video / download_audio 共用：下载单个流到 `.part`（可跨进程续传），完成后改名为成品。"""
+        save_dir = Path(dir) if dir is not None else self.default_dir
+        pdir = parts_dir(save_dir, bvid, page)
+        journals = self._load_journals(pdir, (kind,), quality, codec)
+        resumed = self._streams_from_journals(journals, (kind,))
+        if resumed is not None:
+            stream = resumed[kind]
+            if filename is None:
+                filename = journals[kind].filename
+        else:
+            info, dash = self._fetch_streams(bvid, page, info, need_info=filename is None)
+            stream = dash.pick_video(quality, codec) if kind == "video" else dash.best_audio()
+            if stream is None:
+                label = "视频流" if kind == "video" else "音频流"
+                raise ValueError(f"视频 {bvid} 第 {page} 分P 没有可用的{label}。")
+            if filename is None:
+                filename = self._default_filename(info, bvid, page, stream.ext)
+
+        save_dir.mkdir(parents=True, exist_ok=True)
+        save_path = save_dir / filename
+
+        if save_path.exists():
+            return DownloadResult(path=save_path, media_type=kind, size=save_path.stat().st_size, cached=True)
+
+        # 单独调用时自动显示进度条
+        progress, auto_progress = self._auto_progress(filename, progress, progress_cb)
 
-        return None
+        if progress and kind == "video":
+            picked = VideoQuality.from_qn(stream.quality)
+            if picked is not None:
+                progress.set_quality(picked)
+        journal = self._journal_for(pdir, kind, stream, journals, bvid=bvid, page=page,
+                                    quality=quality, filename=filename)
+        size = download_stream(
+            stream.url, journal.part_path, self.session.session.headers,
+            progress_cb=progress.make_stream_callback() if progress else progress_cb,
+            segments=self.segments, expected_size=stream.size, backup_urls=stream.backup_urls,
+            journal=journal,
+        )
+        journal.part_path.replace(save_path)
+        journal.path.unlink(missing_ok=True)
+        self._record_download(save_dir, save_path, bvid=bvid, page=page, media_type=kind,
+                              quality=getattr(stream, "quality", 0),
+                              variant=self._store_variant(kind, quality, codec))
+        try:
+            pdir.rmdir()  # 目录里没有其他流的未完成下载时一并删除
+        except OSError:
+            pass
+        if auto_progress:
+            progress.finish()
+        return DownloadResult(path=save_path, media_type=kind, size=size)
 
     def download_video(
             self,
@@ -347,9 +800,13 @@ class VideoService:
             progress_cb: Optional[ProgressCallback] = None,
             progress: Optional[BatchProgress] = None,
             filename: Optional[str] = None,
+            info: Optional[VideoInfo] = None,
+            codec: Optional[CodecPolicy] = None,
     ) -> DownloadResult:
         """下载视频流（无音频）。文件名为 `[标题](BV号).{实际格式}`，多P时含 P 序号。
 
+        中断后未完成的部分保留在 `<dir>/.bilitools_parts/`，下次调用从中断处继续（见 src.util.resume）。
+
         :param bvid: BV号
         :param dir: 保存目录。None 时使用默认下载目录
         :param page: 分P序号（从1开始），多P视频指定要下载的P
@@ -357,42 +814,23 @@ class VideoService:
         :param progress_cb: 进度回调 (downloaded, total)
         :param progress: BatchProgress 进度显示（与 progress_cb 二选一，通常由批量接口传入）
         :param filename: 自定义文件名（含扩展名），None 时按统一命名规则生成
+        :param info: 可选：已有的视频信息（如合集内嵌的稿件数据），传入时不再请求 view 接口
+        :param codec: 编码选择策略（见 CodecPolicy），同一清晰度有多种编码时按它挑选；None 时使用服务的 codec_policy
         :return: DownloadResult
         """
         # 下载前先递归检查默认下载目录，避免已经下载过的视频再次请求网络
-        # todo: 后缀名应该统一存储
-        existing = self._find_downloaded_file(bvid, {"mp4", "flv", "m4s"}, page=page,
-                                              root=dir or self.default_dir)
+        codec = codec if codec is not None else self.codec_policy
+        existing = self._find_downloaded_file(bvid, _CACHE_EXTS["video"], page=page, root=dir or self.default_dir,
+                                              variant=self._store_variant("video", quality, codec), link=True)
         if existing is not None:
             return DownloadResult(path=existing, media_type="video", size=existing.stat().st_size, cached=True)
-        info, dash = self._fetch_streams(bvid, page)
-        stream = dash.pick_video(quality)
-        if stream is None:
-            raise ValueError(f"视频 {bvid} 第 {page} 分P 没有可用的视频流。")
-
-        save_dir = Path(dir) if dir is not None else self.default_dir
-        save_dir.mkdir(parents=True, exist_ok=True)
-        if filename is None:
-            filename = self._default_filename(info, bvid, page, stream.ext)
-        save_path = save_dir / filename
-
-        if save_path.exists():
-            return DownloadResult(path=save_path, media_type="video", size=save_path.stat().st_size, cached=True)
-
-        # 单独调用时自动显示进度条
-        progress, auto_progress = self._auto_progress(filename, progress, progress_cb)
-
-        if progress:
-            picked = VideoQuality.from_qn(stream.quality)
-            if picked is not None:
-                progress.set_quality(picked)
-        size = download_stream(
-            stream.url, save_path, self.session.session.headers,
-            progress_cb=progress.make_stream_callback() if progress else progress_cb,
+        return self._single_flight(
+            (bvid, page, "video", int(quality), codec), Path(dir) if dir is not None else self.default_dir,
+            filename, bvid=bvid, page=page, media_type="video",
+            work=lambda _: self._download_single_stream(bvid, dir, "video", page=page, quality=quality,
+                                                        progress_cb=progress_cb, progress=progress,
+                                                        filename=filename, info=info, codec=codec),
         )
-        if auto_progress:
-            progress.finish()
-        return DownloadResult(path=save_path, media_type="video", size=size)
 
     def download_audio(
             self,
@@ -403,49 +841,38 @@ class VideoService:
             progress_cb: Optional[ProgressCallback] = None,
             progress: Optional[BatchProgress] = None,
             filename: Optional[str] = None,
+            info: Optional[VideoInfo] = None,
     ) -> DownloadResult:
         """下载音频流。文件名为 `[标题](BV号).{实际格式}`，多P时含 P 序号。
 
+        中断后未完成的部分保留在 `<dir>/.bilitools_parts/`，下次调用从中断处继续（见 src.util.resume）。
+        保存目录里已有该分P合成好的视频时，直接从中提取音轨（stream copy），不再下载音频流。
+
         :param bvid: BV号
         :param dir: 保存目录。None 时使用默认下载目录
         :param page: 分P序号（从1开始），多P视频指定要下载的P
         :param progress_cb: 进度回调 (downloaded, total)
         :param progress: BatchProgress 进度显示（与 progress_cb 二选一，通常由批量接口传入）
         :param filename: 自定义文件名（含扩展名），None 时按统一命名规则生成
+        :param info: 可选：已有的视频信息（如合集内嵌的稿件数据），传入时不再请求 view 接口
         :return: DownloadResult
         """
         # 音频缓存检查不含 mp4：已存在的「视频」mp4 不能当作音频已下载而跳过（仅音频下载）
-        existing = self._find_downloaded_file(bvid, {"m4a", "mp3", "flac", "aac"}, page=page,
-                                              root=dir or self.default_dir)
-        # print(f"existing:{existing}")
+        existing = self._find_downloaded_file(bvid, _CACHE_EXTS["audio"], page=page, variant="audio",
+                                              root=dir or self.default_dir, link=True)
         if existing is not None:
             return DownloadResult(path=existing, media_type="audio", size=existing.stat().st_size, cached=True)
-
-        info, dash = self._fetch_streams(bvid, page)
-        stream = dash.best_audio()
-        if stream is None:
-            raise ValueError(f"视频 {bvid} 第 {page} 分P 没有可用的音频流。")
-
-        save_dir = Path(dir) if dir is not None else self.default_dir
-        save_dir.mkdir(parents=True, exist_ok=True)
-        if filename is None:
-            filename = self._default_filename(info, bvid, page, stream.ext)
-        save_path = save_dir / filename
-
-        # 修改：如果文件已经存在，则跳过下载
-        if save_path.exists():
-            return DownloadResult(path=save_path, media_type="audio", size=save_path.stat().st_size, cached=True)
-
-        # 单独调用时自动显示进度条
-        progress, auto_progress = self._auto_progress(filename, progress, progress_cb)
-
-        size = download_stream(
-            stream.url, save_path, self.session.session.headers,
-            progress_cb=progress.make_stream_callback() if progress else progress_cb,
+        return self._single_flight(
+            (bvid, page, "audio", 0), Path(dir) if dir is not None else self.default_dir, filename,
+            bvid=bvid, page=page, media_type="audio",
+            work=lambda _: (
+                self._extract_local_audio(bvid, Path(dir) if dir is not None else self.default_dir, page=page,
+                                          filename=filename, progress=progress, progress_cb=progress_cb)
+                or self._download_single_stream(bvid, dir, "audio", page=page, quality=VideoQuality.HD4K,
+                                                progress_cb=progress_cb, progress=progress,
+                                                filename=filename, info=info)
+            ),
         )
-        if auto_progress:
-            progress.finish()
-        return DownloadResult(path=save_path, media_type="audio", size=size)
 
     def download_video_with_audio(
             self,
@@ -458,12 +885,21 @@ class VideoService:
             progress_cb: Optional[ProgressCallback] = None,
             progress: Optional[BatchProgress] = None,
             filename: Optional[str] = None,
+            merge_pool: Optional[MergePool] = None,
+            info: Optional[VideoInfo] = None,
+            codec: Optional[CodecPolicy] = None,
     ) -> DownloadResult:
-        """下载视频流 + 音频流，并用 ffmpeg 合成为一个文件。
-
-        视频流与音频流先下载到临时目录（`<dir>/.tmp/`），合成成功后默认删除。
-        [注意] 合成依赖 ffmpeg（系统安装或 imageio-ffmpeg 库内置），两者都不可用时会
-        在下载前直接报错。
+        """下载视频流 + 音频流，并合成为一个文件。
+
+        视频流与音频流**同时**下载到 `<dir>/.bilitools_parts/<BV号>-Pxx/` 下的 `.part` 文件，
+        合成成功后默认删除。下载中断（崩溃/强制结束/断网）时 `.part` 与续传日志保留，下次调用
+        从中断处继续：直链未过期时直接复用（不再请求视频信息与 playurl），过期则重新获取直链。
+        开启 `stream_merge`（见 __init__）时视频流边下载边喂给 ffmpeg，不落临时文件
+        （`keep_parts=True` 或无 ffmpeg 时仍走普通模式；中断后续传未获 206 时视频流改用普通模式重新下载）。
+        进程内其他任务（另一个收藏夹 / 合集线程）正在下载同一分P的同一清晰度时，等待其完成并
+        硬链接复用其成品，不再重复拉取（见 src.util.inflight）。
+        [注意] avc1/hev1/av01 + mp4a 的常见流由内置重封装合成，不依赖 ffmpeg；其余编码
+        依赖 ffmpeg（系统安装或 imageio-ffmpeg 库内置），两者都不可用时会在下载前直接报错。
 
         :param bvid: BV号
         :param dir: 保存目录。None 时使用默认下载目录
@@ -473,34 +909,74 @@ class VideoService:
         :param progress_cb: 进度回调 (downloaded, total)。传入时将进度转发给回调
         :param progress: BatchProgress 进度显示（与 progress_cb 二选一，通常由批量接口传入）
         :param filename: 自定义文件名（含扩展名），None 时按统一命名规则生成
+        :param merge_pool: 合成线程池（并发批量下载时传入）。传入时两个流下载完即把合成交给该池并
+            立即返回，返回结果的 size 在合成完成后回填；None 时在本线程内合成
+        :param info: 可选：已有的视频信息（如合集内嵌的稿件数据），传入时不再请求 view 接口
+        :param codec: 编码选择策略（见 CodecPolicy），同一清晰度有多种编码时按它挑选；None 时使用服务的 codec_policy
         :return: DownloadResult
-        :raises FFmpegNotFoundError: 未检测到 ffmpeg 且未安装 imageio-ffmpeg
+        :raises FFmpegNotFoundError: 编码超出内置重封装的支持范围，且未检测到 ffmpeg / imageio-ffmpeg
         """
         # 修改：下载前先检查是否已经存在最终视频
-        existing = self._find_downloaded_file(bvid, {"mp4", "flv", "m4s"}, page=page,
-                                              root=dir or self.default_dir)
+        codec = codec if codec is not None else self.codec_policy
+        existing = self._find_downloaded_file(bvid, _CACHE_EXTS["video_with_audio"], page=page,
+                                              root=dir or self.default_dir,
+                                              variant=self._store_variant("video_with_audio", quality, codec),
+                                              link=True)
         if existing is not None:
             return DownloadResult(path=existing, media_type="video", size=existing.stat().st_size, cached=True)
 
-        import tempfile
+        save_dir = Path(dir) if dir is not None else self.default_dir
+        return self._single_flight(
+            (bvid, page, "video_with_audio", int(quality), codec), save_dir, filename,
+            bvid=bvid, page=page, media_type="video", merge_pool=merge_pool,
+            work=lambda pool: self._transfer_video_with_audio(
+                bvid, save_dir, page=page, quality=quality, keep_parts=keep_parts, progress_cb=progress_cb,
+                progress=progress, filename=filename, merge_pool=pool, info=info, codec=codec,
+            ),
+        )
 
-        # 预检合成后端：避免下载完几十 MB 后才报错
-        if not ffmpeg_available():
+    def _transfer_video_with_audio(
+            self,
+            bvid: str,
+            save_dir: Path,
+            *,
+            page: int,
+            quality: VideoQuality,
+            keep_parts: bool,
+            progress_cb: Optional[ProgressCallback],
+            progress: Optional[BatchProgress],
+            filename: Optional[str],
+            merge_pool: Optional[MergePool],
+            info: Optional[VideoInfo],
+            codec: Optional[CodecPolicy] = None,
+    ) -> DownloadResult:
+        """download_video_with_audio 的实际下载与合成（本地缓存检查与进程内单飞之后）。"""
+        # 跨进程续传：读取上次未完成下载的日志，直链未过期时直接复用
+        pdir = parts_dir(save_dir, bvid, page)
+        journals = self._load_journals(pdir, ("video", "audio"), quality, codec)
+        resumed = self._streams_from_journals(journals, ("video", "audio"))
+        if resumed is not None:
+            video_stream, audio_stream = resumed["video"], resumed["audio"]
+            if filename is None:
+                filename = journals["video"].filename
+        else:
+            info, dash = self._fetch_streams(bvid, page, info, need_info=filename is None)
+            video_stream = dash.pick_video(quality, codec)
+            audio_stream = dash.best_audio()
+            if video_stream is None or audio_stream is None:
+                raise ValueError(f"视频 {bvid} 第 {page} 分P 的视频流或音频流不可用，无法合成。")
+            if filename is None:
+                filename = self._default_filename(info, bvid, page, "mp4")
+
+        # 预检合成后端：避免下载完几十 MB 后才报错。常见编码走内置重封装，不依赖 ffmpeg
+        has_ffmpeg = ffmpeg_available()
+        if not has_ffmpeg and not remux_supported(video_stream.codecs, audio_stream.codecs):
             raise FFmpegNotFoundError(
-                "未检测到 ffmpeg，且未安装 imageio-ffmpeg 库，无法进行音视频合成。"
+                "未检测到 ffmpeg，且未安装 imageio-ffmpeg 库，无法合成该编码的音视频。"
                 "请安装 ffmpeg 并加入系统 PATH，或执行 `pip install imageio-ffmpeg` 使用内置 ffmpeg。"
             )
 
-        info, dash = self._fetch_streams(bvid, page)
-        video_stream = dash.pick_video(quality)
-        audio_stream = dash.best_audio()
-        if video_stream is None or audio_stream is None:
-            raise ValueError(f"视频 {bvid} 第 {page} 分P 的视频流或音频流不可用，无法合成。")
-
-        save_dir = Path(dir) if dir is not None else self.default_dir
         save_dir.mkdir(parents=True, exist_ok=True)
-        if filename is None:
-            filename = self._default_filename(info, bvid, page, "mp4")
         save_path = save_dir / filename
 
         if save_path.exists():
@@ -514,47 +990,127 @@ class VideoService:
             if picked is not None:
                 progress.set_quality(picked)
 
-        # 临时目录下载音视频流
-        with tempfile.TemporaryDirectory(prefix="bilitools_", dir=save_dir) as tmp:
-            tmp_dir = Path(tmp)
-            video_tmp = tmp_dir / f"video.{video_stream.ext}"
-            audio_tmp = tmp_dir / f"audio.{audio_stream.ext}"
-            # 进度：视频流+音频流字节增量累加（跨流不重置，总大小为两流之和）
-            _stream_state = {"id": 0, "last": 0}
-
-            def _stream_cb(done: int, total: Optional[int]) -> None:
-                if progress:
-                    # 每个流的 done 是流内绝对值，算增量后按流累加；流切换时 last 归零由外层处理
-                    delta = done - _stream_state["last"]
-                    progress.add(delta, total, stream_id=_stream_state["id"])
-                    _stream_state["last"] = done
-                elif progress_cb:
-                    progress_cb(done, total)
+        # 进度：视频流(id=0)+音频流(id=1)同时下载，各流字节增量累加（总大小为两流之和）；
+        # download_streams 在本线程内回调，线程安全的 progress 可按线程区分当前文件
+        _last = [0, 0]
+        _totals = [None, None]
 
+        def _stream_cb(stream_id: int, done: int, total: Optional[int]) -> None:
+            delta = done - _last[stream_id]
+            _last[stream_id] = done
+            _totals[stream_id] = total
+            if progress:
+                progress.add(delta, total, stream_id=stream_id)
+            elif progress_cb:
+                known = [t for t in _totals if t]
+                progress_cb(sum(_last), sum(known) if known else None)
+
+        def _journal(kind: str, stream) -> StreamJournal:
+            return self._journal_for(pdir, kind, stream, journals, bvid=bvid, page=page,
+                                     quality=quality, filename=filename)
+
+        def _record() -> None:
+            self._record_download(save_dir, save_path, bvid=bvid, page=page, media_type="video",
+                                  quality=video_stream.quality,
+                                  variant=self._store_variant("video_with_audio", quality, codec))
+
+        # 下载阶段出错时保留 .part 与日志供下次续传；普通模式合成阶段结束（成功或失败）后删除整个目录
+        pdir.mkdir(parents=True, exist_ok=True)
+        if self.stream_merge and has_ffmpeg and not keep_parts:
+            # 边下载边合成：音频流（小）先落盘，视频流字节直接喂给 ffmpeg；
+            # 成品先写在 .part 目录内，成功后原子改名，半成品不会被缓存检查误判为已下载。
+            # 失败时保留已下载的音频与日志，下次从中断处继续，只重新拉取视频流
+            audio_journal = _journal("audio", audio_stream)
             download_stream(
-                video_stream.url, video_tmp, self.session.session.headers,
-                progress_cb=_stream_cb,
+                audio_stream.url, audio_journal.part_path, self.session.session.headers,
+                progress_cb=lambda d, t: _stream_cb(1, d, t),
+                segments=self.segments, expected_size=audio_stream.size,
+                backup_urls=audio_stream.backup_urls, journal=audio_journal,
             )
             if progress:
-                progress.status("视频流下载完成，正在下载音频流...")
-                _stream_state["id"] = 1
-                _stream_state["last"] = 0  # 音频流从头计数
-            download_stream(
-                audio_stream.url, audio_tmp, self.session.session.headers,
-                progress_cb=_stream_cb,
+                progress.status("正在边下载边合成音视频...")
+            merged_tmp = pdir / f"merged{save_path.suffix}"
+            try:
+                stream_merge_video_audio(
+                    video_stream.url, audio_journal.part_path, merged_tmp, self.session.session.headers,
+                    progress_cb=lambda d, t: _stream_cb(0, d, t),
+                    backup_urls=video_stream.backup_urls,
+                )
+                merged_tmp.replace(save_path)
+            except StreamResumeError as e:
+                # 管道无法回退：视频流改用普通模式（落盘 + 续传日志）从头下载，再与已下载的音频合成
+                logger.warning("%s 边下载边合成续传失败，改用普通模式下载视频流：%s", filename, e)
+                _stream_cb(0, 0, _totals[0])  # 回退已计入进度的视频流字节
+                video_journal = _journal("video", video_stream)
+                download_stream(
+                    video_stream.url, video_journal.part_path, self.session.session.headers,
+                    progress_cb=lambda d, t: _stream_cb(0, d, t),
+                    segments=self.segments, expected_size=video_stream.size,
+                    backup_urls=video_stream.backup_urls, journal=video_journal,
+                )
+                if progress:
+                    progress.status("正在合成音视频...")
+                self._merge_parts(video_journal.part_path, audio_journal.part_path, save_path)
+            _record()
+            shutil.rmtree(pdir, ignore_errors=True)
+        else:
+            video_journal = _journal("video", video_stream)
+            audio_journal = _journal("audio", audio_stream)
+            download_streams(
+                [(video_stream.url, video_journal.part_path, video_stream.size, video_stream.backup_urls),
+                 (audio_stream.url, audio_journal.part_path, audio_stream.size, audio_stream.backup_urls)],
+                self.session.session.headers,
+                progress_cb=_stream_cb, segments=self.segments,
+                journals=[video_journal, audio_journal],
             )
+            exts = (video_stream.ext, audio_stream.ext) if keep_parts else None
+            if merge_pool is not None:
+                # 合成交给独立的合成线程池，本线程立即返回去下载下一个视频
+                result = DownloadResult(path=save_path, media_type="video")
+
+                def _merge_job() -> None:
+                    try:
+                        result.size = self._merge_parts(video_journal.part_path, audio_journal.part_path,
+                                                        save_path, keep_exts=exts)
+                        _record()
+                    finally:
+                        shutil.rmtree(pdir, ignore_errors=True)
+
+                merge_pool.submit(_merge_job, name=filename)
+                if auto_progress:
+                    progress.finish()
+                return result
             if progress:
-                progress.status("正在用 ffmpeg 合成音视频...")
-            merge_video_audio(video_tmp, audio_tmp, save_path, progress_cb=progress_cb)
-            if keep_parts:
-                # 保留临时文件到同级目录（重命名避免冲突）
-                video_tmp.replace(save_dir / f"{save_path.stem}.video.{video_stream.ext}")
-                audio_tmp.replace(save_dir / f"{save_path.stem}.audio.{audio_stream.ext}")
+                progress.status("正在合成音视频...")
+            try:
+                self._merge_parts(video_journal.part_path, audio_journal.part_path, save_path,
+                                  keep_exts=exts, progress_cb=progress_cb)
+                _record()
+            finally:
+                shutil.rmtree(pdir, ignore_errors=True)
 
         if auto_progress:
             progress.finish()
         return DownloadResult(path=save_path, media_type="video", size=save_path.stat().st_size)
 
+    @staticmethod
+    def _merge_parts(video_part: Path, audio_part: Path, save_path: Path, *,
+                     keep_exts: Optional[tuple] = None,
+                     progress_cb: Optional[ProgressCallback] = None) -> int:
+        """合成 `.part` 目录里的视频/音频流，返回成品字节数。
+
+        成品先写在 `.part` 目录内再原子改名，合成中途崩溃不会留下被缓存检查误判为已下载的半成品。
+        keep_exts=(视频扩展名, 音频扩展名) 时把两个流改名保留到成品同级目录。
+        """
+        merged = video_part.with_name(f"merged{save_path.suffix}")
+        merge_video_audio(video_part, audio_part, merged, progress_cb=progress_cb)
+        merged.replace(save_path)
+        if keep_exts:
+            # 保留临时文件到同级目录（重命名避免冲突）
+            video_part.replace(save_path.with_name(f"{save_path.stem}.video.{keep_exts[0]}"))
+            audio_part.replace(save_path.with_name(f"{save_path.stem}.audio.{keep_exts[1]}"))
+        return save_path.stat().st_size
+
     def download_cover(
             self,
             bvid: str,
@@ -563,6 +1119,7 @@ class VideoService:
             progress_cb: Optional[ProgressCallback] = None,
             progress: Optional[BatchProgress] = None,
             filename: Optional[str] = None,
+            info: Optional[VideoInfo] = None,
     ) -> DownloadResult:
         """下载视频封面。文件名为 `[标题](BV号).jpg/png`。
 
@@ -571,14 +1128,16 @@ class VideoService:
         :param progress_cb: 进度回调 (downloaded, total)
         :param progress: BatchProgress 进度显示（与 progress_cb 二选一，通常由批量接口传入）
         :param filename: 自定义文件名（含扩展名），None 时按统一命名规则生成
+        :param info: 可选：已有的视频信息（如合集内嵌的稿件数据）；其中没有封面地址时仍请求 view 接口
         :return: DownloadResult
         """
-        existing = self._find_downloaded_file(bvid, {"jpg", "jpeg", "png", "webp"},
-                                              root=dir or self.default_dir)
+        existing = self._find_downloaded_file(bvid, _CACHE_EXTS["cover"],
+                                              root=dir or self.default_dir, variant="cover", link=True)
         if existing is not None:
             return DownloadResult(path=existing, media_type="cover", size=existing.stat().st_size, cached=True)
 
-        info = self.fetch_info(bvid)
+        if info is None or not info.pic:
+            info = self.fetch_info(bvid)
         if not info.pic:
             raise ValueError(f"视频 {bvid} 的封面地址获取失败。")
 
@@ -597,6 +1156,7 @@ class VideoService:
 
         content = self.session.get_raw(info.pic)
         save_path.write_bytes(content)
+        self._record_download(save_dir, save_path, bvid=bvid, media_type="cover")
         if progress:
             progress.update(len(content), len(content))
         elif progress_cb:
@@ -614,6 +1174,10 @@ class VideoService:
             media_type: str = "video_with_audio",
             progress_cb: Optional[ProgressCallback] = None,
             progress: Optional[BatchProgress] = None,
+            merge_pool: Optional[MergePool] = None,
+            info: Optional[VideoInfo] = None,
+            codec: Optional[CodecPolicy] = None,
+            plan: Optional[DownloadPlan] = None,
     ) -> list:
         """下载多P视频的全部分P（单P视频等价于 download_video_with_audio）。
 
@@ -623,38 +1187,150 @@ class VideoService:
         :param media_type: 下载类型：video / audio / video_with_audio / cover
         :param progress_cb: 进度回调 (downloaded, total)
         :param progress: BatchProgress 进度显示；None 时自动创建
+        :param merge_pool: 合成线程池（video_with_audio 时转交 download_video_with_audio）
+        :param info: 可选：已有的视频信息（如收藏夹明细构造的标题 / 封面）；传入时不请求 view，
+            其中没有分P数据时只补取轻量的分P列表
+        :param codec: 编码选择策略（见 CodecPolicy），同一清晰度有多种编码时按它挑选；None 时使用服务的 codec_policy
+        :param plan: 可选：体积预算规划（见 plan_download），各分P按规划选定的清晰度与编码下载
         :return: DownloadResult 列表（每个分P一个）
         """
-        info = self.fetch_info(bvid)
-        if not info.pages:
+        if info is not None:
+            if not info.pages:
+                info = copy.copy(info)
+                info.pages = self.fetch_pages(bvid)
+                info.cid = info.pages[0].cid if info.pages else info.cid
+        elif not self._has_local_file(bvid, media_type, dir or self.default_dir,
+                                      variant=self._planned_variant(bvid, 1, media_type, quality, codec, plan)):
+            # 本地还没有该视频的任何文件：文件名需要标题，直接取完整信息；已有部分分P时先取轻量的
+            # 分P列表，只有未下载的分P需要文件名时才补取完整信息
+            info = self.fetch_info(bvid)
+        pages = info.pages if info is not None else self.fetch_pages(bvid)
+        if not pages:
             raise ValueError(f"视频 {bvid} 没有分P信息，无法批量下载。")
 
-        n = len(info.pages)
+        n = len(pages)
+        exts = _CACHE_EXTS.get(media_type, _CACHE_EXTS["video_with_audio"])
         progress = progress or BatchProgress(n=n, label=f"视频 {bvid}")
         results = []
-        for i, page_obj in enumerate(info.pages, 1):
-            # 进度显示用的文件名（与最终保存名一致）
-            display_ext = {"video": "mp4", "audio": "m4a", "cover": "jpg"}.get(media_type, "mp4")
-            display_name = self._default_filename(info, bvid, page_obj.page, display_ext)
+        for i, page_obj in enumerate(pages, 1):
+            q, c = plan.override(bvid, page_obj.page, quality, codec) if plan is not None else (quality, codec)
+            # 进度显示用的文件名（与最终保存名一致）：已下载的分P直接用已有文件名
+            existing = self._find_downloaded_file(
+                bvid, exts, page=None if media_type == "cover" else page_obj.page, root=dir or self.default_dir,
+                variant=self._planned_variant(bvid, page_obj.page, media_type, quality, codec, plan))
+            source = (self._find_audio_source(bvid, page_obj.page, dir or self.default_dir)
+                      if existing is None and media_type == "audio" else None)
+            if existing is not None:
+                display_name = existing.name
+            elif source is not None:
+                display_name = f"{source.stem}.m4a"  # 从已下载的合成视频提取音频，不需要标题
+            else:
+                if info is None:
+                    info = self.fetch_info(bvid)
+                display_ext = {"video": "mp4", "audio": "m4a", "cover": "jpg"}.get(media_type, "mp4")
+                display_name = self._default_filename(info, bvid, page_obj.page, display_ext)
             progress.start(i, display_name)
             # 逐P信息仅保留在 debug 日志（UI 已由 progress 的"正在下载 文件名"行表达）
             logger.debug("正在下载 %s 第 %d/%d 分P：%s",
                          bvid, page_obj.page, n, page_obj.part)
             if media_type == "video":
-                results.append(self.download_video(bvid, dir, page=page_obj.page, quality=quality,
-                                                   progress_cb=progress_cb, progress=progress))
+                results.append(self.download_video(bvid, dir, page=page_obj.page, quality=q,
+                                                   progress_cb=progress_cb, progress=progress, info=info,
+                                                   codec=c))
             elif media_type == "audio":
                 results.append(self.download_audio(bvid, dir, page=page_obj.page,
-                                                   progress_cb=progress_cb, progress=progress))
+                                                   progress_cb=progress_cb, progress=progress, info=info))
             elif media_type == "cover":
-                results.append(self.download_cover(bvid, dir, progress_cb=progress_cb, progress=progress))
+                results.append(self.download_cover(bvid, dir, progress_cb=progress_cb, progress=progress,
+                                                   info=info))
             else:  # video_with_audio
                 results.append(self.download_video_with_audio(bvid, dir, page=page_obj.page,
-                                                              quality=quality, progress_cb=progress_cb,
-                                                              progress=progress))
+                                                              quality=q, progress_cb=progress_cb,
+                                                              progress=progress, merge_pool=merge_pool,
+                                                              info=info, codec=c))
             progress.finish()
         return results
 
+    def plan_download(
+            self,
+            bvids: list,
+            dir: Optional[Path] = None,
+            *,
+            quality: VideoQuality = VideoQuality.HD4K,
+            media_type: str = "video_with_audio",
+            codec: Optional[CodecPolicy] = None,
+            budget: Optional[SizeBudget] = None,
+            infos: Optional[dict] = None,
+    ) -> DownloadPlan:
+        """体积预算规划 / 下载预演：取各分P的流列表（不下载任何字节），按预算为每个分P挑选清晰度。
+
+        本地已有的分P不请求网络，计 0 字节；其余分P各请求一次 playurl（结果进入请求缓存，随后的下载
+        在 cache_ttl 内直接复用）。预算的挑选规则见 src.util.size_budget。
+
+        [使用方法]
+            plan = service.plan_download(bvids, save_dir, budget=SizeBudget.from_mb(total_gb=50))
+            for line in plan.report():
+                print(line)
+
+        :param bvids: BV号列表（每个视频的全部分P都参与规划）
+        :param dir: 保存目录（用于本地缓存检查）。None 时使用默认下载目录
+        :param quality: 目标清晰度（预算只会在它的基础上降档）
+        :param media_type: 下载类型：video / audio / video_with_audio
+        :param codec: 编码选择策略（见 CodecPolicy）；None 时使用服务的 codec_policy
+        :param budget: 体积预算；None 时不限（只统计按 quality 下载的字节数）
+        :param infos: 可选：BV号 -> 已有的 VideoInfo（如收藏夹明细 / 合集稿件），其中的视频不再请求 view
+        :return: DownloadPlan
+        """
+        save_dir = Path(dir) if dir is not None else self.default_dir
+        codec = codec if codec is not None else self.codec_policy
+        infos = infos or {}
+        exts = _CACHE_EXTS.get(media_type, _CACHE_EXTS["video_with_audio"])
+        variant = self._store_variant(media_type, quality, codec)
+
+        def _plan_video(bvid: str) -> list:
+            info = infos.get(bvid)
+            try:
+                pages = info.pages if info is not None and info.pages else self.fetch_pages(bvid)
+                title = info.title if info is not None else bvid
+                target = VideoInfo(bvid=bvid, title=title, pages=pages)
+                items = []
+                for page_obj in pages:
+                    name = f"{title}-P{page_obj.page:02d}" if len(pages) > 1 else title
+                    if (self._find_downloaded_file(bvid, exts, page=page_obj.page, root=save_dir,
+                                                   variant=variant) is not None
+                            or (media_type == "audio" and self._find_audio_source(bvid, page_obj.page, save_dir))):
+                        items.append(PlannedItem(bvid, page_obj.page, name, cached=True))
+                        continue
+                    _, dash = self._fetch_streams(bvid, page_obj.page, target)
+                    audio = dash.best_audio()
+                    audio_size = audio.size if audio is not None else 0
+                    if media_type == "audio":
+                        options = [StreamOption(None, audio_size)] if audio is not None else []
+                    else:
+                        extra = audio_size if media_type == "video_with_audio" else 0
+                        options = [StreamOption(v, v.size + extra if v.size else 0)
+                                   for v in dash.video_options(quality, codec)]
+                    items.append(PlannedItem(bvid, page_obj.page, name, options))
+                return items
+            except Exception as e:
+                if not self._is_video_unavailable_error(e):
+                    raise
+                logger.warning("视频 %s 不可见，不计入下载计划（%s）。", bvid, e)
+                return []
+
+        with ThreadPoolExecutor(max_workers=max(1, self.api_workers)) as pool:
+            planned = list(pool.map(_plan_video, bvids))
+        return DownloadPlan([item for items in planned for item in items], budget).allocate()
+
+    def _budget_plan(self, bvids: list, save_dir: Path, *, label: str, **kwargs) -> DownloadPlan:
+        """批量下载前的体积规划：逐文件记录计划字节数，整批超出预算时给出警告。"""
+        plan = self.plan_download(bvids, save_dir, **kwargs)
+        for line in plan.report():
+            logger.info("%s 下载计划 %s", label, line)
+        if plan.over_budget:
+            logger.warning("%s 全部降到最低清晰度仍超出预算，按最低清晰度下载。", label)
+        return plan
+
     def fetch_season(self, bvid: Optional[str] = None, season_id: Optional[int] = None,
                      mid: int = 0) -> Optional[VideoSeason]:
         """获取合集信息（含合集内全部稿件结构）。bvid 与 season_id 任选其一。
@@ -673,18 +1349,31 @@ class VideoService:
             except ValueError:
                 return None
             meta = data.get("meta") or {}
+            archives = data.get("archives", [])
+            # archives 条目不含分P信息；任一稿件的 view 里都内嵌了整个合集（ugc_season，含各稿件
+            # 分P与 cid），请求一次即可补全全部稿件，内嵌数据缺失的稿件再用轻量的 pagelist 补全
+            embedded = {}
+            first_bvid = next((a.get("bvid") for a in archives if a.get("bvid")), "")
+            if first_bvid:
+                first_season = self.fetch_info(first_bvid).season
+                if first_season is not None:
+                    embedded = {ep.bvid: ep for ep in first_season.episodes if ep.pages}
             episodes = []
-            for a in data.get("archives", []):
+            for a in archives:
                 bvid = a.get("bvid", "")
-                # archives 条目不含分P信息，补一次 fetch_info 拿完整 pages
-                pages = self.fetch_info(bvid).pages if bvid else []
+                ep = embedded.get(bvid)
+                pages = ep.pages if ep is not None else (self.fetch_pages(bvid) if bvid else [])
                 first_cid = pages[0].cid if pages else 0
                 episodes.append(VideoSeasonEpisode(
                     bvid=bvid,
                     aid=a.get("aid", 0),
                     cid=first_cid,
                     title=a.get("title", ""),
+                    section=ep.section if ep is not None else "",
                     pages=pages,
+                    video_title=a.get("title", ""),
+                    pic=a.get("pic", ""),
+                    pub_time=a.get("pubdate", 0),
                 ))
             return VideoSeason(
                 id=meta.get("season_id", season_id),
@@ -707,13 +1396,17 @@ class VideoService:
             file_idx: int,
             progress: Optional[BatchProgress] = None,
             progress_cb: Optional[ProgressCallback] = None,
+            merge_pool: Optional[MergePool] = None,
+            codec: Optional[CodecPolicy] = None,
+            plan: Optional[DownloadPlan] = None,
     ) -> tuple[list, int]:
         """下载合集内单个稿件（多P稿件逐P下载），返回 (新增结果列表, 更新后的累计文件序号)。
 
         文件序号用于合集级进度条 `[file_idx/N]` 的累计显示；
         各分P的下载方法内部会先检查本地缓存，命中的分P直接返回 cached 结果，不再请求网络。
+        稿件带有合集内嵌的分P数据时直接用它请求 playurl，不再请求 view 接口（缺失时才 fetch_info）。
         """
-        info = self.fetch_info(episode.bvid)
+        info = episode.to_video_info() or self.fetch_info(episode.bvid)
         new_results = []
         page_objs = episode.pages if episode.is_multi_page else [
             VideoPage(page=1, cid=info.cid or 0, part=info.title)]
@@ -722,19 +1415,23 @@ class VideoService:
             display_ext = {"video": "mp4", "audio": "m4a", "cover": "jpg"}.get(media_type, "mp4")
             display_name = self._default_filename(info, episode.bvid, page_obj.page, display_ext)
             progress.start(file_idx, display_name)
+            q, c = (plan.override(episode.bvid, page_obj.page, quality, codec) if plan is not None
+                    else (quality, codec))
             if media_type == "video":
-                result = self.download_video(episode.bvid, save_dir, page=page_obj.page, quality=quality,
-                                             progress_cb=progress_cb, progress=progress)
+                result = self.download_video(episode.bvid, save_dir, page=page_obj.page, quality=q,
+                                             progress_cb=progress_cb, progress=progress, info=info,
+                                             codec=c)
             elif media_type == "audio":
                 result = self.download_audio(episode.bvid, save_dir, page=page_obj.page,
-                                             progress_cb=progress_cb, progress=progress)
+                                             progress_cb=progress_cb, progress=progress, info=info)
             elif media_type == "cover":
                 result = self.download_cover(episode.bvid, save_dir,
-                                             progress_cb=progress_cb, progress=progress)
+                                             progress_cb=progress_cb, progress=progress, info=info)
             else:  # video_with_audio
                 result = self.download_video_with_audio(episode.bvid, save_dir, page=page_obj.page,
-                                                        quality=quality, progress_cb=progress_cb,
-                                                        progress=progress)
+                                                        quality=q, progress_cb=progress_cb,
+                                                        progress=progress, merge_pool=merge_pool,
+                                                        info=info, codec=c)
             new_results.append(result)
             progress.finish()
         return new_results, file_idx
@@ -743,11 +1440,21 @@ class VideoService:
         """并发分账用的服务列表：每个账号一个独立会话的 VideoService。
 
         传空/None 时返回 `[self]`（全部任务用当前账号）；否则为每个 session 建一个
-        VideoService（同 default_dir），供并发任务按下标轮询分摊账号。
+        VideoService（同 default_dir），供并发任务分摊账号（见 AccountDispatcher）。
+        各账号有独立的请求节奏控制器：一个账号触发风控只让它自己减速。
         """
         if not account_sessions:
             return [self]
-        return [VideoService(session=s, default_dir=self.default_dir) for s in account_sessions]
+        services = [VideoService(session=s, default_dir=self.default_dir, segments=self.segments,
+                                 stream_merge=self.stream_merge, merge_workers=self.merge_workers,
+                                 cache_ttl=self.cache_ttl, api_workers=self.api_workers,
+                                 codec_policy=self.codec_policy)
+                    for s in account_sessions]
+        for svc in services:
+            svc.store = self.store  # 媒体库各账号共用：任一账号下载的文件其他账号直接复用
+            svc._memo = self._request_memo()  # 视频信息各账号通用；playurl 缓存键含账号，互不串用
+            svc.pacer = Pacer()
+        return services
 
     def download_season(
             self,
@@ -763,17 +1470,20 @@ class VideoService:
             season: Optional[VideoSeason] = None,
             threads: int = 1,
             account_sessions: Optional[list] = None,
-    ) -> list:
+            codec: Optional[CodecPolicy] = None,
+            budget: Optional[SizeBudget] = None,
+            dry_run: bool = False,
+    ) -> Union[list, DownloadPlan]:
         """下载整个合集。`bvid` 与 `season_id` 任选其一。
 
         - 传 `bvid`：从合集内任意一个视频进入，反查合集并下载全部稿件；
         - 传 `season_id`：按合集 sid 直接下载（如 sid=8683221 或 sid=1717000）。
 
         每个稿件若有多个分P，则逐P下载。文件保存到 `<dir>/<合集标题>/`。
-        `threads > 1` 时多个稿件并发下载（需配合线程安全的 progress）；任一稿件触发
-        风控时，所有线程在下一次获取信息前各自随机暂停。
-        `account_sessions` 非空时，并发线程**均匀分摊到各账号**（任务按下标轮询账号），
-        降低单个账号的风控风险。
+        `threads > 1` 时多个稿件并发下载（需配合线程安全的 progress）；某个账号触发风控时，
+        只有使用该账号的线程在下一次获取信息前各自随机暂停，该账号进入冷却期。
+        `account_sessions` 非空时，每个任务交给当前代价最低的账号（进行中任务少、耗时短、出错少，
+        冷却期的账号排到最后，见 AccountDispatcher），降低单个账号的风控风险。
 
         :param bvid: 合集内任意一个视频的BV号
         :param dir: 保存根目录。None 时使用默认下载目录
@@ -786,9 +1496,13 @@ class VideoService:
         :param season: 可选：外部已获取的合集结构（VideoSeason）。传入时跳过内部重复反查
             （GUI 场景会先取合集用于进度总数，传回此处避免请求两次）；None 时内部自动获取
         :param threads: 并发下载线程数（>1 启用并发，需线程安全的 progress）
-        :param account_sessions: 可选：多个账号的 BiliSession 列表，用于把并发任务均匀
-            分摊到各账号（多账号降风控）；None 时全部任务使用当前账号
-        :return: DownloadResult 列表
+        :param account_sessions: 可选：多个账号的 BiliSession 列表，并发任务按各账号的代价调度，
+            风控只让触发它的账号冷却（多账号降风控）；None 时全部任务使用当前账号
+        :param codec: 编码选择策略（见 CodecPolicy），同一清晰度有多种编码时按它挑选；None 时使用服务的 codec_policy
+        :param budget: 可选：体积预算（见 SizeBudget）。下载前先规划（见 plan_download）并逐文件记录计划字节数，
+            再按规划为每个分P选择不超预算的最高清晰度
+        :param dry_run: 只规划不下载：返回 DownloadPlan（逐文件的计划字节数见 DownloadPlan.report）
+        :return: DownloadResult 列表（dry_run 时为 DownloadPlan）
         :raises ValueError: 无法定位合集
         """
         if season is None:
@@ -800,17 +1514,25 @@ class VideoService:
         save_dir = (Path(dir) if dir is not None else self.default_dir) / season.title
         save_dir.mkdir(parents=True, exist_ok=True)
 
+        label = f"合集「{season.title}」"
+        plan = None
+        if budget is not None or dry_run:
+            infos = {ep.bvid: ep.to_video_info() for ep in season.episodes}
+            plan = self._budget_plan([ep.bvid for ep in season.episodes], save_dir, label=label, quality=quality,
+                                     media_type=media_type, codec=codec, budget=budget, infos=infos)
+            if dry_run:
+                return plan
+
         # 计算总共要下载的文件数（多P稿件按分P数计），驱动进度
         file_count = sum(len(ep.pages) if ep.is_multi_page else 1 for ep in season.episodes)
         if progress is None:
             progress = (ParallelBatchProgress(n=file_count, label=f"合集「{season.title}」")
                         if threads > 1 else BatchProgress(n=file_count, label=f"合集「{season.title}」"))
 
-        label = f"合集「{season.title}」"
         total = len(season.episodes)
         if threads > 1:
             return self._download_season_parallel(
-                season, save_dir, quality=quality, media_type=media_type,
+                season, save_dir, quality=quality, codec=codec, plan=plan, media_type=media_type,
                 progress=progress, progress_cb=progress_cb, label=label, threads=threads,
                 services=self._account_services(account_sessions),
             )
@@ -824,7 +1546,7 @@ class VideoService:
             outcome = self._execute_batch_download(
                 episode.bvid,
                 lambda ep=episode, start_idx=file_idx: self._download_episode(
-                    ep, save_dir, media_type=media_type, quality=quality,
+                    ep, save_dir, media_type=media_type, quality=quality, codec=codec, plan=plan,
                     file_idx=start_idx, progress=progress, progress_cb=progress_cb,
                 ),
                 label=label,
@@ -839,25 +1561,25 @@ class VideoService:
         return results
 
     def _download_season_parallel(self, season, save_dir, *, quality, media_type,
-                                  progress, progress_cb, label, threads, services) -> list:
-        """合集并发下载：每个稿件一个线程，共享风控协调器；任务按下标轮询 services 分摊账号。"""
-        gate = RiskGate()
+                                  progress, progress_cb, label, threads, services, codec=None, plan=None) -> list:
+        """合集并发下载：按稿件走批量流水线（见 _run_batch_pipeline），由账号调度器在 services 间按代价分配任务。"""
         counter = _FileCounter()
 
-        def _work(episode, i):
-            svc = services[i % len(services)]
+        def _transfer(svc, episode, pool):
             num_pages = len(episode.pages) if episode.is_multi_page else 1
-            start_idx = counter.reserve(num_pages)
-            return svc._execute_batch_download(
-                episode.bvid,
-                lambda ep=episode, sidx=start_idx: svc._download_episode(
-                    ep, save_dir, media_type=media_type, quality=quality,
-                    file_idx=sidx, progress=progress, progress_cb=progress_cb,
-                ),
-                label=label, risk_gate=gate,
+            return svc._download_episode(
+                episode, save_dir, media_type=media_type, quality=quality, codec=codec, plan=plan,
+                file_idx=counter.reserve(num_pages), progress=progress, progress_cb=progress_cb,
+                merge_pool=pool,
             )
 
-        outcomes = _parallel_run(season.episodes, _work, threads)
+        outcomes = self._run_batch_pipeline(
+            season.episodes, save_dir, bvid_of=lambda ep: ep.bvid,
+            pages_of=lambda ep, pages: ep.pages if ep.is_multi_page else pages[:1],
+            transfer=_transfer, media_type=media_type, progress=progress, label=label,
+            threads=threads, services=services, info_of=lambda ep: ep.to_video_info(),
+            variant_of=lambda bvid, page: self._planned_variant(bvid, page, media_type, quality, codec, plan),
+        )
         # 顺序汇总（结果按输入顺序，日志不交错）
         results = []
         download_count = 0
@@ -872,6 +1594,148 @@ class VideoService:
             )
         return results
 
+    def _download_bvids_parallel(self, bvids, save_dir, *, quality, media_type,
+                                 progress, progress_cb, label, threads, account_sessions,
+                                 infos: Optional[dict] = None, codec: Optional[CodecPolicy] = None,
+                                 plan: Optional[DownloadPlan] = None) -> list:
+        """收藏夹 / UP主并发下载：每个视频（含全部分P）走批量流水线，按输入顺序汇总结果。
+
+        infos（BV号 -> 已有的 VideoInfo，如收藏夹明细）中的视频不再请求 view 接口。
+        """
+        infos = infos or {}
+        outcomes = self._run_batch_pipeline(
+            bvids, save_dir, bvid_of=lambda b: b, pages_of=lambda b, pages: pages,
+            transfer=lambda svc, b, pool: svc.download_all_pages(
+                b, save_dir, quality=quality, media_type=media_type, codec=codec, plan=plan,
+                progress=progress, progress_cb=progress_cb, merge_pool=pool, info=infos.get(b),
+            ),
+            media_type=media_type, progress=progress, label=label, threads=threads,
+            services=self._account_services(account_sessions), info_of=infos.get,
+            variant_of=lambda bvid, page: self._planned_variant(bvid, page, media_type, quality, codec, plan),
+        )
+        results = []
+        download_count = 0
+        total = len(bvids)
+        for i, (bvid, outcome) in enumerate(zip(bvids, outcomes), 1):
+            if outcome is None:
+                logger.warning("视频 %s 不可见，跳过（%s），进度 %d/%d。", bvid, label, i, total)
+                continue
+            results.extend(outcome)
+            download_count = self._report_bvid_download(bvid, outcome, download_count, i, total)
+        return results
+
+    def _run_batch_pipeline(self, items, save_dir, *, bvid_of, pages_of, transfer, media_type,
+                            progress, label, threads, services, info_of=None, variant_of=None) -> list:
+        """并发批量下载的分阶段流水线（见 src.util.pipeline）。
+
+        1. 解析（api_workers 个线程）：获取分P列表——本地没有该视频任何文件时取完整视频信息
+           （文件名需要标题），否则只取轻量的 pagelist；info_of 能给出已有信息的任务跳过这一步
+           （只有标题没有分P时只取 pagelist）；
+        2. 直链（api_workers 个线程）：为未命中本地缓存的分P预取 playurl；
+        3. 传输（threads 个线程）：调用 transfer(svc, item, merge_pool) 下载字节，此时视频信息与
+           直链已在请求缓存中（见 RequestMemo），不再发 API 请求；
+        4. 合成：交给共享的合成线程池（merge_workers 个线程），传输线程不等待合成。
+
+        阶段间队列容量为 2×threads，预取最多领先传输 2×threads 个视频。预取只是加速：
+        预取失败（风控除外会让该账号暂停并冷却）时由传输阶段照常请求并按原有规则重试/跳过。
+        账号调度（AccountDispatcher）：每个任务交给当前代价最低的账号（进行中任务少、耗时短、
+        出错/风控少），风控冷却期的账号排到最后，登录失效的账号被移出；传输阶段优先沿用
+        预取时的账号以命中其直链缓存。风控只让触发它的账号暂停，其余账号照常工作。
+
+        :param items: 任务列表（BV号或合集稿件）
+        :param save_dir: 保存目录（预取阶段据此检查本地缓存）
+        :param bvid_of: item -> BV号
+        :param pages_of: (item, 分P列表) -> 需要下载的 VideoPage 列表
+        :param transfer: (svc, item, merge_pool) -> 该任务的结果
+        :param info_of: 可选：item -> 已有的 VideoInfo（如合集内嵌的稿件数据、收藏夹明细）或 None
+        :param variant_of: 可选：(BV号, 分P序号) -> 媒体库中的版本（见 _planned_variant，须与传输阶段
+            下载时的版本一致）；预取阶段的缓存检查据此命中媒体库，None 时不查媒体库
+        :return: 按输入顺序的结果列表；视频不可见被跳过的为 None
+        """
+        gate = RiskGate()
+        dispatcher = AccountDispatcher(services, key=lambda svc: svc._account_key(), risk_gate=gate)
+        # 共享连接池按并发连接数扩容：每线程视频流 + 音频流，各流 segments 个连接
+        ensure_pool_size(threads * 2 * max(self.segments, 1))
+        exts = _CACHE_EXTS.get(media_type, _CACHE_EXTS["video_with_audio"])
+
+        def _prefetch(bvid, fetch, *, hint=0, prefer=None) -> tuple:
+            """由调度器选账号执行一次预取请求 fetch(svc)。
+
+            :return: (结果, 视频是否不可见, 所用服务)；其余失败时结果为 None
+            """
+            svc = dispatcher.acquire(hint=hint, prefer=prefer)
+            gate.pause_before_fetch(account=svc._account_key())
+            started = time.monotonic()
+            try:
+                result = fetch(svc)  # 实际请求经 svc._api_get 取时间片，缓存命中不等待
+            except Exception as e:
+                dispatcher.release(svc, time.monotonic() - started, e)
+                if svc._is_video_unavailable_error(e):
+                    return None, True, svc
+                if svc._is_risk_control_error(e):
+                    gate.mark_risk(svc._account_key())
+                logger.debug("预取 %s 失败，交由下载阶段处理：%s", bvid, e)
+                return None, False, svc
+            dispatcher.release(svc, time.monotonic() - started)
+            return result, False, svc
+
+        def _resolve(item, i):
+            info = info_of(item) if info_of is not None else None
+            if info is not None and info.pages:
+                return item, info.pages, False, None  # 已有视频信息：不请求，账号留给直链阶段挑选
+            bvid = bvid_of(item)
+            variant = variant_of(bvid, 1) if variant_of is not None else None
+            if info is None and (media_type == "cover"
+                                 or not self._has_local_file(bvid, media_type, save_dir, variant=variant)):
+                info, unavailable, svc = _prefetch(bvid, lambda s: s.fetch_info(bvid), hint=i)
+                return item, info.pages if info is not None else None, unavailable, svc
+            pages, unavailable, svc = _prefetch(bvid, lambda s: s.fetch_pages(bvid), hint=i)
+            return item, pages, unavailable, svc
+
+        def _playurl(payload, i):
+            item, pages, unavailable, svc = payload
+            if pages is None or media_type == "cover" or self.cache_ttl <= 0:
+                return payload
+            bvid = bvid_of(item)
+            titled = info_of is not None and info_of(item) is not None
+            for page in pages_of(item, pages):
+                variant = variant_of(bvid, page.page) if variant_of is not None else None
+                if (self._find_downloaded_file(bvid, exts, page=page.page, root=save_dir, variant=variant) is not None
+                        or parts_dir(save_dir, bvid, page.page).exists()
+                        or (media_type == "audio"
+                            and self._find_audio_source(bvid, page.page, save_dir) is not None)):
+                    continue  # 已下载 / 有续传日志 / 可从合成视频提取音频：下载阶段不需要新直链
+                if not titled and self._request_memo().peek(("view", bvid)) is None:
+                    # 只取了分P列表：有分P要新下载时文件名需要标题，在这里补取完整信息
+                    _, unavailable, svc = _prefetch(bvid, lambda s: s.fetch_info(bvid), hint=i, prefer=svc)
+                    if unavailable:
+                        break
+                titled = True
+                _, unavailable, svc = _prefetch(
+                    bvid, lambda s: s.get_playurl(bvid, page.cid), hint=i, prefer=svc)
+                if unavailable:
+                    break
+            return item, pages, unavailable, svc
+
+        with MergePool(self.merge_workers, progress=progress) as pool:
+            def _transfer(payload, i):
+                item, _, unavailable, svc = payload
+                bvid = bvid_of(item)
+                if unavailable:
+                    logger.warning("视频 %s 不可见，跳过（%s）。", bvid, label)
+                    return None
+                return self._execute_batch_download(
+                    bvid, lambda s: transfer(s, item, pool), label=label, risk_gate=gate,
+                    dispatcher=dispatcher, prefer=svc,
+                )
+
+            api = max(self.api_workers, 1)
+            return run_pipeline(items, [
+                Stage("resolve", _resolve, api),
+                Stage("playurl", _playurl, api),
+                Stage("transfer", _transfer, threads),
+            ], lookahead=threads * 2)
+
     # ---- 统一下载接口 ----
 
     def download(self, bvid: str, dir: Optional[Path] = None) -> list:
@@ -909,13 +1773,24 @@ class VideoService:
             bvids: Optional[list] = None,
             threads: int = 1,
             account_sessions: Optional[list] = None,
-    ) -> list:
+            incremental: bool = False,
+            medias: Optional[list] = None,
+            codec: Optional[CodecPolicy] = None,
+            budget: Optional[SizeBudget] = None,
+            dry_run: bool = False,
+    ) -> Union[list, DownloadPlan]:
         """下载整个收藏夹的全部视频（有声音）或仅音频。
 
         逐个下载收藏夹内的视频，保存到 `<dir>/<收藏夹名称>/`（默认 `output/video/<收藏夹名称>/`）。
         每个视频若有分P则逐P下载。下载带进度显示（含清晰度标签）。
-        `threads > 1` 时多个视频并发下载；任一视频触发风控时所有线程在下一次获取信息前各自随机暂停。
-        `account_sessions` 非空时，并发任务**均匀分摊到各账号**（按下标轮询），降低单个账号风控风险。
+        `threads > 1` 时多个视频并发下载；某个账号触发风控时，只有使用该账号的线程在下一次获取信息前
+        各自随机暂停，该账号进入冷却期。
+        `account_sessions` 非空时，每个任务交给当前代价最低的账号（进行中任务少、耗时短、出错少，
+        冷却期的账号排到最后，见 AccountDispatcher），降低单个账号的风控风险。
+        视频列表取自一次返回全部 BV 号的 resource/ids 接口（见 FavService.get_fav_bv）；增量过滤之后
+        只为排进队列的视频请求包含它们的明细页（见 FavService.list_fav_medias_of）：
+        标题、封面、分P数与首P cid 随明细返回，不再逐个请求 view；单P视频直接用首P cid 请求直链，
+        多P视频只补取轻量的分P列表；已失效的条目在排队前跳过。
 
         [使用方法]
             service = VideoService()
@@ -929,77 +1804,117 @@ class VideoService:
         :param quality: 目标清晰度（精确匹配，默认 HD4K 最高）
         :param progress_cb: 进度回调 (downloaded, total)
         :param progress: BatchProgress 进度显示（与 progress_cb 二选一，通常由 UI 传入以获取逐文件事件）
-        :param bvids: 可选：外部已获取的收藏夹视频 BV 号列表。传入时跳过内部重复拉取
-            （GUI 场景会先取列表用于进度总数，传回此处避免请求两次）；None 时内部自动获取
+        :param bvids: 可选：外部已获取的收藏夹视频 BV 号列表（get_fav_bv 的返回值，GUI 场景先取列表
+            用于进度总数，传回此处避免请求两次）；排进队列的视频仍按它在列表中的位置补取明细
+        :param medias: 可选：外部已获取的收藏夹明细（FavMedia 列表）；传入时直接使用，不再请求明细。
+            bvids 与 medias 都为 None 时内部获取 BV 号列表
         :param threads: 并发下载线程数（>1 启用并发，需线程安全的 progress）
-        :param account_sessions: 可选：多个账号的 BiliSession 列表，用于把并发任务均匀
-            分摊到各账号（多账号降风控）；None 时全部任务使用当前账号
-        :return: DownloadResult 列表
+        :param account_sessions: 可选：多个账号的 BiliSession 列表，并发任务按各账号的代价调度，
+            风控只让触发它的账号冷却（多账号降风控）；None 时全部任务使用当前账号
+        :param incremental: 增量同步：只下载上次同步（见 src.util.sync_state）之后新收藏的视频
+            （按收藏顺序连续遇到若干个已见过的视频才停止，见 SyncState.unseen），只为它们补取明细；整轮完成后记录本轮见到的视频；
+            没有新视频时返回空列表
+        :param codec: 编码选择策略（见 CodecPolicy），同一清晰度有多种编码时按它挑选；None 时使用服务的 codec_policy
+        :param budget: 可选：体积预算（见 SizeBudget）。下载前先规划（见 plan_download）并逐文件记录计划字节数，
+            再按规划为每个分P选择不超预算的最高清晰度
+        :param dry_run: 只规划不下载：返回 DownloadPlan（逐文件的计划字节数见 DownloadPlan.report）
+        :return: DownloadResult 列表（dry_run 时为 DownloadPlan）
         """
         from src.services.fav import FavService
 
         fav = FavService(self.session)
         info = fav.get_fav_info(fid)
-        if bvids is None:
-            bvids = fav.get_fav_bv(fid)
+        infos = {}
+        if medias is not None:
+            for media in medias:
+                if media.is_valid:
+                    infos[media.bvid] = media.to_video_info()
+                else:
+                    logger.info("收藏夹「%s」跳过已失效条目：%s（%s）", info.title, media.bvid or media.aid, media.title)
+            bvids = list(infos)
+        order = bvids if bvids is not None else fav.get_fav_bv(fid)
+        bvids = list(order)
+        root = Path(dir) if dir is not None else self.default_dir
+        sync_store = SyncStore(root) if incremental else None
+        if sync_store is not None:
+            state = sync_store.load("fav", fid) or SyncState("fav", fid)
+            # 收藏顺序从新到旧：连续遇到若干个已见过的视频才停止（重新收藏的旧视频会排到最前面）
+            bvids = state.unseen(bvids)
+            if not bvids:
+                logger.info("收藏夹「%s」没有新视频。", info.title)
+                return []
         if not bvids:
             raise ValueError(f"收藏夹「{info.title}」没有视频。")
 
-        save_dir = (Path(dir) if dir is not None else self.default_dir) / info.title
+        save_dir = root / info.title
         save_dir.mkdir(parents=True, exist_ok=True)
 
         media_type = "audio" if mode == "audio" else "video_with_audio"
         label = f"收藏夹「{info.title}」"
+        if medias is None:
+            bvids = self._fill_fav_medias(fav, fid, bvids, order, infos, label=label)
+            if not bvids:
+                logger.info("%s没有可下载的视频。", label)
+                return []
+        plan = None
+        if budget is not None or dry_run:
+            plan = self._budget_plan(bvids, save_dir, label=label, quality=quality, media_type=media_type,
+                                     codec=codec, budget=budget, infos=infos)
+            if dry_run:
+                return plan
         total = len(bvids)
         if progress is None:
             progress = (ParallelBatchProgress(n=total, label=label)
                         if threads > 1 else BatchProgress(n=total, label=label))
 
         if threads > 1:
-            gate = RiskGate()
-            services = self._account_services(account_sessions)
-
-            def _work(bvid, i):
-                svc = services[i % len(services)]
-                return svc._execute_batch_download(
-                    bvid,
-                    lambda b=bvid: svc.download_all_pages(
-                        b, save_dir, quality=quality, media_type=media_type,
-                        progress=progress, progress_cb=progress_cb,
-                    ),
-                    label=label, risk_gate=gate,
-                )
-
-            outcomes = _parallel_run(bvids, _work, threads)
+            results = self._download_bvids_parallel(
+                bvids, save_dir, quality=quality, media_type=media_type, progress=progress,
+                progress_cb=progress_cb, label=label, threads=threads, account_sessions=account_sessions,
+                infos=infos, codec=codec, plan=plan,
+            )
+        else:
             results = []
             download_count = 0
-            for i, (bvid, outcome) in enumerate(zip(bvids, outcomes), 1):
-                if outcome is None:
-                    print(f"跳过不可见视频 {bvid}，进度 {i}/{total}")
+            for i, bvid in enumerate(bvids):
+                logger.info("收藏夹「%s」下载：%s", info.title, bvid)
+                new_results = self._execute_batch_download(
+                    bvid,
+                    lambda: self.download_all_pages(bvid, save_dir, quality=quality, media_type=media_type,
+                                                    progress=progress, progress_cb=progress_cb,
+                                                    info=infos.get(bvid), codec=codec, plan=plan),
+                    label=label,
+                )
+                if new_results is None:
+                    print(f"跳过不可见视频 {bvid}，进度 {i + 1}/{len(bvids)}")
                     continue
-                results.extend(outcome)
-                download_count = self._report_bvid_download(bvid, outcome, download_count, i, total)
-            return results
-
-        results = []
-        download_count = 0
-        for i, bvid in enumerate(bvids):
-            logger.info("收藏夹「%s」下载：%s", info.title, bvid)
-            new_results = self._execute_batch_download(
-                bvid,
-                lambda: self.download_all_pages(bvid, save_dir, quality=quality, media_type=media_type,
-                                                progress=progress, progress_cb=progress_cb),
-                label=label,
-            )
-            if new_results is None:
-                print(f"跳过不可见视频 {bvid}，进度 {i + 1}/{len(bvids)}")
-                continue
-            results.extend(new_results)
-            download_count = self._report_bvid_download(
-                bvid, new_results, download_count, i + 1, len(bvids),
-            )
+                results.extend(new_results)
+                download_count = self._report_bvid_download(
+                    bvid, new_results, download_count, i + 1, len(bvids),
+                )
+        if sync_store is not None:
+            sync_store.save(state.advance(bvids))
         return results
 
+    def _fill_fav_medias(self, fav, fid: int, bvids: list, order: list, infos: dict, *, label: str) -> list:
+        """只为排进队列的收藏夹视频补取明细（见 FavService.list_fav_medias_of），写入 infos。
+
+        增量同步时队列里只有新收藏的视频，只请求它们所在的明细页。本地已有文件的视频也取明细：
+        判断多P视频是否下完需要分P数，同一明细页 20 个视频只算一次请求，比逐个补取分P列表便宜。
+        明细里已失效的条目从队列中移除；不在推算页里的视频（收藏夹在期间变动）保留，按原方式请求视频信息。
+
+        :return: 去掉已失效条目后的 BV 号列表
+        """
+        found = fav.list_fav_medias_of(fid, bvids, order)
+        dropped = set()
+        for bvid, media in found.items():
+            if media.is_valid:
+                infos[bvid] = media.to_video_info()
+            else:
+                dropped.add(bvid)
+                logger.info("%s跳过已失效条目：%s（%s）", label, bvid, media.title)
+        return [bvid for bvid in bvids if bvid not in dropped]
+
     # ---- UP主空间 ----
 
     def _resolve_mid(self, mid: Optional[int]) -> int:
@@ -1025,24 +1940,58 @@ class VideoService:
         :param ps: 每页数量（最大 50）
         :return: 视频bv号列表
         """
+        return [bvid for bvid, _ in self._list_up_entries(mid, ps)]
+
+    def _list_up_entries(self, mid: Optional[int], ps: int = 30, *,
+                         known: Optional[set] = None, since: int = 0) -> list:
+        """按发布时间从新到旧获取 UP 主投稿，返回 [(BV号, 发布时间)]。
+
+        全量获取时第 1 页拿到总数后，其余页由 api_workers 个线程并发获取（见 src.util.paginate），
+        按页序拼接并按 BV 号去重（翻页期间有新投稿时条目会被挤到下一页）。
+        增量同步时传入 known / since：逐页获取，遇到第一个已见过的视频，或发布时间早于 since 的
+        视频即停止翻页（之后的都是更早的投稿），只返回此前的新增视频。
+
+        :param mid: UP主 mid
+        :param ps: 每页数量（最大 50）
+        :param known: 已见过的 BV 号集合
+        :param since: 上次同步的发布时间高水位（Unix 秒）
+        """
         from src.api.auth import get_wbi
         from src.urls.user_urls import UserUrls
-        import time
         mid = self._resolve_mid(mid)
-        bvids = []
-        pn = 1
-        while True:
+        pacer = self.get_pacer()
+
+        def fetch_page(pn: int) -> tuple:
             params = {"mid": mid, "pn": pn, "ps": ps, "order": "pubdate"}
-            get_wbi(params)  # 原地追加 wts 与 w_rid
+            get_wbi(params)  # 原地追加 wts 与 w_rid（每页各自签名）
             data = self.session.get(UserUrls.SPACE_ARC_SEARCH, params=params)
-            vlist = data.get("list", {}).get("vlist", [])
-            bvids.extend(v.get("bvid") for v in vlist)
-            total = data.get("page", {}).get("count", 0)
-            if len(bvids) >= total or not vlist:
+            return data.get("list", {}).get("vlist", []), data.get("page", {}).get("count", 0)
+
+        def entry(v) -> tuple:
+            return v.get("bvid"), int(v.get("created") or 0)
+
+        if not known and not since:
+            vlist = fetch_all_pages(fetch_page, page_size=ps, workers=max(self.api_workers, 1),
+                                    key=lambda v: v.get("bvid"), pacer=pacer)
+            return [entry(v) for v in vlist]
+
+        entries = []
+        seen = 0
+        pn = 1
+        while True:
+            # 翻页间隔由节奏控制器决定（接口健康时加快，风控后减速）
+            vlist, total = pacer.call(lambda: fetch_page(pn))
+            for v in vlist:
+                bvid, created = entry(v)
+                if bvid in known or (since and created and created < since):
+                    logger.info("UP主 %s 增量同步：在第 %d 页遇到已同步的视频，停止翻页。", mid, pn)
+                    return entries
+                entries.append((bvid, created))
+            seen += len(vlist)
+            if seen >= total or not vlist:
                 break
             pn += 1
-            time.sleep(0.3)  # 避免风控
-        return bvids
+        return entries
 
     def download_up(
             self,
@@ -1056,13 +2005,19 @@ class VideoService:
             bvids: Optional[list] = None,
             threads: int = 1,
             account_sessions: Optional[list] = None,
-    ) -> list:
+            incremental: bool = False,
+            codec: Optional[CodecPolicy] = None,
+            budget: Optional[SizeBudget] = None,
+            dry_run: bool = False,
+    ) -> Union[list, DownloadPlan]:
         """下载某个 UP 主空间的全部视频（有声音）或仅音频。
 
         逐个下载该 UP 主的所有投稿，保存到 `<dir>/<UP主昵称>/`（默认 `output/video/<昵称>/`）。
         每个视频若有分P则逐P下载，带进度显示。
-        `threads > 1` 时多个视频并发下载；任一视频触发风控时所有线程在下一次获取信息前各自随机暂停。
-        `account_sessions` 非空时，并发任务**均匀分摊到各账号**（按下标轮询），降低单个账号风控风险。
+        `threads > 1` 时多个视频并发下载；某个账号触发风控时，只有使用该账号的线程在下一次获取信息前
+        各自随机暂停，该账号进入冷却期。
+        `account_sessions` 非空时，每个任务交给当前代价最低的账号（进行中任务少、耗时短、出错少，
+        冷却期的账号排到最后，见 AccountDispatcher），降低单个账号的风控风险。
 
         [使用方法]
             service = VideoService()
@@ -1079,70 +2034,81 @@ class VideoService:
         :param bvids: 可选：外部已获取的 UP 主视频 BV 号列表。传入时跳过内部重复翻页拉取
             （GUI 场景会先取列表用于进度总数，传回此处避免请求两次）；None 时内部自动获取
         :param threads: 并发下载线程数（>1 启用并发，需线程安全的 progress）
-        :param account_sessions: 可选：多个账号的 BiliSession 列表，用于把并发任务均匀
-            分摊到各账号（多账号降风控）；None 时全部任务使用当前账号
-        :return: DownloadResult 列表
+        :param account_sessions: 可选：多个账号的 BiliSession 列表，并发任务按各账号的代价调度，
+            风控只让触发它的账号冷却（多账号降风控）；None 时全部任务使用当前账号
+        :param incremental: 增量同步：翻页遇到上次同步（见 src.util.sync_state）已见过的视频即停止，
+            只下载新投稿，整轮完成后记录本轮见到的视频；没有新视频时返回空列表
+        :param codec: 编码选择策略（见 CodecPolicy），同一清晰度有多种编码时按它挑选；None 时使用服务的 codec_policy
+        :param budget: 可选：体积预算（见 SizeBudget）。下载前先规划（见 plan_download）并逐文件记录计划字节数，
+            再按规划为每个分P选择不超预算的最高清晰度
+        :param dry_run: 只规划不下载：返回 DownloadPlan（逐文件的计划字节数见 DownloadPlan.report）
+        :return: DownloadResult 列表（dry_run 时为 DownloadPlan）
         """
         from src.services.user import UserService
 
         mid = self._resolve_mid(mid)
-        if bvids is None:
+        root = Path(dir) if dir is not None else self.default_dir
+        sync_store = SyncStore(root) if incremental else None
+        high_water = 0
+        if sync_store is not None:
+            state = sync_store.load("up", mid) or SyncState("up", mid)
+            known = state.known()
+            if bvids is None:
+                entries = self._list_up_entries(mid, known=known, since=state.high_water)
+                bvids = [bvid for bvid, _ in entries]
+                high_water = max((created for _, created in entries), default=0)
+            else:
+                bvids = [bvid for bvid in bvids if bvid not in known]
+            if not bvids:
+                logger.info("UP主 %s 没有新视频。", mid)
+                return []
+        elif bvids is None:
             bvids = self.list_up_videos(mid)
         if not bvids:
             raise ValueError(f"UP主 {mid} 没有视频。")
 
         up_name = UserService(self.session).get_name(mid) or f"up_{mid}"
-        save_dir = (Path(dir) if dir is not None else self.default_dir) / up_name
+        save_dir = root / up_name
         save_dir.mkdir(parents=True, exist_ok=True)
 
         media_type = "audio" if mode == "audio" else "video_with_audio"
         label = f"UP主「{up_name}」"
+        plan = None
+        if budget is not None or dry_run:
+            plan = self._budget_plan(bvids, save_dir, label=label, quality=quality, media_type=media_type,
+                                     codec=codec, budget=budget)
+            if dry_run:
+                return plan
         total = len(bvids)
         if progress is None:
             progress = (ParallelBatchProgress(n=total, label=label)
                         if threads > 1 else BatchProgress(n=total, label=label))
 
         if threads > 1:
-            gate = RiskGate()
-            services = self._account_services(account_sessions)
-
-            def _work(bvid, i):
-                svc = services[i % len(services)]
-                return svc._execute_batch_download(
-                    bvid,
-                    lambda b=bvid: svc.download_all_pages(
-                        b, save_dir, quality=quality, media_type=media_type,
-                        progress=progress, progress_cb=progress_cb,
-                    ),
-                    label=label, risk_gate=gate,
-                )
-
-            outcomes = _parallel_run(bvids, _work, threads)
+            results = self._download_bvids_parallel(
+                bvids, save_dir, quality=quality, media_type=media_type, progress=progress,
+                progress_cb=progress_cb, label=label, threads=threads, account_sessions=account_sessions,
+                codec=codec, plan=plan,
+            )
+        else:
             results = []
             download_count = 0
-            for i, (bvid, outcome) in enumerate(zip(bvids, outcomes), 1):
-                if outcome is None:
+            for i, bvid in enumerate(bvids):
+                logger.info("UP主「%s」下载：%s", up_name, bvid)
+                new_results = self._execute_batch_download(
+                    bvid,
+                    lambda: self.download_all_pages(bvid, save_dir, quality=quality, media_type=media_type,
+                                                    progress=progress, progress_cb=progress_cb, codec=codec,
+                                                    plan=plan),
+                    label=label,
+                )
+                if new_results is None:
                     logger.warning("视频 %s 不可见，跳过。", bvid)
                     continue
-                results.extend(outcome)
-                download_count = self._report_bvid_download(bvid, outcome, download_count, i, total)
-            return results
-
-        results = []
-        download_count = 0
-        for i, bvid in enumerate(bvids):
-            logger.info("UP主「%s」下载：%s", up_name, bvid)
-            new_results = self._execute_batch_download(
-                bvid,
-                lambda: self.download_all_pages(bvid, save_dir, quality=quality, media_type=media_type,
-                                                progress=progress, progress_cb=progress_cb),
-                label=label,
-            )
-            if new_results is None:
-                logger.warning("视频 %s 不可见，跳过。", bvid)
-                continue
-            results.extend(new_results)
-            download_count = self._report_bvid_download(
-                bvid, new_results, download_count, i + 1, len(bvids),
-            )
+                results.extend(new_results)
+                download_count = self._report_bvid_download(
+                    bvid, new_results, download_count, i + 1, len(bvids),
+                )
+        if sync_store is not None:
+            sync_store.save(state.advance(bvids, high_water=high_water))
         return results
@@ -10,6 +10,7 @@ class FavUrls:
     """收藏夹接口。"""
 
     RESOURCE_IDS = f"{API_BASE}/x/v3/fav/resource/ids"  # 获取收藏夹内视频（by media_id，一次性返回全部 id）
+    RESOURCE_LIST = f"{API_BASE}/x/v3/fav/resource/list"  # 收藏夹内容明细（分页，含标题/封面/分P数/时长）
     FOLDER_INFO = f"{API_BASE}/x/v3/fav/folder/info"  # 收藏夹详情（名称/数量）
 
     @staticmethod
@@ -0,0 +1,177 @@
+"""
+多账号调度器：按各账号的健康状况把下一个任务分给当前最合适的账号，取代按下标 `i % len` 的静态轮询。
+
+静态轮询下，一个被限流或登录失效的账号仍会分到 1/N 的任务，拖慢整批下载。
+调度器为每个账号记录：进行中的任务数、最近耗时、出错率、风控率与登录是否有效，
+每次取账号时选「代价」最低的一个。
+
+[设计]
+- 代价 = (进行中任务数 + 1) × 最近耗时（EWMA，不低于 LATENCY_FLOOR）× (1 + 出错率 × ERROR_WEIGHT
+  + 风控率 × RISK_WEIGHT)；出错率 / 风控率同样是 EWMA（最近的结果权重更高）；
+- 传入 risk_gate 时，处于风控冷却期的账号排在所有健康账号之后（全部冷却时取最早结束冷却的）；
+- 代价相同时从 `hint`（通常为任务下标）开始轮询，账号全部健康时仍按下标均匀分摊；
+- 请求抛出 BiliAuthError（cookie 失效）时该账号被**移出调度**，之后不再分到任务；
+  全部账号都失效时 `acquire()` 抛出 BiliAuthError；
+- 视频不存在等业务错误（BiliAPIError）与账号无关，不计入出错率。
+
+[使用方法]
+    dispatcher = AccountDispatcher(sessions, key=id)
+    result = dispatcher.call(lambda session: download(session, item), hint=i)
+    # 或手动借还：
+    account = dispatcher.acquire(hint=i)
+    ...
+    dispatcher.release(account, elapsed, error)
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from src.api.errors import BiliAPIError, BiliAuthError
+from src.util.pacing import is_risk_error
+
+logger = logging.getLogger(__name__)
+
+LATENCY_FLOOR = 0.05  # 耗时下限（秒）：过短的耗时一律按此计，避免毫秒级抖动左右调度
+EWMA_ALPHA = 0.2  # 耗时 / 出错率 / 风控率的平滑系数（越大越看重最近一次）
+ERROR_WEIGHT = 4.0  # 出错率对代价的放大系数
+RISK_WEIGHT = 8.0  # 风控率对代价的放大系数
+
+
+@dataclass
+class AccountStats:
+    """单个账号的调度统计。"""
+
+    in_flight: int = 0  # 进行中的任务数
+    latency: Optional[float] = None  # 最近耗时（秒，EWMA）；None 表示尚无成功记录
+    error_rate: float = 0.0  # 出错率（EWMA，0~1）
+    risk_rate: float = 0.0  # 风控率（EWMA，0~1）
+    calls: int = 0  # 已完成的任务数
+    ejected: bool = False  # 登录失效，已移出调度
+
+    def cost(self) -> float:
+        """该账号接下一个任务的代价（越小越优先）。"""
+        latency = max(self.latency if self.latency is not None else 0.0, LATENCY_FLOOR)
+        penalty = 1.0 + self.error_rate * ERROR_WEIGHT + self.risk_rate * RISK_WEIGHT
+        return (self.in_flight + 1) * latency * penalty
+
+
+def _ewma(old: float, sample: float) -> float:
+    return old + EWMA_ALPHA * (sample - old)
+
+
+class AccountDispatcher:
+    """线程安全的健康加权多账号调度器。"""
+
+    def __init__(self, accounts: list, *, key: Callable[[Any], Any] = id, risk_gate=None):
+        """
+        :param accounts: 候选账号（BiliSession，或持有账号的对象如各账号的 VideoService）
+        :param key: 元素 -> 账号标识（与 RiskGate.mark_risk 的 account 一致）
+        :param risk_gate: 可选的 RiskGate；处于冷却期的账号排在健康账号之后
+        """
+        if not accounts:
+            raise ValueError("至少需要一个账号")
+        self.accounts = list(accounts)
+        self.key = key
+        self.risk_gate = risk_gate
+        self._lock = threading.Lock()
+        self._stats = [AccountStats() for _ in self.accounts]
+
+    def _index(self, account) -> int:
+        for i, candidate in enumerate(self.accounts):
+            if candidate is account:
+                return i
+        raise ValueError("账号不属于该调度器")
+
+    def _cooldown(self, account) -> float:
+        if self.risk_gate is None:
+            return 0.0
+        return self.risk_gate.cooldown_remaining(self.key(account))
+
+    @property
+    def live(self) -> list:
+        """登录仍有效（未被移出调度）的账号。"""
+        with self._lock:
+            return [a for a, s in zip(self.accounts, self._stats) if not s.ejected]
+
+    def stats(self, account) -> AccountStats:
+        """account 的调度统计快照。"""
+        with self._lock:
+            return AccountStats(**vars(self._stats[self._index(account)]))
+
+    def acquire(self, hint: int = 0, prefer=None):
+        """为下一个任务选择账号，并计入该账号的进行中任务数。
+
+        :param hint: 代价相同时的轮询起点（通常为任务下标）
+        :param prefer: 优先使用的账号（如预取阶段已用过的账号，可命中其请求缓存）；
+            只要它未被移出且不在冷却期就直接选它
+        :return: 选中的账号（须配对调用 release）
+        :raises BiliAuthError: 全部账号登录均已失效
+        """
+        n = len(self.accounts)
+        cooldowns = [self._cooldown(a) for a in self.accounts]
+        with self._lock:
+            live = [i for i in range(n) if not self._stats[i].ejected]
+            if not live:
+                raise BiliAuthError("全部账号的登录均已失效，请重新登录。")
+            chosen = None
+            if prefer is not None:
+                i = self._index(prefer)
+                if not self._stats[i].ejected and cooldowns[i] <= 0:
+                    chosen = i
+            if chosen is None:
+                chosen = min(live, key=lambda i: (
+                    cooldowns[i] > 0, cooldowns[i], self._stats[i].cost(), (i - hint) % n))
+            self._stats[chosen].in_flight += 1
+            return self.accounts[chosen]
+
+    def release(self, account, elapsed: float, error: Optional[BaseException] = None) -> None:
+        """任务结束：归还账号并按结果更新统计。
+
+        :param account: acquire 返回的账号
+        :param elapsed: 任务耗时（秒）
+        :param error: 任务抛出的异常；None 表示成功
+        """
+        with self._lock:
+            stats = self._stats[self._index(account)]
+            stats.in_flight = max(stats.in_flight - 1, 0)
+            stats.calls += 1
+            if isinstance(error, BiliAuthError):
+                if not stats.ejected:
+                    stats.ejected = True
+                    logger.warning("[dispatcher] 账号登录已失效，移出调度：%s", error)
+                return
+            risk = error is not None and is_risk_error(error)
+            failed = error is not None and not risk and not isinstance(error, BiliAPIError)
+            stats.risk_rate = _ewma(stats.risk_rate, 1.0 if risk else 0.0)
+            stats.error_rate = _ewma(stats.error_rate, 1.0 if failed else 0.0)
+            if error is None:
+                stats.latency = elapsed if stats.latency is None else _ewma(stats.latency, elapsed)
+
+    def call(self, fn: Callable[[Any], Any], *, hint: int = 0, prefer=None) -> Any:
+        """选账号执行 fn(account)；账号登录失效时移出调度并换其他账号重试。
+
+        :param fn: 以选中账号调用的任务
+        :param hint: 见 acquire
+        :param prefer: 见 acquire
+        :return: fn 的返回值
+        :raises Exception: fn 的其余异常原样抛出；全部账号失效时抛出 BiliAuthError
+        """
+        while True:
+            account = self.acquire(hint=hint, prefer=prefer)
+            started = time.monotonic()
+            try:
+                result = fn(account)
+            except BiliAuthError as e:
+                self.release(account, time.monotonic() - started, e)
+                if not self.live:
+                    raise
+                prefer = None
+                continue
+            except Exception as e:
+                self.release(account, time.monotonic() - started, e)
+                raise
+            self.release(account, time.monotonic() - started)
+            return result
@@ -1,28 +1,46 @@
 """
 下载工具：DASH 流的下载与音视频合成。
 
-- `download_stream`     下载单个媒体流到本地文件（流式写入，支持进度回调）；
+- `download_stream`     下载单个媒体流到本地文件（流式写入，支持进度回调；可选多连接分段下载）；
+- `download_streams`    并发下载多个媒体流（如同一视频的视频流 + 音频流），进度回调回到调用线程；
 - `merge_video_audio`   合成音视频到单文件（subprocess 列表参数，避免 shell 注入）；
+- `stream_merge_video_audio` 边下载边合成：视频流字节直接经 stdin 喂给 ffmpeg，不落临时文件；
+- `extract_audio`       从已合成的视频文件中取出音频轨道（stream copy）；
 - `ffmpeg_available`    合成后端可用性探测（带缓存）。
 
-合成后端按优先级探测：系统 PATH 中的 ffmpeg → imageio-ffmpeg 库内置的静态 ffmpeg
-（pip 依赖，wheel 自带二进制，无需手动安装 ffmpeg）。
+所有下载请求经 `src.util.transport` 的进程级 keep-alive 连接池发出，同一 CDN 主机的连接
+在流、重试、分段与文件之间复用。
+
+合成优先使用内置的纯 Python fMP4 重封装（`src.util.remux`，覆盖 avc1/hev1/av01 + mp4a
+的常见 DASH 流，不启动子进程）；超出其支持范围时回退到 ffmpeg，按优先级探测：
+系统 PATH 中的 ffmpeg → imageio-ffmpeg 库内置的静态 ffmpeg（pip 依赖，wheel 自带二进制，
+无需手动安装 ffmpeg）。
 
 由旧 `src/utils.py` 的 `merge_video_audio`（os.system 拼接）迁移并加固而来。
 """
 
 import logging
+import queue
 import shutil
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Callable, Optional
 
-from src.api.errors import DownloadError, FFmpegNotFoundError
+from src.api.errors import DownloadError, FFmpegNotFoundError, StreamResumeError
+from src.config.constants import SEGMENT_MIN_SIZE
+from src.util import mirror, transport
+from src.util.remux import RemuxUnsupportedError, extract_audio_track, remux_dash
+from src.util.resume import StreamJournal
 
 logger = logging.getLogger(__name__)
 
 # 进度回调签名：已下载字节数, 总字节数（总字节数可能为 None/0）
 ProgressCallback = Callable[[int, Optional[int]], None]
+# 多流进度回调签名：流序号, 该流已下载字节数, 该流总字节数
+MultiStreamProgressCallback = Callable[[int, int, Optional[int]], None]
 
 # 合成后端探测结果缓存（避免每次调用都执行 which / 导入 imageio）
 _ffmpeg_checked: bool = False
@@ -74,6 +92,10 @@ def download_stream(
     progress_cb: Optional[ProgressCallback] = None,
     chunk_size: int = 1024 * 256,
     max_retries: int = 3,
+    segments: int = 1,
+    expected_size: Optional[int] = None,
+    backup_urls: Optional[list] = None,
+    journal: Optional[StreamJournal] = None,
 ) -> int:
     """
     下载单个媒体流（如 DASH 视频/音频流）到本地文件。
@@ -86,32 +108,118 @@ def download_stream(
     Content）——若服务器忽略 Range 返回 200 全量内容，会丢弃半截文件从头下载，
     避免把全量内容追加到半截文件后造成文件损坏。
 
+    `segments > 1` 时启用**多连接分段下载**：CDN 通常按连接限速，把流切成 N 个字节
+    区间并发拉取，各区间写入预分配文件的对应偏移，失败的区间单独重试（每段各自
+    `max_retries` 次）。先用 `Range: bytes=0-0` 探测总大小；服务器不支持 Range、
+    总大小未知或文件太小（每段不足 `SEGMENT_MIN_SIZE`）时自动回退到单连接下载。
+
+    传入 `backup_urls`（playurl 的 backupUrl）时启用**镜像选择**（见 `src.util.mirror`）：
+    按进程内缓存的主机评分排序候选（未评分的主机先探测 TTFB），从最优镜像开始下载；
+    某镜像出错或吞吐崩塌时切到下一个镜像，用 Range 从已下载位置续传。
+
+    传入 `journal`（见 `src.util.resume`）时进度持续记录到旁路日志，进程重启后可**跨进程续传**：
+    save_path 应为对应的 `.part` 文件；日志标记已完成时直接返回，记录了分段表时按分段表继续。
+
     :param url: 媒体直链
     :param save_path: 保存路径（父目录需已存在）
     :param headers: 请求头（用于补充 Cookie/Referer）
     :param progress_cb: 进度回调 (downloaded, total)
     :param chunk_size: 分块大小（字节）
-    :param max_retries: 断点续传的最大重试次数
+    :param max_retries: 断点续传的最大重试次数（分段模式下为每段的重试次数）
+    :param segments: 并发连接数（1 为单连接，>1 启用分段下载）
+    :param expected_size: 预期文件大小（如 VideoStream.size）。已知且过小时跳过分段探测请求
+    :param backup_urls: 备用镜像直链（如 VideoStream.backup_urls）；None/空时只用 url
+    :param journal: 跨进程续传日志；None 时不记录
     :return: 下载的文件大小（字节）
     :raises DownloadError: 下载失败（重试后仍失败）
     """
-    import requests
-
     save_path = Path(save_path)
     save_path.parent.mkdir(parents=True, exist_ok=True)
+    size_on_disk = save_path.stat().st_size if save_path.exists() else -1
+    if journal is not None and journal.complete and size_on_disk == journal.bytes_written:
+        # 上次已下载完成（如音频流完成、视频流中断）：不再请求网络
+        if progress_cb:
+            progress_cb(size_on_disk, size_on_disk)
+        return size_on_disk
+    urls = mirror.rank_urls([url, *backup_urls], headers) if backup_urls else [url]
+
+    if journal is not None and journal.segments:
+        total = journal.segments[-1][1] + 1
+        if size_on_disk == total:
+            # 按日志中的分段表继续（每段从已落盘的位置续传）
+            try:
+                size = _download_segmented(
+                    urls, save_path, headers, total, len(journal.segments),
+                    progress_cb=progress_cb, chunk_size=chunk_size, max_retries=max_retries,
+                    journal=journal,
+                )
+                journal.finish(size)
+                return size
+            except _RangeIgnored:
+                logger.warning("[download_stream] 分段请求未获 206，回退到单连接下载：%s", url)
+        # 分段表与 .part 文件对不上（或服务器不再支持 Range）：从头单连接下载
+        save_path.unlink(missing_ok=True)
+        journal.checkpoint(0, segments=[])
+    elif segments > 1 and (not expected_size or expected_size >= SEGMENT_MIN_SIZE * 2) and size_on_disk <= 0:
+        total = _probe_range(urls[0], headers)
+        n = min(segments, total // SEGMENT_MIN_SIZE) if total else 0
+        if n > 1:
+            try:
+                size = _download_segmented(
+                    urls, save_path, headers, total, n,
+                    progress_cb=progress_cb, chunk_size=chunk_size, max_retries=max_retries,
+                    journal=journal,
+                )
+                if journal is not None:
+                    journal.finish(size)
+                return size
+            except _RangeIgnored:
+                logger.warning("[download_stream] 分段请求未获 206，回退到单连接下载：%s", url)
+                save_path.unlink(missing_ok=True)
+                if journal is not None:
+                    journal.checkpoint(0, segments=[])
+    size = _download_single(
+        urls, save_path, headers,
+        progress_cb=progress_cb, chunk_size=chunk_size, max_retries=max_retries, journal=journal,
+    )
+    if journal is not None:
+        journal.finish(size)
+    return size
+
+
+class _SlowMirror(Exception):
+    """当前镜像吞吐崩塌，切换镜像后续传（不计入重试次数）。"""
+
+
+def _download_single(
+    urls: list,
+    save_path: Path,
+    headers: Optional[dict],
+    *,
+    progress_cb: Optional[ProgressCallback],
+    chunk_size: int,
+    max_retries: int,
+    journal: Optional[StreamJournal] = None,
+) -> int:
+    """单连接下载（带断点续传与镜像切换），见 download_stream。"""
+    import requests
 
+    cursor = mirror.MirrorCursor(urls)
     total: Optional[int] = None
     last_error: Optional[Exception] = None
+    attempt = 0
 
-    for attempt in range(max_retries + 1):
+    while attempt <= max_retries:
+        url = cursor.url
         downloaded = save_path.stat().st_size if save_path.exists() else 0
         req_headers = dict(headers) if headers else {}
         resuming = downloaded > 0
         if resuming:
             # 断点续传：从已下载位置继续
             req_headers["Range"] = f"bytes={downloaded}-"
+        watch = mirror.SpeedWatch()
         try:
-            resp = requests.get(url, headers=req_headers, stream=True, timeout=30)
+            resp = transport.media_get(url, headers=req_headers, stream=True, timeout=30)
             resp.raise_for_status()
             if resuming and resp.status_code != 206:
                 # 服务器忽略/不支持 Range（返回 200 全量内容等）：
@@ -135,17 +243,242 @@ def download_stream(
                         downloaded += len(chunk)
                         if progress_cb:
                             progress_cb(downloaded, total)
+                        if journal is not None:
+                            journal.checkpoint(downloaded)
+                        if watch.feed(len(chunk)) and cursor.can_switch:
+                            resp.close()
+                            raise _SlowMirror(f"吞吐跌破峰值的 1/{watch.ratio}")
+            mirror.record_speed(url, watch.total, watch.elapsed())
             return downloaded
+        except _SlowMirror as e:
+            cursor.fail(str(e))
         except (requests.RequestException, OSError) as e:
             last_error = e
             logger.warning(
                 "[download_stream]第%d次下载%s失败（已下载%d字节）：%s",
                 attempt + 1, url, downloaded, e,
             )
-            if attempt >= max_retries:
-                break
+            attempt += 1
+            if attempt <= max_retries and len(cursor.urls) > 1:
+                cursor.fail(str(e))
             # 继续循环：从 save_path 当前大小续传
-    raise DownloadError(f"下载失败：{url}，原因：{last_error}") from last_error
+    raise DownloadError(f"下载失败：{urls[0]}，原因：{last_error}") from last_error
+
+
+class _RangeIgnored(Exception):
+    """分段请求未获 206（服务器忽略 Range），由 download_stream 回退到单连接下载。"""
+
+
+def _probe_range(url: str, headers: Optional[dict]) -> Optional[int]:
+    """用 `Range: bytes=0-0` 探测服务器是否支持分段请求。
+
+    :return: 支持时返回 Content-Range 中的文件总大小；不支持/探测失败时返回 None
+    """
+    import requests
+
+    req_headers = dict(headers) if headers else {}
+    req_headers["Range"] = "bytes=0-0"
+    try:
+        resp = transport.media_get(url, headers=req_headers, stream=True, timeout=30)
+        resp.raise_for_status()
+    except requests.RequestException as e:
+        logger.warning("[download_stream] 分段探测失败，使用单连接下载：%s（%s）", url, e)
+        return None
+    try:
+        if resp.status_code != 206:
+            return None
+        # Content-Range: bytes 0-0/123456
+        size = resp.headers.get("Content-Range", "").rsplit("/", 1)[-1].strip()
+        return int(size) if size.isdigit() else None
+    finally:
+        resp.close()
+
+
+def _split_ranges(total: int, n: int) -> list:
+    """把 [0, total) 均分为 n 个闭区间 [(start, end), ...]（最后一段吸收余数）。"""
+    step = total // n
+    return [(i * step, total - 1 if i == n - 1 else (i + 1) * step - 1) for i in range(n)]
+
+
+def _download_segmented(
+    urls: list,
+    save_path: Path,
+    headers: Optional[dict],
+    total: int,
+    segments: int,
+    *,
+    progress_cb: Optional[ProgressCallback],
+    chunk_size: int,
+    max_retries: int,
+    journal: Optional[StreamJournal] = None,
+) -> int:
+    """多连接分段下载：预分配文件，各区间并发写入对应偏移，失败区间单独续传重试。
+
+    每段各持一个镜像游标：某段出错或吞吐崩塌时只有该段切换镜像。
+    传入 journal 时分段表写入日志；日志已有分段表时沿用其区间与各段进度（跨进程续传）。
+    某段失败（含服务器忽略 Range）时其余段在下一个分块处停止，回退单连接下载前不再白白多拉字节。
+
+    :raises _RangeIgnored: 某段请求返回非 206（服务器忽略 Range）
+    :raises DownloadError: 某段重试后仍失败，或最终字节数与总大小不符
+    """
+    import requests
+
+    if journal is not None and journal.segments:
+        ranges = [(start, end) for start, end, _ in journal.segments]
+        done = [seg_done for _, _, seg_done in journal.segments]
+    else:
+        ranges = _split_ranges(total, segments)
+        done = [0] * len(ranges)  # 各段已写入字节（重试时从 start + done 续传）
+        # 预分配：各段按偏移写入，文件长度一次到位
+        with open(save_path, "wb") as f:
+            f.truncate(total)
+        if journal is not None:
+            journal.segments = [[start, end, 0] for start, end in ranges]
+            journal.save()
+    lock = threading.Lock()
+    cancelled = threading.Event()  # 某段失败后置位：其余段停止下载
+    if progress_cb and any(done):
+        progress_cb(sum(done), total)
+
+    def _fetch(i: int) -> None:
+        start, end = ranges[i]
+        cursor = mirror.MirrorCursor(urls)
+        last_error: Optional[Exception] = None
+        attempt = 0
+        while attempt <= max_retries:
+            offset = start + done[i]
+            if offset > end or cancelled.is_set():
+                return
+            url = cursor.url
+            req_headers = dict(headers) if headers else {}
+            req_headers["Range"] = f"bytes={offset}-{end}"
+            watch = mirror.SpeedWatch()
+            try:
+                resp = transport.media_get(url, headers=req_headers, stream=True, timeout=30)
+                resp.raise_for_status()
+                if resp.status_code != 206:
+                    resp.close()
+                    raise _RangeIgnored(url)
+                with open(save_path, "r+b") as f:
+                    f.seek(offset)
+                    for chunk in resp.iter_content(chunk_size=chunk_size):
+                        if not chunk:
+                            continue
+                        chunk = chunk[:end + 1 - (start + done[i])]  # 防御：不越过本段末尾
+                        f.write(chunk)
+                        if journal is not None:
+                            f.flush()  # 日志只记录已落盘的字节
+                        with lock:  # 回调也在锁内：保证各段上报的累计值单调递增
+                            done[i] += len(chunk)
+                            if progress_cb:
+                                progress_cb(sum(done), total)
+                            if journal is not None:
+                                journal.checkpoint(sum(done), [[s, e, d] for (s, e), d in zip(ranges, done)])
+                        if start + done[i] > end:
+                            break
+                        if cancelled.is_set():
+                            resp.close()
+                            return
+                        if watch.feed(len(chunk)) and cursor.can_switch:
+                            resp.close()
+                            raise _SlowMirror(f"吞吐跌破峰值的 1/{watch.ratio}")
+                if start + done[i] > end:
+                    mirror.record_speed(url, watch.total, watch.elapsed())
+                    return
+                raise OSError(f"分段 {i} 数据不完整（{done[i]}/{end - start + 1} 字节）")
+            except _SlowMirror as e:
+                cursor.fail(str(e))
+            except (requests.RequestException, OSError) as e:
+                last_error = e
+                logger.warning(
+                    "[download_stream]分段 %d 第%d次下载失败（本段已下载%d字节）：%s",
+                    i, attempt + 1, done[i], e,
+                )
+                attempt += 1
+                if attempt <= max_retries and len(cursor.urls) > 1:
+                    cursor.fail(str(e))
+        raise DownloadError(f"下载失败：{urls[0]}（分段 {i}），原因：{last_error}") from last_error
+
+    def _run(i: int) -> None:
+        try:
+            _fetch(i)
+        except BaseException:
+            cancelled.set()
+            raise
+
+    with ThreadPoolExecutor(max_workers=len(ranges)) as ex:
+        futures = [ex.submit(_run, i) for i in range(len(ranges))]
+        for future in futures:
+            future.result()
+
+    downloaded = sum(done)
+    if downloaded != total:
+        raise DownloadError(f"下载失败：{urls[0]}，分段合计 {downloaded} 字节，与总大小 {total} 不符")
+    return downloaded
+
+
+def download_streams(
+    jobs: list,
+    headers: Optional[dict] = None,
+    *,
+    progress_cb: Optional[MultiStreamProgressCallback] = None,
+    segments: int = 1,
+    journals: Optional[list] = None,
+) -> list:
+    """
+    并发下载多个媒体流（如同一视频的视频流与音频流），省去串行下载时第二个流的
+    建连与慢启动等待。
+
+    进度回调**在调用线程内**执行：各下载线程把 (流序号, 已下载, 总大小) 投递到队列，
+    由调用线程取出后转发。因此按线程区分「当前文件」的进度对象
+    （ParallelBatchProgress 等）可以直接在回调里使用。
+
+    [使用方法]
+        download_streams([(video_url, Path("v.m4s"), 0), (audio_url, Path("a.m4s"), 0)], headers,
+                         progress_cb=lambda sid, done, total: ...)
+    :param jobs: [(url, save_path, expected_size[, backup_urls]), ...]，expected_size 未知时传 0/None，
+        backup_urls 为可选的备用镜像直链（见 download_stream）
+    :param headers: 请求头（各流共用）
+    :param progress_cb: 进度回调 (stream_id, downloaded, total)，stream_id 为 jobs 下标
+    :param segments: 每个流的并发连接数（见 download_stream）
+    :param journals: 各流的跨进程续传日志（与 jobs 对齐，见 download_stream）；None 时不记录
+    :return: 各流下载的字节数（与 jobs 顺序一致）
+    :raises DownloadError: 任一流下载失败（等其余流结束后抛出）
+    """
+    journals = journals or [None] * len(jobs)
+    if len(jobs) <= 1:
+        return [
+            download_stream(
+                url, path, headers, segments=segments, expected_size=size,
+                backup_urls=backups[0] if backups else None, journal=journals[0],
+                progress_cb=(lambda d, t: progress_cb(0, d, t)) if progress_cb else None,
+            )
+            for url, path, size, *backups in jobs
+        ]
+
+    events: queue.Queue = queue.Queue()
+
+    def _run(stream_id: int, url: str, path: Path, size: Optional[int],
+             backup_urls: Optional[list] = None) -> int:
+        try:
+            return download_stream(
+                url, path, headers, segments=segments, expected_size=size,
+                backup_urls=backup_urls, journal=journals[stream_id],
+                progress_cb=lambda d, t: events.put((stream_id, d, t)),
+            )
+        finally:
+            events.put(None)  # 该流结束（成功或失败）
+
+    with ThreadPoolExecutor(max_workers=len(jobs)) as ex:
+        futures = [ex.submit(_run, i, *job) for i, job in enumerate(jobs)]
+        remaining = len(futures)
+        while remaining:
+            event = events.get()
+            if event is None:
+                remaining -= 1
+            elif progress_cb:
+                progress_cb(*event)
+        return [future.result() for future in futures]
 
 
 def merge_video_audio(
@@ -156,10 +489,11 @@ def merge_video_audio(
     progress_cb: Optional[ProgressCallback] = None,
 ) -> None:
     """
-    使用 ffmpeg 将视频流与音频流合成为单文件。
+    将视频流与音频流合成为单文件（stream copy）。
 
-    合成后端按优先级自动选择：系统 PATH 中的 ffmpeg → imageio-ffmpeg 库内置的
-    静态 ffmpeg。无系统 ffmpeg 时无需手动安装，`pip install imageio-ffmpeg` 即可。
+    优先用内置重封装 `remux_dash`（纯 Python，免去每个视频一次 ffmpeg 进程启动）；
+    输入超出其支持范围（加密、FLAC/杜比音轨等）时回退到 ffmpeg，按优先级自动选择：
+    系统 PATH 中的 ffmpeg → imageio-ffmpeg 库内置的静态 ffmpeg。
 
     [使用方法]:
         merge_video_audio(Path("video.m4s"), Path("audio.m4a"), Path("output.mp4"))
@@ -170,16 +504,24 @@ def merge_video_audio(
     :raises FFmpegNotFoundError: 未检测到 ffmpeg 且未安装 imageio-ffmpeg
     :raises DownloadError: 合成失败（后端返回非零）
     """
-    ffmpeg = _resolve_ffmpeg()
-    if ffmpeg is None:
-        raise FFmpegNotFoundError(
-            "未检测到 ffmpeg，且未安装 imageio-ffmpeg 库，无法进行音视频合成。"
-            "请安装 ffmpeg 并加入系统 PATH，或执行 `pip install imageio-ffmpeg` 使用内置 ffmpeg。"
-        )
-
     video_path = Path(video_path)
     audio_path = Path(audio_path)
     save_path = Path(save_path)
+    if video_path.exists() and audio_path.exists():
+        if progress_cb:
+            progress_cb(0, None)
+        try:
+            remux_dash(video_path, audio_path, save_path)
+        except RemuxUnsupportedError as e:
+            logger.info("[merge_video_audio] 内置合成不支持该输入（%s），改用 ffmpeg", e)
+        except OSError as e:
+            raise DownloadError(f"音视频合成失败：{e}") from e
+        else:
+            if progress_cb:
+                progress_cb(1, 1)
+            return
+
+    ffmpeg = _require_ffmpeg()
     if not video_path.exists():
         raise DownloadError(f"视频流文件不存在：{video_path}")
     if not audio_path.exists():
@@ -201,3 +543,171 @@ def merge_video_audio(
         raise DownloadError(f"音视频合成失败，返回码 {result.returncode}：{err_tail}")
     if progress_cb:
         progress_cb(1, 1)
+
+
+def extract_audio(video_path: Path, save_path: Path) -> int:
+    """
+    从已合成的视频文件中取出音频轨道（stream copy，不重新编码）。
+
+    优先用内置提取 `extract_audio_track`（本工具合成的分片 MP4）；其余输入（ffmpeg 合成的普通 MP4、
+    非 AAC 音轨等）回退到 ffmpeg：`ffmpeg -i in.mp4 -vn -map 0:a:0 -c copy out.m4a`。
+
+    [使用方法]:
+        extract_audio(Path("[标题](BV号).mp4"), Path("[标题](BV号).m4a"))
+    :param video_path: 已合成的视频文件路径
+    :param save_path: 音频文件保存路径
+    :return: 输出文件字节数
+    :raises FFmpegNotFoundError: 内置提取不支持该输入，且未检测到 ffmpeg / imageio-ffmpeg
+    :raises DownloadError: 提取失败（如视频没有音轨）
+    """
+    video_path = Path(video_path)
+    save_path = Path(save_path)
+    try:
+        return extract_audio_track(video_path, save_path)
+    except RemuxUnsupportedError as e:
+        logger.info("[extract_audio] 内置提取不支持该输入（%s），改用 ffmpeg", e)
+    except OSError as e:
+        raise DownloadError(f"音频提取失败：{e}") from e
+
+    ffmpeg = _require_ffmpeg()
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    # -f mp4：保存名可能带 .part 等临时后缀，显式指定容器
+    cmd = [ffmpeg, "-y", "-i", str(video_path), "-vn", "-map", "0:a:0", "-c", "copy", "-f", "mp4", str(save_path)]
+    logger.debug("[extract_audio] 提取命令：%s", " ".join(cmd))
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=600)
+    except subprocess.TimeoutExpired:
+        raise DownloadError("音频提取超时（>600s）。")
+    if result.returncode != 0:
+        save_path.unlink(missing_ok=True)
+        err_tail = result.stderr.decode("utf-8", errors="replace")[-500:] if result.stderr else ""
+        raise DownloadError(f"音频提取失败，返回码 {result.returncode}：{err_tail}")
+    return save_path.stat().st_size
+
+
+def _require_ffmpeg() -> str:
+    """返回 ffmpeg 路径；不可用时抛 FFmpegNotFoundError。"""
+    ffmpeg = _resolve_ffmpeg()
+    if ffmpeg is None:
+        raise FFmpegNotFoundError(
+            "未检测到 ffmpeg，且未安装 imageio-ffmpeg 库，无法进行音视频合成。"
+            "请安装 ffmpeg 并加入系统 PATH，或执行 `pip install imageio-ffmpeg` 使用内置 ffmpeg。"
+        )
+    return ffmpeg
+
+
+def stream_merge_video_audio(
+    video_url: str,
+    audio_path: Path,
+    save_path: Path,
+    headers: Optional[dict] = None,
+    *,
+    progress_cb: Optional[ProgressCallback] = None,
+    chunk_size: int = 1024 * 256,
+    max_retries: int = 3,
+    backup_urls: Optional[list] = None,
+) -> int:
+    """
+    边下载边合成：视频流的字节到达后直接写入 ffmpeg 的 stdin，与本地音频文件
+    stream copy 合成。视频流不落临时文件，单个视频的峰值磁盘占用约为成品大小的 1 倍
+    （普通模式为「流文件 + 成品」约 2 倍），且最后一个字节到达后几秒内即可得到成品。
+
+    DASH 的 fMP4 流 moov 在文件头，ffmpeg 可从不可 seek 的管道顺序读取。
+    网络中断时按已写入 stdin 的字节数用 Range 续传（有 backup_urls 时换镜像续传，
+    吞吐崩塌时同样换镜像）；续传未获 206 时无法回退管道，抛出 StreamResumeError，
+    由调用方改用普通模式重新下载视频流（见 VideoService.download_video_with_audio）。
+
+    [使用方法]
+        stream_merge_video_audio(video_url, Path("audio.m4a"), Path("output.mp4"), headers)
+    :param video_url: 视频流直链
+    :param audio_path: 已下载完成的音频流文件（音频流通常很小，先落盘）
+    :param save_path: 合成后的文件保存路径（失败时删除半成品）
+    :param headers: 请求头（用于补充 Cookie/Referer）
+    :param progress_cb: 视频流下载进度回调 (downloaded, total)
+    :param chunk_size: 分块大小（字节）
+    :param max_retries: 断点续传的最大重试次数
+    :param backup_urls: 视频流的备用镜像直链（见 download_stream）
+    :return: 视频流字节数
+    :raises FFmpegNotFoundError: 未检测到 ffmpeg 且未安装 imageio-ffmpeg
+    :raises StreamResumeError: 中断后续传未获 206（服务端不支持 Range）
+    :raises DownloadError: 下载失败或合成失败
+    """
+    import requests
+
+    ffmpeg = _require_ffmpeg()
+    audio_path = Path(audio_path)
+    save_path = Path(save_path)
+    if not audio_path.exists():
+        raise DownloadError(f"音频流文件不存在：{audio_path}")
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+
+    urls = mirror.rank_urls([video_url, *backup_urls], headers) if backup_urls else [video_url]
+    cursor = mirror.MirrorCursor(urls)
+    cmd = [ffmpeg, "-y", "-i", "pipe:0", "-i", str(audio_path), "-c", "copy", str(save_path)]
+    logger.debug("[stream_merge_video_audio] 合成命令：%s", " ".join(cmd))
+    # stderr 写临时文件而非 PIPE：ffmpeg 日志量大时 PIPE 写满会反过来阻塞 stdin 写入
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=err)
+        written = 0
+        total: Optional[int] = None
+        last_error: Optional[Exception] = None
+        try:
+            attempt = 0
+            while attempt <= max_retries:
+                url = cursor.url
+                req_headers = dict(headers) if headers else {}
+                if written:
+                    req_headers["Range"] = f"bytes={written}-"
+                watch = mirror.SpeedWatch()
+                try:
+                    resp = transport.media_get(url, headers=req_headers, stream=True, timeout=30)
+                    resp.raise_for_status()
+                    if written and resp.status_code != 206:
+                        raise StreamResumeError(f"续传未获 206（status={resp.status_code}），无法继续流式合成：{url}")
+                    if total is None:
+                        total = int(resp.headers.get("Content-Length", 0)) or None
+                    for chunk in resp.iter_content(chunk_size=chunk_size):
+                        if chunk:
+                            proc.stdin.write(chunk)
+                            written += len(chunk)
+                            if progress_cb:
+                                progress_cb(written, total)
+                            if watch.feed(len(chunk)) and cursor.can_switch:
+                                resp.close()
+                                raise _SlowMirror(f"吞吐跌破峰值的 1/{watch.ratio}")
+                    mirror.record_speed(url, watch.total, watch.elapsed())
+                    last_error = None
+                    break
+                except _SlowMirror as e:
+                    cursor.fail(str(e))
+                except requests.RequestException as e:
+                    last_error = e
+                    logger.warning(
+                        "[stream_merge_video_audio]第%d次下载%s失败（已写入%d字节）：%s",
+                        attempt + 1, url, written, e,
+                    )
+                    attempt += 1
+                    if attempt <= max_retries and len(cursor.urls) > 1:
+                        cursor.fail(str(e))
+            if last_error is not None:
+                raise DownloadError(f"下载失败：{video_url}，原因：{last_error}") from last_error
+            proc.stdin.close()
+            returncode = proc.wait(timeout=600)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            save_path.unlink(missing_ok=True)
+            raise DownloadError("音视频合成超时（>600s），请检查视频是否过大。")
+        except BrokenPipeError:
+            # ffmpeg 提前退出（输入无法解析等）：按返回码与 stderr 报错
+            returncode = proc.wait()
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            save_path.unlink(missing_ok=True)
+            raise
+        if returncode != 0:
+            err.seek(0)
+            err_tail = err.read().decode("utf-8", errors="replace")[-500:]
+            save_path.unlink(missing_ok=True)
+            raise DownloadError(f"音视频合成失败，返回码 {returncode}：{err_tail}")
+    return written
@@ -0,0 +1,125 @@
+"""
+进程内下载单飞登记：同一文件（BV号 + 分P + 媒体类型 + 清晰度）同一时刻只有一个线程在下载。
+
+任务管理器只合并参数完全相同的任务；收藏夹任务与 UP 主任务共享几百个视频、两个合集线程碰到同一个
+视频时，会同时下载并合成同一组流。本模块在 SDK 层登记「正在下载的文件」，进程内任何 VideoService
+都先查这里：已有线程在下载时等待它完成并复用其结果，不再重复拉取字节。
+
+[设计]
+- `acquire(key)` 返回 (Flight, 是否为首个请求者)：首个请求者负责下载，其余请求者在 Flight 上等待；
+- 下载结束后首个请求者调用 `Flight.complete(result)`（失败时传 error）；合成交给合成线程池时
+  先 `defer()`，合成任务结束再 complete 一次，全部完成后登记才撤销、等待者才被唤醒；
+- 等待者拿到结果后由调用方决定如何复用（同目录直接用，不同目录硬链接 / 复制，
+  见 src.util.media_store.link_or_copy）；
+  首个请求者失败时等待者收到异常，由调用方自行重试（可能成为新的首个请求者）；
+- 登记只在进程内有效（`shared_inflight()`），跨进程的重复由下载库索引与续传日志处理。
+
+[使用方法]
+    flight, leader = shared_inflight().acquire(("BV1xx", 1, "video", 120))
+    if leader:
+        try:
+            result = download()
+        except BaseException as e:
+            flight.complete(error=e)
+            raise
+        flight.complete(result)
+    else:
+        result = flight.wait()
+"""
+
+import threading
+from typing import Any, Hashable, Optional
+
+
+class Flight:
+    """某个文件正在进行中的下载（等待者在 event 上等待）。"""
+
+    def __init__(self, registry: "InflightRegistry", key: Hashable):
+        self._registry = registry
+        self.key = key
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._pending = 1  # 尚未结束的阶段数（下载 + 交给合成线程池的合成）
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    @property
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    def defer(self) -> None:
+        """登记一个延后完成的阶段（如交给合成线程池的合成任务），须配对调用 complete。"""
+        with self._lock:
+            self._pending += 1
+
+    def complete(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """结束一个阶段；全部阶段结束后撤销登记并唤醒等待者。
+
+        :param result: 下载结果（非 None 时记录）
+        :param error: 该阶段的异常（记录第一个）
+        """
+        with self._lock:
+            if result is not None:
+                self.result = result
+            if error is not None and self.error is None:
+                self.error = error
+            self._pending -= 1
+            finished = self._pending <= 0
+        if finished:
+            self._registry._drop(self)
+            self._event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """等待下载完成并返回其结果。
+
+        :raises TimeoutError: 超时仍未完成
+        :raises Exception: 首个请求者的下载失败时原样抛出
+        """
+        if not self._event.wait(timeout):
+            raise TimeoutError(f"等待下载 {self.key} 超时")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class InflightRegistry:
+    """线程安全的进行中下载登记表。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict = {}
+
+    def acquire(self, key: Hashable) -> tuple:
+        """登记或加入 key 的下载。
+
+        :return: (Flight, 是否为首个请求者)；首个请求者负责下载并 complete
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = Flight(self, key)
+            return flight, True
+
+    def active(self) -> list:
+        """正在下载的 key 列表。"""
+        with self._lock:
+            return list(self._flights)
+
+    def _drop(self, flight: Flight) -> None:
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+
+_shared: Optional[InflightRegistry] = None
+_shared_lock = threading.Lock()
+
+
+def shared_inflight() -> InflightRegistry:
+    """进程内共用的进行中下载登记表（懒创建）。"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = InflightRegistry()
+        return _shared
@@ -0,0 +1,333 @@
+"""
+本地下载库索引：取代每次下载前对输出目录的 `rglob("*")` 全量遍历。
+
+索引是保存目录下的一个 SQLite 文件（`<root>/.bilitools_index/library.sqlite`），按
+(BV号, 分P, 媒体类型) 记录文件的相对路径、大小与清晰度。缓存检查是一次索引查询，
+不再随目录里的文件数线性变慢。
+
+[设计]
+- 下载完成时由 VideoService 直接写入索引（含实际清晰度、自定义文件名也能按 BV号命中）；
+- 用户在外部增删/移动文件时靠目录 mtime 对账：查询前只 stat 所查子树（`under`，默认整个 root）
+  的各级目录，mtime 没变的目录直接沿用索引里的子目录表，变了的目录才重新列出其中的文件；
+- 同一子树对账后 `_FRESH_WINDOW` 秒内、且子树根目录 mtime 不变时不再重复对账：批量下载逐个检查缓存时
+  每次查询都是纯索引查询（本进程下载的文件由 record() 直接写入，不依赖对账）；
+- 刚修改过的目录（mtime 距今不足 `_RACY_WINDOW` 秒）不信任其 mtime，下次查询仍重扫，
+  避免同一时间戳内的第二次修改被漏掉；
+- 按文件名解析 BV号与 `-Pxx` 分P标记，匹配规则与原先的 rglob 实现一致
+  （BV号出现在文件名中即命中；分P>1 时还需文件名含 `-Pxx`）；
+- 命中的文件在返回前再确认一次存在，已被删除的记录顺手清理；
+- 索引放在单独的子目录里：SQLite 每次写事务都会增删 `-journal` 文件，放在 root 下会让 root 的
+  mtime 不停变化、每次查询都重扫 root；
+- 索引只在写入下载记录时创建：只读的缓存检查不会在用户指定的任意目录里建索引目录，
+  还没有索引的目录逐个遍历；
+- 跳过续传目录（`.bilitools_parts`）、索引目录与媒体库目录（`.bilitools_store`）；索引打不开（只读目录、
+  文件损坏等）时退回逐个遍历，缓存检查的结果不受影响。
+
+[使用方法]
+    path = find_downloaded(root, "BV1ov42117yC", {"mp4", "flv", "m4s"}, page=1)
+    record_download(root, save_path, bvid="BV1ov42117yC", page=1, media_type="video", quality=120)
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from src.util.resume import PARTS_DIR_NAME
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR_NAME = ".bilitools_index"  # 索引目录（位于保存目录下）
+INDEX_FILE_NAME = "library.sqlite"
+STORE_DIR_NAME = ".bilitools_store"  # 共享媒体库的默认目录名（见 src.util.media_store），不计入所在目录的索引
+_RACY_WINDOW = 2.0  # 目录 mtime 距今不足该秒数时视为「可能仍在变化」，下次查询重扫
+_FRESH_WINDOW = 5.0  # 子树对账后该秒数内、且子树根目录 mtime 不变时不再重复对账
+
+_BVID_RE = re.compile(r"bv[0-9a-z]+")
+_PAGE_RE = re.compile(r"-p(\d{2,})")
+_MEDIA_BY_EXT = {
+    **dict.fromkeys(("mp4", "flv", "m4s"), "video"),
+    **dict.fromkeys(("m4a", "mp3", "flac", "aac"), "audio"),
+    **dict.fromkeys(("jpg", "jpeg", "png", "webp"), "cover"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT NOT NULL,        -- 相对 root 的路径（posix）
+    dir TEXT NOT NULL,         -- 所在目录（相对 root，root 本身为空串）
+    bvid TEXT NOT NULL,        -- 小写 BV号
+    page INTEGER NOT NULL,
+    media_type TEXT NOT NULL,  -- video / audio / cover / other
+    ext TEXT NOT NULL,         -- 小写扩展名（不含点）
+    size INTEGER NOT NULL,
+    quality INTEGER NOT NULL DEFAULT 0,  -- 实际清晰度 qn（扫描得到的文件为 0，未知）
+    PRIMARY KEY (path, bvid, page)
+);
+CREATE INDEX IF NOT EXISTS files_key ON files (bvid, page, media_type);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,     -- 相对 root 的目录路径
+    parent TEXT,               -- 上级目录（root 为 NULL）
+    mtime_ns INTEGER NOT NULL  -- 上次扫描时的 mtime；-1 表示下次必须重扫
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+"""
+
+_indexes: dict = {}  # 解析后的 root -> LibraryIndex（进程内复用连接）
+_indexes_lock = threading.Lock()
+
+
+def _parse_name(name: str) -> list:
+    """从文件名解析 [(bvid, page), ...]：文件名里每个 BV号 × 每个分P标记各一条（无标记时分P为 1）。"""
+    stem = Path(name).stem.lower()
+    bvids = set(_BVID_RE.findall(stem))
+    pages = {int(p) for p in _PAGE_RE.findall(stem)} or {1}
+    return [(b, p) for b in bvids for p in pages]
+
+
+def _ext_of(name: str) -> str:
+    return Path(name).suffix.lower().lstrip(".")
+
+
+def _is_skipped_dir(name: str) -> bool:
+    return name in (PARTS_DIR_NAME, INDEX_DIR_NAME, STORE_DIR_NAME)
+
+
+def _join(parent: str, name: str) -> str:
+    return f"{parent}/{name}" if parent else name
+
+
+class LibraryIndex:
+    """单个保存目录的下载库索引（线程安全，同一进程内每个 root 共用一个实例）。"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.db_path = self.root / INDEX_DIR_NAME / INDEX_FILE_NAME
+        self._lock = threading.Lock()
+        self._checked: dict = {}  # 子树 -> (上次对账的 monotonic 时间, 当时子树根目录的 mtime_ns)
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+        conn.executescript(_SCHEMA)
+        return conn
+
+    # ---- 查询 / 写入 ----
+
+    def find(self, bvid: str, extensions: set, page: Optional[int] = None,
+             under: Optional[str] = None) -> Optional[Path]:
+        """查找已下载的文件：对账后按 (BV号, 分P, 扩展名) 查询索引。
+
+        :param bvid: BV号（不区分大小写）
+        :param extensions: 可接受的扩展名集合（不含点）
+        :param page: 分P序号；None 或 1 时不区分分P（与原 rglob 规则一致）
+        :param under: 只查找该子目录（相对 root 的 posix 路径）及其下级目录中的文件；None 时不限
+        :return: 已存在的文件路径，未找到返回 None
+        """
+        exts = sorted({e.lower().lstrip(".") for e in extensions})
+        if not exts:
+            return None
+        sql = f"SELECT path FROM files WHERE bvid = ? AND ext IN ({','.join('?' * len(exts))})"
+        args: list = [bvid.lower(), *exts]
+        if page is not None and page > 1:
+            sql += " AND page = ?"
+            args.append(page)
+        if under:
+            prefix = under.strip("/") + "/"
+            sql += " AND (dir = ? OR substr(dir, 1, ?) = ?)"
+            args.extend((prefix[:-1], len(prefix), prefix))
+        sql += " ORDER BY path"
+        with self._lock:
+            self._ensure_open()
+            with self._conn:
+                self._reconcile(under.strip("/") if under else "")
+                for (rel,) in self._conn.execute(sql, args).fetchall():
+                    path = self.root / rel
+                    if path.is_file():
+                        return path
+                    self._conn.execute("DELETE FROM files WHERE path = ?", (rel,))  # 已被外部删除
+        return None
+
+    def record(self, path: Path, *, bvid: str, page: int, media_type: str, quality: int = 0) -> None:
+        """记录一个刚下载完成的文件（文件名不含 BV号时也能按 bvid 命中）。"""
+        rel_path = Path(path).relative_to(self.root)
+        rel = rel_path.as_posix()
+        parent = rel_path.parent.as_posix()
+        parent = "" if parent == "." else parent
+        size = Path(path).stat().st_size
+        with self._lock:
+            self._ensure_open()
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files (path, dir, bvid, page, media_type, ext, size, quality) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (rel, parent, bvid.lower(), page, media_type, _ext_of(rel), size, quality),
+                )
+
+    # ---- 对账 ----
+
+    def _ensure_open(self) -> None:
+        """索引文件被外部删除时重建（调用方持锁）。"""
+        if not self.db_path.exists():
+            self._conn.close()
+            self._conn = self._connect()
+
+    def _reconcile(self, under: str = "") -> None:
+        """按目录 mtime 与磁盘对账：只遍历 under 子树，只重扫 mtime 变化过的目录（调用方持锁并处于事务中）。
+
+        :param under: 子树（相对 root 的 posix 路径）；空串为整个 root
+        """
+        try:
+            top = os.stat(self.root / under).st_mtime_ns
+        except OSError:
+            self._drop_dir(under)  # 子树已被删除（含上级目录被删除）
+            self._checked.pop(under, None)
+            return
+        now = time.monotonic()
+        checked = self._checked.get(under)
+        if checked is not None and now - checked[0] < _FRESH_WINDOW and checked[1] == top:
+            return
+        if under:
+            prefix = under + "/"
+            rows = self._conn.execute("SELECT path, mtime_ns FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?",
+                                      (under, len(prefix), prefix))
+        else:
+            rows = self._conn.execute("SELECT path, mtime_ns FROM dirs")
+        known = {p: m for p, m in rows}
+        self._checked[under] = (now, top)
+        stack = [under]
+        while stack:
+            rel = stack.pop()
+            try:
+                st = os.stat(self.root / rel)
+            except OSError:
+                self._drop_dir(rel)
+                continue
+            if known.get(rel) == st.st_mtime_ns:
+                children = [c for (c,) in self._conn.execute("SELECT path FROM dirs WHERE parent = ?", (rel,))]
+            else:
+                children = self._rescan_dir(rel, st.st_mtime_ns)
+            stack.extend(children)
+
+    def _rescan_dir(self, rel: str, mtime_ns: int) -> list:
+        """重新列出一个目录：同步其中文件的索引记录与子目录表，返回子目录列表。"""
+        files, children = {}, []
+        with os.scandir(self.root / rel) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not _is_skipped_dir(entry.name):
+                            children.append(_join(rel, entry.name))
+                    elif entry.is_file():
+                        files[_join(rel, entry.name)] = entry
+                except OSError:
+                    continue
+
+        indexed = {p for (p,) in self._conn.execute("SELECT DISTINCT path FROM files WHERE dir = ?", (rel,))}
+        self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in indexed - files.keys()])
+        rows = []
+        for path in files.keys() - indexed:
+            entry = files[path]
+            ext = _ext_of(entry.name)
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            for bvid, page in _parse_name(entry.name):
+                rows.append((path, rel, bvid, page, _MEDIA_BY_EXT.get(ext, "other"), ext, size))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO files (path, dir, bvid, page, media_type, ext, size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+        old_children = {c for (c,) in self._conn.execute("SELECT path FROM dirs WHERE parent = ?", (rel,))}
+        for gone in old_children - set(children):
+            self._drop_dir(gone)
+        racy = time.time() - mtime_ns / 1e9 < _RACY_WINDOW
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+            (rel, None if rel == "" else (rel.rpartition("/")[0]), -1 if racy else mtime_ns),
+        )
+        return children
+
+    def _drop_dir(self, rel: str) -> None:
+        """删除某目录（含子目录）的全部记录。"""
+        if rel == "":
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM dirs")
+            return
+        prefix = rel + "/"
+        n = len(prefix)
+        self._conn.execute("DELETE FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?", (rel, n, prefix))
+        self._conn.execute("DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?", (rel, n, prefix))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_index(root: Path) -> LibraryIndex:
+    """取某个保存目录的索引（同一进程内复用）。root 须已存在。"""
+    key = Path(root).resolve()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = LibraryIndex(key)
+        return index
+
+
+def _scan(root: Path, bvid: str, extensions: set, page: Optional[int],
+          under: Optional[str] = None) -> Optional[Path]:
+    """不经索引逐个遍历（索引不可用时的回退）。"""
+    extensions = {ext.lower().lstrip(".") for ext in extensions}
+    page_tag = f"-P{page:02d}".lower() if page is not None and page > 1 else None
+    for path in sorted((root / under if under else root).rglob("*")):  # 与索引查询一样按路径排序，结果确定
+        if not path.is_file() or any(_is_skipped_dir(part) for part in path.relative_to(root).parts[:-1]):
+            continue
+        stem = path.stem.lower()
+        if bvid.lower() not in stem:
+            continue
+        if path.suffix.lower().lstrip(".") not in extensions:
+            continue
+        if page_tag is not None and page_tag not in stem:
+            continue
+        return path
+    return None
+
+
+def find_downloaded(root: Path, bvid: str, extensions: set, page: Optional[int] = None,
+                    under: Optional[str] = None) -> Optional[Path]:
+    """在 root（递归）中查找已下载的文件；root 不存在时返回 None，root 下还没有索引时逐个遍历（不创建索引）。
+
+    :param root: 保存目录
+    :param bvid: BV号
+    :param extensions: 可接受的扩展名集合（不含点）
+    :param page: 分P序号；>1 时要求文件名含 `-Pxx`
+    :param under: 只查找 root 下该子目录（posix 相对路径）中的文件；None 时查找整个 root
+    :return: 文件路径或 None
+    """
+    root = Path(root)
+    if not root.exists():
+        return None
+    if not (root / INDEX_DIR_NAME / INDEX_FILE_NAME).exists():
+        return _scan(root, bvid, extensions, page, under)  # 还没有写入过下载记录：不为查询创建索引
+    try:
+        return open_index(root).find(bvid, extensions, page, under)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("[library] 下载库索引不可用，改为遍历目录：%s（%s）", root, e)
+        return _scan(root, bvid, extensions, page, under)
+
+
+def record_download(root: Path, path: Path, *, bvid: str, page: int = 1, media_type: str,
+                    quality: int = 0) -> None:
+    """下载完成后写入索引；索引不可用或文件不在 root 下时忽略（不影响下载结果）。"""
+    try:
+        open_index(root).record(Path(path).resolve(), bvid=bvid, page=page,
+                                media_type=media_type, quality=quality)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        logger.warning("[library] 写入下载库索引失败：%s（%s）", path, e)
@@ -0,0 +1,105 @@
+"""
+共享媒体库：同一个视频在多个收藏夹 / UP 主 / 合集目录里只存一份，各目录里是指向它的硬链接。
+
+同一个 BV号常常同时出现在几个收藏夹、UP 主空间和合集里；download_fav / download_up / download_season
+各自保存到 `<dir>/<标题>/`，缓存检查只查本次的保存目录，同一个几 GB 的文件会为每个目录各下载、各存一份。
+开启媒体库后，下载完成的文件同时登记到媒体库；之后任何目录需要同一文件时直接从媒体库硬链接过去，
+与已有目录重叠的新收藏夹不再产生网络流量。
+
+[设计]
+- 媒体库本身是一个下载库根目录（见 src.util.library_index）：文件存放在 `<store>/<BV号>/<版本>/<文件名>`，
+  按 (BV号, 分P, 版本, 扩展名) 查找。「版本」是下载请求的关键参数（媒体类型 + 目标清晰度 + 编码策略，
+  如 `video_with_audio-q120`、`video-q80-hevc`、`audio`，由 VideoService 生成）：360P 的文件不会被
+  之后的 4K 请求或另一种编码策略的请求复用。按文件名与版本查找，不校验文件内容，查找本身不需要
+  任何网络请求，也只对账 `<BV号>/<版本>` 这一个子目录（不随媒体库里的视频数变慢）；
+- `put()`：下载完成后把成品硬链接进媒体库（不额外占空间）；`link_into()`：把媒体库里的文件硬链接到
+  保存目录；两者在跨文件系统等无法硬链接时退回复制（见 link_or_copy）；
+- 写入媒体库失败只记录警告，不影响下载结果；
+- 媒体库目录默认名 `.bilitools_store` 会被所在目录的索引跳过，可以放在下载根目录下。
+
+[使用方法]
+    store = MediaStore(root / ".bilitools_store")
+    store.put(save_path, bvid="BV1ov42117yC", page=1, media_type="video", quality=120,
+              variant="video_with_audio-q120")
+    stored = store.find("BV1ov42117yC", {"mp4"}, page=1, variant="video_with_audio-q120")
+    if stored is not None:
+        path = store.link_into(stored, other_dir)
+"""
+
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+from src.util.library_index import find_downloaded, record_download
+
+logger = logging.getLogger(__name__)
+
+
+def link_or_copy(src: Path, dst: Path) -> Path:
+    """把已下载的文件放到 dst：优先硬链接（不占额外空间），跨文件系统等失败时退回复制。
+
+    先写到同目录的临时名再原子改名，复制中途中断不会留下被缓存检查误判为已下载的半成品。
+
+    :return: dst
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(dst.name + ".link.part")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        logger.debug("无法硬链接 %s，改为复制。", src)
+        shutil.copy2(src, tmp)
+    tmp.replace(dst)
+    return dst
+
+
+class MediaStore:
+    """共享媒体库（按 BV号 + 分P + 版本查找，多个保存目录共用）。"""
+
+    def __init__(self, root: Path):
+        """
+        :param root: 媒体库目录（不存在时首次写入时创建）
+        """
+        self.root = Path(root)
+
+    def find(self, bvid: str, extensions: set, page: Optional[int] = None, *,
+             variant: str) -> Optional[Path]:
+        """在媒体库中查找某个版本的文件（分P与扩展名规则同 find_downloaded）。
+
+        :param variant: 版本（见模块说明），只匹配以同一版本存入的文件
+        """
+        return find_downloaded(self.root, bvid, extensions, page, under=f"{bvid}/{variant}")
+
+    def put(self, path: Path, *, bvid: str, page: int = 1, media_type: str, quality: int = 0,
+            variant: str) -> Optional[Path]:
+        """把下载完成的文件登记到媒体库（硬链接，已有同名文件时跳过）。
+
+        :param variant: 版本（见模块说明），之后以同一版本查找才会命中
+        :return: 媒体库中的路径；写入失败时为 None
+        """
+        target = self.root / bvid / variant / Path(path).name
+        try:
+            if not target.exists():
+                link_or_copy(Path(path), target)
+        except OSError as e:
+            logger.warning("[store] 写入媒体库失败：%s（%s）", path, e)
+            return None
+        record_download(self.root, target, bvid=bvid, page=page, media_type=media_type, quality=quality)
+        return target
+
+    @staticmethod
+    def link_into(stored: Path, directory: Path, filename: Optional[str] = None) -> Path:
+        """把媒体库里的文件放到 directory（已存在同名文件时直接返回）。
+
+        :param stored: find 返回的媒体库路径
+        :param directory: 目标目录
+        :param filename: 目标文件名；None 时沿用媒体库中的文件名
+        :return: 目标路径
+        """
+        target = Path(directory) / (filename or stored.name)
+        if not target.exists():
+            link_or_copy(stored, target)
+        return target
@@ -0,0 +1,131 @@
+"""
+请求级结果缓存：批量下载期间复用 view / playurl 等接口的响应，避免同一视频被反复请求。
+
+[设计]
+- 每条缓存有独立的过期时刻：默认 `ttl` 秒；也可由调用方按结果计算（playurl 按直链的
+  `deadline` 参数提前过期，不会把即将失效的直链交给下载）；
+- 线程安全且「单飞」：多个线程同时请求同一个 key 时只有一个线程真正发请求，其余线程等待
+  并复用结果；请求失败不缓存，异常只抛给本次等待中的线程，之后的调用会重新请求；
+- 条目数超过 `max_entries` 时先清理过期条目，仍超出则淘汰最早写入的条目。
+
+[使用方法]
+    memo = RequestMemo(ttl=300)
+    info = memo.get_or_fetch(("view", bvid), lambda: fetch(bvid))
+    dash = memo.get_or_fetch(("playurl", bvid, cid), lambda: playurl(bvid, cid),
+                             expires_at=lambda d: earliest_deadline(d))
+"""
+
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+
+class _Pending:
+    """某个 key 正在进行中的请求（其余线程在 event 上等待）。"""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class RequestMemo:
+    """带过期时间的线程安全请求缓存。"""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 4096):
+        """
+        :param ttl: 默认缓存时长（秒）；<=0 时不缓存（仍合并并发的相同请求）
+        :param max_entries: 缓存条目数上限
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: dict = {}  # key -> (过期时刻 time.time(), value)，按写入顺序
+        self._pending: dict = {}  # key -> _Pending
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any], *,
+                     expires_at: Optional[Callable[[Any], Optional[float]]] = None) -> Any:
+        """取缓存；未命中（或已过期）时调用 fetch 并写入缓存。
+
+        :param key: 缓存键
+        :param fetch: 无参请求函数
+        :param expires_at: 可选：按结果计算过期时刻（Unix 时间戳）的函数，返回 None 时用默认 ttl；
+            结果比默认 ttl 更早过期时以其为准
+        :return: fetch 的结果（可能来自缓存）
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if entry[0] > time.time():
+                        self.hits += 1
+                        return entry[1]
+                    del self._entries[key]
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = _Pending()
+                    self.misses += 1
+                    break
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            pending.error = e
+            with self._lock:
+                del self._pending[key]
+            pending.event.set()
+            raise
+
+        deadline = time.time() + self.ttl
+        if expires_at is not None:
+            custom = expires_at(value)
+            if custom is not None:
+                deadline = min(deadline, custom)
+        with self._lock:
+            if self.ttl > 0 and deadline > time.time():
+                self._entries[key] = (deadline, value)
+                self._evict()
+            del self._pending[key]
+        pending.value = value
+        pending.event.set()
+        return value
+
+    def peek(self, key: Hashable) -> Any:
+        """只读缓存：返回未过期的缓存值，未命中时返回 None（不发请求、不等待进行中的请求）。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self.hits += 1
+                return entry[1]
+        return None
+
+    def invalidate(self, key: Hashable) -> None:
+        """丢弃某个 key 的缓存（如直链已失效）。"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _evict(self) -> None:
+        """条目数超限时清理（调用方持锁）。"""
+        if len(self._entries) <= self.max_entries:
+            return
+        now = time.time()
+        for k in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+            del self._entries[k]
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
@@ -0,0 +1,107 @@
+"""
+音视频合成线程池：并发批量下载时，把「合成」从下载线程中拆出来单独限流。
+
+[设计]
+- 下载线程下载完视频流 + 音频流后调用 `submit()` 把合成任务交给本池，随即返回去下载下一个视频，
+  网络不会因合成而空闲；
+- 合成并发数由 `workers` 单独限制（与下载线程数无关），避免多个 ffmpeg 同时争抢磁盘 I/O；
+- 排队数 / 进行中数 / 最近一次合成耗时通过 progress 对象的 `merge_status()` 上报；
+- 单个合成失败只记录，`join()` 等全部合成结束后抛出第一个错误（与并发下载「任一失败即报错」一致）。
+
+[使用方法]
+    with MergePool(workers=2, progress=progress) as pool:
+        run_pipeline(items, stages_that_call_pool_submit)
+    # 退出 with 时等待全部合成完成
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MergePool:
+    """有界的合成线程池（线程安全）。"""
+
+    def __init__(self, workers: int = 2, progress=None):
+        """
+        :param workers: 同时进行的合成任务数上限（>=1）
+        :param progress: 进度对象（鸭子类型，需实现 merge_status）；None 时不上报
+        """
+        self.workers = max(1, workers)
+        self.progress = progress
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="merge")
+        self._lock = threading.Lock()
+        self._queued = 0             # 已提交、尚未开始的合成数
+        self._running = 0            # 正在进行的合成数
+        self._errors: list = []      # 合成失败的异常（按完成顺序）
+        self.merged = 0              # 已结束（含失败）的合成数
+        self.total_seconds = 0.0     # 累计合成耗时
+        self.last_seconds: Optional[float] = None  # 最近一次合成耗时
+
+    @property
+    def pending(self) -> int:
+        """排队中 + 进行中的合成数（队列深度）。"""
+        with self._lock:
+            return self._queued + self._running
+
+    def submit(self, job: Callable[[], None], name: str = "") -> None:
+        """提交一个合成任务（无参可调用对象），立即返回。
+
+        :param job: 完成合成（及临时文件清理）的可调用对象；异常由本池记录
+        :param name: 任务名（仅用于日志）
+        """
+        with self._lock:
+            self._queued += 1
+        self._report()
+        self._executor.submit(self._run, job, name)
+
+    def join(self, raise_errors: bool = True) -> None:
+        """等待全部合成结束并关闭线程池。
+
+        :param raise_errors: 有合成失败时是否抛出第一个错误
+        """
+        self._executor.shutdown(wait=True)
+        if raise_errors and self._errors:
+            raise self._errors[0]
+
+    def __enter__(self) -> "MergePool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # 已有异常在上抛时只等待收尾，不用合成错误覆盖原异常
+        self.join(raise_errors=exc_type is None)
+
+    # ---- 内部 ----
+
+    def _run(self, job: Callable[[], None], name: str) -> None:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        self._report()
+        start = time.monotonic()
+        try:
+            job()
+        except Exception as e:
+            logger.error("合成失败 %s：%s", name, e)
+            with self._lock:
+                self._errors.append(e)
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self._running -= 1
+                self.merged += 1
+                self.total_seconds += elapsed
+                self.last_seconds = elapsed
+            logger.debug("合成完成 %s，耗时 %.1fs", name, elapsed)
+            self._report()
+
+    def _report(self) -> None:
+        if self.progress is None:
+            return
+        with self._lock:
+            queued, running, seconds = self._queued, self._running, self.last_seconds
+        self.progress.merge_status(queued, running, seconds)
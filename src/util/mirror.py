@@ -0,0 +1,186 @@
+"""
+CDN 镜像选择：playurl 返回的 baseUrl + backupUrl 候选按主机评分排序，下载中途可切换镜像。
+
+[设计]
+- 主机评分进程级缓存（线程安全）：探测到的 TTFB、实测吞吐（EWMA）、失败次数；
+  同一进程内后续的流直接按缓存排序，不再重复探测；
+- `rank_urls()`：尚未评分的主机并发发一次 `Range: bytes=0-0` 探测 TTFB，随后按
+  (失败次数, -实测吞吐, TTFB) 排序——用过且快的镜像优先，其次是握手快的镜像；
+- `MirrorCursor`：下载循环持有的当前镜像游标，出错或吞吐崩塌时切到下一个候选，
+  由调用方用 Range 从已下载位置续传（各镜像内容相同）；
+- `SpeedWatch`：按时间窗统计吞吐，窗口吞吐跌到本次下载峰值的 1/COLLAPSE_RATIO 以下视为崩塌。
+
+[使用方法]
+    urls = rank_urls([stream.url, *stream.backup_urls], headers)
+    cursor = MirrorCursor(urls)
+    # 下载循环中：出错 → cursor.fail()；watch.feed(n) 返回 True 且 cursor.can_switch → 换镜像
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlparse
+
+from src.util import transport
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT = 5  # 探测请求超时（秒）
+SPEED_WINDOW = 3.0  # 吞吐统计时间窗（秒）
+COLLAPSE_RATIO = 5  # 窗口吞吐低于峰值的 1/5 视为崩塌
+_EWMA_ALPHA = 0.5  # 吞吐/TTFB 的指数平滑系数
+
+_lock = threading.Lock()
+_scores: dict = {}  # host -> _HostScore
+
+
+class _HostScore:
+    """单个 CDN 主机的评分（进程内缓存）。"""
+
+    __slots__ = ("ttfb", "speed", "failures")
+
+    def __init__(self):
+        self.ttfb: Optional[float] = None  # 首字节耗时（秒）
+        self.speed: Optional[float] = None  # 实测吞吐（字节/秒）
+        self.failures = 0  # 累计失败次数
+
+    def key(self) -> tuple:
+        return (self.failures, -(self.speed or 0.0), self.ttfb if self.ttfb is not None else float("inf"))
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def _score(url: str) -> _HostScore:
+    """取主机评分（调用方持锁）。"""
+    return _scores.setdefault(host_of(url), _HostScore())
+
+
+def _smooth(old: Optional[float], new: float) -> float:
+    return new if old is None else old * (1 - _EWMA_ALPHA) + new * _EWMA_ALPHA
+
+
+def record_ttfb(url: str, seconds: float) -> None:
+    with _lock:
+        s = _score(url)
+        s.ttfb = _smooth(s.ttfb, seconds)
+
+
+def record_speed(url: str, nbytes: int, seconds: float) -> None:
+    """记录一次实测吞吐（数据量太少或耗时太短时忽略，避免噪声）。"""
+    if nbytes <= 0 or seconds < 0.5:
+        return
+    with _lock:
+        s = _score(url)
+        s.speed = _smooth(s.speed, nbytes / seconds)
+
+
+def record_failure(url: str) -> None:
+    with _lock:
+        _score(url).failures += 1
+
+
+def _probe(url: str, headers: Optional[dict]) -> None:
+    """发一次 `Range: bytes=0-0` 请求，记录 TTFB；失败计入失败次数。"""
+    import requests
+
+    req_headers = dict(headers) if headers else {}
+    req_headers["Range"] = "bytes=0-0"
+    start = time.monotonic()
+    try:
+        resp = transport.media_get(url, headers=req_headers, stream=True, timeout=PROBE_TIMEOUT)
+        try:
+            resp.raise_for_status()
+        finally:
+            resp.close()
+    except requests.RequestException as e:
+        logger.info("[mirror] 镜像探测失败 %s：%s", host_of(url), e)
+        record_failure(url)
+        return
+    record_ttfb(url, time.monotonic() - start)
+
+
+def rank_urls(urls: list, headers: Optional[dict] = None, *, probe: bool = True) -> list:
+    """按主机评分排序候选直链（去重，顺序稳定）。
+
+    :param urls: 候选直链（baseUrl 在前，backupUrl 在后）
+    :param headers: 探测请求的请求头（Referer/Cookie）
+    :param probe: 是否并发探测尚未评分的主机
+    :return: 排序后的直链列表（评分相同保持原顺序，即 baseUrl 优先）
+    """
+    candidates = list(dict.fromkeys(u for u in urls if u))
+    if len(candidates) <= 1:
+        return candidates
+    if probe:
+        with _lock:
+            unknown = [u for u in candidates if host_of(u) not in _scores]
+        if unknown:
+            with ThreadPoolExecutor(max_workers=len(unknown)) as ex:
+                list(ex.map(lambda u: _probe(u, headers), unknown))
+    with _lock:
+        keys = {u: _score(u).key() for u in candidates}
+    ranked = sorted(candidates, key=lambda u: keys[u])
+    logger.debug("[mirror] 镜像排序：%s", [host_of(u) for u in ranked])
+    return ranked
+
+
+class MirrorCursor:
+    """下载循环内的当前镜像游标（单线程使用；分段下载每段各持一个）。"""
+
+    def __init__(self, urls: list):
+        self.urls = list(urls)
+        self._index = 0
+        self.switches = 0  # 已切换次数
+
+    @property
+    def url(self) -> str:
+        return self.urls[self._index]
+
+    @property
+    def can_switch(self) -> bool:
+        """是否还有其他候选可切换（因吞吐崩塌切换的次数限制在每个候选两轮以内）。"""
+        return len(self.urls) > 1 and self.switches < len(self.urls) * 2
+
+    def fail(self, reason: str = "") -> str:
+        """当前镜像出错/变慢：计入失败并切到下一个候选，返回新的直链。"""
+        old = self.url
+        record_failure(old)
+        if len(self.urls) > 1:
+            self._index = (self._index + 1) % len(self.urls)
+            self.switches += 1
+            logger.warning("[mirror] 切换镜像 %s → %s（%s）", host_of(old), host_of(self.url), reason)
+        return self.url
+
+
+class SpeedWatch:
+    """按时间窗统计单次响应的吞吐，检测吞吐崩塌。"""
+
+    def __init__(self, window: float = SPEED_WINDOW, ratio: float = COLLAPSE_RATIO):
+        self.window = window
+        self.ratio = ratio
+        self.start = time.monotonic()
+        self.total = 0
+        self.peak = 0.0
+        self._win_start = self.start
+        self._win_bytes = 0
+
+    def feed(self, nbytes: int) -> bool:
+        """累计 nbytes；一个时间窗结束时若吞吐低于峰值的 1/ratio 返回 True（崩塌）。"""
+        now = time.monotonic()
+        self.total += nbytes
+        self._win_bytes += nbytes
+        elapsed = now - self._win_start
+        if elapsed < self.window:
+            return False
+        rate = self._win_bytes / elapsed
+        collapsed = self.peak > 0 and rate < self.peak / self.ratio
+        self.peak = max(self.peak, rate)
+        self._win_start = now
+        self._win_bytes = 0
+        return collapsed
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start
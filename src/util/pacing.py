@@ -0,0 +1,145 @@
+"""
+自适应请求节奏（AIMD）：取代批量下载 / 翻页循环里写死的 `time.sleep(0.3)` 与随机长休息。
+
+接口健康时逐步加快，触发风控（-412 / -403）后立即减半并冷却一段时间，之后再慢慢加回来：
+- 加性增（AI）：每次请求成功，速率 +`step` 次/秒，直到 `max_rate`；
+- 乘性减（MD）：每次风控，速率 ×`beta`（不低于 `min_rate`），并让**所有共用本控制器的线程**
+  冷却 uniform(3, 8) × 连续风控次数 秒（与原先的本地退避时长一致）；
+- 请求间隔 = 1 / 速率，多线程共用时按预约时间片排队，整体速率不超过当前值。
+
+[设计]
+- 进程内共用一个控制器（`shared_pacer()`），服务层的翻页与批量循环都从这里取时间片；
+- 其他异常（网络错误、视频不存在等）不影响速率；
+- `rate` / `interval` / `cooldown_remaining` 可随时读取，供调用方展示或记录当前节奏。
+
+[使用方法]
+    pacer = shared_pacer()
+    data = pacer.call(lambda: session.get(url, params=params))   # 等待时间片 → 请求 → 记录结果
+    print(f"当前速率 {pacer.rate:.2f} 次/秒")
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from src.api.errors import BiliForbiddenError, BiliRiskError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE = 1 / 0.3  # 初始速率（次/秒），与原先固定的 0.3s 间隔一致
+MIN_RATE = 0.1  # 速率下限：最慢 10 秒一次
+MAX_RATE = 5.0  # 速率上限
+RATE_STEP = 0.25  # 每次成功增加的速率
+BACKOFF_BETA = 0.5  # 每次风控的速率乘数
+COOLDOWN_BASE = 3.0  # 风控冷却时长下限（秒），乘以连续风控次数
+COOLDOWN_SPAN = 5.0  # 风控冷却时长随机跨度（秒）
+
+
+def is_risk_error(exc: BaseException) -> bool:
+    """是否风控类错误（-412 触发风控 / -403 被拒绝访问）。"""
+    return isinstance(exc, (BiliRiskError, BiliForbiddenError))
+
+
+class Pacer:
+    """线程安全的 AIMD 请求节奏控制器。"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, *, min_rate: float = MIN_RATE,
+                 max_rate: float = MAX_RATE, step: float = RATE_STEP, beta: float = BACKOFF_BETA):
+        """
+        :param rate: 初始速率（次/秒）
+        :param min_rate: 速率下限
+        :param max_rate: 速率上限
+        :param step: 每次成功增加的速率（加性增）
+        :param beta: 每次风控的速率乘数（乘性减，0~1）
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.step = step
+        self.beta = beta
+        self._rate = min(max(rate, min_rate), max_rate)
+        self._lock = threading.Lock()
+        self._next = 0.0  # 下一个可用时间片（time.monotonic）
+        self._cooldown_until = 0.0
+        self._streak = 0  # 连续风控次数（成功一次清零）
+        self.successes = 0
+        self.risks = 0
+
+    @property
+    def rate(self) -> float:
+        """当前速率（次/秒）。"""
+        with self._lock:
+            return self._rate
+
+    @property
+    def interval(self) -> float:
+        """当前请求间隔（秒）。"""
+        return 1.0 / self.rate
+
+    @property
+    def cooldown_remaining(self) -> float:
+        """风控冷却剩余秒数（未在冷却时为 0）。"""
+        with self._lock:
+            return max(0.0, self._cooldown_until - time.monotonic())
+
+    def wait(self) -> float:
+        """预约下一个时间片并等待到点，返回实际等待的秒数。"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next, self._cooldown_until)
+            self._next = slot + 1.0 / self._rate
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def success(self) -> None:
+        """请求成功：加性增。"""
+        with self._lock:
+            self._streak = 0
+            self.successes += 1
+            self._rate = min(self._rate + self.step, self.max_rate)
+
+    def risk(self) -> float:
+        """触发风控：乘性减，并让所有线程冷却一段时间；返回冷却秒数。"""
+        with self._lock:
+            self._streak += 1
+            self.risks += 1
+            self._rate = max(self._rate * self.beta, self.min_rate)
+            cooldown = random.uniform(COOLDOWN_BASE, COOLDOWN_BASE + COOLDOWN_SPAN) * self._streak
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + cooldown)
+            rate = self._rate
+        logger.warning("[pacing] 触发风控，速率降到 %.2f 次/秒，冷却 %.1fs", rate, cooldown)
+        return cooldown
+
+    def record(self, exc: Optional[BaseException] = None) -> None:
+        """按请求结果调整速率：无异常为成功，风控类异常退避，其余异常不影响速率。"""
+        if exc is None:
+            self.success()
+        elif is_risk_error(exc):
+            self.risk()
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """等待时间片后执行 fn，并按结果调整速率（异常原样抛出）。"""
+        self.wait()
+        try:
+            result = fn()
+        except Exception as e:
+            self.record(e)
+            raise
+        self.record()
+        return result
+
+
+_shared: Optional[Pacer] = None
+_shared_lock = threading.Lock()
+
+
+def shared_pacer() -> Pacer:
+    """进程内共用的节奏控制器（懒创建）。"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Pacer()
+        return _shared
@@ -0,0 +1,125 @@
+"""
+并发翻页：先取第 1 页拿到总数，再并发获取其余页，结果按页序拼接并去重。
+
+UP 主投稿列表、合集视频列表这类接口每页最多几十条，几千条的列表要翻上百页；
+逐页请求时每页都要等「上一页返回 + 请求间隔」。第 1 页返回总数后其余页的参数都已确定，
+可以并发发出，整体仍受共用的节奏控制器（见 src.util.pacing）限速。
+
+[设计]
+- `fetch_page(pn) -> (items, total)`：由调用方构造参数并请求（WBI 签名等每页各自计算）；
+- 第 1 页之后按 ceil(total / page_size) 并发获取第 2..N 页，每页经 `pacer.call` 取时间片，
+  触发风控时由 pacer 减速冷却后重试（最多 `retries` 次）；
+- 结果按页序拼接；翻页期间列表可能变动（新投稿把条目挤到下一页），传入 `key` 时按 key 去重，
+  保留第一次出现的位置；
+- 第 1 页条数少于请求的每页条数（且未取完）时按实际条数推算页数（服务端会截断过大的 ps）；
+- 某页返回空列表时忽略（列表在翻页期间变短）；
+- 页号事先已知时（如按 id 列表中的位置推算出只需要其中几页）用 `fetch_pages` 只取这些页。
+
+[使用方法]
+    def fetch(pn):
+        data = session.get(url, params={"pn": pn, "ps": 30})
+        return data["list"], data["page"]["count"]
+
+    items = fetch_all_pages(fetch, page_size=30, key=lambda v: v["bvid"])
+"""
+
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.util.pacing import Pacer, is_risk_error, shared_pacer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4  # 默认并发翻页线程数
+
+
+def _fetch_with_retry(fetch_page: Callable[[int], tuple], pn: int, pacer: Pacer, retries: int) -> tuple:
+    """经 pacer 获取一页；触发风控时由 pacer 减速冷却后重试（最多 retries 次）。"""
+    for attempt in range(retries + 1):
+        try:
+            return pacer.call(lambda: fetch_page(pn))
+        except Exception as e:
+            if not is_risk_error(e) or attempt == retries:
+                raise
+            logger.warning("[paginate] 第 %d 页触发风控（第 %d/%d 次尝试），冷却后重试。",
+                           pn, attempt + 1, retries + 1)
+
+
+def _concat(pages: list, key: Optional[Callable[[Any], Any]]) -> list:
+    """按页序拼接；传入 key 时按 key 去重，保留第一次出现的位置。"""
+    results = []
+    seen = set()
+    for items in pages:
+        for item in items or []:
+            if key is not None:
+                k = key(item)
+                if k in seen:
+                    continue
+                seen.add(k)
+            results.append(item)
+    return results
+
+
+def fetch_all_pages(
+        fetch_page: Callable[[int], tuple],
+        *,
+        page_size: int,
+        workers: int = DEFAULT_WORKERS,
+        key: Optional[Callable[[Any], Any]] = None,
+        pacer: Optional[Pacer] = None,
+        retries: int = 3,
+) -> list:
+    """获取全部页并按页序拼接。
+
+    :param fetch_page: pn -> (本页条目列表, 总条数)；pn 从 1 开始
+    :param page_size: 每页条数（用于由总条数推算页数）
+    :param workers: 第 2 页起的并发线程数（1 为逐页获取）
+    :param key: 条目 -> 去重键；None 时不去重
+    :param pacer: 节奏控制器；None 时使用进程内共用的 shared_pacer()
+    :param retries: 单页触发风控后的最大重试次数
+    :return: 全部条目（按页序、去重后）
+    :raises Exception: 某页重试后仍失败时原样抛出
+    """
+    pacer = pacer if pacer is not None else shared_pacer()
+    first, total = _fetch_with_retry(fetch_page, 1, pacer, retries)
+    pages = [list(first or [])]
+    if first and len(first) < min(page_size, total):
+        page_size = len(first)  # 服务端实际每页条数小于请求值（ps 超过上限时被截断）
+    n_pages = math.ceil(total / page_size) if page_size > 0 and total else 1
+    if first and n_pages > 1:
+        pages.extend(_fetch_many(fetch_page, list(range(2, n_pages + 1)), workers, pacer, retries))
+    return _concat(pages, key)
+
+
+def fetch_pages(
+        fetch_page: Callable[[int], tuple],
+        pns,
+        *,
+        workers: int = DEFAULT_WORKERS,
+        key: Optional[Callable[[Any], Any]] = None,
+        pacer: Optional[Pacer] = None,
+        retries: int = 3,
+) -> list:
+    """只获取指定的页（页号已知时不必先取第 1 页拿总数），按 pns 的顺序拼接。
+
+    :param fetch_page: pn -> (本页条目列表, 总条数)；pn 从 1 开始
+    :param pns: 要获取的页号（可迭代）
+    :param workers: 并发线程数（1 为逐页获取）
+    :param key: 条目 -> 去重键；None 时不去重
+    :param pacer: 节奏控制器；None 时使用进程内共用的 shared_pacer()
+    :param retries: 单页触发风控后的最大重试次数
+    :return: 各页条目（按页序、去重后）
+    :raises Exception: 某页重试后仍失败时原样抛出
+    """
+    pacer = pacer if pacer is not None else shared_pacer()
+    return _concat(_fetch_many(fetch_page, list(pns), workers, pacer, retries), key)
+
+
+def _fetch_many(fetch_page: Callable[[int], tuple], pns: list, workers: int, pacer: Pacer, retries: int) -> list:
+    """获取多页（workers > 1 时并发），返回各页条目列表（与 pns 同序）。"""
+    if workers > 1 and len(pns) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(pns))) as pool:
+            return list(pool.map(lambda pn: _fetch_with_retry(fetch_page, pn, pacer, retries)[0], pns))
+    return [_fetch_with_retry(fetch_page, pn, pacer, retries)[0] for pn in pns]
@@ -0,0 +1,108 @@
+"""
+分阶段流水线：把批量任务拆成若干阶段，各阶段独立设定线程数，阶段之间用有界队列衔接。
+
+批量下载时，一个线程从头到尾处理一个视频会轮流卡在「API 请求 → CDN 传输 → 合成」上，
+同一时刻只有一种资源在忙。拆成流水线后，少量 API 线程提前解析后面视频的信息与直链，
+传输线程始终有现成的任务可做，合成再交给独立的合成线程池（见 MergePool）。
+
+[设计]
+- `Stage(name, fn, workers)`：fn(payload, index) -> 交给下一阶段的 payload；
+  最后一个阶段的返回值即该输入的结果；
+- 阶段之间是容量为 `lookahead` 的有界队列：API 阶段最多领先传输阶段 lookahead 个任务，
+  不会一口气把整个列表的请求都发出去；
+- 某个输入在任一阶段抛异常时记录下来、不再往下传，其余输入照常处理；全部结束后抛出
+  最先发生的异常（与线程池「等其余任务跑完再上抛」一致）；
+- 结果按输入顺序返回。
+
+[使用方法]
+    results = run_pipeline(bvids, [
+        Stage("resolve", resolve, workers=2),
+        Stage("transfer", transfer, workers=4),
+    ], lookahead=8)
+"""
+
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # 队列结束标记
+
+
+@dataclass
+class Stage:
+    """流水线的一个阶段。"""
+
+    name: str
+    fn: Callable[[Any, int], Any]  # (上一阶段的 payload, 输入下标) -> 本阶段的 payload
+    workers: int = 1
+
+
+def run_pipeline(items: list, stages: list, *, lookahead: Optional[int] = None) -> list:
+    """按阶段处理 items，返回按输入顺序排列的结果列表（最后一个阶段的返回值）。
+
+    :param items: 输入列表（作为第一个阶段的 payload）
+    :param stages: Stage 列表（按执行顺序）
+    :param lookahead: 阶段间队列容量；None 时为最后一个阶段线程数的 2 倍
+    :return: 结果列表
+    :raises Exception: 任一输入在任一阶段失败时，等全部输入处理完后抛出最先发生的异常
+    """
+    if not stages:
+        return list(items)
+    if lookahead is None:
+        lookahead = max(stages[-1].workers, 1) * 2
+    results: list = [None] * len(items)
+    errors: list = []
+    errors_lock = threading.Lock()
+    queues = [queue.Queue(maxsize=max(lookahead, 1)) for _ in stages]
+
+    def _worker(k: int, stage: Stage, remaining: list, remaining_lock: threading.Lock) -> None:
+        inbox = queues[k]
+        outbox = queues[k + 1] if k + 1 < len(stages) else None
+        while True:
+            entry = inbox.get()
+            if entry is _DONE:
+                break
+            idx, payload = entry
+            try:
+                out = stage.fn(payload, idx)
+            except Exception as e:
+                logger.debug("[pipeline] 阶段 %s 处理第 %d 项失败：%s", stage.name, idx, e)
+                with errors_lock:
+                    errors.append(e)
+                continue
+            if outbox is None:
+                results[idx] = out
+            else:
+                outbox.put((idx, out))
+        # 本阶段最后一个线程退出时通知下一阶段结束
+        with remaining_lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last and outbox is not None:
+            for _ in range(max(stages[k + 1].workers, 1)):
+                outbox.put(_DONE)
+
+    threads = []
+    for k, stage in enumerate(stages):
+        n = max(stage.workers, 1)
+        remaining, remaining_lock = [n], threading.Lock()
+        for j in range(n):
+            t = threading.Thread(target=_worker, args=(k, stage, remaining, remaining_lock),
+                                 name=f"pipeline-{stage.name}-{j}", daemon=True)
+            t.start()
+            threads.append(t)
+
+    for idx, item in enumerate(items):
+        queues[0].put((idx, item))
+    for _ in range(max(stages[0].workers, 1)):
+        queues[0].put(_DONE)
+    for t in threads:
+        t.join()
+
+    if errors:
+        raise errors[0]
+    return results
@@ -12,7 +12,8 @@
 
 单个视频由「视频流 + 音频流 + ffmpeg 合成」组成：
 - 视频/音频流下载阶段：字节数通过 `add()` 增量累加（跨流累计，b = 各流总大小之和）；
-- ffmpeg 合成阶段：无字节数，用 `status()` 单独提示。
+- ffmpeg 合成阶段：无字节数，用 `status()` 单独提示；
+- 并发批量下载时合成交给独立线程池（MergePool），队列深度与合成耗时经 `merge_status()` 上报。
 """
 
 from typing import Callable, List, Optional
@@ -58,6 +59,9 @@ class BatchProgress:
         self.current_quality: Optional[VideoQuality] = None  # 当前视频的清晰度
         self.current_done = 0  # 当前视频累计已下载字节
         self._stream_totals: List[int] = []  # 各流已知的总大小
+        self.merge_queued = 0  # 合成线程池：排队中的合成数
+        self.merge_running = 0  # 合成线程池：进行中的合成数
+        self.merge_seconds: Optional[float] = None  # 最近一次合成耗时（秒）
 
     # ---- 每个视频的生命周期 ----
 
@@ -112,6 +116,19 @@ class BatchProgress:
         """当前视频完成，输出完成行。"""
         self._render(final=True)
 
+    def merge_status(self, queued: int, running: int, seconds: Optional[float]) -> None:
+        """合成线程池状态（由 MergePool 在合成线程中调用）。
+
+        :param queued: 排队中的合成数
+        :param running: 进行中的合成数
+        :param seconds: 最近一次合成耗时（秒），尚无完成的合成时为 None
+        """
+        self.merge_queued = queued
+        self.merge_running = running
+        self.merge_seconds = seconds
+        if self.display:
+            print(f"\r{_merge_line(queued, running, seconds)}", flush=True)
+
     # ---- 渲染 ----
 
     def _header(self) -> str:
@@ -158,7 +175,7 @@ class BatchProgress:
 class ParallelBatchProgress:
     """线程安全的并发下载进度：多线程各自持有「当前文件」状态，字节进度跨线程聚合。
 
-    与 `BatchProgress` 契约一致（start/set_quality/add/update/status/finish/
+    与 `BatchProgress` 契约一致（start/set_quality/add/update/status/finish/merge_status/
     make_stream_callback/iter_count），并发下多个线程调用互不干扰；
     `current_done`/`current_index` 等仅代表聚合视图。display=True 时 stdout 会交错，
     GUI 场景通常 display=False 并经前端适配器转发 Qt 信号。
@@ -178,6 +195,9 @@ class ParallelBatchProgress:
         self._done_done = 0         # 已完成文件的已下载字节
         self._done_total = 0        # 已完成文件的已知总大小
         self._stream_totals: List[int] = []  # 聚合视图：各活跃线程已知总大小
+        self.merge_queued = 0
+        self.merge_running = 0
+        self.merge_seconds: Optional[float] = None
 
     def start(self, index: int, name: str) -> None:
         with self._lock:
@@ -228,6 +248,14 @@ class ParallelBatchProgress:
             self._aggregate_locked()
             self._render_locked(final=True)
 
+    def merge_status(self, queued: int, running: int, seconds: Optional[float]) -> None:
+        with self._lock:
+            self.merge_queued = queued
+            self.merge_running = running
+            self.merge_seconds = seconds
+        if self.display:
+            print(f"\r{_merge_line(queued, running, seconds)}", flush=True)
+
     def make_stream_callback(self) -> StreamProgressCallback:
         return self.update
 
@@ -272,6 +300,14 @@ class ParallelBatchProgress:
             print(f"\r{line}", end="", flush=True)
 
 
+def _merge_line(queued: int, running: int, seconds: Optional[float]) -> str:
+    """合成队列状态行：`[合成] 排队 q，进行中 r，上次耗时 s`。"""
+    line = f"[合成] 排队 {queued}，进行中 {running}"
+    if seconds is not None:
+        line += f"，上次耗时 {seconds:.1f}s"
+    return line
+
+
 class _ThreadFile:
     """单个线程的「当前文件」进度状态（ParallelBatchProgress 内部使用）。"""
 
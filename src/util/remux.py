@@ -0,0 +1,489 @@
+"""
+内置 fMP4 重封装：把 B 站 DASH 的视频流 `.m4s` 与音频流 `.m4s` 合成为单个 MP4，无需 ffmpeg。
+
+- `remux_dash`        合成入口（等价于 `ffmpeg -i video -i audio -c copy out.mp4` 的常见情形）；
+- `remux_supported`   按 codecs 字符串预判能否走内置合成（供下载前的后端预检）；
+- `extract_audio_track` 从合成好的分片 MP4 中取出音频轨道（等价于 `ffmpeg -i in.mp4 -vn -c copy out.m4a`）；
+- `RemuxUnsupportedError` 输入超出内置合成的支持范围，由调用方回退到 ffmpeg。
+
+[原理]
+DASH 流是分片 MP4（ISO-BMFF）：`ftyp` + `moov`（单个 trak，mvex/trex 声明分片）
++ 若干 `moof`/`mdat` 分片。合成时：
+1. 重建 `moov`：视频 trak（track_ID=1）+ 音频 trak（track_ID=2），mvex 内两个 trex；
+2. 两路分片按解码时间（tfdt / mdhd timescale）交错写出，仅**原位改写**定长字段
+   （mfhd 序号、tfhd track_ID），box 大小不变，trun 的 data_offset（相对 moof）保持有效；
+3. 末尾追加 `mfra`（每轨一个 tfra），便于播放器随机定位。
+只顺序写一遍输出文件；mdat 按块拷贝，不整体读入内存。
+
+支持范围：视频 avc1/avc3/hev1/hvc1/av01 + 音频 mp4a，单轨分片输入，tfhd 未使用
+显式 base_data_offset。其余情况（加密、FLAC/杜比音轨、非分片等）抛 RemuxUnsupportedError。
+"""
+
+import heapq
+import logging
+import struct
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# 内置合成支持的采样描述（stsd 首个 entry 的 fourcc）
+VIDEO_FOURCCS = ("avc1", "avc3", "hev1", "hvc1", "av01")
+AUDIO_FOURCCS = ("mp4a",)
+
+_COPY_CHUNK = 1024 * 1024
+
+
+class RemuxUnsupportedError(Exception):
+    """输入超出内置合成的支持范围（由调用方回退到 ffmpeg）。"""
+
+
+def remux_supported(video_codecs: str, audio_codecs: str) -> bool:
+    """按 playurl 返回的 codecs 字段预判能否走内置合成（如 `avc1.640032` + `mp4a.40.2`）。"""
+    return (video_codecs.lower().startswith(VIDEO_FOURCCS)
+            and audio_codecs.lower().startswith(AUDIO_FOURCCS))
+
+
+# ---- box 解析 ----
+
+def _children(data: bytes, start: int, end: int) -> Iterator[tuple[str, int, int, int]]:
+    """遍历 data[start:end] 内的子 box，产出 (type, box_start, payload_start, box_end)。"""
+    pos = start
+    while pos + 8 <= end:
+        size, = struct.unpack_from(">I", data, pos)
+        box_type = data[pos + 4:pos + 8].decode("latin-1")
+        header = 8
+        if size == 1:
+            size, = struct.unpack_from(">Q", data, pos + 8)
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise RemuxUnsupportedError(f"box「{box_type}」长度非法")
+        yield box_type, pos, pos + header, pos + size
+        pos += size
+
+
+def _find(data: bytes, start: int, end: int, path: str) -> Optional[tuple[int, int, int]]:
+    """按 `a/b/c` 路径查找首个匹配的子 box，返回 (box_start, payload_start, box_end)。"""
+    head, _, rest = path.partition("/")
+    for box_type, box_start, payload, box_end in _children(data, start, end):
+        if box_type == head:
+            if not rest:
+                return box_start, payload, box_end
+            return _find(data, payload, box_end, rest)
+    return None
+
+
+def _box(box_type: str, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + box_type.encode("latin-1") + payload
+
+
+def _top_level(f: BinaryIO) -> Iterator[tuple[str, int, int, int]]:
+    """遍历文件顶层 box（只读 header，不读 payload），产出 (type, box_start, payload_start, box_end)。"""
+    f.seek(0, 2)
+    file_end = f.tell()
+    pos = 0
+    while pos + 8 <= file_end:
+        f.seek(pos)
+        header = f.read(16)
+        size, = struct.unpack_from(">I", header, 0)
+        box_type = header[4:8].decode("latin-1")
+        header_len = 8
+        if size == 1:
+            size, = struct.unpack_from(">Q", header, 8)
+            header_len = 16
+        elif size == 0:
+            size = file_end - pos
+        if size < header_len or pos + size > file_end:
+            raise RemuxUnsupportedError(f"顶层 box「{box_type}」长度非法（文件可能不完整）")
+        yield box_type, pos, pos + header_len, pos + size
+        pos += size
+
+
+def _read(f: BinaryIO, start: int, end: int) -> bytes:
+    f.seek(start)
+    return f.read(end - start)
+
+
+# ---- 输入解析 ----
+
+class _Fragment:
+    """一个分片：moof 及紧随其后的 mdat（文件内连续区间）。"""
+
+    __slots__ = ("start", "end", "decode_time", "moof", "tfhd_id_pos", "mfhd_seq_pos")
+
+    def __init__(self, start, end, decode_time, moof, tfhd_id_pos, mfhd_seq_pos):
+        self.start = start
+        self.end = end
+        self.decode_time = decode_time  # tfdt baseMediaDecodeTime（轨道 timescale）
+        self.moof = moof  # moof 原始字节（写出前原位改写）
+        self.tfhd_id_pos = tfhd_id_pos
+        self.mfhd_seq_pos = mfhd_seq_pos
+
+
+class _Track:
+    """单轨分片 MP4 输入（视频或音频流文件）。"""
+
+    def __init__(self, path: Path, handler: str, fourccs: tuple):
+        self.path = path
+        self.ftyp = b""
+        self.moov = b""
+        self.fragments: list = []
+        with open(path, "rb") as f:
+            boxes = list(_top_level(f))
+            i = 0
+            while i < len(boxes):
+                box_type, start, _, end = boxes[i]
+                if box_type == "ftyp":
+                    self.ftyp = _read(f, start, end)
+                elif box_type == "moov":
+                    self.moov = _read(f, start, end)
+                elif box_type == "moof":
+                    frag_end = end
+                    while i + 1 < len(boxes) and boxes[i + 1][0] == "mdat":
+                        i += 1
+                        frag_end = boxes[i][3]
+                    self.fragments.append(self._parse_moof(_read(f, start, end), start, frag_end))
+                i += 1
+        if not self.moov:
+            raise RemuxUnsupportedError(f"{path.name} 缺少 moov")
+        if not self.fragments:
+            raise RemuxUnsupportedError(f"{path.name} 不是分片 MP4（无 moof）")
+        self._parse_moov(handler, fourccs)
+        # 最早呈现时间（轨道 timescale）：与 ffmpeg 一致，把每路输入的起点对齐到 0
+        self.start_time = self.fragments[0].decode_time + _earliest_cts(
+            self.fragments[0].moof, self.default_duration)
+
+    def _parse_moov(self, handler: str, fourccs: tuple) -> None:
+        moov = self.moov
+        traks = [c for c in _children(moov, 8, len(moov)) if c[0] == "trak"]
+        if len(traks) != 1:
+            raise RemuxUnsupportedError(f"{self.path.name} 含 {len(traks)} 个轨道，仅支持单轨")
+        _, trak_start, trak_payload, trak_end = traks[0]
+        self.trak = (trak_start, trak_payload, trak_end)
+
+        hdlr = _find(moov, trak_payload, trak_end, "mdia/hdlr")
+        if hdlr is None or moov[hdlr[1] + 8:hdlr[1] + 12].decode("latin-1") != handler:
+            raise RemuxUnsupportedError(f"{self.path.name} 不是 {handler} 轨道")
+        stsd = _find(moov, trak_payload, trak_end, "mdia/minf/stbl/stsd")
+        if stsd is None:
+            raise RemuxUnsupportedError(f"{self.path.name} 缺少 stsd")
+        fourcc = moov[stsd[1] + 12:stsd[1] + 16].decode("latin-1")
+        if fourcc not in fourccs:
+            raise RemuxUnsupportedError(f"{self.path.name} 的编码 {fourcc} 不在内置合成支持范围内")
+        self.fourcc = fourcc
+
+        mdhd = _find(moov, trak_payload, trak_end, "mdia/mdhd")
+        self.timescale = _read_timescale(moov, mdhd[1]) if mdhd else 0
+        mvhd = _find(moov, 8, len(moov), "mvhd")
+        self.movie_timescale = _read_timescale(moov, mvhd[1]) if mvhd else 0
+        if not self.timescale or not self.movie_timescale:
+            raise RemuxUnsupportedError(f"{self.path.name} 缺少 timescale")
+
+        trex = _find(moov, 8, len(moov), "mvex/trex")
+        if trex is None:
+            raise RemuxUnsupportedError(f"{self.path.name} 缺少 mvex/trex")
+        self.trex = moov[trex[0]:trex[2]]
+        self.default_duration, = struct.unpack_from(">I", self.trex, 20)
+        self.has_edit_list = _find(moov, trak_payload, trak_end, "edts") is not None
+
+    @staticmethod
+    def _parse_moof(moof: bytes, start: int, end: int) -> _Fragment:
+        mfhd = _find(moof, 8, len(moof), "mfhd")
+        trafs = [c for c in _children(moof, 8, len(moof)) if c[0] == "traf"]
+        if mfhd is None or len(trafs) != 1:
+            raise RemuxUnsupportedError("moof 结构不受支持（缺少 mfhd 或含多个 traf）")
+        _, _, traf_payload, traf_end = trafs[0]
+        tfhd = _find(moof, traf_payload, traf_end, "tfhd")
+        tfdt = _find(moof, traf_payload, traf_end, "tfdt")
+        if tfhd is None or tfdt is None:
+            raise RemuxUnsupportedError("traf 缺少 tfhd 或 tfdt")
+        flags = int.from_bytes(moof[tfhd[1] + 1:tfhd[1] + 4], "big")
+        if flags & 0x000001:
+            # 显式 base_data_offset 是文件内绝对偏移，搬移分片后会失效
+            raise RemuxUnsupportedError("tfhd 使用显式 base_data_offset")
+        version = moof[tfdt[1]]
+        fmt = ">Q" if version == 1 else ">I"
+        decode_time, = struct.unpack_from(fmt, moof, tfdt[1] + 4)
+        return _Fragment(start, end, decode_time, bytearray(moof), tfhd[1] + 4, mfhd[1] + 4)
+
+
+def _earliest_cts(moof: bytes, trex_duration: int) -> int:
+    """首个分片内样本的最早呈现时间（相对 tfdt）：min(累计解码时间 + 合成时间偏移)。
+
+    含 B 帧的视频流首帧 cts 通常 > 0；音频流为 0。
+    """
+    traf = _find(moof, 8, len(moof), "traf")
+    tfhd = _find(moof, traf[1], traf[2], "tfhd")
+    trun = _find(moof, traf[1], traf[2], "trun")
+    if trun is None:
+        return 0
+    tf_flags = int.from_bytes(moof[tfhd[1] + 1:tfhd[1] + 4], "big")
+    default_duration = trex_duration
+    if tf_flags & 0x000008:
+        pos = tfhd[1] + 8 + (4 if tf_flags & 0x000002 else 0)
+        default_duration, = struct.unpack_from(">I", moof, pos)
+
+    version = moof[trun[1]]
+    flags = int.from_bytes(moof[trun[1] + 1:trun[1] + 4], "big")
+    count, = struct.unpack_from(">I", moof, trun[1] + 4)
+    pos = trun[1] + 8 + (4 if flags & 0x000001 else 0) + (4 if flags & 0x000004 else 0)
+    if not flags & 0x000800:
+        return 0
+    decode, earliest = 0, None
+    for _ in range(count):
+        duration = default_duration
+        if flags & 0x000100:
+            duration, = struct.unpack_from(">I", moof, pos)
+            pos += 4
+        pos += (4 if flags & 0x000200 else 0) + (4 if flags & 0x000400 else 0)
+        cts, = struct.unpack_from(">i" if version == 1 else ">I", moof, pos)
+        pos += 4
+        earliest = decode + cts if earliest is None else min(earliest, decode + cts)
+        decode += duration
+    return max(earliest or 0, 0)
+
+
+def _read_timescale(data: bytes, payload: int) -> int:
+    """mvhd / mdhd 的 timescale（version 1 时前置 64 位时间字段）。"""
+    offset = payload + 4 + (16 if data[payload] == 1 else 8)
+    return struct.unpack_from(">I", data, offset)[0]
+
+
+# ---- 输出构造 ----
+
+def _patch_u32(buf: bytearray, pos: int, value: int) -> None:
+    struct.pack_into(">I", buf, pos, value)
+
+
+def _build_trak(track: _Track, track_id: int, movie_timescale: int) -> bytes:
+    """复制 trak 并改写 tkhd track_ID；movie timescale 不同时按比例换算 elst 的段时长。
+
+    输入无 edts 且最早呈现时间不为 0（如含 B 帧的视频流）时，补一个 elst 把起点对齐到 0，
+    与 `ffmpeg -c copy` 的音画对齐结果一致。
+    """
+    trak_start, trak_payload, trak_end = track.trak
+    buf = bytearray(track.moov[trak_start:trak_end])
+    base = trak_start
+    tkhd = _find(track.moov, trak_payload, trak_end, "tkhd")
+    if tkhd is None:
+        raise RemuxUnsupportedError(f"{track.path.name} 缺少 tkhd")
+    payload = tkhd[1] - base
+    _patch_u32(buf, payload + 4 + (16 if buf[payload] == 1 else 8), track_id)
+
+    elst = _find(track.moov, trak_payload, trak_end, "edts/elst")
+    if elst is not None and track.movie_timescale != movie_timescale:
+        payload = elst[1] - base
+        version = buf[payload]
+        count, = struct.unpack_from(">I", buf, payload + 4)
+        pos = payload + 8
+        fmt, entry = (">Q", 20) if version == 1 else (">I", 12)
+        for _ in range(count):
+            duration, = struct.unpack_from(fmt, buf, pos)
+            struct.pack_into(fmt, buf, pos, duration * movie_timescale // track.movie_timescale)
+            pos += entry
+    if not track.has_edit_list and track.start_time:
+        # segment_duration=0：分片文件中表示该段持续到结尾
+        elst = _box("elst", struct.pack(">IIQqhh", 1 << 24, 1, 0, track.start_time, 1, 0))
+        tkhd_end = tkhd[2] - base
+        buf[tkhd_end:tkhd_end] = _box("edts", elst)
+        _patch_u32(buf, 0, len(buf))
+    return bytes(buf)
+
+
+def _build_moov(video: _Track, audio: _Track) -> bytes:
+    """以视频流的 moov 为骨架：视频 trak(1) + 音频 trak(2)，mvex 内两个 trex。"""
+    moov = video.moov
+    movie_timescale = video.movie_timescale
+    parts = []
+    for box_type, start, payload, end in _children(moov, 8, len(moov)):
+        if box_type == "mvhd":
+            mvhd = bytearray(moov[start:end])
+            _patch_u32(mvhd, len(mvhd) - 4, 3)  # next_track_ID
+            parts.append(bytes(mvhd))
+        elif box_type == "trak":
+            parts.append(_build_trak(video, 1, movie_timescale))
+            parts.append(_build_trak(audio, 2, movie_timescale))
+        elif box_type == "mvex":
+            trexes = []
+            for track, track_id in ((video, 1), (audio, 2)):
+                trex = bytearray(track.trex)
+                _patch_u32(trex, 12, track_id)
+                trexes.append(bytes(trex))
+            # mehd（整体分片时长）只描述视频流，合成后省略，由播放器按分片推算
+            parts.append(_box("mvex", b"".join(trexes)))
+        else:
+            parts.append(moov[start:end])
+    return _box("moov", b"".join(parts))
+
+
+def _build_mfra(index: dict) -> bytes:
+    """随机访问索引：每轨一个 tfra（version 1，64 位时间/偏移），末尾 mfro 记录 mfra 总长。"""
+    tfras = []
+    for track_id, entries in index.items():
+        payload = struct.pack(">I", 1 << 24) + struct.pack(">III", track_id, 0, len(entries))
+        payload += b"".join(struct.pack(">QQBBB", t, off, 1, 1, 1) for t, off in entries)
+        tfras.append(_box("tfra", payload))
+    body = b"".join(tfras)
+    size = 8 + len(body) + 16
+    return _box("mfra", body + _box("mfro", struct.pack(">II", 0, size)))
+
+
+def remux_dash(video_path: Path, audio_path: Path, save_path: Path) -> int:
+    """
+    将 DASH 视频流与音频流合成为单个（分片）MP4，纯 Python 实现，不启动 ffmpeg。
+
+    先完整解析两路输入（不支持时在写出前抛错，不留半成品），再顺序写出：
+    ftyp → moov → 按解码时间交错的 moof/mdat → mfra。
+
+    [使用方法]
+        remux_dash(Path("video.m4s"), Path("audio.m4s"), Path("output.mp4"))
+    :param video_path: 视频流文件路径
+    :param audio_path: 音频流文件路径
+    :param save_path: 合成后的文件保存路径（失败时删除半成品）
+    :return: 输出文件字节数
+    :raises RemuxUnsupportedError: 输入超出内置合成的支持范围（调用方应回退 ffmpeg）
+    :raises OSError: 读写失败
+    """
+    video = _Track(Path(video_path), "vide", VIDEO_FOURCCS)
+    audio = _Track(Path(audio_path), "soun", AUDIO_FOURCCS)
+
+    header = (video.ftyp or _box("ftyp", b"iso6" + struct.pack(">I", 0) + b"iso6mp41"))
+    header += _build_moov(video, audio)
+    # 按解码时间（秒，各自扣除起点）归并两路分片；同一时刻视频在前
+    timeline = heapq.merge(*[
+        [((frag.decode_time - track.start_time) / track.timescale, source, n, frag)
+         for n, frag in enumerate(track.fragments)]
+        for source, track in enumerate((video, audio))
+    ])
+
+    save_path = Path(save_path)
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    index: dict = {1: [], 2: []}
+    try:
+        with open(save_path, "wb") as out, open(video.path, "rb") as vf, open(audio.path, "rb") as af:
+            out.write(header)
+            for seq, (_, source, _, frag) in enumerate(timeline, 1):
+                track_id = source + 1
+                src = vf if source == 0 else af
+                _patch_u32(frag.moof, frag.mfhd_seq_pos, seq)
+                _patch_u32(frag.moof, frag.tfhd_id_pos, track_id)
+                index[track_id].append((frag.decode_time, out.tell()))
+                out.write(frag.moof)
+                src.seek(frag.start + len(frag.moof))
+                remaining = frag.end - frag.start - len(frag.moof)
+                while remaining > 0:
+                    chunk = src.read(min(_COPY_CHUNK, remaining))
+                    if not chunk:
+                        raise OSError(f"{Path(src.name).name} 数据提前结束")
+                    out.write(chunk)
+                    remaining -= len(chunk)
+            out.write(_build_mfra(index))
+            size = out.tell()
+    except BaseException:
+        save_path.unlink(missing_ok=True)
+        raise
+    logger.debug("[remux_dash] %s + %s → %s（%d 字节，%d+%d 个分片）",
+                 video.path.name, audio.path.name, save_path.name, size,
+                 len(video.fragments), len(audio.fragments))
+    return size
+
+
+def extract_audio_track(src_path: Path, save_path: Path) -> int:
+    """
+    从合成好的分片 MP4（如 remux_dash 的输出）中取出音频轨道，写成只含音频的分片 MP4（.m4a）。
+
+    只保留音频 trak 与其 trex，逐个拷贝属于音频轨道的 moof/mdat（trun 的 data_offset 相对 moof，
+    整段拷贝后仍然有效），重排 mfhd 序号。不是分片 MP4、没有 AAC 音轨或 moof 含多个 traf 时抛
+    RemuxUnsupportedError，由调用方回退 ffmpeg。
+
+    [使用方法]
+        extract_audio_track(Path("[标题](BV号).mp4"), Path("[标题](BV号).m4a"))
+    :param src_path: 合成好的视频文件路径
+    :param save_path: 音频文件保存路径（失败时删除半成品）
+    :return: 输出文件字节数
+    :raises RemuxUnsupportedError: 输入超出内置提取的支持范围
+    :raises OSError: 读写失败
+    """
+    src_path = Path(src_path)
+    ftyp = moov = b""
+    fragments = []  # (track_ID, _Fragment)
+    with open(src_path, "rb") as f:
+        boxes = list(_top_level(f))
+        i = 0
+        while i < len(boxes):
+            box_type, start, _, end = boxes[i]
+            if box_type == "ftyp":
+                ftyp = _read(f, start, end)
+            elif box_type == "moov":
+                moov = _read(f, start, end)
+            elif box_type == "moof":
+                frag_end = end
+                while i + 1 < len(boxes) and boxes[i + 1][0] == "mdat":
+                    i += 1
+                    frag_end = boxes[i][3]
+                frag = _Track._parse_moof(_read(f, start, end), start, frag_end)
+                fragments.append((struct.unpack_from(">I", frag.moof, frag.tfhd_id_pos)[0], frag))
+            i += 1
+    if not moov:
+        raise RemuxUnsupportedError(f"{src_path.name} 缺少 moov")
+    if not fragments:
+        raise RemuxUnsupportedError(f"{src_path.name} 不是分片 MP4（无 moof）")
+
+    audio_trak, track_id = None, None
+    for box_type, start, payload, end in _children(moov, 8, len(moov)):
+        if box_type != "trak":
+            continue
+        hdlr = _find(moov, payload, end, "mdia/hdlr")
+        if hdlr is None or moov[hdlr[1] + 8:hdlr[1] + 12] != b"soun":
+            continue
+        stsd = _find(moov, payload, end, "mdia/minf/stbl/stsd")
+        fourcc = moov[stsd[1] + 12:stsd[1] + 16].decode("latin-1") if stsd else ""
+        tkhd = _find(moov, payload, end, "tkhd")
+        if fourcc not in AUDIO_FOURCCS or tkhd is None:
+            raise RemuxUnsupportedError(f"{src_path.name} 的音频编码 {fourcc or '未知'} 不在内置提取支持范围内")
+        audio_trak = moov[start:end]
+        track_id, = struct.unpack_from(">I", moov, tkhd[1] + 4 + (16 if moov[tkhd[1]] == 1 else 8))
+        break
+    if audio_trak is None:
+        raise RemuxUnsupportedError(f"{src_path.name} 没有音频轨道")
+
+    parts = []
+    for box_type, start, payload, end in _children(moov, 8, len(moov)):
+        if box_type == "trak":
+            if moov[start:end] == audio_trak:
+                parts.append(audio_trak)
+        elif box_type == "mvex":
+            # 只保留音频轨道的 trex；mehd（整体分片时长）省略，由播放器按分片推算
+            trexes = [moov[s:e] for t, s, _, e in _children(moov, payload, end)
+                      if t == "trex" and struct.unpack_from(">I", moov, s + 12)[0] == track_id]
+            parts.append(_box("mvex", b"".join(trexes)))
+        else:
+            parts.append(moov[start:end])
+    header = ftyp or _box("ftyp", b"M4A " + struct.pack(">I", 0) + b"M4A mp42isom")
+    header += _box("moov", b"".join(parts))
+
+    save_path = Path(save_path)
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    audio = [frag for tid, frag in fragments if tid == track_id]
+    try:
+        with open(save_path, "wb") as out, open(src_path, "rb") as src:
+            out.write(header)
+            for seq, frag in enumerate(audio, 1):
+                _patch_u32(frag.moof, frag.mfhd_seq_pos, seq)
+                out.write(frag.moof)
+                src.seek(frag.start + len(frag.moof))
+                remaining = frag.end - frag.start - len(frag.moof)
+                while remaining > 0:
+                    chunk = src.read(min(_COPY_CHUNK, remaining))
+                    if not chunk:
+                        raise OSError(f"{src_path.name} 数据提前结束")
+                    out.write(chunk)
+                    remaining -= len(chunk)
+            size = out.tell()
+    except BaseException:
+        save_path.unlink(missing_ok=True)
+        raise
+    logger.debug("[extract_audio_track] %s → %s（%d 字节，%d 个分片）", src_path.name, save_path.name, size, len(audio))
+    return size
@@ -0,0 +1,140 @@
+"""
+跨进程断点续传日志：`.part` 文件 + 旁路 JSON 日志。
+
+下载中途崩溃、GUI 强制结束线程或断网退出后，已下载的字节保留在
+`<保存目录>/.bilitools_parts/<BV号>-Pxx/{video,audio}.part`，旁边的 `*.part.json` 记录
+该流的来源与进度（BV号、分P、目标清晰度、流类型、预期大小、已写入字节、分段表）。
+下次对同一视频调用 download_* 时读取日志继续下载：直链未过期（URL 的 `deadline` 参数）
+时直接复用，已过期则重新请求 playurl，并确认新流与日志记录的是同一个流（清晰度/编码/大小一致）。
+
+[设计]
+- 日志只记录**已落盘**的字节（分段下载每块写入后 flush 再计数），崩溃后按日志续传只会
+  重写少量字节，不会留下空洞；
+- 单连接下载以 `.part` 文件实际大小为准（append 续传），日志中的 bytes_written 仅作参考；
+- 写日志节流（`_SAVE_INTERVAL` 秒一次），先写临时文件再原子替换，崩溃时不会留下半截 JSON；
+- `.part` / `.json` 后缀不在缓存检查的扩展名内，不会被误判为已下载的成品。
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+PARTS_DIR_NAME = ".bilitools_parts"  # 未完成下载的存放目录（位于保存目录下）
+_SAVE_INTERVAL = 2.0  # 日志写盘的最小间隔（秒）
+_DEADLINE_MARGIN = 60  # 直链剩余有效期少于该秒数时视为已过期
+
+
+def parts_dir(save_dir: Path, bvid: str, page: int) -> Path:
+    """某个视频分P的未完成下载目录：`<save_dir>/.bilitools_parts/<BV号>-Pxx/`。"""
+    return Path(save_dir) / PARTS_DIR_NAME / f"{bvid}-P{page:02d}"
+
+
+def url_deadline(url: str) -> Optional[int]:
+    """从直链查询串解析 `deadline`（Unix 时间戳，秒）；没有该参数时返回 None。"""
+    value = parse_qs(urlparse(url).query).get("deadline", [""])[0]
+    return int(value) if value.isdigit() else None
+
+
+@dataclass
+class StreamJournal:
+    """单个媒体流的续传日志（与 `<name>.part` 同目录的 `<name>.part.json`）。"""
+
+    path: Path  # 日志文件路径（不写入 JSON）
+    bvid: str = ""
+    page: int = 1
+    quality: int = 0  # 请求的目标清晰度 qn（VideoQuality）
+    stream_id: str = ""  # video / audio
+    stream_quality: int = 0  # 实际下载的流 qn（音频为 0）
+    codecs: str = ""
+    expected_size: int = 0  # 流总大小（字节），playurl 未提供时为 0
+    url: str = ""
+    backup_urls: list = field(default_factory=list)
+    filename: str = ""  # 成品文件名（续传时无需再请求视频信息即可确定保存路径）
+    bytes_written: int = 0  # 已落盘字节
+    segments: list = field(default_factory=list)  # 分段表 [[start, end, done], ...]；单连接下载为空
+    complete: bool = False
+
+    def __post_init__(self) -> None:
+        self.path = Path(self.path)
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+
+    @property
+    def part_path(self) -> Path:
+        """对应的 `.part` 数据文件路径。"""
+        return self.path.with_suffix("")
+
+    @property
+    def deadline(self) -> Optional[int]:
+        return url_deadline(self.url)
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        """直链是否已过期（或即将过期）；URL 无 deadline 参数时视为未过期。"""
+        deadline = self.deadline
+        if deadline is None:
+            return False
+        return deadline - _DEADLINE_MARGIN <= (now if now is not None else time.time())
+
+    def matches(self, stream) -> bool:
+        """新 playurl 里的流是否与日志记录的是同一个流（清晰度/编码/大小一致）。"""
+        return (getattr(stream, "quality", 0) == self.stream_quality
+                and stream.codecs == self.codecs
+                and (not stream.size or not self.expected_size or stream.size == self.expected_size))
+
+    def rebind(self, stream) -> None:
+        """换用新 playurl 的直链（旧直链过期后），并立即写盘。"""
+        self.url = stream.url
+        self.backup_urls = list(stream.backup_urls)
+        self.save()
+
+    # ---- 读写 ----
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["StreamJournal"]:
+        """读取日志；文件不存在或内容损坏时返回 None。"""
+        path = Path(path)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            data.pop("path", None)
+            return cls(path=path, **data)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("[resume] 续传日志损坏，忽略：%s（%s）", path, e)
+            return None
+
+    def save(self) -> None:
+        """立即写盘（临时文件 + 原子替换）。"""
+        with self._lock:
+            data = {k: v for k, v in asdict(self).items() if k != "path"}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
+            self._last_save = time.monotonic()
+
+    def checkpoint(self, bytes_written: int, segments: Optional[list] = None) -> None:
+        """记录进度（节流写盘）。调用方需保证这些字节已 flush 到文件。"""
+        self.bytes_written = bytes_written
+        if segments is not None:
+            self.segments = segments
+        if time.monotonic() - self._last_save >= _SAVE_INTERVAL:
+            self.save()
+
+    def finish(self, size: int) -> None:
+        """流下载完成：记录最终大小并写盘（之后的续传直接跳过该流）。"""
+        self.bytes_written = size
+        self.complete = True
+        self.save()
+
+    def discard(self) -> None:
+        """删除日志与 `.part` 文件（流已变化或需要从头下载时）。"""
+        self.part_path.unlink(missing_ok=True)
+        self.path.unlink(missing_ok=True)
@@ -1,41 +1,66 @@
 """
-风控协调器：并发下载时，任一线程触发风控后，所有线程在下一次获取信息前各自暂停。
+风控协调器：并发下载时，某个账号触发风控后，使用该账号的线程在下一次获取信息前各自暂停。
 
 [设计]
-- `mark_risk()`：某线程捕获到风控错误（BiliRiskError / BiliForbiddenError）时调用，
-  内部风控事件版本号 +1；
-- `pause_before_fetch()`：每次「获取信息」前调用。若自该线程上次检查以来发生过风控，
-  则按**本线程独立随机时长**暂停一次（每个线程单独计算，互不影响），随后继续。
+- 风控状态**按账号**记录（account 为任意可哈希的账号标识，如 `id(session)`；不传时所有线程
+  共用同一个账号，即原先的单账号行为）；
+- `mark_risk(account)`：某线程捕获到风控错误（BiliRiskError / BiliForbiddenError）时调用，
+  该账号的风控事件版本号 +1，并进入 `cooldown` 秒的冷却期；
+- `pause_before_fetch(account=account)`：每次「获取信息」前调用。若自该线程上次检查以来
+  该账号发生过风控，则按**本线程独立随机时长**暂停一次（每个线程单独计算，互不影响），随后继续；
+  其他账号的风控不会让本线程暂停；
+- `cooldown_remaining(account)`：账号的冷却剩余秒数，供多账号调度（见 src.util.dispatcher）
+  把冷却期的账号排到最后——新任务会被路由到健康的账号，不必整池停顿；
 - 线程各自用 `threading.local()` 记录已消费的事件版本，保证每个线程对每次风控恰好暂停一次。
 """
 
 import random
 import threading
 import time
+from typing import Hashable, Optional
+
+DEFAULT_COOLDOWN = 60.0  # 账号触发风控后的冷却时长（秒），冷却期内新任务优先分给其他账号
 
 
 class RiskGate:
-    """线程安全的风控事件协调器。"""
+    """线程安全的风控事件协调器（按账号隔离）。"""
 
-    def __init__(self):
+    def __init__(self, cooldown: float = DEFAULT_COOLDOWN):
+        """
+        :param cooldown: 账号触发风控后的冷却时长（秒）
+        """
+        self.cooldown = cooldown
         self._lock = threading.Lock()
-        self._epoch = 0              # 风控事件版本号
-        self._seen = threading.local()  # 各线程已消费的版本号
+        self._epochs: dict = {}          # account -> 风控事件版本号
+        self._cooldown_until: dict = {}  # account -> 冷却结束时刻（time.monotonic）
+        self._seen = threading.local()   # 各线程已消费的版本号 {account: epoch}
 
-    def mark_risk(self) -> None:
-        """记录一次风控事件（某线程触发风控时调用）。"""
+    def mark_risk(self, account: Optional[Hashable] = None) -> None:
+        """记录一次风控事件（某线程使用 account 触发风控时调用）。"""
         with self._lock:
-            self._epoch += 1
+            self._epochs[account] = self._epochs.get(account, 0) + 1
+            self._cooldown_until[account] = time.monotonic() + self.cooldown
 
-    def pause_before_fetch(self, base: float = 3.0, span: float = 5.0) -> None:
-        """在每次获取信息前调用；若发生过风控，按本线程独立随机时长暂停一次。
+    def pause_before_fetch(self, base: float = 3.0, span: float = 5.0,
+                           account: Optional[Hashable] = None) -> None:
+        """在每次获取信息前调用；若 account 发生过风控，按本线程独立随机时长暂停一次。
 
         :param base: 暂停时长下限（秒）
         :param span: 暂停时长随机跨度（秒），实际为 uniform(base, base + span)
+        :param account: 本次请求使用的账号
         """
         with self._lock:
-            epoch = self._epoch
-        if epoch > getattr(self._seen, "epoch", 0):
+            epoch = self._epochs.get(account, 0)
+        seen = getattr(self._seen, "epochs", None)
+        if seen is None:
+            seen = self._seen.epochs = {}
+        if epoch > seen.get(account, 0):
             wait = random.uniform(base, base + span)
             time.sleep(wait)
-            self._seen.epoch = epoch
+            seen[account] = epoch
+
+    def cooldown_remaining(self, account: Optional[Hashable] = None) -> float:
+        """account 的冷却剩余秒数（不在冷却期为 0）。"""
+        with self._lock:
+            until = self._cooldown_until.get(account, 0.0)
+        return max(0.0, until - time.monotonic())
@@ -0,0 +1,189 @@
+"""
+体积预算：按 playurl 返回的流大小（size 字段）为批量下载的每个文件挑选清晰度。
+
+批量下载（收藏夹 / UP 主 / 合集）对每个视频使用同一个目标清晰度：3 小时的直播回放在 4K 下可能有 15 GB，
+2 分钟的短片却只有几十 MB。按体积预算规划时先取各文件的流列表（不下载），再为每个文件挑选：
+- 单个文件上限（per_item）：不超过上限的最高清晰度；
+- 整批上限（total）：先按单个文件上限挑选，总量仍超出时反复把当前最大的文件降一档，直到总量不超出
+  （短片保持高清晰度，超长视频降档）。
+
+[设计]
+- 每个文件的候选（StreamOption）按清晰度从高到低排列，首个即不限预算时会下载的流（见
+  DashStreams.video_options）；目标清晰度是上限，预算只会让清晰度降低；
+- 候选的体积为视频流 + 最高码率音频流（仅视频 / 仅音频时只计一个流）；size 未知（0）的候选
+  无法判断是否超预算，只在没有任何已知大小的候选时使用；
+- 所有候选都超出单个文件上限时选体积最小的候选（不跳过文件）；整批降到最低仍超出时照常下载，
+  `over_budget` 为 True，由调用方决定是否继续；
+- 已在本地的文件计 0 字节，不参与降档；
+- 规划本身不下载任何字节：`DownloadPlan.report()` 给出逐文件的计划字节数（预演），
+  下载时按 `override()` 为每个分P指定清晰度与编码。
+
+[使用方法]
+    plan = service.plan_download(bvids, save_dir, budget=SizeBudget.from_mb(total_gb=50))
+    for line in plan.report():
+        print(line)
+    service.download_fav(3953119978, budget=SizeBudget.from_mb(per_item_mb=800))
+"""
+
+import heapq
+from dataclasses import dataclass, field
+from typing import Optional
+
+from src.models.download_model import CodecPolicy, VideoQuality, VideoStream, codec_family
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+
+@dataclass(frozen=True)
+class SizeBudget:
+    """批量下载的体积预算（字节）。"""
+
+    per_item: int = 0  # 单个文件（一个分P）的上限，0 不限
+    total: int = 0  # 整批的上限，0 不限
+
+    @classmethod
+    def from_mb(cls, per_item_mb: float = 0, total_gb: float = 0) -> "SizeBudget":
+        """按 MB / GB 构造：`SizeBudget.from_mb(per_item_mb=800)`、`SizeBudget.from_mb(total_gb=50)`。"""
+        return cls(per_item=int(per_item_mb * MB), total=int(total_gb * GB))
+
+
+@dataclass
+class StreamOption:
+    """某个文件的一个候选：视频流（仅音频时为 None）与下载的总字节数。"""
+
+    stream: Optional[VideoStream]
+    size: int = 0  # 视频流 + 音频流的字节数，0 表示未知
+
+
+@dataclass
+class PlannedItem:
+    """规划中的一个文件（一个分P）。"""
+
+    bvid: str
+    page: int
+    name: str  # 展示名（标题-P序号）
+    options: list = field(default_factory=list)  # StreamOption 列表，按清晰度降序
+    choice: int = 0  # 选中的候选下标
+    cached: bool = False  # 本地已有，不下载
+
+    @property
+    def picked(self) -> Optional[StreamOption]:
+        """选中的候选；已在本地或没有候选时为 None。"""
+        if self.cached or not self.options:
+            return None
+        return self.options[self.choice]
+
+    @property
+    def size(self) -> int:
+        """计划下载的字节数（未知时为 0）。"""
+        picked = self.picked
+        return picked.size if picked is not None else 0
+
+    def fit(self, cap: int) -> None:
+        """按单个文件上限选候选：不超过 cap 的首个候选，都超出时选体积最小的。"""
+        self.choice = 0
+        known = [(i, o.size) for i, o in enumerate(self.options) if o.size > 0]
+        if not cap or not known:
+            return
+        fitting = [i for i, size in known if size <= cap]
+        self.choice = fitting[0] if fitting else min(known, key=lambda x: x[1])[0]
+
+    def downgrade(self) -> bool:
+        """降到下一个体积更小的候选。
+
+        :return: 是否降档成功（已是最小或大小未知时为 False）
+        """
+        current = self.size
+        if self.cached or current <= 0:
+            return False
+        for i in range(self.choice + 1, len(self.options)):
+            if 0 < self.options[i].size < current:
+                self.choice = i
+                return True
+        return False
+
+
+@dataclass
+class DownloadPlan:
+    """一批下载的规划结果：逐文件的候选与选择。"""
+
+    items: list = field(default_factory=list)  # PlannedItem 列表（按下载顺序）
+    budget: Optional[SizeBudget] = None
+
+    def __post_init__(self) -> None:
+        self._index = {(item.bvid, item.page): item for item in self.items}
+
+    @property
+    def total(self) -> int:
+        """计划下载的总字节数（本地已有的文件不计）。"""
+        return sum(item.size for item in self.items)
+
+    @property
+    def over_budget(self) -> bool:
+        """整批降到最低仍超出总预算。"""
+        return bool(self.budget and self.budget.total and self.total > self.budget.total)
+
+    def allocate(self) -> "DownloadPlan":
+        """按预算为每个文件挑选候选（原地修改并返回自身）。"""
+        budget = self.budget or SizeBudget()
+        for item in self.items:
+            item.fit(budget.per_item)
+        if not budget.total:
+            return self
+        total = self.total
+        # 反复把当前最大的文件降一档：长视频先降，短片尽量保持高清晰度
+        heap = [(-item.size, i) for i, item in enumerate(self.items) if item.size > 0]
+        heapq.heapify(heap)
+        while total > budget.total and heap:
+            _, i = heapq.heappop(heap)
+            item = self.items[i]
+            before = item.size
+            if item.downgrade():
+                total -= before - item.size
+                heapq.heappush(heap, (-item.size, i))
+        return self
+
+    def override(self, bvid: str, page: int, quality: VideoQuality,
+                 codec: Optional[CodecPolicy] = None) -> tuple:
+        """某个分P下载时使用的 (清晰度, 编码策略)：规划中选了视频流时指定其清晰度与编码族，
+        否则原样返回。"""
+        item = self._index.get((bvid, page))
+        picked = item.picked if item is not None else None
+        if picked is None or picked.stream is None:
+            return quality, codec
+        stream = picked.stream
+        prefer = CodecPolicy(prefer=(codec_family(stream.codecs),), require=codec.require if codec else ())
+        return VideoQuality.from_qn(stream.quality) or stream.quality, prefer
+
+    def report(self) -> list:
+        """逐文件的计划字节数（预演输出），最后一行为合计与预算。"""
+        lines = []
+        n = len(self.items)
+        for i, item in enumerate(self.items, 1):
+            picked = item.picked
+            if item.cached:
+                detail = "本地已有"
+            elif picked is None:
+                detail = "无可用流"
+            else:
+                label = ""
+                if picked.stream is not None:
+                    quality = VideoQuality.from_qn(picked.stream.quality)
+                    name = quality.display_name if quality is not None else str(picked.stream.quality)
+                    label = f"[{name} {codec_family(picked.stream.codecs)}] "
+                detail = f"{label}{_fmt(picked.size)}"
+            lines.append(f"[{i}/{n}] {item.name}: {detail}")
+        summary = f"合计 {_fmt(self.total)}"
+        if self.budget is not None and self.budget.total:
+            summary += f"（预算 {_fmt(self.budget.total)}{'，降到最低仍超出' if self.over_budget else ''}）"
+        lines.append(summary)
+        return lines
+
+
+def _fmt(size: int) -> str:
+    if size <= 0:
+        return "大小未知"
+    if size >= GB:
+        return f"{size / GB:.2f}GB"
+    return f"{size / MB:.1f}MB"
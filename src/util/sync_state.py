@@ -0,0 +1,136 @@
+"""
+增量同步状态：记录每个 UP 主 / 收藏夹上次同步时已见过的视频，下次同步只下载新增的部分。
+
+每晚重新同步一个有几千个投稿的 UP 主时，完整翻页（order=pubdate）再逐个检查本地缓存
+要花几分钟，而新增的通常只有几个视频。增量同步按发布时间从新到旧翻页，遇到第一个已见过的
+视频（或早于上次同步的发布时间高水位）就停止翻页，只把新增的视频排进下载队列。
+
+[设计]
+- 状态按「类型 + id」（`up` + mid / `fav` + media_id）保存在保存目录下的
+  `.bilitools_index/sync.json`（与下载库索引同目录，不会被误判为已下载的成品）；
+- `SyncState.bvids`：已见过的 BV 号（新的在前）；`high_water`：已见过的最大发布时间（秒）；
+- 增量同步只靠最新的一段判断新旧（UP 主遇到已见过的或早于高水位的即停止翻页；收藏夹按收藏顺序
+  连续遇到 KNOWN_RUN 个已见过的才停止，见 SyncState.unseen），`bvids` 只保留最新的 KNOWN_LIMIT 个，
+  状态文件不随同步次数增长；
+  保留多个而不是一个，是为了最新的几个视频被删除 / 取消收藏后仍能找到停止点；
+- 只在一轮同步**完整结束**后写回状态：中途失败时下次仍会重新排队这些视频（已下载的由缓存检查跳过）；
+- 写盘为临时文件 + 原子替换；文件损坏时按「从未同步」处理（退化为全量同步）。
+
+[使用方法]
+    store = SyncStore(save_dir)
+    state = store.load("up", mid)           # None 表示第一次同步
+    ...
+    store.save(state.advance(new_bvids, high_water=max_pubdate))
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from src.util.library_index import INDEX_DIR_NAME
+
+logger = logging.getLogger(__name__)
+
+SYNC_FILE_NAME = "sync.json"
+KNOWN_LIMIT = 500  # 每个同步目标保留的已见过 BV 号个数（最新的在前）
+KNOWN_RUN = 5  # 收藏夹增量同步：连续遇到这么多个已见过的视频才认为之后都是旧收藏
+
+
+@dataclass
+class SyncState:
+    """单个同步目标（UP 主 / 收藏夹）的同步状态。"""
+
+    kind: str  # up / fav
+    target: int  # mid / media_id
+    bvids: list = field(default_factory=list)  # 已见过的 BV 号（新的在前，最多 KNOWN_LIMIT 个）
+    high_water: int = 0  # 已见过的最大发布时间（Unix 秒；收藏夹不记录，为 0）
+    synced_at: float = 0.0  # 上次同步完成时间（Unix 秒）
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.target}"
+
+    def known(self) -> set:
+        """已见过的 BV 号集合。"""
+        return set(self.bvids)
+
+    def unseen(self, order: list) -> list:
+        """按收藏顺序（新的在前）挑出未见过的 BV 号。
+
+        取消后重新收藏的旧视频会排到最前面，遇到第一个已见过的就停止会漏掉排在它下面的新收藏
+        （且状态随后前进，这些视频再也不会被排队）。因此跳过零星的已见过视频，连续遇到 KNOWN_RUN 个
+        （已见过的不足 KNOWN_RUN 个时为全部）才停止。
+
+        :param order: 当前的 BV 号列表（新的在前）
+        :return: 停止点之前未见过的 BV 号（保持原顺序）
+        """
+        known = self.known()
+        need = min(KNOWN_RUN, len(known))
+        fresh, run = [], 0
+        for bvid in order:
+            if bvid not in known:
+                fresh.append(bvid)
+                run = 0
+                continue
+            run += 1
+            if run >= need:
+                break
+        return fresh
+
+    def advance(self, new_bvids: list, *, high_water: int = 0) -> "SyncState":
+        """返回合并了本轮新增视频后的新状态（只保留最新的 KNOWN_LIMIT 个 BV 号）。
+
+        :param new_bvids: 本轮新增的 BV 号（新的在前）
+        :param high_water: 本轮见到的最大发布时间
+        """
+        known = self.known()
+        fresh = [b for b in dict.fromkeys(new_bvids) if b not in known]
+        return SyncState(self.kind, self.target, (fresh + list(self.bvids))[:KNOWN_LIMIT],
+                         max(self.high_water, high_water), time.time())
+
+
+class SyncStore:
+    """某个保存目录下的增量同步状态文件。"""
+
+    def __init__(self, save_dir: Path):
+        """
+        :param save_dir: 保存目录（状态文件位于 `<save_dir>/.bilitools_index/sync.json`）
+        """
+        self.path = Path(save_dir) / INDEX_DIR_NAME / SYNC_FILE_NAME
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("[sync] 同步状态文件损坏，按全量同步处理：%s（%s）", self.path, e)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def load(self, kind: str, target: int) -> Optional[SyncState]:
+        """读取同步状态；从未同步过（或状态损坏）时返回 None。"""
+        with self._lock:
+            raw = self._read().get(f"{kind}:{target}")
+        if not isinstance(raw, dict):
+            return None
+        try:
+            return SyncState(**raw)
+        except TypeError as e:
+            logger.warning("[sync] 同步状态 %s:%s 格式不符，按全量同步处理（%s）", kind, target, e)
+            return None
+
+    def save(self, state: SyncState) -> None:
+        """写回同步状态（临时文件 + 原子替换，同文件里其他目标的状态保持不变）。"""
+        with self._lock:
+            data = self._read()
+            data[state.key] = asdict(state)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
@@ -0,0 +1,65 @@
+"""
+媒体下载的共享 HTTP 传输层：进程级 keep-alive 连接池。
+
+下载视频/音频流、表情包、收藏集素材时，所有请求都经由同一个 `requests.Session`，
+同一 CDN 主机（`upos-*`、`i0.hdslb.com` 等）的 TCP+TLS 连接在请求之间复用，
+批量下载成千上万个小图片时省去每个文件一次握手的开销。
+
+[设计]
+- 进程级单例，跨 VideoService 实例、跨账号共享：cookie 只随调用方显式传入的 headers 发送，
+  共享 Session 的 cookie jar **不保存任何 Set-Cookie**，因此复用连接不会串号；
+- 每个主机一个连接池，上限默认 `_DEFAULT_POOL_SIZE`；并发下载前调用 `ensure_pool_size()`
+  按线程数扩容（只增不减），避免并发连接数超过池上限时连接用完即丢、无法复用；
+- urllib3 连接池本身线程安全，本模块只对单例创建与扩容加锁。
+
+[使用方法]
+    ensure_pool_size(threads * 2)              # 并发下载前按线程数扩容（可选）
+    resp = media_get(url, headers=headers, stream=True, timeout=30)
+"""
+
+import threading
+from typing import Optional
+
+_DEFAULT_POOL_SIZE = 10  # 每个主机的默认连接数上限（与 requests 默认一致）
+_POOL_HOSTS = 16  # 缓存连接池的主机数（CDN 镜像 + 图片域名）
+
+_lock = threading.Lock()
+_session = None
+_pool_size = 0
+
+
+def media_session(pool_size: Optional[int] = None):
+    """返回进程级共享的下载 Session；pool_size 大于当前上限时扩容每主机连接池。
+
+    :param pool_size: 期望的每主机连接数上限；None 时使用默认值
+    :return: requests.Session
+    """
+    global _session, _pool_size
+    import requests
+    from http.cookiejar import DefaultCookiePolicy
+    from requests.adapters import HTTPAdapter
+
+    want = max(pool_size or 0, _DEFAULT_POOL_SIZE)
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            # 不保存任何响应 cookie：身份只由调用方 headers 决定，连接可跨账号复用
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            _session = session
+        if want > _pool_size:
+            # 重新挂载更大的适配器；旧适配器上进行中的请求不受影响
+            adapter = HTTPAdapter(pool_connections=_POOL_HOSTS, pool_maxsize=want)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _pool_size = want
+        return _session
+
+
+def ensure_pool_size(n: int) -> None:
+    """确保每主机连接池至少容纳 n 个并发连接（并发下载前按线程数调用）。"""
+    media_session(n)
+
+
+def media_get(url: str, **kwargs):
+    """经共享连接池发起 GET 请求，参数同 `requests.get`。"""
+    return media_session().get(url, **kwargs)
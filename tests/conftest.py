@@ -3,7 +3,8 @@ pytest 公共配置。
 
 - 确保项目根目录在 sys.path（运行 `pytest` 时能 import src）；
 - 注册 `network` 标记（真实网络测试，默认跳过，加 -m network 运行）；
-- 提供共享 fixture：默认 cookie 的 BiliSession。
+- 提供共享 fixture：默认 cookie 的 BiliSession；
+- 单元测试使用独立的快速请求节奏控制器（不真实等待，风控冷却不跨用例泄漏）。
 """
 
 import os
@@ -50,3 +51,12 @@ def video_service():
     """共享 VideoService。"""
     from src.services import VideoService
     return VideoService()
+
+
+@pytest.fixture(autouse=True)
+def _fast_pacer(request, monkeypatch):
+    """每个单元测试用独立的快速节奏控制器；网络测试保持默认节奏。"""
+    if "network" in request.keywords:
+        return
+    from src.util import pacing
+    monkeypatch.setattr(pacing, "_shared", pacing.Pacer(rate=1000, max_rate=1000))
@@ -0,0 +1,92 @@
+"""多账号调度器（src.util.dispatcher）与批量下载接入的单元测试。"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.api.errors import BiliAPIError, BiliAuthError, BiliRiskError
+from src.services import VideoService
+from src.util import risk_gate as risk_gate_module
+from src.util.dispatcher import AccountDispatcher
+from src.util.risk_gate import RiskGate
+
+
+def test_healthy_accounts_follow_hint_round_robin():
+    d = AccountDispatcher(["A", "B", "C"])
+    picked = [d.acquire(hint=i) for i in range(3)]
+    assert picked == ["A", "B", "C"]
+
+
+def test_least_loaded_and_healthiest_account_wins():
+    d = AccountDispatcher(["A", "B"])
+    a = d.acquire(hint=0)
+    assert a == "A"
+    assert d.acquire(hint=0) == "B"  # A 有进行中任务
+    d.release("A", 0.1)
+    d.release("B", 0.1)
+    d.release(d.acquire(hint=0), 1.0, ConnectionError("断开"))  # A 出错
+    assert d.acquire(hint=0) == "B"
+    assert d.stats("A").error_rate > 0 and d.stats("A").in_flight == 0
+
+
+def test_business_errors_do_not_count_against_account():
+    d = AccountDispatcher(["A", "B"])
+    d.release(d.acquire(), 0.1, BiliAPIError(-404, "不存在"))
+    assert d.stats("A").error_rate == 0
+    assert d.acquire(hint=0) == "A"
+
+
+def test_risk_cooldown_moves_work_elsewhere(monkeypatch):
+    monkeypatch.setattr(risk_gate_module.time, "sleep", lambda s: None)
+    gate = RiskGate()
+    d = AccountDispatcher(["A", "B"], key=lambda a: a, risk_gate=gate)
+    gate.mark_risk("A")
+    assert d.acquire(hint=0, prefer="A") == "B"
+
+
+def test_auth_error_ejects_account_and_retries():
+    d = AccountDispatcher(["A", "B"])
+    used = []
+
+    def fn(account):
+        used.append(account)
+        if account == "A":
+            raise BiliAuthError("未登录")
+        return account
+
+    assert d.call(fn) == "B"
+    assert used == ["A", "B"]
+    assert d.live == ["B"]
+    assert d.call(fn, hint=0, prefer="A") == "B"  # 已移出的账号不再分到任务
+    d.release(d.acquire(), 0.1, BiliAuthError("未登录"))
+    with pytest.raises(BiliAuthError):
+        d.acquire()
+
+
+def _services(*names):
+    svcs = []
+    for name in names:
+        svc = VideoService.__new__(VideoService)
+        svc.session = SimpleNamespace(name=name)
+        svcs.append(svc)
+    return svcs
+
+
+def test_batch_download_reroutes_after_risk_and_expired_login(monkeypatch):
+    monkeypatch.setattr(risk_gate_module.time, "sleep", lambda s: None)
+    gate = RiskGate()
+    s1, s2, s3 = _services("s1", "s2", "s3")
+    d = AccountDispatcher([s1, s2, s3], key=lambda s: s._account_key(), risk_gate=gate)
+    used = []
+
+    def action(svc):
+        used.append(svc.session.name)
+        if svc is s1:
+            raise BiliRiskError(-412, "风控")
+        if svc is s2:
+            raise BiliAuthError("未登录")
+        return "ok"
+
+    assert s1._execute_batch_download("BV1", action, risk_gate=gate, dispatcher=d, prefer=s1) == "ok"
+    assert used == ["s1", "s2", "s3"]
+    assert d.live == [s1, s3]
@@ -109,7 +109,7 @@ def test_download_stream_writes_file(tmp_path):
         def iter_content(self, chunk_size):
             yield b"hello "; yield b"world"
 
-    with patch("requests.get", return_value=FakeResp()):
+    with patch("src.util.transport.media_get", return_value=FakeResp()):
         target = tmp_path / "f.bin"
         size = dl.download_stream("http://x", target)
         assert size == 11
@@ -127,7 +127,7 @@ def test_download_stream_progress(tmp_path):
             yield b"12345"; yield b"67890"
 
     calls = []
-    with patch("requests.get", return_value=FakeResp()):
+    with patch("src.util.transport.media_get", return_value=FakeResp()):
         dl.download_stream("http://x", tmp_path / "f.bin", progress_cb=lambda d, t: calls.append((d, t)))
     assert calls == [(5, 10), (10, 10)]
 
@@ -139,7 +139,7 @@ def test_download_stream_request_failure(tmp_path):
         def raise_for_status(self):
             raise __import__("requests").HTTPError("404")
 
-    with patch("requests.get", return_value=BadResp()):
+    with patch("src.util.transport.media_get", return_value=BadResp()):
         with pytest.raises(DownloadError):
             dl.download_stream("http://x", tmp_path / "f.bin")
 
@@ -177,7 +177,7 @@ def test_download_stream_resume_after_interrupt(tmp_path):
         resp.iter_content = _iter
         return resp
 
-    with patch("requests.get", side_effect=fake_get) as mock_get:
+    with patch("src.util.transport.media_get", side_effect=fake_get) as mock_get:
         target = tmp_path / "f.bin"
         size = dl.download_stream("http://x", target, max_retries=2)
         assert size == 11
@@ -217,7 +217,7 @@ def test_download_stream_resume_ignored_range_restarts(tmp_path):
         resp.iter_content = _iter
         return resp
 
-    with patch("requests.get", side_effect=fake_get) as mock_get:
+    with patch("src.util.transport.media_get", side_effect=fake_get) as mock_get:
         target = tmp_path / "f.bin"
         size = dl.download_stream("http://x", target, max_retries=2)
         assert size == 11
@@ -239,6 +239,263 @@ def test_download_stream_gives_up_after_retries(tmp_path):
         def iter_content(self, chunk_size):
             raise requests.exceptions.ConnectionError("broken")
 
-    with patch("requests.get", return_value=BadResp()):
+    with patch("src.util.transport.media_get", return_value=BadResp()):
         with pytest.raises(DownloadError):
             dl.download_stream("http://x", tmp_path / "f.bin", max_retries=2)
+
+
+class _RangeServer:
+    """模拟支持 Range 的 CDN：按请求头返回 206 + 对应字节区间（可注入单段失败）。"""
+
+    def __init__(self, body: bytes, honor_range: bool = True, fail_once_at=None):
+        self.body = body
+        self.honor_range = honor_range
+        self.fail_once_at = fail_once_at  # 该起始偏移的首个请求读到一半断流
+        self.ranges = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        import requests
+
+        body = self.body
+        rng = (headers or {}).get("Range", "")
+        self.ranges.append(rng)
+
+        class Resp:
+            status_code = 200
+            headers = {"Content-Length": str(len(body))}
+            def raise_for_status(self): pass
+            def close(self): pass
+            def iter_content(self, chunk_size):
+                yield self.data
+
+        resp = Resp()
+        resp.data = body
+        if rng and self.honor_range:
+            start, end = rng.split("=")[1].split("-")
+            start, end = int(start), int(end) if end else len(body) - 1
+            resp.status_code = 206
+            resp.data = body[start:end + 1]
+            resp.headers = {"Content-Length": str(len(resp.data)),
+                            "Content-Range": f"bytes {start}-{end}/{len(body)}"}
+            if start == self.fail_once_at:
+                self.fail_once_at = None
+                data = resp.data
+
+                def _broken(chunk_size):
+                    yield data[:3]
+                    raise requests.exceptions.ConnectionError("IncompleteRead")
+                resp.iter_content = _broken
+        return resp
+
+
+def test_download_stream_segmented(tmp_path, monkeypatch):
+    """segments>1：探测总大小后按区间并发下载，拼出完整文件。"""
+    monkeypatch.setattr(dl, "SEGMENT_MIN_SIZE", 4)
+    body = bytes(range(40))
+    server = _RangeServer(body)
+    with patch("src.util.transport.media_get", side_effect=server.get):
+        target = tmp_path / "f.bin"
+        size = dl.download_stream("http://x", target, segments=4)
+    assert size == 40
+    assert target.read_bytes() == body
+    assert server.ranges[0] == "bytes=0-0"  # 首个请求为探测
+    assert sorted(server.ranges[1:]) == ["bytes=0-9", "bytes=10-19", "bytes=20-29", "bytes=30-39"]
+
+
+def test_download_stream_segment_retry_resumes(tmp_path, monkeypatch):
+    """单个分段断流时只重试该段，并从段内已下载位置续传。"""
+    monkeypatch.setattr(dl, "SEGMENT_MIN_SIZE", 4)
+    body = bytes(range(40))
+    server = _RangeServer(body, fail_once_at=10)
+    with patch("src.util.transport.media_get", side_effect=server.get):
+        target = tmp_path / "f.bin"
+        assert dl.download_stream("http://x", target, segments=4) == 40
+    assert target.read_bytes() == body
+    assert "bytes=13-19" in server.ranges
+
+
+def test_download_stream_segmented_falls_back_without_range(tmp_path, monkeypatch):
+    """服务器忽略 Range（探测返回 200）时回退单连接下载。"""
+    monkeypatch.setattr(dl, "SEGMENT_MIN_SIZE", 4)
+    body = bytes(range(40))
+    server = _RangeServer(body, honor_range=False)
+    with patch("src.util.transport.media_get", side_effect=server.get):
+        target = tmp_path / "f.bin"
+        assert dl.download_stream("http://x", target, segments=4) == 40
+    assert target.read_bytes() == body
+    assert server.ranges == ["bytes=0-0", ""]
+
+
+def test_download_stream_range_ignored_cancels_other_segments(tmp_path, monkeypatch):
+    """某段发现服务器忽略 Range 时，其余段停止拉流，不在回退前下完整段。"""
+    import threading
+    import time
+
+    monkeypatch.setattr(dl, "SEGMENT_MIN_SIZE", 4)
+    body = bytes(range(200)) * 20
+    streamed = []
+    ignored = threading.Event()
+
+    def get(url, headers=None, stream=False, timeout=None):
+        rng = (headers or {}).get("Range", "")
+        start, end = (int(x) for x in rng.split("=")[1].split("-")) if rng else (0, len(body) - 1)
+
+        class Resp:
+            status_code = 206
+            headers = {"Content-Length": str(end - start + 1),
+                       "Content-Range": f"bytes {start}-{end}/{len(body)}"}
+            def raise_for_status(self): pass
+            def close(self): pass
+            def iter_content(self, chunk_size):
+                for pos in range(start, end + 1, 10):
+                    if pos > start:
+                        ignored.wait(1)
+                        time.sleep(0.001)
+                    streamed.append(min(10, end + 1 - pos))
+                    yield body[pos:min(pos + 10, end + 1)]
+
+        resp = Resp()
+        if not rng or (start == 0 and end > 0):
+            # 单连接回退请求与首段：服务器忽略 Range，返回整文件
+            resp.status_code = 200
+            resp.headers = {"Content-Length": str(len(body))}
+            start, end = 0, len(body) - 1
+            if rng:
+                ignored.set()
+        return resp
+
+    with patch("src.util.transport.media_get", side_effect=get):
+        target = tmp_path / "f.bin"
+        assert dl.download_stream("http://x", target, segments=4) == len(body)
+    assert target.read_bytes() == body
+    # 回退的整文件 + 探测 1 字节 + 其余段被取消前的少量分块
+    assert sum(streamed) < len(body) + len(body) // 4
+
+
+def test_download_stream_small_expected_size_skips_probe(tmp_path):
+    """已知大小不足两段时不发探测请求，直接单连接下载。"""
+    server = _RangeServer(b"hello world")
+    with patch("src.util.transport.media_get", side_effect=server.get):
+        dl.download_stream("http://x", tmp_path / "f.bin", segments=4, expected_size=11)
+    assert server.ranges == [""]
+
+
+def test_download_streams_concurrent_callbacks_on_caller_thread(tmp_path):
+    """多个流并发下载；进度回调在调用线程内执行，并按流序号区分。"""
+    import threading
+
+    caller = threading.get_ident()
+    seen = []
+
+    def fake_get(url, headers=None, stream=False, timeout=None):
+        body = url.encode() * 3
+
+        class Resp:
+            status_code = 200
+            headers = {"Content-Length": str(len(body))}
+            def raise_for_status(self): pass
+            def iter_content(self, chunk_size):
+                yield body
+
+        return Resp()
+
+    def cb(stream_id, done, total):
+        seen.append((stream_id, done, total, threading.get_ident() == caller))
+
+    with patch("src.util.transport.media_get", side_effect=fake_get):
+        sizes = dl.download_streams(
+            [("http://v", tmp_path / "v.m4s", 0), ("http://a", tmp_path / "a.m4s", 0)],
+            progress_cb=cb,
+        )
+    assert sizes == [24, 24]
+    assert (tmp_path / "a.m4s").read_bytes() == b"http://a" * 3
+    assert sorted(seen) == [(0, 24, 24, True), (1, 24, 24, True)]
+
+
+def test_download_streams_propagates_failure(tmp_path):
+    """任一流失败时抛 DownloadError。"""
+    import requests
+
+    def fake_get(url, headers=None, stream=False, timeout=None):
+        if url == "http://a":
+            raise requests.ConnectionError("down")
+
+        class Resp:
+            status_code = 200
+            headers = {}
+            def raise_for_status(self): pass
+            def iter_content(self, chunk_size):
+                yield b"x"
+
+        return Resp()
+
+    with patch("src.util.transport.media_get", side_effect=fake_get):
+        with pytest.raises(DownloadError):
+            dl.download_streams(
+                [("http://v", tmp_path / "v.m4s", 0), ("http://a", tmp_path / "a.m4s", 0)],
+            )
+
+
+class _FakeProc:
+    """模拟 ffmpeg 子进程：记录写入 stdin 的字节。"""
+
+    def __init__(self, returncode=0):
+        import io
+        self.stdin = io.BytesIO()
+        self.stdin.close = lambda: None
+        self.returncode = returncode
+        self.killed = False
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def kill(self):
+        self.killed = True
+
+
+def test_stream_merge_pipes_video_into_ffmpeg(tmp_path):
+    """边下载边合成：视频流字节写入 ffmpeg stdin，命令以 pipe:0 为首个输入。"""
+    audio = tmp_path / "a.m4a"
+    audio.write_bytes(b"a")
+
+    class Resp:
+        status_code = 200
+        headers = {"Content-Length": "10"}
+        def raise_for_status(self): pass
+        def iter_content(self, chunk_size):
+            yield b"12345"; yield b"67890"
+
+    proc = _FakeProc()
+    calls = []
+    with patch("shutil.which", return_value="ffmpeg"), \
+            patch("src.util.transport.media_get", return_value=Resp()), \
+            patch("subprocess.Popen", return_value=proc) as mock_popen:
+        size = dl.stream_merge_video_audio("http://v", audio, tmp_path / "out.mp4",
+                                           progress_cb=lambda d, t: calls.append((d, t)))
+    assert size == 10
+    assert proc.stdin.getvalue() == b"1234567890"
+    cmd = mock_popen.call_args[0][0]
+    assert cmd[1:4] == ["-y", "-i", "pipe:0"] and "copy" in cmd
+    assert calls == [(5, 10), (10, 10)]
+
+
+def test_stream_merge_ffmpeg_failure_removes_output(tmp_path):
+    """ffmpeg 返回非零时抛 DownloadError，并删除半成品。"""
+    audio = tmp_path / "a.m4a"
+    audio.write_bytes(b"a")
+    out = tmp_path / "out.mp4"
+    out.write_bytes(b"partial")
+
+    class Resp:
+        status_code = 200
+        headers = {}
+        def raise_for_status(self): pass
+        def iter_content(self, chunk_size):
+            yield b"x"
+
+    with patch("shutil.which", return_value="ffmpeg"), \
+            patch("src.util.transport.media_get", return_value=Resp()), \
+            patch("subprocess.Popen", return_value=_FakeProc(returncode=1)):
+        with pytest.raises(DownloadError):
+            dl.stream_merge_video_audio("http://v", audio, out)
+    assert not out.exists()
@@ -0,0 +1,122 @@
+"""收藏夹明细（resource/list）与据此免 view 的批量下载规划的单元测试。"""
+
+from types import SimpleNamespace
+
+from src.models import FavMedia
+from src.models.download_model import DownloadResult
+from src.services import VideoService
+from src.services.fav import FavService
+from src.urls.fav_urls import FavUrls
+from src.urls.video_urls import VideoUrls
+from src.util.sync_state import SyncState, SyncStore
+
+
+def _media(bvid, page=1, **kw):
+    return {"id": int(bvid[2:] or 0), "type": 2, "title": f"标题{bvid}", "cover": f"http://i0.hdslb.com/{bvid}.jpg",
+            "page": page, "duration": 60, "attr": 0, "bvid": bvid, "ugc": {"first_cid": 500}, **kw}
+
+
+def test_fav_media_from_dict_and_video_info():
+    single = FavMedia.from_dict(_media("BV1", upper={"mid": 1, "name": "UP"}))
+    assert single.is_valid and single.upper_name == "UP"
+    info = single.to_video_info()
+    assert (info.title, info.pic, info.cid) == ("标题BV1", "http://i0.hdslb.com/BV1.jpg", 500)
+    assert [(p.page, p.cid) for p in info.pages] == [(1, 500)]
+
+    assert FavMedia.from_dict(_media("BV2", page=3)).to_video_info().pages == []  # 多P：分P另取
+    assert not FavMedia.from_dict(_media("BV3", attr=9, title="已失效视频")).is_valid
+    assert not FavMedia.from_dict(_media("", type=12)).is_valid
+
+
+def test_list_fav_medias_fetches_all_pages():
+    calls = []
+
+    def get(url, params=None):
+        calls.append(params)
+        start = (params["pn"] - 1) * params["ps"]
+        medias = [_media(f"BV{i}") for i in range(start, min(start + params["ps"], 45))]
+        return {"info": {"media_count": 45}, "medias": medias, "has_more": start + params["ps"] < 45}
+
+    medias = FavService(SimpleNamespace(get=get)).list_fav_medias(7)
+    assert [m.bvid for m in medias] == [f"BV{i}" for i in range(45)]
+    assert sorted(c["pn"] for c in calls) == [1, 2, 3]
+    assert all(c["media_id"] == 7 and c["platform"] == "web" for c in calls)
+
+
+def test_incremental_fav_fetches_details_only_for_new_videos(tmp_path):
+    order = [f"BV{i:03d}" for i in range(1, 101)]  # 5 页明细
+    pages = []
+
+    def get(url, params=None):
+        if url == FavUrls.FOLDER_INFO:
+            return {"id": 7, "title": "收藏夹"}
+        if url == FavUrls.RESOURCE_IDS:
+            return [{"bvid": b} for b in order]
+        if url == FavUrls.RESOURCE_LIST:
+            pages.append(params["pn"])
+            start = (params["pn"] - 1) * params["ps"]
+            return {"info": {"media_count": 100}, "medias": [_media(b) for b in order[start:start + params["ps"]]]}
+        raise AssertionError(f"不应请求 {url}")
+
+    svc = VideoService.__new__(VideoService)
+    svc.session = SimpleNamespace(get=get)
+    svc.default_dir = tmp_path
+    svc._report_bvid_download = lambda bvid, new_results, dc, i, total: dc
+    SyncStore(tmp_path).save(SyncState("fav", 7).advance(order[25:]))  # 上次同步后新收藏了 25 个
+    infos = {}
+    svc.download_all_pages = lambda bvid, *a, info=None, **k: infos.setdefault(bvid, info) and []
+    svc.download_fav(7, tmp_path, mode="audio", incremental=True)
+
+    assert sorted(pages) == [1, 2]  # 只请求新收藏的视频所在的明细页
+    assert list(infos) == order[:25] and infos["BV025"].title == "标题BV025"
+
+
+def test_download_fav_plans_from_medias_without_view(tmp_path):
+    calls = []
+
+    def get(url, params=None):
+        calls.append(url.rsplit("/", 1)[-1])
+        if url == FavUrls.FOLDER_INFO:
+            return {"id": 7, "title": "收藏夹"}
+        if url == FavUrls.RESOURCE_IDS:
+            return [{"bvid": b} for b in ("BV1", "BV2", "BV3", "BV4")]
+        if url == FavUrls.RESOURCE_LIST:
+            return {"info": {"media_count": 4}, "medias": [
+                _media("BV1"), _media("BV2", page=2), _media("BV3"),
+                _media("BV4", attr=9, title="已失效视频"),
+            ]}
+        if url == VideoUrls.PAGELIST:
+            return [{"page": p, "cid": 600 + p, "part": f"P{p}"} for p in (1, 2)]
+        raise AssertionError(f"不应请求 {url}")
+
+    svc = VideoService.__new__(VideoService)
+    svc.session = SimpleNamespace(get=get)
+    svc.default_dir = tmp_path
+    svc._report_bvid_download = lambda bvid, new_results, dc, i, total: dc
+    (tmp_path / "收藏夹").mkdir()
+    (tmp_path / "收藏夹" / "标题BV3(BV3).m4a").write_bytes(b"a")  # 已下载：不请求任何接口
+    downloads = []
+
+    def fake_audio(bvid, dir, *, page, info=None, **k):
+        downloads.append((bvid, page, info.title, info.pages[page - 1].cid))
+        return DownloadResult(path=tmp_path / f"{bvid}-{page}.m4a", media_type="audio")
+
+    svc.download_audio = fake_audio
+    svc.download_fav(7, tmp_path, mode="audio", progress=_Progress())
+
+    assert "view" not in calls
+    assert calls.count("list") == 1
+    assert calls.count("pagelist") == 1  # 只有多P视频补取分P列表
+    assert downloads == [("BV1", 1, "标题BV1", 500), ("BV2", 1, "标题BV2", 601),
+                         ("BV2", 2, "标题BV2", 602), ("BV3", 1, "标题BV3", 500)]
+
+
+class _Progress:
+    def start(self, i, name):
+        pass
+
+    def finish(self):
+        pass
+
+    def update(self, *a, **k):
+        pass
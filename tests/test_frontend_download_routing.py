@@ -148,6 +148,7 @@ def test_fav(monkeypatch):
     _worker("fav", 3953119978)._execute(_FakeService())
     assert any(c[0] == "get_fav_bv" for c in CALLS)
     (_, fid, _dir, kw), = [c for c in CALLS if c[0] == "download_fav"]
+    assert kw["bvids"] == ["BV1", "BV2", "BV3"]
     assert kw["progress"].__class__.__name__ == "ProgressAdapter"
 
 
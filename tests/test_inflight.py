@@ -0,0 +1,74 @@
+"""进程内下载单飞登记（src.util.inflight）与 VideoService 接入的单元测试。"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.models.download_model import DownloadResult
+from src.services import VideoService
+from src.util.inflight import InflightRegistry
+
+
+def test_followers_wait_for_deferred_stage():
+    registry = InflightRegistry()
+    flight, leader = registry.acquire("k")
+    same, follower = registry.acquire("k")
+    assert leader and not follower and same is flight
+    flight.defer()  # 合成交给线程池
+    flight.complete("result")
+    assert not flight.done and registry.active() == ["k"]
+    flight.complete()
+    assert flight.wait(0) == "result" and registry.active() == []
+    assert registry.acquire("k")[1]  # 完成后重新登记
+
+
+def test_leader_error_reaches_followers():
+    registry = InflightRegistry()
+    flight, _ = registry.acquire("k")
+    flight.complete(error=ValueError("断网"))
+    with pytest.raises(ValueError):
+        flight.wait(0)
+
+
+def test_overlapping_tasks_download_once(tmp_path):
+    svc = VideoService.__new__(VideoService)
+    svc.default_dir = tmp_path
+    joined = threading.Event()
+
+    class Registry(InflightRegistry):
+        def acquire(self, key):
+            flight, leader = super().acquire(key)
+            if not leader:
+                joined.set()
+            return flight, leader
+
+    svc.inflight = Registry()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fake_stream(bvid, dir, kind, **k):
+        calls.append(dir)
+        started.set()
+        release.wait(5)
+        path = dir / f"歌({bvid}).m4a"
+        path.write_bytes(b"audio")
+        return DownloadResult(path=path, media_type="audio", size=5)
+
+    svc._download_single_stream = fake_stream
+    fav, up = tmp_path / "收藏夹", tmp_path / "UP主"
+    fav.mkdir()
+    up.mkdir()
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(svc.download_audio, "BV1", fav)
+        started.wait(5)
+        second = pool.submit(svc.download_audio, "BV1", up)
+        joined.wait(5)  # 第二个任务已在等待
+        release.set()
+        a, b = first.result(5), second.result(5)
+
+    assert calls == [fav]  # 字节只拉取一次
+    assert b.cached and b.path == up / "歌(BV1).m4a"
+    assert os.path.samefile(a.path, b.path)
+    assert svc._find_downloaded_file("BV1", {"m4a"}, root=up) == b.path
@@ -0,0 +1,127 @@
+"""下载库索引（src.util.library_index）的单元测试：命中规则、mtime 对账、下载记录与回退。"""
+
+import os
+import sqlite3
+
+import pytest
+
+from src.util import library_index as li
+from src.util.resume import PARTS_DIR_NAME
+
+VIDEO = {"mp4", "flv", "m4s"}
+AUDIO = {"m4a", "mp3", "flac", "aac"}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_indexes(monkeypatch):
+    monkeypatch.setattr(li, "_indexes", {})
+    monkeypatch.setattr(li, "_FRESH_WINDOW", 0)  # 每次查询都对账（节流单独测试）
+
+
+def _settle(path, seconds=10):
+    """把目录 mtime 调到过去，避免被当作「刚修改」而每次重扫。"""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 10**9))
+
+
+def test_match_rules_follow_filename(tmp_path):
+    li.open_index(tmp_path)
+    sub = tmp_path / "合集"
+    sub.mkdir()
+    (sub / "演唱会-P02-第二首(BV1Q43w6QETb).mp4").write_bytes(b"v")
+    (tmp_path / "标题(BV1ov42117yC).m4a").write_bytes(b"a")
+    (tmp_path / PARTS_DIR_NAME / "BV1ZZ-P01").mkdir(parents=True)
+    (tmp_path / PARTS_DIR_NAME / "BV1ZZ-P01" / "merged(BV1ZZ).mp4").write_bytes(b"x")
+
+    assert li.find_downloaded(tmp_path, "bv1q43w6qetb", VIDEO, page=2).name.startswith("演唱会-P02")
+    assert li.find_downloaded(tmp_path, "BV1Q43w6QETb", VIDEO, page=3) is None
+    assert li.find_downloaded(tmp_path, "BV1ov42117yC", AUDIO) is not None
+    assert li.find_downloaded(tmp_path, "BV1ov42117yC", VIDEO) is None
+    assert li.find_downloaded(tmp_path, "BV1ZZ", VIDEO) is None  # 续传目录不参与
+    assert li.find_downloaded(tmp_path / "不存在", "BV1ov42117yC", AUDIO) is None
+    assert (tmp_path / li.INDEX_DIR_NAME / li.INDEX_FILE_NAME).exists()
+
+
+def test_only_changed_dirs_are_rescanned(tmp_path, monkeypatch):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / f"{name}(BV1{name}).mp4").write_bytes(b"v")
+        _settle(tmp_path / name)
+    li.open_index(tmp_path)
+    _settle(tmp_path)  # 创建索引目录改变了 root 的 mtime
+    assert li.find_downloaded(tmp_path, "BV1a", VIDEO) is not None
+    assert li.find_downloaded(tmp_path, "BV1a", VIDEO) is not None
+
+    scanned = []
+    rescan = li.LibraryIndex._rescan_dir
+    monkeypatch.setattr(li.LibraryIndex, "_rescan_dir",
+                        lambda self, rel, m: scanned.append(rel) or rescan(self, rel, m))
+    assert li.find_downloaded(tmp_path, "BV1b", VIDEO) is not None
+    assert scanned == []  # 目录均未变化：纯索引查询
+
+    (tmp_path / "b" / "b(BV1b).mp4").unlink()
+    (tmp_path / "b" / "新(BV1new).flv").write_bytes(b"v")
+    assert li.find_downloaded(tmp_path, "BV1b", VIDEO) is None
+    assert li.find_downloaded(tmp_path, "BV1new", VIDEO) is not None
+    assert "b" in scanned and "a" not in scanned
+
+
+def test_removed_subtree_and_stale_rows_are_dropped(tmp_path):
+    li.open_index(tmp_path)
+    sub = tmp_path / "up"
+    sub.mkdir()
+    target = sub / "x(BV1x).mp4"
+    target.write_bytes(b"v")
+    assert li.find_downloaded(tmp_path, "BV1x", VIDEO) == target
+    target.unlink()
+    sub.rmdir()
+    assert li.find_downloaded(tmp_path, "BV1x", VIDEO) is None
+    rows = li.open_index(tmp_path)._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+    assert rows == 0
+
+
+def test_recorded_download_keeps_quality_and_custom_name(tmp_path):
+    saved = tmp_path / "自定义名字.mp4"
+    saved.write_bytes(b"vvvv")
+    li.record_download(tmp_path, saved, bvid="BV1ov42117yC", page=3, media_type="video", quality=120)
+    assert li.find_downloaded(tmp_path, "BV1ov42117yC", VIDEO, page=3) == saved.resolve()
+    row = li.open_index(tmp_path)._conn.execute(
+        "SELECT size, quality, media_type FROM files WHERE bvid = 'bv1ov42117yc'").fetchone()
+    assert row == (4, 120, "video")
+
+
+def test_falls_back_to_scan_when_index_unavailable(tmp_path, monkeypatch):
+    (tmp_path / "标题(BV1ov42117yC).mp4").write_bytes(b"v")
+
+    def broken(root):
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(li, "open_index", broken)
+    assert li.find_downloaded(tmp_path, "BV1ov42117yC", VIDEO) is not None
+    li.record_download(tmp_path, tmp_path / "标题(BV1ov42117yC).mp4", bvid="BV1ov42117yC", media_type="video")
+
+
+def test_lookup_without_index_does_not_create_it(tmp_path):
+    (tmp_path / "标题(BV1ov42117yC).mp4").write_bytes(b"v")
+    assert li.find_downloaded(tmp_path, "BV1ov42117yC", VIDEO) is not None
+    assert not (tmp_path / li.INDEX_DIR_NAME).exists()  # 只读检查不建索引
+    li.record_download(tmp_path, tmp_path / "标题(BV1ov42117yC).mp4", bvid="BV1ov42117yC", media_type="video")
+    assert (tmp_path / li.INDEX_DIR_NAME / li.INDEX_FILE_NAME).exists()
+
+
+def test_reconcile_is_scoped_and_throttled(tmp_path, monkeypatch):
+    li.open_index(tmp_path)
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / f"{name}(BV1{name}).mp4").write_bytes(b"v")
+    stats = []
+    real_stat = os.stat
+    monkeypatch.setattr(li.os, "stat", lambda path, *a, **k: stats.append(str(path)) or real_stat(path, *a, **k))
+    assert li.find_downloaded(tmp_path, "BV1a", VIDEO, under="a") is not None
+    assert str(tmp_path / "a") in stats and str(tmp_path / "b") not in stats  # 只对账所查子树
+
+    monkeypatch.setattr(li, "_FRESH_WINDOW", 60)
+    assert li.find_downloaded(tmp_path, "BV1b", VIDEO) is not None
+    stats.clear()
+    assert li.find_downloaded(tmp_path, "BV1a", VIDEO) is not None
+    assert str(tmp_path / "a") not in stats  # 刚对账过且 root 未变：不再逐个 stat 子目录
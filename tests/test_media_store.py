@@ -0,0 +1,99 @@
+"""共享媒体库（src.util.media_store）与 VideoService 接入的单元测试。"""
+
+import os
+from types import SimpleNamespace
+
+from src.models.download_model import CodecPolicy, VideoQuality
+from src.services import VideoService
+from src.util import media_store
+from src.util.library_index import STORE_DIR_NAME, find_downloaded
+from src.util.media_store import MediaStore, link_or_copy
+
+
+def test_link_or_copy_prefers_hardlink(tmp_path, monkeypatch):
+    src = tmp_path / "a.m4a"
+    src.write_bytes(b"abc")
+    linked = link_or_copy(src, tmp_path / "fav" / "a.m4a")
+    assert os.path.samefile(src, linked)
+
+    def no_link(*a):
+        raise OSError("跨文件系统")
+
+    monkeypatch.setattr(media_store.os, "link", no_link)
+    copied = link_or_copy(src, tmp_path / "up" / "a.m4a")
+    assert copied.read_bytes() == b"abc" and not os.path.samefile(src, copied)
+
+
+def test_overlapping_folder_reuses_store_without_network(tmp_path):
+    svc = VideoService.__new__(VideoService)
+    svc.default_dir = tmp_path
+    svc.store = MediaStore(tmp_path / STORE_DIR_NAME)
+    svc.session = None  # 任何网络请求都会报错
+
+    fav = tmp_path / "收藏夹"
+    fav.mkdir()
+    song = fav / "歌-P02-副歌(BV1).m4a"
+    song.write_bytes(b"audio")
+    svc._record_download(fav, song, bvid="BV1", page=2, media_type="audio")
+
+    up = tmp_path / "UP主"
+    result = svc.download_audio("BV1", up, page=2)
+    assert result.cached and result.path == up / song.name
+    assert os.path.samefile(result.path, song)
+
+    # 媒体库目录不计入所在根目录的索引：根目录下只找到各保存目录里的文件
+    found = find_downloaded(tmp_path, "BV1", {"m4a"}, page=2)
+    assert found is not None and STORE_DIR_NAME not in found.parts
+
+
+def test_cache_check_does_not_link_into_target(tmp_path):
+    svc = VideoService.__new__(VideoService)
+    svc.default_dir = tmp_path
+    svc.store = MediaStore(tmp_path / STORE_DIR_NAME)
+    fav = tmp_path / "收藏夹"
+    fav.mkdir()
+    song = fav / "歌(BV1).m4a"
+    song.write_bytes(b"audio")
+    svc._record_download(fav, song, bvid="BV1", media_type="audio", variant="audio")
+
+    up = tmp_path / "UP主"
+    assert svc._has_local_file("BV1", "audio", up, variant="audio")
+    stored = svc._find_downloaded_file("BV1", {"m4a"}, root=up, variant="audio")
+    assert STORE_DIR_NAME in stored.parts and not up.exists()  # 只检查：不在目标目录里建链接
+
+
+def test_store_lookup_is_keyed_by_quality_and_codec(tmp_path):
+    svc = VideoService.__new__(VideoService)
+    svc.default_dir = tmp_path
+    svc.store = MediaStore(tmp_path / STORE_DIR_NAME)
+    fav = tmp_path / "收藏夹"
+    fav.mkdir()
+    low = fav / "视频(BV1).mp4"
+    low.write_bytes(b"360p")
+    variant = svc._store_variant("video_with_audio", VideoQuality.P360)
+    svc._record_download(fav, low, bvid="BV1", media_type="video", quality=16, variant=variant)
+
+    up = tmp_path / "UP主"
+    exts = {"mp4"}
+    assert svc._find_downloaded_file("BV1", exts, root=up, variant=variant, link=True) == up / low.name
+    other = tmp_path / "合集"
+    for wanted in (svc._store_variant("video_with_audio", VideoQuality.HD4K),
+                   svc._store_variant("video_with_audio", VideoQuality.P360, CodecPolicy(smallest=True)),
+                   svc._store_variant("video", VideoQuality.P360)):
+        assert svc._find_downloaded_file("BV1", exts, root=other, variant=wanted) is None
+    assert svc._find_downloaded_file("BV1", exts, root=other) is None  # 不带版本时不查媒体库
+
+
+def test_account_services_share_store(tmp_path):
+    svc = VideoService(session=SimpleNamespace(), default_dir=tmp_path, store_dir=tmp_path / STORE_DIR_NAME)
+    fav = tmp_path / "收藏夹"
+    fav.mkdir()
+    song = fav / "歌(BV1).m4a"
+    song.write_bytes(b"audio")
+    svc._record_download(fav, song, bvid="BV1", media_type="audio")
+
+    accounts = svc._account_services([SimpleNamespace(), SimpleNamespace()])
+    assert all(s.store is svc.store for s in accounts)
+    for i, account in enumerate(accounts):
+        result = account.download_audio("BV1", tmp_path / f"UP{i}")  # 无网络：session 没有 get
+        assert result.cached and os.path.samefile(result.path, song)
@@ -0,0 +1,131 @@
+"""请求级缓存（src.util.memo）与 VideoService view / playurl 复用的单元测试。"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.download_model import AudioStream, DashStreams, VideoStream
+from src.services import VideoService
+from src.services import video as video_mod
+from src.util import memo as memo_mod
+from src.util.memo import RequestMemo
+
+
+def test_ttl_expiry_and_custom_deadline(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(memo_mod.time, "time", lambda: now[0])
+    memo = RequestMemo(ttl=10)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return len(calls)
+
+    assert memo.get_or_fetch("k", fetch) == 1
+    now[0] += 9
+    assert memo.get_or_fetch("k", fetch) == 1
+    now[0] += 2
+    assert memo.get_or_fetch("k", fetch) == 2  # 超过 ttl 重新请求
+    assert memo.get_or_fetch("e", fetch, expires_at=lambda v: now[0] + 1) == 3
+    now[0] += 1
+    assert memo.get_or_fetch("e", fetch, expires_at=lambda v: now[0] + 1) == 4  # 按结果提前过期
+    assert (memo.hits, memo.misses) == (1, 4)
+
+
+def test_concurrent_callers_share_one_request():
+    memo = RequestMemo()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "info"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(memo.get_or_fetch("view", fetch)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    started.wait(5)
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert results == ["info"] * 8 and len(calls) == 1
+
+
+def test_errors_are_not_cached():
+    memo = RequestMemo()
+    with pytest.raises(RuntimeError):
+        memo.get_or_fetch("k", lambda: (_ for _ in ()).throw(RuntimeError("-412")))
+    assert memo.get_or_fetch("k", lambda: "ok") == "ok"
+
+
+def _view(pages=3):
+    return {
+        "bvid": "BV1A", "title": "多P", "cid": 11,
+        "pages": [{"page": i, "cid": 10 + i, "part": f"P{i}"} for i in range(1, pages + 1)],
+    }
+
+
+def test_peek_never_fetches():
+    memo = RequestMemo(ttl=60)
+    assert memo.peek("k") is None
+    memo.get_or_fetch("k", lambda: 1)
+    assert memo.peek("k") == 1
+
+
+def _svc(tmp_path, **attrs):
+    svc = VideoService.__new__(VideoService)
+    svc.default_dir = tmp_path
+    svc.__dict__.update(attrs)
+    return svc
+
+
+def test_download_all_pages_requests_view_once(tmp_path):
+    requests = []
+
+    def get(url, params=None):
+        requests.append(url)
+        return _view()
+
+    svc = _svc(tmp_path, session=SimpleNamespace(get=get))
+    seen = []
+    svc.get_playurl = lambda bvid, cid: cid
+    svc.download_video_with_audio = lambda bvid, d, page, **k: seen.append(svc._fetch_streams(bvid, page)[1])
+    svc.download_all_pages("BV1A", tmp_path, progress=SimpleNamespace(start=lambda *a: None,
+                                                                        finish=lambda: None))
+    assert seen == [11, 12, 13]
+    assert len(requests) == 1  # N 个分P 只请求一次 view
+
+
+def test_playurl_cache_respects_url_deadline(tmp_path, monkeypatch):
+    deadline = int(time.time()) + 3600
+    fetched = []
+
+    def fake_request(bvid, cid, fnval):
+        fetched.append(cid)
+        url = f"https://upos.bilivideo.com/v.m4s?deadline={deadline}"
+        return DashStreams(video=[VideoStream(url=url, quality=80)], audio=[AudioStream(url=url)])
+
+    svc = _svc(tmp_path, session=object())
+    monkeypatch.setattr(svc, "_request_playurl", fake_request)
+    svc.get_playurl("BV1A", 11)
+    svc.get_playurl("BV1A", 11)
+    assert fetched == [11]
+
+    deadline = int(time.time()) + video_mod.PLAYURL_EXPIRY_MARGIN - 5  # 直链即将过期：不缓存
+    svc.get_playurl("BV1A", 12)
+    svc.get_playurl("BV1A", 12)
+    assert fetched == [11, 12, 12]
+
+
+def test_account_services_share_memo_but_not_playurls(tmp_path):
+    svc = _svc(tmp_path, session=object())
+    a, b = svc._account_services([object(), object()])
+    assert a._request_memo() is b._request_memo() is svc._request_memo()
@@ -0,0 +1,124 @@
+"""MergePool 合成线程池的单元测试：合成并发数受限、下载线程不等待合成、状态上报到 progress。"""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.models.download_model import AudioStream, DashStreams, VideoStream
+from src.models.video_model import VideoInfo
+from src.services import VideoService
+from src.util.merge_pool import MergePool
+from src.util.progress import BatchProgress, ParallelBatchProgress
+
+
+class _Recorder:
+    """只记录 merge_status 调用的 progress。"""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def merge_status(self, queued, running, seconds):
+        with self._lock:
+            self.calls.append((queued, running, seconds))
+
+
+def test_pool_limits_concurrent_merges():
+    active = [0]
+    peak = [0]
+    lock = threading.Lock()
+
+    def job():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.03)
+        with lock:
+            active[0] -= 1
+
+    with MergePool(workers=2) as pool:
+        for _ in range(6):
+            pool.submit(job)
+    assert peak[0] == 2
+    assert pool.merged == 6
+    assert pool.pending == 0
+
+
+def test_pool_reports_queue_depth_and_time():
+    rec = _Recorder()
+    release = threading.Event()
+    with MergePool(workers=1, progress=rec) as pool:
+        pool.submit(release.wait)
+        pool.submit(lambda: None)
+        assert pool.pending == 2
+        release.set()
+    assert (1, 0, None) in rec.calls  # 第一个任务提交后排队 1
+    queued, running, seconds = rec.calls[-1]
+    assert (queued, running) == (0, 0)
+    assert seconds is not None and pool.last_seconds == seconds
+
+
+def test_pool_raises_first_error_after_all_done():
+    done = []
+
+    def bad():
+        raise RuntimeError("merge failed")
+
+    pool = MergePool(workers=1)
+    pool.submit(bad)
+    pool.submit(lambda: done.append(1))
+    with pytest.raises(RuntimeError, match="merge failed"):
+        pool.join()
+    assert done == [1]  # 失败不影响后续合成
+
+
+def test_pool_does_not_mask_outer_exception():
+    def bad():
+        raise RuntimeError("merge failed")
+
+    with pytest.raises(ValueError):
+        with MergePool(workers=1) as pool:
+            pool.submit(bad)
+            raise ValueError("download failed")
+
+
+def test_progress_objects_accept_merge_status(capsys):
+    p = BatchProgress(n=1, display=True)
+    p.merge_status(2, 1, 3.25)
+    assert "[合成] 排队 2，进行中 1，上次耗时 3.2s" in capsys.readouterr().out
+    pp = ParallelBatchProgress(n=1)
+    pp.merge_status(0, 1, None)
+    assert (pp.merge_queued, pp.merge_running, pp.merge_seconds) == (0, 1, None)
+
+
+def test_download_video_with_audio_hands_merge_to_pool(tmp_path):
+    """传入 merge_pool 时：两个流下载完即返回，合成在池中完成后回填 size、清理临时目录。"""
+    svc = VideoService.__new__(VideoService)
+    svc.session = SimpleNamespace(session=SimpleNamespace(headers={}))
+    svc.default_dir = tmp_path
+    info = VideoInfo(bvid="BV1A", title="测试视频", cid=123)
+    dash = DashStreams(video=[VideoStream(url="http://v", quality=80, codecs="avc1.640032")],
+                       audio=[AudioStream(url="http://a", codecs="mp4a.40.2")])
+    release = threading.Event()
+    merge_threads = []
+
+    def fake_merge(video, audio, save_path, progress_cb=None):
+        release.wait()
+        merge_threads.append(threading.get_ident())
+        save_path.write_bytes(b"merged")
+
+    with patch.object(svc, "_fetch_streams", return_value=(info, dash)), \
+            patch("src.services.video.download_streams", return_value=[1, 1]), \
+            patch("src.services.video.merge_video_audio", side_effect=fake_merge):
+        progress = ParallelBatchProgress()
+        progress.start(1, "测试视频(BV1A).mp4")
+        with MergePool(workers=1) as pool:
+            result = svc.download_video_with_audio("BV1A", tmp_path, progress=progress, merge_pool=pool)
+            assert result.size is None and not result.path.exists()  # 尚未合成，下载线程已返回
+            release.set()
+    assert merge_threads and merge_threads[0] != threading.get_ident()
+    assert result.size == len(b"merged")
+    assert not list(tmp_path.glob("bilitools_*"))  # 临时目录已由合成任务删除
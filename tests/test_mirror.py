@@ -0,0 +1,109 @@
+"""CDN 镜像选择（src.util.mirror）与 download_stream 镜像切换的单元测试。"""
+
+import pytest
+import requests
+
+from src.util import downloader as dl
+from src.util import mirror
+
+PRIMARY = "https://upos-sz-mirrorcos.bilivideo.com/v.m4s?e=1"
+BACKUP = "https://upos-sz-mirrorali.bilivideo.com/v.m4s?e=1"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_scores(monkeypatch):
+    monkeypatch.setattr(mirror, "_scores", {})
+
+
+class _Resp:
+    def __init__(self, body=b"", status=200, headers=None, fail_after=None):
+        self.body = body
+        self.status_code = status
+        self.headers = headers or {"Content-Length": str(len(body))}
+        self.fail_after = fail_after
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code))
+
+    def iter_content(self, chunk_size):
+        data = self.body[:self.fail_after] if self.fail_after is not None else self.body
+        for i in range(0, len(data), 4):
+            yield data[i:i + 4]
+        if self.fail_after is not None:
+            raise requests.exceptions.ConnectionError("reset")
+
+    def close(self):
+        pass
+
+
+def test_rank_prefers_measured_speed_then_ttfb():
+    mirror.record_ttfb(PRIMARY, 0.30)
+    mirror.record_ttfb(BACKUP, 0.05)
+    assert mirror.rank_urls([PRIMARY, BACKUP], probe=False) == [BACKUP, PRIMARY]
+    mirror.record_speed(PRIMARY, 10_000_000, 1.0)  # 实测吞吐优先于 TTFB
+    assert mirror.rank_urls([PRIMARY, BACKUP], probe=False) == [PRIMARY, BACKUP]
+    mirror.record_failure(PRIMARY)  # 失败过的主机排到最后
+    assert mirror.rank_urls([PRIMARY, BACKUP], probe=False) == [BACKUP, PRIMARY]
+
+
+def test_rank_probes_unknown_hosts_once(monkeypatch):
+    probed = []
+
+    def fake_get(url, headers=None, **kwargs):
+        probed.append(url)
+        assert headers["Range"] == "bytes=0-0"
+        if url == PRIMARY:
+            raise requests.exceptions.ConnectTimeout("timeout")
+        return _Resp(b"x", status=206)
+
+    monkeypatch.setattr("src.util.transport.media_get", fake_get)
+    assert mirror.rank_urls([PRIMARY, BACKUP, PRIMARY]) == [BACKUP, PRIMARY]
+    assert sorted(probed) == sorted([PRIMARY, BACKUP])
+    mirror.rank_urls([PRIMARY, BACKUP])
+    assert len(probed) == 2  # 评分已缓存，不再探测
+
+
+def test_download_fails_over_to_backup_and_resumes(tmp_path, monkeypatch):
+    body = b"0123456789abcdefghij"
+    calls = []
+
+    def fake_get(url, headers=None, **kwargs):
+        rng = headers.get("Range")
+        calls.append((url, rng))
+        if rng == "bytes=0-0":
+            return _Resp(b"0", status=206)
+        if url == PRIMARY:
+            return _Resp(body, fail_after=8)
+        start = int(rng.split("=")[1].rstrip("-"))
+        return _Resp(body[start:], status=206)
+
+    monkeypatch.setattr("src.util.transport.media_get", fake_get)
+    mirror.record_ttfb(PRIMARY, 0.01)
+    mirror.record_ttfb(BACKUP, 0.02)
+    size = dl.download_stream(PRIMARY, tmp_path / "v.m4s", backup_urls=[BACKUP])
+    assert size == len(body)
+    assert (tmp_path / "v.m4s").read_bytes() == body
+    assert calls == [(PRIMARY, None), (BACKUP, "bytes=8-")]  # 换镜像后从已下载位置续传
+    assert mirror._scores[mirror.host_of(PRIMARY)].failures == 1
+
+
+def test_speed_watch_detects_collapse(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(mirror.time, "monotonic", lambda: now[0])
+    watch = mirror.SpeedWatch(window=1.0, ratio=5)
+    now[0] = 1.0
+    assert watch.feed(1_000_000) is False  # 首个窗口：建立峰值 1MB/s
+    now[0] = 2.0
+    assert watch.feed(500_000) is False  # 0.5MB/s：未跌破 1/5
+    now[0] = 3.0
+    assert watch.feed(100_000) is True  # 0.1MB/s：崩塌
+
+
+def test_cursor_limits_switches():
+    cursor = mirror.MirrorCursor([PRIMARY, BACKUP])
+    for _ in range(4):
+        assert cursor.can_switch
+        cursor.fail("slow")
+    assert not cursor.can_switch
+    assert mirror.MirrorCursor([PRIMARY]).can_switch is False
@@ -3,7 +3,7 @@
 import pytest
 
 from src.models import AudioStream, LoginUser, VideoInfo, VideoOwner, VideoSeason, VideoStat
-from src.models.download_model import DashStreams, VideoQuality, VideoStream
+from src.models.download_model import CodecPolicy, DashStreams, VideoQuality, VideoStream, codec_family
 from src.models.history_model import HistoryItem, HistoryPage
 
 
@@ -198,6 +198,29 @@ class TestDownloadModels:
         assert DashStreams().best_video() is None
         assert DashStreams().best_audio() is None
 
+    def test_pick_video_codec_policy(self):
+        """同一清晰度有 avc1/hev1/av01 三种编码：按 CodecPolicy 挑选，未传策略时沿用接口顺序。"""
+        dash = DashStreams(video=[
+            VideoStream(url="4k-hevc", codecs="hev1.1.6.L150.90", quality=120, size=900),
+            VideoStream(url="avc", codecs="avc1.640032", quality=80, size=100),
+            VideoStream(url="hevc", codecs="hev1.1.6.L120.90", quality=80, size=60),
+            VideoStream(url="av1", codecs="av01.0.08M.08", quality=80, size=70),
+        ])
+        assert dash.pick_video(VideoQuality.P1080).url == "avc"
+        assert dash.pick_video(VideoQuality.P1080, CodecPolicy(smallest=True)).url == "hevc"
+        assert dash.pick_video(VideoQuality.P1080, CodecPolicy(prefer=("av01", "h265"))).url == "av1"
+        # 只要 H.264：4K 只有 HEVC → 回退到满足限制的最高清晰度
+        assert dash.pick_video(VideoQuality.HD4K, CodecPolicy(require=("avc1",))).url == "avc"
+        assert DashStreams(video=dash.video[:1]).pick_video(VideoQuality.HD4K, CodecPolicy(require=("avc",))) is None
+
+    def test_codec_policy_parse(self):
+        assert CodecPolicy.parse("") is None and CodecPolicy.parse("any") is None
+        assert CodecPolicy.parse("smallest") == CodecPolicy(smallest=True)
+        assert CodecPolicy.parse("compat") == CodecPolicy(require=("avc",))
+        assert CodecPolicy.parse("AV1, hev1, smallest") == CodecPolicy(prefer=("av1", "hevc"), smallest=True)
+        assert codec_family("hvc1.2.4.L153.90") == "hevc" and codec_family("opus") == "opus"
+        assert not CodecPolicy(require=("avc",)).accepts("av01.0.08M.08")
+
 
 class TestHistoryModels:
     def test_view_percent(self):
@@ -0,0 +1,97 @@
+"""自适应请求节奏（src.util.pacing）与批量下载 / 翻页接入的单元测试（虚拟时钟，不真实等待）。"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.api.errors import BiliAPIError, BiliRiskError
+from src.services import VideoService
+from src.services.history import HistoryService
+from src.util import pacing
+from src.util.pacing import Pacer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """虚拟时钟：sleep 只推进时间并记录时长。"""
+    state = SimpleNamespace(now=100.0, sleeps=[])
+
+    def sleep(seconds):
+        state.sleeps.append(round(seconds, 3))
+        state.now += seconds
+
+    monkeypatch.setattr(pacing.time, "monotonic", lambda: state.now)
+    monkeypatch.setattr(pacing.time, "sleep", sleep)
+    monkeypatch.setattr(pacing.random, "uniform", lambda a, b: a)
+    return state
+
+
+def test_slots_are_spaced_by_current_rate(clock):
+    p = Pacer(rate=2.0)
+    for _ in range(3):
+        p.wait()
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_additive_increase_multiplicative_decrease(clock):
+    p = Pacer(rate=2.0, max_rate=3.0, step=0.5, beta=0.5)
+    p.success()
+    p.success()
+    p.success()
+    assert p.rate == 3.0  # 加性增到上限
+    assert p.risk() == pacing.COOLDOWN_BASE
+    assert p.rate == 1.5  # 乘性减
+    assert p.cooldown_remaining == pytest.approx(pacing.COOLDOWN_BASE)
+    assert p.risk() == pacing.COOLDOWN_BASE * 2  # 连续风控冷却加长
+    p.record(ValueError("网络错误"))  # 其余异常不影响速率
+    assert p.rate == 0.75
+
+
+def test_cooldown_blocks_next_slot(clock):
+    p = Pacer(rate=10.0)
+    p.wait()
+    with pytest.raises(BiliRiskError):
+        p.call(lambda: (_ for _ in ()).throw(BiliRiskError(-412, "风控")))
+    assert p.wait() == pytest.approx(pacing.COOLDOWN_BASE)
+
+
+def test_batch_download_backs_off_through_pacer(tmp_path, clock):
+    svc = VideoService.__new__(VideoService)
+    svc.pacer = Pacer(rate=4.0)
+    attempts = []
+
+    def get(url, params=None):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise BiliRiskError(-412, "风控")
+        return "ok"
+
+    svc.session = SimpleNamespace(get=get)
+    assert svc._execute_batch_download("BV1", lambda: svc._api_get("view", {}), label="测试") == "ok"
+    # 两次风控冷却：3s、6s（连续次数加倍）；成功后速率回升
+    assert clock.sleeps[-2:] == [pacing.COOLDOWN_BASE, pacing.COOLDOWN_BASE * 2]
+    assert svc.get_pacer().rate == pytest.approx(4.0 * 0.25 + pacing.RATE_STEP)
+    assert svc._execute_batch_download(
+        "BV2", lambda: (_ for _ in ()).throw(BiliAPIError(-404, "不存在"))) is None
+
+
+def test_cached_items_do_not_wait_for_pacer(clock):
+    """本地已有的视频不发请求：不等待时间片，也不计入速率调整。"""
+    svc = VideoService.__new__(VideoService)
+    svc.pacer = Pacer(rate=0.5)
+    svc.pacer.risk()  # 冷却中
+    for i in range(100):
+        assert svc._execute_batch_download(f"BV{i}", lambda: "cached") == "cached"
+    assert clock.sleeps == [] and svc.pacer.successes == 0
+
+
+def test_history_pages_use_pacer(clock):
+    pages = iter([
+        SimpleNamespace(items=[1], has_more=True, max=1, business="archive", view_at=1),
+        SimpleNamespace(items=[2], has_more=False, max=0, business="", view_at=0),
+    ])
+    svc = HistoryService(session=object(), pacer=Pacer(rate=4.0))
+    svc.get_history_page = lambda **k: next(pages)
+    assert svc.get_history_all(max_iter=5) == [1, 2]
+    assert clock.sleeps == [0.25]
+    assert svc.pacer.successes == 2
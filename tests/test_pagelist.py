@@ -0,0 +1,75 @@
+"""轻量分P解析（pagelist）与按需补取完整视频信息的单元测试。"""
+
+from types import SimpleNamespace
+
+from src.models.download_model import DownloadResult
+from src.services import VideoService
+from src.urls.video_urls import VideoUrls
+
+BVID = "BV1xx411c7mD"
+
+
+def _service(tmp_path, pages=2):
+    calls = []
+
+    def get(url, params=None):
+        calls.append(url.rsplit("/", 1)[-1])
+        page_list = [{"page": p, "cid": 100 + p, "part": f"P{p}"} for p in range(1, pages + 1)]
+        if url == VideoUrls.PAGELIST:
+            return page_list
+        return {"bvid": params["bvid"], "title": "演唱会", "pages": page_list}
+
+    svc = VideoService.__new__(VideoService)
+    svc.session = SimpleNamespace(get=get)
+    svc.default_dir = tmp_path
+    downloads = []
+
+    def fake_audio(bvid, dir, *, page, info=None, **k):
+        downloads.append((page, info is not None))
+        return DownloadResult(path=tmp_path / f"{page}.m4a", media_type="audio")
+
+    svc.download_audio = fake_audio
+    return svc, calls, downloads
+
+
+def test_fetch_pages_uses_pagelist_and_reuses_view(tmp_path):
+    svc, calls, _ = _service(tmp_path)
+    assert [p.cid for p in svc.fetch_pages(BVID)] == [101, 102]
+    assert calls == ["pagelist"]
+    svc.fetch_info("BV2")
+    assert [p.part for p in svc.fetch_pages("BV2")] == ["P1", "P2"]
+    assert calls == ["pagelist", "view"]  # 已缓存 view：不再请求 pagelist
+
+
+def test_new_video_goes_straight_to_view(tmp_path):
+    svc, calls, downloads = _service(tmp_path)
+    svc.download_all_pages(BVID, tmp_path, media_type="audio", progress=_Progress())
+    assert calls == ["view"]
+    assert downloads == [(1, True), (2, True)]
+
+
+def test_partially_downloaded_video_upgrades_lazily(tmp_path):
+    svc, calls, downloads = _service(tmp_path, pages=3)
+    (tmp_path / f"演唱会-P01-P1({BVID}).m4a").write_bytes(b"a")
+    (tmp_path / f"演唱会-P02-P2({BVID}).m4a").write_bytes(b"a")
+    progress = _Progress()
+    svc.download_all_pages(BVID, tmp_path, media_type="audio", progress=progress)
+    assert calls == ["pagelist", "view"]  # 只有第 3P 需要文件名时才补取完整信息
+    assert downloads == [(1, False), (2, False), (3, True)]
+    assert progress.names[:2] == [f"演唱会-P01-P1({BVID}).m4a", f"演唱会-P02-P2({BVID}).m4a"]
+
+    (tmp_path / f"演唱会-P03-P3({BVID}).m4a").write_bytes(b"a")
+    svc, calls, _ = _service(tmp_path, pages=3)
+    svc.download_all_pages(BVID, tmp_path, media_type="audio", progress=_Progress())
+    assert calls == ["pagelist"]  # 全部已下载：只取分P列表
+
+
+class _Progress:
+    def __init__(self):
+        self.names = []
+
+    def start(self, i, name):
+        self.names.append(name)
+
+    def finish(self):
+        pass
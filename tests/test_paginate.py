@@ -0,0 +1,87 @@
+"""并发翻页（src.util.paginate）与投稿 / 合集列表接入的单元测试。"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.api.errors import BiliRiskError
+from src.services import VideoService
+from src.services.archive import ArchiveService
+from src.util.pacing import Pacer
+from src.util.paginate import fetch_all_pages
+
+
+def _fast_pacer():
+    return Pacer(rate=1000, max_rate=1000)
+
+
+def test_pages_fetched_concurrently_and_kept_in_order():
+    active = [0]
+    peak = [0]
+    lock = threading.Lock()
+
+    def fetch(pn):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return [pn * 10 + k for k in range(3)][: 3 if pn < 4 else 1], 10
+
+    items = fetch_all_pages(fetch, page_size=3, workers=3, pacer=_fast_pacer())
+    assert items == [10, 11, 12, 20, 21, 22, 30, 31, 32, 40]
+    assert peak[0] >= 2
+
+
+def test_shifted_listing_is_deduplicated():
+    # 翻页期间有新投稿：第 1 页末尾的 b 被挤到第 2 页开头
+    pages = {1: ["a", "b"], 2: ["b", "c"], 3: ["d"]}
+    items = fetch_all_pages(lambda pn: (pages[pn], 5), page_size=2, key=lambda x: x,
+                            pacer=_fast_pacer())
+    assert items == ["a", "b", "c", "d"]
+
+
+def test_risk_error_on_a_page_is_retried():
+    attempts = []
+
+    def fetch(pn):
+        attempts.append(pn)
+        if pn == 2 and attempts.count(2) == 1:
+            raise BiliRiskError("风控")
+        return [pn], 2
+
+    pacer = Pacer(rate=1000, max_rate=1000)
+    pacer.risk = lambda: 0.0  # 不真实冷却
+    assert fetch_all_pages(fetch, page_size=1, pacer=pacer) == [1, 2]
+    with pytest.raises(ValueError):
+        fetch_all_pages(lambda pn: (_ for _ in ()).throw(ValueError("x")), page_size=1,
+                        pacer=_fast_pacer())
+
+
+def test_list_up_videos_signs_each_page(monkeypatch):
+    signed = []
+    monkeypatch.setattr("src.api.auth.get_wbi", lambda params: signed.append(params["pn"]))
+
+    def get(url, params=None):
+        start = (params["pn"] - 1) * params["ps"]
+        vlist = [{"bvid": f"BV{i}", "created": 100 - i} for i in range(start, min(start + params["ps"], 5))]
+        return {"list": {"vlist": vlist}, "page": {"count": 5}}
+
+    svc = VideoService.__new__(VideoService)
+    svc.session = SimpleNamespace(get=get)
+    assert svc.list_up_videos(1, ps=2) == ["BV0", "BV1", "BV2", "BV3", "BV4"]
+    assert sorted(signed) == [1, 2, 3]
+
+
+def test_season_by_sid_fetches_all_pages():
+    def get(url, params=None):
+        pn = params["page_num"]
+        archives = [{"aid": i, "bvid": f"BV{i}"} for i in range((pn - 1) * 50, min(pn * 50, 120))]
+        return {"archives": archives, "meta": {"title": f"meta{pn}"}, "page": {"total": 120}}
+
+    data = ArchiveService(SimpleNamespace(get=get)).get_season_by_sid(1, mid=2)
+    assert data["aids"] == list(range(120))
+    assert data["meta"] == {"title": "meta1"}
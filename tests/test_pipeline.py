@@ -0,0 +1,125 @@
+"""分阶段流水线（src.util.pipeline）与并发批量下载预取的单元测试。"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.api.errors import BiliAPIError
+from src.services import VideoService
+from src.util.pipeline import Stage, run_pipeline
+
+
+def test_results_keep_input_order_and_stage_sizes():
+    active = {"api": 0, "cdn": 0}
+    peak = {"api": 0, "cdn": 0}
+    lock = threading.Lock()
+
+    def _stage(name, fn):
+        def run(payload, i):
+            with lock:
+                active[name] += 1
+                peak[name] = max(peak[name], active[name])
+            time.sleep(0.02 if name == "cdn" else 0.001)
+            with lock:
+                active[name] -= 1
+            return fn(payload)
+        return run
+
+    results = run_pipeline(list(range(12)), [
+        Stage("api", _stage("api", lambda x: x * 10), workers=1),
+        Stage("cdn", _stage("cdn", lambda x: x + 1), workers=3),
+    ])
+    assert results == [x * 10 + 1 for x in range(12)]
+    assert peak["api"] == 1 and peak["cdn"] >= 2
+
+
+def test_lookahead_bounds_how_far_first_stage_runs_ahead():
+    resolved = []
+    release = threading.Event()
+
+    def slow(payload, i):
+        release.wait(5)
+        return payload
+
+    t = threading.Thread(target=run_pipeline, args=(list(range(20)), [
+        Stage("resolve", lambda p, i: resolved.append(i) or p, workers=1),
+        Stage("transfer", slow, workers=1),
+    ]), kwargs={"lookahead": 2})
+    t.start()
+    time.sleep(0.1)
+    # 传输阶段卡住：1 个在处理 + 队列 2 个 + 解析线程手里 1 个
+    assert len(resolved) <= 5
+    release.set()
+    t.join(5)
+    assert len(resolved) == 20
+
+
+def test_failure_is_raised_after_other_items_finish():
+    done = []
+
+    def work(x, i):
+        if x == 1:
+            raise ValueError("boom")
+        done.append(x)
+        return x
+
+    with pytest.raises(ValueError):
+        run_pipeline([0, 1, 2, 3], [Stage("work", work, workers=2)])
+    assert sorted(done) == [0, 2, 3]
+
+
+def _view(bvid, pages=2):
+    return {"bvid": bvid, "title": bvid, "cid": 1,
+            "pages": [{"page": p, "cid": p, "part": f"P{p}"} for p in range(1, pages + 1)]}
+
+
+def test_parallel_fav_prefetches_info_and_playurl_once(tmp_path, monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def get(url, params=None):
+        with lock:
+            calls.append(("view", params["bvid"]))
+        if params["bvid"] == "BV404":
+            raise BiliAPIError(62002, "稿件不可见")
+        return _view(params["bvid"])
+
+    svc = VideoService.__new__(VideoService)
+    svc.session = SimpleNamespace(get=get)
+    svc.default_dir = tmp_path
+    svc._report_bvid_download = lambda bvid, new_results, dc, i, total: dc
+
+    def fake_playurl(bvid, cid, fnval):
+        with lock:
+            calls.append(("playurl", bvid, cid))
+        return SimpleNamespace(video=[], audio=[])
+
+    monkeypatch.setattr(svc, "_request_playurl", fake_playurl)
+    transfer_threads = set()
+
+    def fake_all_pages(bvid, save_dir, **k):
+        transfer_threads.add(threading.current_thread().name)
+        info = svc.fetch_info(bvid)  # 传输阶段：信息与直链均命中预取缓存
+        return [svc.get_playurl(bvid, p.cid) and f"{bvid}-P{p.page}" for p in info.pages]
+
+    svc.download_all_pages = fake_all_pages
+
+    class FakeFav:
+        def __init__(self, session):
+            pass
+
+        def get_fav_info(self, fid):
+            return SimpleNamespace(title="收藏夹")
+
+        def list_fav_medias_of(self, fid, bvids, order):
+            return {}  # 明细页里没有这些视频：按原方式请求视频信息
+
+    monkeypatch.setattr("src.services.fav.FavService", FakeFav)
+    results = svc.download_fav(1, tmp_path, bvids=["BV1", "BV404", "BV2"], threads=2)
+    assert results == ["BV1-P1", "BV1-P2", "BV2-P1", "BV2-P2"]
+    assert sorted(c for c in calls if c[0] == "view") == [("view", "BV1"), ("view", "BV2"), ("view", "BV404")]
+    assert sorted(c for c in calls if c[0] == "playurl") == [
+        ("playurl", "BV1", 1), ("playurl", "BV1", 2), ("playurl", "BV2", 1), ("playurl", "BV2", 2)]
+    assert all(name.startswith("pipeline-transfer") for name in transfer_threads)
@@ -192,7 +192,7 @@ class TestAutoProgress:
         fake_stat = os.stat_result((dir_mode, 0, 0, 0, 0, 0, 123, 0, 0, 0))
 
         with patch.object(s, "_fetch_streams", return_value=(info, dash)), \
-             patch("src.services.video.download_stream", return_value=1), \
+             patch("src.services.video.download_streams", return_value=[1, 1]), \
              patch("src.services.video.merge_video_audio"), \
              patch.object(Path, "stat", return_value=fake_stat):
             s.download_video_with_audio("BV1A")
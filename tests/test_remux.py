@@ -0,0 +1,190 @@
+"""内置 fMP4 重封装 / 音轨提取的单元测试：用手工构造的最小分片 MP4 验证，不依赖 ffmpeg。"""
+
+import struct
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from src.services import VideoService
+from src.util import downloader as dl
+from src.util.remux import (
+    RemuxUnsupportedError,
+    _children,
+    _find,
+    extract_audio_track,
+    remux_dash,
+    remux_supported,
+)
+
+
+def _box(box_type: str, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + box_type.encode() + payload
+
+
+def _full(box_type: str, payload: bytes, version: int = 0, flags: int = 0) -> bytes:
+    return _box(box_type, struct.pack(">I", (version << 24) | flags) + payload)
+
+
+def _fmp4(handler: str, fourcc: str, timescale: int, fragments: list, track_id: int = 1) -> bytes:
+    """构造单轨分片 MP4：fragments 为 [(tfdt, sample_duration, payload), ...]，每片一个样本。"""
+    mvhd = _full("mvhd", struct.pack(">IIII", 0, 0, 1000, 0) + b"\0" * 76 + struct.pack(">I", 2))
+    tkhd = _full("tkhd", struct.pack(">III", 0, 0, track_id) + b"\0" * 68)
+    mdhd = _full("mdhd", struct.pack(">IIII", 0, 0, timescale, 0) + b"\0" * 4)
+    hdlr = _full("hdlr", struct.pack(">I", 0) + handler.encode() + b"\0" * 13)
+    stsd = _full("stsd", struct.pack(">I", 1) + _box(fourcc, b"\0" * 8))
+    trak = _box("trak", tkhd + _box("mdia", mdhd + hdlr + _box("minf", _box("stbl", stsd))))
+    trex = _full("trex", struct.pack(">IIIII", track_id, 1, 0, 0, 0))
+    moov = _box("moov", mvhd + trak + _box("mvex", trex))
+    out = _box("ftyp", b"iso5" + b"\0\0\0\0" + b"iso6mp41") + moov
+    for seq, (tfdt, duration, payload) in enumerate(fragments, 1):
+        tfhd = _full("tfhd", struct.pack(">I", track_id), flags=0x020000)
+        tfdt_box = _full("tfdt", struct.pack(">Q", tfdt), version=1)
+        trun_len = 8 + 4 + 4 + 4 + 8  # header + fullbox + count + data_offset + (duration, size)
+        moof_len = 8 + 16 + 8 + len(tfhd) + len(tfdt_box) + trun_len
+        trun = _full("trun", struct.pack(">IiII", 1, moof_len + 8, duration, len(payload)), flags=0x000301)
+        moof = _box("moof", _full("mfhd", struct.pack(">I", seq)) + _box("traf", tfhd + tfdt_box + trun))
+        assert len(moof) == moof_len
+        out += moof + _box("mdat", payload)
+    return out
+
+
+def _write_inputs(tmp_path, audio_fourcc="mp4a"):
+    video = tmp_path / "video.m4s"
+    audio = tmp_path / "audio.m4s"
+    # 视频 timescale 1000：每片 1s；音频 timescale 48000：每片 0.5s
+    video.write_bytes(_fmp4("vide", "avc1", 1000, [(0, 1000, b"V0"), (1000, 1000, b"V1")]))
+    audio.write_bytes(_fmp4("soun", audio_fourcc, 48000, [
+        (0, 24000, b"A0"), (24000, 24000, b"A1"), (48000, 24000, b"A2"), (72000, 24000, b"A3"),
+    ]))
+    return video, audio
+
+
+def _fragments(data: bytes) -> list:
+    """输出文件中各 moof 的 (mfhd 序号, tfhd track_ID, 紧随其后的 mdat 内容)。"""
+    boxes = list(_children(data, 0, len(data)))
+    result = []
+    for i, (box_type, start, payload, end) in enumerate(boxes):
+        if box_type != "moof":
+            continue
+        mfhd = _find(data, payload, end, "mfhd")
+        tfhd = _find(data, payload, end, "traf/tfhd")
+        seq, = struct.unpack_from(">I", data, mfhd[1] + 4)
+        track_id, = struct.unpack_from(">I", data, tfhd[1] + 4)
+        _, _, mdat_payload, mdat_end = boxes[i + 1]
+        result.append((seq, track_id, data[mdat_payload:mdat_end]))
+    return result
+
+
+def test_remux_interleaves_by_decode_time(tmp_path):
+    video, audio = _write_inputs(tmp_path)
+    out = tmp_path / "out.mp4"
+    size = remux_dash(video, audio, out)
+    data = out.read_bytes()
+    assert size == len(data)
+
+    assert [box[0] for box in _children(data, 0, len(data))][:2] == ["ftyp", "moov"]
+    assert _fragments(data) == [
+        (1, 1, b"V0"), (2, 2, b"A0"), (3, 2, b"A1"),
+        (4, 1, b"V1"), (5, 2, b"A2"), (6, 2, b"A3"),
+    ]
+
+
+def test_remux_moov_has_both_tracks(tmp_path):
+    video, audio = _write_inputs(tmp_path)
+    out = tmp_path / "out.mp4"
+    remux_dash(video, audio, out)
+    data = out.read_bytes()
+    moov = _find(data, 0, len(data), "moov")
+    traks = [c for c in _children(data, moov[1], moov[2]) if c[0] == "trak"]
+    ids = [struct.unpack_from(">I", data, _find(data, t[2], t[3], "tkhd")[1] + 12)[0] for t in traks]
+    assert ids == [1, 2]
+    mvex = _find(data, moov[1], moov[2], "mvex")
+    trex_ids = [struct.unpack_from(">I", data, c[2] + 4)[0] for c in _children(data, mvex[1], mvex[2])]
+    assert trex_ids == [1, 2]
+    assert _find(data, 0, len(data), "mfra") is not None
+
+
+def test_remux_rejects_unsupported_codec(tmp_path):
+    video, audio = _write_inputs(tmp_path, audio_fourcc="fLaC")
+    out = tmp_path / "out.mp4"
+    with pytest.raises(RemuxUnsupportedError):
+        remux_dash(video, audio, out)
+    assert not out.exists()  # 解析阶段即拒绝，不留半成品
+
+
+def test_remux_supported_by_codecs():
+    assert remux_supported("avc1.640032", "mp4a.40.2")
+    assert remux_supported("hev1.1.6.L150.90", "mp4a.40.2")
+    assert remux_supported("av01.0.08M.08", "mp4a.40.5")
+    assert not remux_supported("avc1.640032", "fLaC")
+    assert not remux_supported("dvh1.08.07", "mp4a.40.2")
+
+
+def test_merge_uses_builtin_remux_without_ffmpeg(tmp_path):
+    """常见编码直接走内置合成，不探测、不启动 ffmpeg。"""
+    video, audio = _write_inputs(tmp_path)
+    with patch.object(dl, "_resolve_ffmpeg", return_value=None), patch("subprocess.run") as mock_run:
+        dl.merge_video_audio(video, audio, tmp_path / "out.mp4")
+    mock_run.assert_not_called()
+    assert (tmp_path / "out.mp4").exists()
+
+
+def test_merge_falls_back_to_ffmpeg_for_unsupported(tmp_path):
+    video, audio = _write_inputs(tmp_path, audio_fourcc="fLaC")
+    done = subprocess.CompletedProcess(args=[], returncode=0)
+    with patch.object(dl, "_resolve_ffmpeg", return_value="ffmpeg"), \
+            patch("subprocess.run", return_value=done) as mock_run:
+        dl.merge_video_audio(video, audio, tmp_path / "out.mp4")
+    assert mock_run.call_args[0][0][0] == "ffmpeg"
+
+
+def test_extract_audio_track_keeps_only_audio(tmp_path):
+    video, audio = _write_inputs(tmp_path)
+    merged = tmp_path / "out.mp4"
+    remux_dash(video, audio, merged)
+    out = tmp_path / "out.m4a"
+    size = extract_audio_track(merged, out)
+    data = out.read_bytes()
+    assert size == len(data)
+    assert _fragments(data) == [(1, 2, b"A0"), (2, 2, b"A1"), (3, 2, b"A2"), (4, 2, b"A3")]
+    moov = _find(data, 0, len(data), "moov")
+    assert [c[0] for c in _children(data, moov[1], moov[2])].count("trak") == 1
+    mvex = _find(data, moov[1], moov[2], "mvex")
+    assert [struct.unpack_from(">I", data, c[2] + 4)[0] for c in _children(data, mvex[1], mvex[2])] == [2]
+
+
+def test_extract_audio_falls_back_to_ffmpeg(tmp_path):
+    video, _ = _write_inputs(tmp_path)  # 只有视频轨道：内置提取不支持
+    with pytest.raises(RemuxUnsupportedError):
+        extract_audio_track(video, tmp_path / "out.m4a")
+    out = tmp_path / "out.m4a"
+    done = subprocess.CompletedProcess(args=[], returncode=0)
+
+    def run(cmd, **kw):
+        out.write_bytes(b"aac")
+        return done
+
+    with patch.object(dl, "_resolve_ffmpeg", return_value="ffmpeg"), \
+            patch("subprocess.run", side_effect=run) as mock_run:
+        assert dl.extract_audio(video, out) == 3
+    assert "-vn" in mock_run.call_args[0][0]
+
+
+def test_download_audio_extracts_from_merged_video(tmp_path):
+    """仅音频下载：保存目录里已有合成视频时直接提取音轨，不走网络。"""
+    video, audio = _write_inputs(tmp_path)
+    save_dir = tmp_path / "收藏夹"
+    remux_dash(video, audio, save_dir / "歌(BV1).mp4")
+    remux_dash(video, audio, save_dir / "合集-P02-副歌(BV2).mp4")
+    svc = VideoService.__new__(VideoService)
+    svc.default_dir = tmp_path
+    svc.session = None  # 任何网络请求都会报错
+
+    result = svc.download_audio("BV1", save_dir)
+    assert result.path == save_dir / "歌(BV1).m4a" and not result.cached
+    assert result.size == result.path.stat().st_size
+    assert svc.download_audio("BV1", save_dir).cached  # 第二次直接命中音频缓存
+    assert not list(save_dir.glob("*.part"))
+    assert svc._find_audio_source("BV2", 2, save_dir) is not None
+    assert svc._find_audio_source("BV2", 1, save_dir) is None  # 其他分P的视频不能当作来源
@@ -0,0 +1,216 @@
+"""跨进程断点续传（src.util.resume + download_stream journal + VideoService）的单元测试。"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.api.errors import DownloadError, StreamResumeError
+from src.models import VideoQuality
+from src.models.download_model import AudioStream, CodecPolicy, DashStreams, VideoStream
+from src.models.video_model import VideoInfo
+from src.services import VideoService
+from src.util import downloader as dl
+from src.util.resume import StreamJournal, parts_dir, url_deadline
+
+
+def _url(host="upos-a", deadline=None):
+    deadline = deadline if deadline is not None else int(time.time()) + 3600
+    return f"https://{host}.bilivideo.com/v.m4s?deadline={deadline}&e=1"
+
+
+class _Resp:
+    def __init__(self, body, status=206):
+        self.body = body
+        self.status_code = status
+        self.headers = {"Content-Length": str(len(body))}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), 4):
+            yield self.body[i:i + 4]
+
+    def close(self):
+        pass
+
+
+def test_journal_roundtrip_and_deadline(tmp_path):
+    j = StreamJournal(path=tmp_path / "video.part.json", bvid="BV1", page=2, quality=120,
+                      stream_id="video", url=_url(deadline=100), segments=[[0, 9, 4]])
+    j.save()
+    loaded = StreamJournal.load(j.path)
+    assert (loaded.bvid, loaded.page, loaded.segments) == ("BV1", 2, [[0, 9, 4]])
+    assert loaded.part_path == tmp_path / "video.part"
+    assert url_deadline(loaded.url) == 100 and loaded.expired()
+    assert not StreamJournal(path=j.path, url=_url()).expired()
+    (tmp_path / "bad.part.json").write_text("{", encoding="utf-8")
+    assert StreamJournal.load(tmp_path / "bad.part.json") is None
+
+
+def test_segmented_resume_requests_only_missing_bytes(tmp_path, monkeypatch):
+    body = b"0123456789abcdefghij"
+    part = tmp_path / "video.part"
+    part.write_bytes(body[:6] + b"\0" * 4 + body[10:13] + b"\0" * 7)  # 两段各下了一部分
+    journal = StreamJournal(path=tmp_path / "video.part.json", url=_url(),
+                            segments=[[0, 9, 6], [10, 19, 3]])
+    calls = []
+
+    def fake_get(url, headers=None, **kwargs):
+        rng = headers["Range"]
+        calls.append(rng)
+        start, end = (int(x) for x in rng.split("=")[1].split("-"))
+        return _Resp(body[start:end + 1])
+
+    monkeypatch.setattr("src.util.transport.media_get", fake_get)
+    size = dl.download_stream(journal.url, part, segments=2, journal=journal)
+    assert size == len(body) and part.read_bytes() == body
+    assert sorted(calls) == ["bytes=13-19", "bytes=6-9"]
+    assert StreamJournal.load(journal.path).complete
+
+
+def test_completed_stream_is_not_downloaded_again(tmp_path, monkeypatch):
+    part = tmp_path / "audio.part"
+    part.write_bytes(b"done")
+    journal = StreamJournal(path=tmp_path / "audio.part.json", url=_url())
+    journal.finish(4)
+    monkeypatch.setattr("src.util.transport.media_get", lambda *a, **k: pytest.fail("不应请求网络"))
+    seen = []
+    assert dl.download_stream(journal.url, part, journal=journal, progress_cb=lambda d, t: seen.append(d)) == 4
+    assert seen == [4]
+
+
+def _svc(tmp_path):
+    svc = VideoService.__new__(VideoService)
+    svc.session = SimpleNamespace(session=SimpleNamespace(headers={}))
+    svc.default_dir = tmp_path
+    return svc
+
+
+def _dash(deadline=None):
+    return DashStreams(
+        video=[VideoStream(url=_url("upos-v", deadline), codecs="avc1.640032", quality=80, size=8)],
+        audio=[AudioStream(url=_url("upos-a", deadline), codecs="mp4a.40.2", size=4)],
+    )
+
+
+def _interrupted_download(tmp_path, svc, deadline=None):
+    """第一次下载：音频完成、视频下到一半时进程「崩溃」。"""
+    info = VideoInfo(bvid="BV1A", title="测试视频", cid=123)
+    dash = _dash(deadline)
+
+    def crash(jobs, headers, *, progress_cb=None, segments=1, journals=None):
+        (_, video_part, *_), (_, audio_part, *_) = jobs
+        audio_part.write_bytes(b"AAAA")
+        journals[1].finish(4)
+        video_part.write_bytes(b"VVVV")
+        journals[0].checkpoint(4)
+        raise DownloadError("断网")
+
+    with patch.object(svc, "_fetch_streams", return_value=(info, dash)), \
+            patch("src.services.video.download_streams", side_effect=crash):
+        with pytest.raises(DownloadError):
+            svc.download_video_with_audio("BV1A", tmp_path, progress_cb=lambda d, t: None)
+    return info, dash
+
+
+def _finish(jobs, headers, *, progress_cb=None, segments=1, journals=None):
+    return [dl.download_stream(url, path, journal=j) for (url, path, *_), j in zip(jobs, journals)]
+
+
+def _fake_merge(video, audio, save_path, progress_cb=None):
+    save_path.write_bytes(video.read_bytes() + audio.read_bytes())
+
+
+def test_video_with_audio_resumes_without_refetching(tmp_path, monkeypatch):
+    svc = _svc(tmp_path)
+    _, dash = _interrupted_download(tmp_path, svc)
+    pdir = parts_dir(tmp_path, "BV1A", 1)
+    assert (pdir / "video.part").read_bytes() == b"VVVV"  # 中断后保留
+
+    ranges = []
+
+    def fake_get(url, headers=None, **kwargs):
+        ranges.append((url, headers.get("Range")))
+        return _Resp(b"WWWW")
+
+    monkeypatch.setattr("src.util.transport.media_get", fake_get)
+    with patch.object(svc, "_fetch_streams", side_effect=AssertionError("直链未过期，不应重新请求")), \
+            patch("src.services.video.download_streams", side_effect=_finish), \
+            patch("src.services.video.merge_video_audio", side_effect=_fake_merge):
+        result = svc.download_video_with_audio("BV1A", tmp_path, progress_cb=lambda d, t: None)
+    assert result.path.name == "测试视频(BV1A).mp4"
+    assert result.path.read_bytes() == b"VVVVWWWWAAAA"
+    assert ranges == [(dash.video[0].url, "bytes=4-")]  # 只续传视频流剩余部分，音频流已完成
+    assert not pdir.exists()
+
+
+def test_expired_url_fetches_fresh_playurl(tmp_path, monkeypatch):
+    svc = _svc(tmp_path)
+    info, _ = _interrupted_download(tmp_path, svc, deadline=int(time.time()) - 10)
+    fresh = _dash()
+    urls = []
+
+    def fake_get(url, headers=None, **kwargs):
+        urls.append(url)
+        return _Resp(b"WWWW")
+
+    monkeypatch.setattr("src.util.transport.media_get", fake_get)
+    with patch.object(svc, "_fetch_streams", return_value=(info, fresh)) as fetch, \
+            patch("src.services.video.download_streams", side_effect=_finish), \
+            patch("src.services.video.merge_video_audio", side_effect=_fake_merge):
+        result = svc.download_video_with_audio("BV1A", tmp_path, progress_cb=lambda d, t: None)
+    fetch.assert_called_once()
+    assert urls == [fresh.video[0].url]  # 用新直链续传
+    assert result.path.read_bytes() == b"VVVVWWWWAAAA"
+
+
+def test_changed_quality_discards_old_parts(tmp_path):
+    svc = _svc(tmp_path)
+    _interrupted_download(tmp_path, svc)
+    pdir = parts_dir(tmp_path, "BV1A", 1)
+    journals = svc._load_journals(pdir, ("video", "audio"), VideoQuality.HD4K)
+    assert set(journals) == {"video", "audio"}
+    journals = svc._load_journals(pdir, ("video", "audio"), VideoQuality.P720)
+    assert set(journals) == {"audio"}  # 音频流与目标清晰度无关，照常续传
+    assert not (pdir / "video.part").exists()
+
+
+def test_codec_policy_discards_rejected_video_parts(tmp_path):
+    svc = _svc(tmp_path)
+    _interrupted_download(tmp_path, svc)  # 未完成的视频流是 avc1
+    pdir = parts_dir(tmp_path, "BV1A", 1)
+    journals = svc._load_journals(pdir, ("video", "audio"), VideoQuality.HD4K, CodecPolicy(require=("avc",)))
+    assert set(journals) == {"video", "audio"}
+    journals = svc._load_journals(pdir, ("video", "audio"), VideoQuality.HD4K, CodecPolicy(require=("hevc",)))
+    assert set(journals) == {"audio"}
+
+
+def _stream_merge(tmp_path, monkeypatch, merge_error):
+    """开启边下载边合成，stream_merge_video_audio 抛出 merge_error。"""
+    svc = _svc(tmp_path)
+    svc.stream_merge = True
+    monkeypatch.setattr("src.services.video.ffmpeg_available", lambda: True)
+    monkeypatch.setattr("src.util.transport.media_get",
+                        lambda url, headers=None, **k: _Resp(b"VVVVVVVV" if "upos-v" in url else b"AAAA", 200))
+    info = VideoInfo(bvid="BV1A", title="测试视频", cid=123)
+    with patch.object(svc, "_fetch_streams", return_value=(info, _dash())), \
+            patch("src.services.video.stream_merge_video_audio", side_effect=merge_error), \
+            patch("src.services.video.merge_video_audio", side_effect=_fake_merge):
+        return svc.download_video_with_audio("BV1A", tmp_path, progress_cb=lambda d, t: None)
+
+
+def test_stream_merge_falls_back_when_resume_gets_no_206(tmp_path, monkeypatch):
+    result = _stream_merge(tmp_path, monkeypatch, StreamResumeError("续传未获 206"))
+    assert result.path.read_bytes() == b"VVVVVVVVAAAA"  # 视频流改用普通模式下载后合成
+    assert not parts_dir(tmp_path, "BV1A", 1).exists()
+
+
+def test_stream_merge_failure_keeps_audio_journal(tmp_path, monkeypatch):
+    with pytest.raises(DownloadError):
+        _stream_merge(tmp_path, monkeypatch, DownloadError("音视频合成失败"))
+    pdir = parts_dir(tmp_path, "BV1A", 1)
+    assert (pdir / "audio.part").read_bytes() == b"AAAA"
+    assert StreamJournal.load(pdir / "audio.part.json").complete  # 下次只需重新拉取视频流
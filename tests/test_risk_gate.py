@@ -1,7 +1,8 @@
 """RiskGate 风控协调器的单元测试。
 
-核心约定：任一线程触发风控后，所有线程在下一次获取信息前各自随机暂停（每个线程
-暂停一次、时长单独计算）；无风控事件时不产生任何暂停。
+核心约定：某个账号触发风控后，使用该账号的线程在下一次获取信息前各自随机暂停（每个线程
+暂停一次、时长单独计算）；无风控事件时不产生任何暂停。风控状态按账号隔离：其余账号不暂停，
+cooldown_remaining() 给出该账号剩余的冷却时间。
 """
 
 import threading
@@ -77,3 +78,14 @@ def test_each_thread_pauses_independently(monkeypatch):
     for t in threads:
         t.join()
     assert len(sleeps) == n  # 每个线程独立暂停一次
+
+
+def test_risk_on_one_account_does_not_pause_others(monkeypatch):
+    gate = RiskGate()
+    sleeps = _patch_sleep(monkeypatch)
+    gate.mark_risk("A")
+    gate.pause_before_fetch(account="B")
+    assert sleeps == []
+    gate.pause_before_fetch(account="A")
+    assert len(sleeps) == 1
+    assert gate.cooldown_remaining("A") > 0 and gate.cooldown_remaining("B") == 0
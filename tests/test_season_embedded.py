@@ -0,0 +1,79 @@
+"""合集下载直接使用 ugc_season 内嵌稿件数据（不逐个请求 view）的单元测试。"""
+
+from types import SimpleNamespace
+
+from src.models.download_model import DashStreams
+from src.models.video_model import VideoSeason
+from src.services import VideoService
+from src.urls.video_urls import VideoUrls
+
+
+def _ugc_season(n=3):
+    return {
+        "id": 77, "title": "合集", "mid": 1, "ep_count": n,
+        "sections": [{"title": "正片", "episodes": [
+            {"bvid": f"BV{i}", "aid": i, "title": f"条目{i}",
+             "arc": {"title": f"稿件{i}", "pic": f"http://i0.hdslb.com/{i}.jpg", "pubdate": 100 + i},
+             "pages": [{"page": p, "cid": i * 10 + p, "part": f"P{p}"} for p in range(1, 2 + (i == 2))]}
+            for i in range(1, n + 1)
+        ]}],
+    }
+
+
+def test_episode_to_video_info_uses_embedded_pages():
+    season = VideoSeason.from_dict(_ugc_season())
+    info = season.episodes[1].to_video_info()
+    assert info.bvid == "BV2" and info.title == "稿件2" and info.pic.endswith("2.jpg")
+    assert [p.cid for p in info.pages] == [21, 22] and info.cid == 21
+    season.episodes[0].pages = []
+    assert season.episodes[0].to_video_info() is None
+
+
+def test_season_download_requests_only_playurl(tmp_path, monkeypatch):
+    calls = []
+
+    def get(url, params=None):
+        calls.append(url)
+        assert url != VideoUrls.VIEW, "合集下载不应再请求 view"
+        return {}
+
+    svc = VideoService.__new__(VideoService)
+    svc.session = SimpleNamespace(get=get)
+    svc.default_dir = tmp_path
+    svc._report_bvid_download = lambda bvid, new_results, dc, i, total: dc
+    playurls = []
+    monkeypatch.setattr(svc, "_request_playurl",
+                        lambda bvid, cid, fnval: playurls.append((bvid, cid)) or DashStreams())
+    monkeypatch.setattr(svc, "_download_single_stream",
+                        lambda bvid, d, kind, **k: svc._fetch_streams(bvid, k["page"], k["info"])
+                        and SimpleNamespace(cached=False))
+
+    season = VideoSeason.from_dict(_ugc_season())
+    svc.download_season(season=season, dir=tmp_path, media_type="audio")
+    assert sorted(playurls) == [("BV1", 11), ("BV2", 21), ("BV2", 22), ("BV3", 31)]
+    assert calls == []
+
+
+def test_fetch_season_by_sid_uses_one_view(monkeypatch):
+    views = []
+    archives = [{"bvid": f"BV{i}", "aid": i, "title": f"稿件{i}"} for i in (1, 2, 3, 4)]
+
+    class FakeArchive:
+        def __init__(self, session):
+            pass
+
+        def get_season_by_sid(self, season_id, mid):
+            return {"meta": {"season_id": 77, "title": "合集", "total": 4}, "archives": archives}
+
+    def get(url, params=None):
+        views.append((url.rsplit("/", 1)[-1], params["bvid"]))
+        if url == VideoUrls.PAGELIST:
+            return [{"page": 1, "cid": 9, "part": "P1"}]
+        return {"bvid": params["bvid"], "pages": [{"page": 1, "cid": 1}], "ugc_season": _ugc_season(3)}
+
+    monkeypatch.setattr("src.services.video.ArchiveService", FakeArchive)
+    svc = VideoService.__new__(VideoService)
+    svc.session = SimpleNamespace(get=get)
+    season = svc.fetch_season(season_id=77)
+    assert [ep.pages[0].cid for ep in season.episodes] == [11, 21, 31, 9]
+    assert views == [("view", "BV1"), ("pagelist", "BV4")]  # BV4 不在内嵌数据中，用 pagelist 补全
@@ -11,6 +11,7 @@
 
 import pytest
 
+from src.models import FavMedia
 from src.services import VideoService
 
 
@@ -37,6 +38,9 @@ class _Episode:
         self.title = "稿件"
         self.pages = [_Page()]
 
+    def to_video_info(self):
+        return None  # 无内嵌数据：按需 fetch_info
+
 
 class _Season:
     def __init__(self):
@@ -67,6 +71,9 @@ def test_download_fav_reuses_external_bvids(tmp_path, monkeypatch):
             calls["get_fav_bv"] += 1
             return ["BV1"]
 
+        def list_fav_medias_of(self, fid, bvids, order):
+            return {}
+
     # download_fav 内部是 `from src.services.fav import FavService`，须 patch 该模块
     monkeypatch.setattr("src.services.fav.FavService", FakeFav)
 
@@ -79,7 +86,7 @@ def test_download_fav_fetches_when_no_bvids(tmp_path, monkeypatch):
     svc = _svc(tmp_path)
     svc.download_all_pages = lambda *a, **k: []
 
-    calls = {"get_fav_bv": 0}
+    calls = {"get_fav_bv": 0, "list_fav_medias_of": 0}
 
     class FakeFav:
         def __init__(self, session):
@@ -92,10 +99,14 @@ def test_download_fav_fetches_when_no_bvids(tmp_path, monkeypatch):
             calls["get_fav_bv"] += 1
             return ["BV1"]
 
+        def list_fav_medias_of(self, fid, bvids, order):
+            calls["list_fav_medias_of"] += 1
+            return {"BV1": FavMedia(bvid="BV1")}
+
     monkeypatch.setattr("src.services.fav.FavService", FakeFav)
 
     svc.download_fav(1, tmp_path, mode="audio")
-    assert calls["get_fav_bv"] == 1  # 内部自动获取一次
+    assert calls == {"get_fav_bv": 1, "list_fav_medias_of": 1}  # 内部获取一次列表，只为待下载的视频补取明细
 
 
 def test_download_up_reuses_external_bvids(tmp_path, monkeypatch):
@@ -159,6 +170,9 @@ class _Episode3:
         self.title = f"稿件{bvid}"
         self.pages = [_Page()]
 
+    def to_video_info(self):
+        return None  # 无内嵌数据：按需 fetch_info
+
 
 class _Season3:
     id = 1
@@ -222,6 +236,9 @@ def test_download_fav_parallel_threads(tmp_path):
         def get_fav_bv(self, fid):
             return ["BV1", "BV2", "BV3"]
 
+        def list_fav_medias_of(self, fid, bvids, order):
+            return {}
+
     monkeypatch = __import__("pytest").MonkeyPatch()
     try:
         monkeypatch.setattr("src.services.fav.FavService", FakeFav)
@@ -233,7 +250,7 @@ def test_download_fav_parallel_threads(tmp_path):
 
 
 def test_download_fav_distributes_across_accounts(tmp_path, monkeypatch):
-    """account_sessions 非空时，并发任务均匀轮询分摊到各账号（BV1/BV3→s1，BV2/BV4→s2）。"""
+    """account_sessions 非空时，并发任务由调度器分摊到各账号（每个任务恰好下载一次，两个账号都分到任务）。"""
     from src.services import VideoService
 
     svc = _svc(tmp_path)
@@ -249,6 +266,9 @@ def test_download_fav_distributes_across_accounts(tmp_path, monkeypatch):
         def get_fav_bv(self, fid):
             return ["BV1", "BV2", "BV3", "BV4"]
 
+        def list_fav_medias_of(self, fid, bvids, order):
+            return {}
+
     monkeypatch.setattr("src.services.fav.FavService", FakeFav)
 
     got = {}
@@ -262,9 +282,8 @@ def test_download_fav_distributes_across_accounts(tmp_path, monkeypatch):
     s1, s2 = object(), object()
     svc.download_fav(1, tmp_path, mode="video", threads=2, account_sessions=[s1, s2])
 
-    # 任务按下标轮询：i%2 → 0,2 走 s1；1,3 走 s2
-    assert sorted(got[id(s1)]) == ["BV1", "BV3"]
-    assert sorted(got[id(s2)]) == ["BV2", "BV4"]
+    assert set(got) == {id(s1), id(s2)}
+    assert sorted(got[id(s1)] + got[id(s2)]) == ["BV1", "BV2", "BV3", "BV4"]
 
 
 def test_download_fav_no_accounts_uses_current(tmp_path, monkeypatch):
@@ -284,6 +303,9 @@ def test_download_fav_no_accounts_uses_current(tmp_path, monkeypatch):
         def get_fav_bv(self, fid):
             return ["BV1", "BV2"]
 
+        def list_fav_medias_of(self, fid, bvids, order):
+            return {}
+
     monkeypatch.setattr("src.services.fav.FavService", FakeFav)
 
     used = []
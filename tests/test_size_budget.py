@@ -0,0 +1,74 @@
+"""体积预算规划（src.util.size_budget）与 VideoService.plan_download 的单元测试。"""
+
+from src.models.download_model import AudioStream, CodecPolicy, DashStreams, VideoQuality, VideoStream
+from src.models.video_model import VideoInfo, VideoPage
+from src.services import VideoService
+from src.util.size_budget import MB, DownloadPlan, PlannedItem, SizeBudget, StreamOption
+
+
+def _item(bvid, *sizes_mb):
+    options = [StreamOption(VideoStream(url=f"{bvid}-{q}", codecs="avc1", quality=q), int(s * MB))
+               for q, s in zip((120, 80, 64, 32), sizes_mb)]
+    return PlannedItem(bvid, 1, bvid, options)
+
+
+def test_per_item_cap_picks_best_quality_that_fits():
+    plan = DownloadPlan([_item("BV1", 900, 400, 200), _item("BV2", 50, 20), _item("BV3", 900, 700)],
+                        SizeBudget.from_mb(per_item_mb=500)).allocate()
+    assert [item.picked.stream.quality for item in plan.items] == [80, 120, 80]  # 都超出时取最小
+    assert plan.total == int((400 + 50 + 700) * MB)
+
+
+def test_total_budget_downgrades_largest_items_first():
+    long_replay, clip = _item("BV1", 15000, 6000, 3000, 1500), _item("BV2", 80, 40)
+    plan = DownloadPlan([long_replay, clip], SizeBudget.from_mb(total_gb=5)).allocate()
+    assert long_replay.picked.stream.quality == 64 and clip.picked.stream.quality == 120  # 短片保持 4K
+    assert not plan.over_budget
+
+    tight = DownloadPlan([_item("BV1", 300, 200)], SizeBudget(total=1)).allocate()
+    assert tight.over_budget and tight.items[0].picked.stream.quality == 80
+
+
+def test_plan_download_reports_and_drives_downloads(tmp_path):
+    svc = VideoService.__new__(VideoService)
+    svc.default_dir = tmp_path
+    (tmp_path / "已下载(BV2).mp4").write_bytes(b"v")
+    info = VideoInfo(bvid="BV1", title="直播回放", pages=[VideoPage(page=1, cid=11)])
+    dash = DashStreams(
+        video=[VideoStream(url="4k", codecs="hev1.1", quality=120, size=900 * MB),
+               VideoStream(url="1080-avc", codecs="avc1.64", quality=80, size=500 * MB),
+               VideoStream(url="1080-hevc", codecs="hev1.1", quality=80, size=300 * MB)],
+        audio=[AudioStream(url="a", codecs="mp4a.40.2", size=20 * MB)],
+    )
+    fetched = []
+
+    def fake_fetch(bvid, page=1, info=None, **k):
+        fetched.append(bvid)
+        return info, dash
+
+    svc._fetch_streams = fake_fetch
+    svc.fetch_pages = lambda bvid: [VideoPage(page=1, cid=22)]
+    plan = svc.plan_download(["BV1", "BV2"], tmp_path, budget=SizeBudget.from_mb(per_item_mb=400),
+                             infos={"BV1": info})
+
+    assert fetched == ["BV1"]  # 本地已有的视频不请求 playurl
+    assert plan.report() == ["[1/2] 直播回放: [1080P hevc] 320.0MB", "[2/2] BV2: 本地已有", "合计 320.0MB"]
+    quality, codec = plan.override("BV1", 1, VideoQuality.HD4K, CodecPolicy(require=("hevc",)))
+    assert quality == VideoQuality.P1080 and dash.pick_video(quality, codec).url == "1080-hevc"
+    # 预取阶段的缓存检查与下载时登记媒体库用同一个版本
+    assert (svc._planned_variant("BV1", 1, "video_with_audio", VideoQuality.HD4K, CodecPolicy(require=("hevc",)), plan)
+            == svc._store_variant("video_with_audio", quality, codec))
+
+    calls = []
+    svc.download_video_with_audio = lambda bvid, dir, *, quality, codec, **k: calls.append((quality, codec))
+    svc._has_local_file = lambda *a: False
+    svc.download_all_pages("BV1", tmp_path, info=info, plan=plan, progress=_Progress())
+    assert calls == [(VideoQuality.P1080, CodecPolicy(prefer=("hevc",)))]
+
+
+class _Progress:
+    def start(self, i, name):
+        pass
+
+    def finish(self):
+        pass
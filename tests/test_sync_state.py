@@ -0,0 +1,159 @@
+"""增量同步状态（src.util.sync_state）与 download_up / download_fav 增量模式的单元测试。"""
+
+from types import SimpleNamespace
+
+from src.services import VideoService
+from src.util.sync_state import KNOWN_LIMIT, KNOWN_RUN, SyncState, SyncStore
+
+
+def test_store_roundtrip_and_corrupt_file(tmp_path):
+    store = SyncStore(tmp_path)
+    assert store.load("up", 1) is None
+    state = SyncState("up", 1).advance(["BV2", "BV1"], high_water=200)
+    store.save(state)
+    store.save(SyncState("fav", 9, ["BV9"]))
+    loaded = store.load("up", 1)
+    assert loaded.bvids == ["BV2", "BV1"] and loaded.high_water == 200
+    assert store.load("fav", 9).bvids == ["BV9"]
+    assert loaded.advance(["BV3", "BV2"], high_water=150).bvids == ["BV3", "BV2", "BV1"]
+
+    store.path.write_text("{broken", encoding="utf-8")
+    assert store.load("up", 1) is None  # 损坏时退化为全量同步
+
+
+def test_known_bvids_are_capped():
+    state = SyncState("fav", 1).advance([f"BV{i}" for i in range(KNOWN_LIMIT + 50)])
+    state = state.advance(["BVnew"])
+    assert len(state.bvids) == KNOWN_LIMIT and state.bvids[:2] == ["BVnew", "BV0"]
+
+
+def test_unseen_skips_refavorited_known_video():
+    old = [f"BV{i}" for i in range(20)]
+    state = SyncState("fav", 1).advance(old)
+    # BV15 取消后重新收藏排到最前，其下才是真正的新收藏；更早的 BVx 已不在保留的记录里
+    order = ["BV15", "BVa", "BVb"] + old[:KNOWN_RUN] + ["BVx"]
+    assert state.unseen(order) == ["BVa", "BVb"]
+    assert SyncState("fav", 1, ["BV1"]).unseen(["BVa", "BV1", "BVx"]) == ["BVa"]
+
+
+def _up_service(tmp_path, monkeypatch, uploads, ps=2):
+    """uploads 为 [(bvid, created)]（新的在前），按每页 ps 个分页返回。"""
+    pages = []
+
+    def get(url, params=None):
+        pages.append(params["pn"])
+        start = (params["pn"] - 1) * ps
+        vlist = [{"bvid": b, "created": c} for b, c in uploads[start:start + ps]]
+        return {"list": {"vlist": vlist}, "page": {"count": len(uploads)}}
+
+    monkeypatch.setattr("src.api.auth.get_wbi", lambda params: params)
+
+    class FakeUser:
+        def __init__(self, session):
+            pass
+
+        def get_name(self, mid):
+            return "测试UP"
+
+    monkeypatch.setattr("src.services.user.UserService", FakeUser)
+    svc = VideoService.__new__(VideoService)
+    svc.session = SimpleNamespace(get=get)
+    svc.default_dir = tmp_path
+    svc._report_bvid_download = lambda bvid, new_results, dc, i, total: dc
+    downloaded = []
+    svc.download_all_pages = lambda bvid, *a, **k: downloaded.append(bvid) or []
+    return svc, pages, downloaded
+
+
+def test_incremental_up_stops_paging_at_first_known_video(tmp_path, monkeypatch):
+    uploads = [("BV3", 300), ("BV2", 200), ("BV1", 100)]
+    svc, pages, downloaded = _up_service(tmp_path, monkeypatch, uploads)
+    svc.download_up(1, tmp_path, incremental=True)
+    assert downloaded == ["BV3", "BV2", "BV1"] and pages == [1, 2]  # 首次同步：全量
+
+    uploads[:0] = [("BV5", 500), ("BV4", 400)]
+    pages.clear(), downloaded.clear()
+    svc.download_up(1, tmp_path, incremental=True)
+    assert downloaded == ["BV5", "BV4"]
+    assert pages == [1, 2]  # 第 2 页遇到 BV3 即停止，不再翻第 3 页
+    state = SyncStore(tmp_path).load("up", 1)
+    assert state.bvids == ["BV5", "BV4", "BV3", "BV2", "BV1"] and state.high_water == 500
+
+    pages.clear(), downloaded.clear()
+    assert svc.download_up(1, tmp_path, incremental=True) == []
+    assert pages == [1] and downloaded == []
+
+
+def test_failed_run_does_not_advance_state(tmp_path, monkeypatch):
+    svc, _, _ = _up_service(tmp_path, monkeypatch, [("BV1", 100)])
+
+    def boom(*a, **k):
+        raise RuntimeError("磁盘已满")
+
+    svc.download_all_pages = boom
+    try:
+        svc.download_up(1, tmp_path, incremental=True)
+    except RuntimeError:
+        pass
+    assert SyncStore(tmp_path).load("up", 1) is None
+
+
+def test_incremental_fav_queues_only_new_bvids(tmp_path, monkeypatch):
+    fav_bvids = ["BV2", "BV1"]
+
+    class FakeFav:
+        def __init__(self, session):
+            pass
+
+        def get_fav_info(self, fid):
+            return SimpleNamespace(title="收藏夹")
+
+        def get_fav_bv(self, fid):
+            return list(fav_bvids)
+
+        def list_fav_medias_of(self, fid, bvids, order):
+            return {}
+
+    monkeypatch.setattr("src.services.fav.FavService", FakeFav)
+    svc = VideoService.__new__(VideoService)
+    svc.session = object()
+    svc.default_dir = tmp_path
+    svc._report_bvid_download = lambda bvid, new_results, dc, i, total: dc
+    downloaded = []
+    svc.download_all_pages = lambda bvid, *a, **k: downloaded.append(bvid) or []
+
+    svc.download_fav(7, tmp_path, incremental=True)
+    fav_bvids.insert(0, "BV3")
+    svc.download_fav(7, tmp_path, incremental=True)
+    assert downloaded == ["BV2", "BV1", "BV3"]
+    assert svc.download_fav(7, tmp_path, incremental=True) == []
+
+
+def test_incremental_fav_stops_at_first_known_bvid(tmp_path, monkeypatch):
+    class FakeFav:
+        def __init__(self, session):
+            pass
+
+        def get_fav_info(self, fid):
+            return SimpleNamespace(title="收藏夹")
+
+        def get_fav_bv(self, fid):
+            return ["BV9", "BV8", "BV5", "BV4", "BV3"]
+
+        def list_fav_medias_of(self, fid, bvids, order):
+            queried.append(list(bvids))
+            return {}
+
+    queried = []
+    monkeypatch.setattr("src.services.fav.FavService", FakeFav)
+    SyncStore(tmp_path).save(SyncState("fav", 7, ["BV5"]))  # 更早的 BV4 / BV3 已不在保留的记录里
+    svc = VideoService.__new__(VideoService)
+    svc.session = object()
+    svc.default_dir = tmp_path
+    svc._report_bvid_download = lambda bvid, new_results, dc, i, total: dc
+    downloaded = []
+    svc.download_all_pages = lambda bvid, *a, **k: downloaded.append(bvid) or []
+
+    svc.download_fav(7, tmp_path, incremental=True)
+    assert downloaded == ["BV9", "BV8"] and queried == [["BV9", "BV8"]]
+    assert SyncStore(tmp_path).load("fav", 7).bvids == ["BV9", "BV8", "BV5"]
@@ -0,0 +1,65 @@
+"""共享下载连接池（src.util.transport）的单元测试：单例、只增不减的扩容、不保存 cookie、连接复用。"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.util import transport
+from src.util.downloader import download_stream
+
+
+@pytest.fixture(autouse=True)
+def _fresh_transport(monkeypatch):
+    """每个用例使用全新的单例，互不影响。"""
+    monkeypatch.setattr(transport, "_session", None)
+    monkeypatch.setattr(transport, "_pool_size", 0)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    peers: set = set()
+
+    def do_GET(self):
+        type(self).peers.add(self.client_address)
+        body = b"x" * 1024
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "buvid3=leak; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.peers = set()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_singleton_and_pool_only_grows():
+    s1 = transport.media_session()
+    assert transport._pool_size == transport._DEFAULT_POOL_SIZE
+    transport.ensure_pool_size(32)
+    assert transport.media_session() is s1
+    assert s1.get_adapter("https://upos-sz-mirrorcos.bilivideo.com/")._pool_maxsize == 32
+    transport.ensure_pool_size(4)  # 不缩容
+    assert transport._pool_size == 32
+
+
+def test_downloads_reuse_one_connection(server, tmp_path):
+    for i in range(5):
+        assert download_stream(f"{server}/img{i}.png", tmp_path / f"{i}.png") == 1024
+    assert len(_Handler.peers) == 1  # 5 个文件共用同一条 TCP 连接
+
+
+def test_response_cookies_not_shared(server, tmp_path):
+    download_stream(f"{server}/a.png", tmp_path / "a.png", headers={"Cookie": "SESSDATA=acc1"})
+    assert len(transport.media_session().cookies) == 0  # Set-Cookie 不落入共享 jar，避免串号
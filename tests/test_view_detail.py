@@ -0,0 +1,78 @@
+"""view/detail 一次请求获取信息 + 标签 + UP 主粉丝数的单元测试。"""
+
+from types import SimpleNamespace
+
+from src.api.errors import BiliAPIError
+from src.models.history_model import HistoryItem
+from src.models.video_model import VideoInfo
+from src.services import VideoService
+from src.services.history import HistoryService
+from src.urls.video_urls import VideoUrls
+from src.util.pacing import Pacer
+
+
+def _detail(bvid):
+    return {
+        "View": {"bvid": bvid, "title": f"标题{bvid}", "tid": 3, "pubdate": 10,
+                 "stat": {"view": 100, "like": 5}, "owner": {"mid": 1, "name": "UP"},
+                 "pages": [{"page": 1, "cid": 11}]},
+        "Tags": [{"tag_name": "音乐"}, {"tag_name": "VOCALOID"}],
+        "Card": {"card": {"mid": 1, "fans": 999}, "follower": 1000, "following": True},
+    }
+
+
+def test_from_detail_json_fills_tags_and_followers():
+    info = VideoInfo.from_detail_json(_detail("BV1"))
+    assert info.title == "标题BV1" and info.cid == 11
+    assert info.tags == ["音乐", "VOCALOID"]
+    assert info.owner.num_followers == 1000 and info.owner.is_followed is True
+    data = _detail("BV1")
+    del data["Card"]["follower"]
+    assert VideoInfo.from_detail_json(data).owner.num_followers == 999
+
+
+def _service():
+    calls = []
+
+    def get(url, params=None):
+        calls.append(url)
+        if params["bvid"] == "BV404":
+            raise BiliAPIError(-404, "不存在")
+        return _detail(params["bvid"])
+
+    svc = VideoService.__new__(VideoService)
+    svc.session = SimpleNamespace(get=get)
+    return svc, calls
+
+
+def test_info_with_tags_is_one_request_and_seeds_view_cache():
+    svc, calls = _service()
+    info = svc.fetch_info_with_tags("BV1")
+    info.tags.append("改写")
+    assert svc.fetch_info_with_tags("BV1").tags == ["音乐", "VOCALOID"]
+    assert svc.fetch_info("BV1").title == "标题BV1"
+    assert calls == [VideoUrls.VIEW_DETAIL]
+
+
+def test_history_fill_video_details():
+    svc, calls = _service()
+    items = [HistoryItem(business="archive", bvid="BV1"), HistoryItem(business="live"),
+             HistoryItem(business="archive", bvid="BV404")]
+    HistoryService(session=object(), pacer=Pacer(rate=1000, max_rate=1000)).fill_video_details(
+        items, video_service=svc)
+    assert items[0].up_followers == 1000 and items[0].tags == "音乐,VOCALOID"
+    assert items[0].num_view == 100 and items[0].up_name == "UP"
+    assert not hasattr(items[1], "num_view") and not hasattr(items[2], "num_view")
+    assert calls == [VideoUrls.VIEW_DETAIL, VideoUrls.VIEW_DETAIL]
+
+
+def test_history_export_fetches_details_only_when_asked(tmp_path, monkeypatch):
+    history = HistoryService(session=object(), pacer=Pacer(rate=1000, max_rate=1000))
+    filled = []
+    monkeypatch.setattr(history, "fill_video_details", lambda items, video_service=None: filled.extend(items))
+    items = [HistoryItem(business="archive", bvid="BV1")]
+
+    df = history.save_video_history_df(items, detailed_info=True, save_path=tmp_path, add_df=False)
+    assert filled == [] and list(df["bv"]) == ["BV1"]  # 导出本身不发请求
+    history.save_video_history_df(items, detailed_info=True, fetch_details=True, save_path=tmp_path)
+    assert filled == items